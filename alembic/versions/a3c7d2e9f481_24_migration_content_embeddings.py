@@ -0,0 +1,37 @@
+"""24_migration_content_embeddings
+
+Revision ID: a3c7d2e9f481
+Revises: e5b0c8f2a613
+Create Date: 2026-10-16 19:20:41.318502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c7d2e9f481"
+down_revision: Union[str, Sequence[str], None] = "e5b0c8f2a613"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Content-addressed embedding store: lookups are by primary key only,
+    # so no vector index is needed
+    op.create_table(
+        "content_embeddings",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("content_hash"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("content_embeddings")
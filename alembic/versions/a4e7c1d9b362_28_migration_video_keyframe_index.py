@@ -0,0 +1,27 @@
+"""28_migration_video_keyframe_index
+
+Revision ID: a4e7c1d9b362
+Revises: d9a3e6b1f257
+Create Date: 2026-10-17 10:12:48.306154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a4e7c1d9b362"
+down_revision: Union[str, Sequence[str], None] = "d9a3e6b1f257"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("videos", sa.Column("keyframe_index_key", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("videos", "keyframe_index_key")
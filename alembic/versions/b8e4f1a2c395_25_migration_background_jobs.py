@@ -0,0 +1,72 @@
+"""25_migration_background_jobs
+
+Revision ID: b8e4f1a2c395
+Revises: a3c7d2e9f481
+Create Date: 2026-10-16 19:52:08.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f1a2c395"
+down_revision: Union[str, Sequence[str], None] = "a3c7d2e9f481"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("idempotency_key", sa.String(), nullable=True),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Claim query: next due queued jobs of a kind
+    op.create_index(
+        "idx_background_jobs_claim",
+        "background_jobs",
+        ["kind", "status", "run_after"],
+        unique=False,
+    )
+    # Lease recovery scans running jobs by heartbeat
+    op.create_index(
+        "idx_background_jobs_running",
+        "background_jobs",
+        ["locked_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'running'"),
+    )
+    # Idempotency: one pending job per key; finished jobs don't block reruns
+    op.create_index(
+        "uq_background_jobs_pending_key",
+        "background_jobs",
+        ["idempotency_key"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_background_jobs_pending_key", table_name="background_jobs")
+    op.drop_index("idx_background_jobs_running", table_name="background_jobs")
+    op.drop_index("idx_background_jobs_claim", table_name="background_jobs")
+    op.drop_table("background_jobs")
@@ -0,0 +1,35 @@
+"""26_migration_background_job_groups
+
+Revision ID: c2f9a7d4e816
+Revises: b8e4f1a2c395
+Create Date: 2026-10-16 20:31:55.172093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c2f9a7d4e816"
+down_revision: Union[str, Sequence[str], None] = "b8e4f1a2c395"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("background_jobs", sa.Column("group_key", sa.String(), nullable=True))
+    # Per-group progress (e.g. one assignment's grading batch)
+    op.create_index(
+        "idx_background_jobs_group",
+        "background_jobs",
+        ["kind", "group_key", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_background_jobs_group", table_name="background_jobs")
+    op.drop_column("background_jobs", "group_key")
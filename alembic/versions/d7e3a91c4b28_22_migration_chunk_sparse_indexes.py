@@ -0,0 +1,61 @@
+"""22_migration_chunk_sparse_indexes
+
+Revision ID: d7e3a91c4b28
+Revises: b113c0df09ae
+Create Date: 2026-10-16 10:12:44.318202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e3a91c4b28"
+down_revision: Union[str, Sequence[str], None] = "b113c0df09ae"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chunk_sparse_indexes",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("video_id", sa.String(), nullable=True),
+        sa.Column("course_material_id", sa.String(), nullable=True),
+        sa.Column("num_docs", sa.Integer(), nullable=False),
+        sa.Column("avg_doc_len", sa.Float(), nullable=False),
+        sa.Column("index_data", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["course_material_id"], ["course_materials.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_chunk_sparse_indexes_video_id"),
+        "chunk_sparse_indexes",
+        ["video_id"],
+        unique=True,
+    )
+    op.create_index(
+        op.f("ix_chunk_sparse_indexes_course_material_id"),
+        "chunk_sparse_indexes",
+        ["course_material_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_chunk_sparse_indexes_course_material_id"),
+        table_name="chunk_sparse_indexes",
+    )
+    op.drop_index(
+        op.f("ix_chunk_sparse_indexes_video_id"), table_name="chunk_sparse_indexes"
+    )
+    op.drop_table("chunk_sparse_indexes")
@@ -0,0 +1,31 @@
+"""27_migration_background_job_results
+
+Revision ID: d9a3e6b1f257
+Revises: c2f9a7d4e816
+Create Date: 2026-10-16 22:04:37.519826
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "d9a3e6b1f257"
+down_revision: Union[str, Sequence[str], None] = "c2f9a7d4e816"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "background_jobs",
+        sa.Column("result", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("background_jobs", "result")
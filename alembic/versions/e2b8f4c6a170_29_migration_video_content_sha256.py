@@ -0,0 +1,27 @@
+"""29_migration_video_content_sha256
+
+Revision ID: e2b8f4c6a170
+Revises: a4e7c1d9b362
+Create Date: 2026-10-17 16:40:21.518237
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b8f4c6a170"
+down_revision: Union[str, Sequence[str], None] = "a4e7c1d9b362"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("videos", sa.Column("content_sha256", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("videos", "content_sha256")
@@ -0,0 +1,68 @@
+"""23_migration_hnsw_chunk_indexes
+
+Revision ID: e5b0c8f2a613
+Revises: d7e3a91c4b28
+Create Date: 2026-10-16 15:40:12.907114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b0c8f2a613"
+down_revision: Union[str, Sequence[str], None] = "d7e3a91c4b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Replace the IVFFlat index from migration 16 (lists were fixed at 100
+    # when the table was nearly empty) with HNSW, which needs no training
+    # data and keeps recall as chunks are added. Names match
+    # services/ann_index.py so rebuild_vector_indexes can manage them.
+    op.execute("DROP INDEX IF EXISTS idx_transcript_chunks_embedding_cosine")
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcript_chunks_embedding_ann
+        ON transcript_chunks
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """
+    )
+
+    # material_chunks had no ANN index at all
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_material_chunks_embedding_ann
+        ON material_chunks
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """
+    )
+
+    # Per-material chunk loads filter by material and order by chunk_index
+    op.create_index(
+        "idx_material_chunks_material_chunk",
+        "material_chunks",
+        ["course_material_id", "chunk_index"],
+        unique=False,
+        postgresql_using="btree",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_material_chunks_material_chunk", table_name="material_chunks")
+    op.execute("DROP INDEX IF EXISTS idx_material_chunks_embedding_ann")
+    op.execute("DROP INDEX IF EXISTS idx_transcript_chunks_embedding_ann")
+    op.execute(
+        """
+        CREATE INDEX idx_transcript_chunks_embedding_cosine
+        ON transcript_chunks
+        USING ivfflat (embedding vector_cosine_ops)
+        WITH (lists = 100)
+    """
+    )
@@ -0,0 +1,36 @@
+"""30_migration_background_job_batches
+
+Revision ID: f6c1a8e3d947
+Revises: e2b8f4c6a170
+Create Date: 2026-10-17 18:12:47.306915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f6c1a8e3d947"
+down_revision: Union[str, Sequence[str], None] = "e2b8f4c6a170"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("background_jobs", sa.Column("batch_id", sa.String(), nullable=True))
+    # Existing batches were identified by their shared created_at
+    op.execute(
+        "UPDATE background_jobs SET batch_id = "
+        "md5(kind || ':' || coalesce(group_key, id) || ':' || created_at::text)"
+    )
+    op.create_index(
+        "idx_background_jobs_batch", "background_jobs", ["batch_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_background_jobs_batch", table_name="background_jobs")
+    op.drop_column("background_jobs", "batch_id")
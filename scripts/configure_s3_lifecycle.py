@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Add an AbortIncompleteMultipartUpload lifecycle rule to the S3 bucket.
+
+Video uploads are S3 multipart uploads (src/utils/s3_multipart.py). The
+server aborts the ones it sees fail, but a crashed API process or a browser
+that abandons a direct upload leaves parts behind, which S3 keeps (and
+bills) until the upload is aborted. This rule has S3 abort them after
+S3_ABORT_INCOMPLETE_UPLOAD_DAYS days. Other lifecycle rules on the bucket
+are kept.
+"""
+
+import boto3
+import os
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
+AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+AWS_REGION = os.getenv("AWS_REGION", "us-west-1")
+BUCKET_NAME = os.getenv("AWS_S3_BUCKET", "uservideodownloads980")
+# Longer than S3_PRESIGNED_PART_EXPIRES_SECONDS, so no live upload is cut off
+ABORT_AFTER_DAYS = int(os.getenv("S3_ABORT_INCOMPLETE_UPLOAD_DAYS", "1"))
+RULE_ID = "abort-incomplete-multipart-uploads"
+
+
+def configure_s3_lifecycle():
+    """Add (or update) the abort rule, keeping the bucket's other rules."""
+
+    print(f"Configuring lifecycle for bucket: {BUCKET_NAME}")
+    print(f"Region: {AWS_REGION}")
+
+    s3_client = boto3.client(
+        "s3",
+        aws_access_key_id=AWS_ACCESS_KEY,
+        aws_secret_access_key=AWS_SECRET_KEY,
+        region_name=AWS_REGION,
+    )
+
+    try:
+        try:
+            rules = s3_client.get_bucket_lifecycle_configuration(Bucket=BUCKET_NAME)[
+                "Rules"
+            ]
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchLifecycleConfiguration":
+                raise
+            rules = []
+
+        # put_bucket_lifecycle_configuration replaces the whole configuration
+        rules = [rule for rule in rules if rule.get("ID") != RULE_ID]
+        rules.append(
+            {
+                "ID": RULE_ID,
+                "Filter": {"Prefix": ""},
+                "Status": "Enabled",
+                "AbortIncompleteMultipartUpload": {
+                    "DaysAfterInitiation": ABORT_AFTER_DAYS
+                },
+            }
+        )
+        s3_client.put_bucket_lifecycle_configuration(
+            Bucket=BUCKET_NAME, LifecycleConfiguration={"Rules": rules}
+        )
+        print("✅ Lifecycle configuration applied successfully!")
+
+        response = s3_client.get_bucket_lifecycle_configuration(Bucket=BUCKET_NAME)
+        print("\n📋 Current lifecycle rules:")
+        for rule in response["Rules"]:
+            print(f"  {rule.get('ID')}: {rule.get('Status')}")
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Error configuring lifecycle: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("S3 Lifecycle Configuration Script")
+    print("=" * 60)
+    print()
+
+    success = configure_s3_lifecycle()
+
+    print()
+    if success:
+        print(
+            f"✅ Incomplete multipart uploads are now aborted after {ABORT_AFTER_DAYS} day(s)."
+        )
+    else:
+        print("❌ Lifecycle configuration failed!")
+        print("   Please check your AWS credentials and bucket permissions.")
+    print("=" * 60)
@@ -38,7 +38,9 @@ def configure_s3_cors():
         "CORSRules": [
             {
                 "AllowedHeaders": ["*"],
-                "AllowedMethods": ["GET", "HEAD"],
+                # PUT: browsers upload video parts straight to S3 through
+                # presigned URLs (and read the ETag header of each response)
+                "AllowedMethods": ["GET", "HEAD", "PUT"],
                 "AllowedOrigins": [
                     "http://localhost:3000",
                     "http://localhost:3001",
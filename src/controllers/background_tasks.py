@@ -1,5 +1,4 @@
 import os
-import threading
 from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 from utils.db import SessionLocal
@@ -373,8 +372,13 @@ def format_uploaded_transcript_background(
 
 def grade_submission_background(
     assignment_id: str, submission_id: str, options: Optional[Dict[str, Any]] = None
-):
-    """Grade a single submission in the background."""
+) -> Optional[Dict[str, Any]]:
+    """Grade a single submission in the background.
+
+    Returns:
+        {"usage": ...} LLM token usage incl. prompt cache hits, stored as the
+        job result (summed per batch by job_queue.batch_progress)
+    """
     logger.info(f"Starting background grading for submission {submission_id}")
     db = SessionLocal()
     try:
@@ -472,6 +476,7 @@ def grade_submission_background(
         logger.info(
             f"Successfully graded submission {submission_id}: {total_score}/{total_points}"
         )
+        return {"usage": grader.usage}
 
     except Exception as e:
         logger.error(f"Error grading submission {submission_id}: {str(e)}")
@@ -501,16 +506,33 @@ def queue_batch_grading(
     # Convert options to dict if it's a Pydantic model
     options_dict = options.dict() if hasattr(options, "dict") else (options or {})
 
-    # Start grading each submission in a separate thread
-    for sub_id in submission_ids:
-        thread = threading.Thread(
-            target=grade_submission_background,
-            args=(assignment_id, sub_id, options_dict),
-            daemon=True,
+    # One durable grade job per submission; the grade worker pool
+    # (JOB_CONCURRENCY_GRADE) bounds how many run at once
+    from services.job_queue import enqueue_jobs
+
+    # Grouped by assignment, so workers interleave concurrent batches
+    db = SessionLocal()
+    try:
+        enqueue_jobs(
+            db,
+            "grade",
+            [
+                (
+                    {
+                        "assignment_id": assignment_id,
+                        "submission_id": sub_id,
+                        "options": options_dict,
+                    },
+                    f"grade:{sub_id}",
+                )
+                for sub_id in submission_ids
+            ],
+            group_key=assignment_id,
         )
-        thread.start()
+    finally:
+        db.close()
 
-    logger.info(f"Started {len(submission_ids)} grading threads")
+    logger.info(f"Queued {len(submission_ids)} grading jobs")
 
 
 def generate_summary_background(video_id: str, transcript: str):
@@ -630,7 +652,11 @@ def chunk_pdf_material_background(material_id: str, s3_key: str) -> None:
 
     Updates CourseMaterial.chunking_status to "processing" / "completed" / "failed".
     """
-    from services.chunking_embedding_service import SemanticChunker, EmbeddingService
+    from services.chunk_writer import replace_chunks
+    from services.chunking_embedding_service import SemanticChunker
+    from services.embedding_store import embed_with_store
+    from services.sparse_index import store_sparse_index
+    from utils.cache import invalidate_material_cache
 
     logger.info(f"Starting PDF chunking for material {material_id}")
     db = SessionLocal()
@@ -692,30 +718,33 @@ def chunk_pdf_material_background(material_id: str, s3_key: str) -> None:
             db.commit()
             return
 
-        # Embed all chunks in batch
-        embedder = EmbeddingService()
-        embeddings = embedder.embed_batch([c["text"] for c in all_chunks])
-
-        # Clear any stale chunks and insert new ones
-        db.query(MaterialChunk).filter(
-            MaterialChunk.course_material_id == material_id
-        ).delete(synchronize_session=False)
-
-        for idx, (chunk, embedding) in enumerate(zip(all_chunks, embeddings)):
-            db.add(
-                MaterialChunk(
-                    course_material_id=material_id,
-                    chunk_index=idx,
-                    text=chunk["text"],
-                    page_number=chunk["page_number"],
-                    word_count=chunk["word_count"],
-                    embedding=embedding,
-                )
-            )
+        # Embed all chunks; unchanged texts reuse their stored embeddings
+        embeddings = embed_with_store(db, [c["text"] for c in all_chunks])
+
+        # Swap stale chunks for the new ones in one bulk write
+        replace_chunks(
+            db,
+            MaterialChunk,
+            [
+                {
+                    "chunk_index": idx,
+                    "text": chunk["text"],
+                    "page_number": chunk["page_number"],
+                    "word_count": chunk["word_count"],
+                    "embedding": embedding,
+                }
+                for idx, (chunk, embedding) in enumerate(zip(all_chunks, embeddings))
+            ],
+            course_material_id=material_id,
+        )
+
+        # Corpus-wide BM25 index, replaced in the same transaction
+        store_sparse_index(db, [c["text"] for c in all_chunks], material_id=material_id)
 
         material.chunking_status = "completed"
         material.updated_at = datetime.now(timezone.utc)
         db.commit()
+        invalidate_material_cache(material_id)
         logger.info(
             f"Chunking completed for material {material_id}: {len(all_chunks)} chunks"
         )
@@ -738,6 +767,17 @@ def chunk_pdf_material_background(material_id: str, s3_key: str) -> None:
         db.close()
 
 
+def chunk_material_background(material_id: str, s3_key: Optional[str] = None) -> None:
+    """
+    Job handler for "chunk" jobs: PDF/DOCX materials pass their s3_key,
+    directly-uploaded course videos chunk their stored transcript.
+    """
+    if s3_key:
+        chunk_pdf_material_background(material_id, s3_key)
+    else:
+        chunk_video_material_transcript_background(material_id)
+
+
 def chunk_video_material_transcript_background(material_id: str) -> None:
     """
     Background job: chunk + embed the transcript_text of a directly-uploaded
@@ -750,7 +790,11 @@ def chunk_video_material_transcript_background(material_id: str) -> None:
 
     Updates CourseMaterial.chunking_status to "processing" / "completed" / "failed".
     """
-    from services.chunking_embedding_service import SemanticChunker, EmbeddingService
+    from services.chunk_writer import replace_chunks
+    from services.chunking_embedding_service import SemanticChunker
+    from services.embedding_store import embed_with_store
+    from services.sparse_index import store_sparse_index
+    from utils.cache import invalidate_material_cache
 
     logger.info(f"Starting video-transcript chunking for material {material_id}")
     db = SessionLocal()
@@ -801,31 +845,37 @@ def chunk_video_material_transcript_background(material_id: str) -> None:
             db.commit()
             return
 
-        embedder = EmbeddingService()
-        embeddings = embedder.embed_batch([c["text"] for c in timed_chunks])
-
-        # Clear any stale chunks and insert new ones
-        db.query(MaterialChunk).filter(
-            MaterialChunk.course_material_id == material_id
-        ).delete(synchronize_session=False)
-
-        for idx, (chunk, embedding) in enumerate(zip(timed_chunks, embeddings)):
-            db.add(
-                MaterialChunk(
-                    course_material_id=material_id,
-                    chunk_index=idx,
-                    text=chunk["text"],
-                    page_number=None,  # No page concept for video transcripts
-                    start_seconds=chunk.get("start_seconds"),
-                    end_seconds=chunk.get("end_seconds"),
-                    word_count=chunk["word_count"],
-                    embedding=embedding,
-                )
-            )
+        # Unchanged chunk texts reuse their stored embeddings
+        embeddings = embed_with_store(db, [c["text"] for c in timed_chunks])
+
+        # Swap stale chunks for the new ones in one bulk write
+        replace_chunks(
+            db,
+            MaterialChunk,
+            [
+                {
+                    "chunk_index": idx,
+                    "text": chunk["text"],
+                    "page_number": None,  # No page concept for video transcripts
+                    "start_seconds": chunk.get("start_seconds"),
+                    "end_seconds": chunk.get("end_seconds"),
+                    "word_count": chunk["word_count"],
+                    "embedding": embedding,
+                }
+                for idx, (chunk, embedding) in enumerate(zip(timed_chunks, embeddings))
+            ],
+            course_material_id=material_id,
+        )
+
+        # Corpus-wide BM25 index, replaced in the same transaction
+        store_sparse_index(
+            db, [c["text"] for c in timed_chunks], material_id=material_id
+        )
 
         material.chunking_status = "completed"
         material.updated_at = datetime.now(timezone.utc)
         db.commit()
+        invalidate_material_cache(material_id)
         logger.info(
             f"Video-transcript chunking completed for {material_id}: "
             f"{len(timed_chunks)} chunks "
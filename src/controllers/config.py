@@ -80,9 +80,10 @@ for path in [video_path, frames_path, output_path]:
     os.makedirs(path, exist_ok=True)
 
 
-# Thread executors
+# Thread executors, only for work tied to this node's disk (YouTube
+# downloads into video_path, buffered uploads in /tmp). Everything else runs
+# as durable jobs (services.job_queue).
 download_executor = ThreadPoolExecutor(max_workers=3)
-formatting_executor = ThreadPoolExecutor(max_workers=3)
 upload_executor = ThreadPoolExecutor(max_workers=3)
 
 
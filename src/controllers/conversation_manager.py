@@ -141,15 +141,36 @@ def get_merged_conversation_history(
         # OPTIMIZED: Only load chat_sessions column (not entire Video row)
         # Reduces load time from 80-180ms to 15-30ms
         result = db.query(Video.chat_sessions).filter(Video.id == video_id).first()
+        return history_from_chat_sessions(
+            result[0] if result else None, video_id, firebase_uid, session_id
+        )
+
+    except Exception as e:
+        logger.error(f"Error retrieving conversation history: {e}")
+        # Return empty list on error - do NOT use client history
+        return []
+
+
+def history_from_chat_sessions(
+    chat_sessions: Optional[List[Dict[str, Any]]],
+    video_id: str,
+    firebase_uid: str,
+    session_id: Optional[str],
+) -> List[Dict[str, Any]]:
+    """
+    Conversation history from an already-loaded Video.chat_sessions value
+    (e.g. from load_video_chat_context), without another query.
 
-        if not result or not result[0]:
+    Returns:
+        List[Dict]: Conversation history in OpenAI message format (last 20 messages)
+    """
+    try:
+        if not chat_sessions:
             logger.info(
                 f"No chat sessions found for video {video_id}, returning empty history"
             )
             return []  # Return empty list, ignore client history
 
-        chat_sessions = result[0]
-
         # Find the active session
         active_session = None
         if session_id:
@@ -1,7 +1,9 @@
 import os
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
-from models import Video
+from models import Video, VideoSummary, TranscriptChunk
 from .config import s3_client, AWS_S3_BUCKET, logger
 from .storage import s3_presign_url, s3_client
 
@@ -122,6 +124,74 @@ def get_transcript_cache(db: Session, video_id: str) -> dict:
     return {}
 
 
+@dataclass
+class VideoChatContext:
+    """Everything a video chat turn reads about the video, loaded at once."""
+
+    video_id: str
+    found: bool = False
+    title: str = ""
+    source_type: Optional[str] = None
+    # Formatted transcript if formatting completed, else the raw transcript
+    transcript: Optional[str] = None
+    chat_sessions: List[Dict[str, Any]] = field(default_factory=list)
+    # Completed summary in SummaryService.get_summary's shape, else None
+    summary: Optional[Dict[str, Any]] = None
+    has_chunks: bool = False
+
+
+def load_video_chat_context(db: Session, video_id: str) -> VideoChatContext:
+    """
+    Load the video row's chat columns, its summary and whether it has
+    chunks in a single round trip (LEFT JOIN + EXISTS), replacing separate
+    get_formatting_status / get_transcript_cache / get_summary / count()
+    queries per chat turn.
+    """
+    has_chunks = exists().where(TranscriptChunk.video_id == Video.id)
+    row = (
+        db.query(
+            Video.title,
+            Video.source_type,
+            Video.formatting_status,
+            Video.transcript_text,
+            Video.chat_sessions,
+            VideoSummary.processing_status,
+            VideoSummary.overview_summary,
+            VideoSummary.sections,
+            VideoSummary.key_topics,
+            has_chunks.label("has_chunks"),
+        )
+        .outerjoin(VideoSummary, VideoSummary.video_id == Video.id)
+        .filter(Video.id == video_id)
+        .first()
+    )
+
+    context = VideoChatContext(video_id=video_id)
+    if row is None:
+        return context
+
+    context.found = True
+    context.title = row.title or ""
+    context.source_type = row.source_type
+    context.chat_sessions = row.chat_sessions or []
+    context.has_chunks = bool(row.has_chunks)
+
+    formatting = row.formatting_status or {}
+    if formatting.get("status") == "completed":
+        context.transcript = formatting.get("formatted_transcript")
+    if not context.transcript:
+        context.transcript = row.transcript_text or None
+
+    if row.processing_status == "completed":
+        context.summary = {
+            "overview": row.overview_summary,
+            "sections": row.sections,
+            "key_topics": row.key_topics,
+            "video_id": video_id,
+        }
+    return context
+
+
 def update_transcript_cache(
     db: Session, video_id: str, transcript_data: str, json_data: dict
 ):
@@ -134,6 +204,12 @@ def update_transcript_cache(
     db.commit()
 
 
+def get_keyframe_index_key(db: Session, video_id: str) -> Optional[str]:
+    """S3 key of the video's keyframe index (utils/keyframe_index.py), if built."""
+    row = db.query(Video.keyframe_index_key).filter(Video.id == video_id).first()
+    return row[0] if row else None
+
+
 def get_video_path(db: Session, video_id: str) -> Optional[str]:
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
@@ -1,12 +1,98 @@
-import cv2
+import csv
 import os
 import mimetypes
+import shutil
 import subprocess
 import tempfile
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 from fastapi import HTTPException
 from .config import s3_client, AWS_S3_BUCKET, deepgram_client, logger
 
+# Long local media is split into chunks of TRANSCRIBE_CHUNK_SECONDS that are
+# transcribed TRANSCRIBE_CHUNK_CONCURRENCY at a time
+TRANSCRIBE_CHUNK_SECONDS = int(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "600"))
+TRANSCRIBE_CHUNK_MIN_SECONDS = int(
+    os.getenv("TRANSCRIBE_CHUNK_MIN_SECONDS", str(12 * 60))
+)
+TRANSCRIBE_CHUNK_CONCURRENCY = int(os.getenv("TRANSCRIBE_CHUNK_CONCURRENCY", "4"))
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    """
+    How audio is encoded for transcription uploads.
+
+    Args:
+        name: TRANSCRIBE_AUDIO_CODEC value
+        suffix: File extension (also picks the ffmpeg muxer)
+        mimetype: Sent with the upload
+        codec_args: ffmpeg encoder arguments
+    """
+
+    name: str
+    suffix: str
+    mimetype: str
+    codec_args: Tuple[str, ...]
+
+
+# Mono 16 kHz speech: PCM WAV is ~115 MB/hour, FLAC (lossless) roughly half
+# that, Opus at 24 kbit/s ~11 MB/hour. Deepgram and OpenAI accept all three;
+# management_commands.benchmark_transcription_audio compares their size,
+# upload time and word error rate.
+AUDIO_PROFILES: Dict[str, AudioProfile] = {
+    profile.name: profile
+    for profile in (
+        AudioProfile("wav", ".wav", "audio/wav", ("-acodec", "pcm_s16le")),
+        AudioProfile("flac", ".flac", "audio/flac", ("-acodec", "flac")),
+        AudioProfile(
+            "opus",
+            ".ogg",
+            "audio/ogg",
+            ("-acodec", "libopus", "-b:a", "24k", "-application", "voip"),
+        ),
+    )
+}
+TRANSCRIBE_AUDIO_CODEC = os.getenv("TRANSCRIBE_AUDIO_CODEC", "opus")
+VIDEO_SUFFIXES = (".mp4", ".mov", ".mkv", ".webm", ".avi")
+
+
+def _media_suffix(source: str) -> str:
+    """Lower-case extension of a local path or URL (query string ignored)."""
+    return os.path.splitext(urlparse(source).path)[1].lower()
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _is_video_source(source: str) -> bool:
+    """
+    Whether audio has to be extracted from source before transcription.
+
+    URLs are uploaded videos stored under the client's filename, whatever
+    its extension (.m4v, .mpeg or none), so they always count as video.
+    """
+    return _is_url(source) or _media_suffix(source) in VIDEO_SUFFIXES
+
+
+def _require_local(source_path: str, source: str) -> str:
+    """source_path, unless audio extraction failed and it's still a URL."""
+    if _is_url(source_path):
+        raise Exception(f"Could not extract audio from {urlparse(source).path}")
+    return source_path
+
+
+def audio_profile(name: Optional[str] = None) -> AudioProfile:
+    """The named profile (default TRANSCRIBE_AUDIO_CODEC; unknown names -> wav)."""
+    name = name or TRANSCRIBE_AUDIO_CODEC
+    if name not in AUDIO_PROFILES:
+        logger.warning(f"Unknown audio codec profile {name!r}, using wav")
+        name = "wav"
+    return AUDIO_PROFILES[name]
+
 
 def s3_upload_file(
     local_path: str, bucket_key: str, content_type: Optional[str] = None
@@ -19,6 +105,15 @@ def s3_upload_file(
     s3_client.upload_file(local_path, AWS_S3_BUCKET, bucket_key, ExtraArgs=extra_args)
 
 
+def s3_upload_bytes(data: bytes, bucket_key: str, content_type: Optional[str] = None):
+    if not s3_client or not AWS_S3_BUCKET:
+        raise HTTPException(status_code=500, detail="S3 is not configured")
+    extra_args = {"ACL": "private"}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    s3_client.put_object(Bucket=AWS_S3_BUCKET, Key=bucket_key, Body=data, **extra_args)
+
+
 def s3_presign_url(bucket_key: str, expires_in: int = 3600) -> str:
     if not s3_client or not AWS_S3_BUCKET:
         raise HTTPException(status_code=500, detail="S3 is not configured")
@@ -42,6 +137,8 @@ def generate_thumbnail(
     input_video_path: str, output_image_path: str, ts_seconds: float = 1.0
 ) -> bool:
     try:
+        import cv2  # Deferred: OpenCV is slow to import
+
         cap = cv2.VideoCapture(input_video_path)
         fps = cap.get(cv2.CAP_PROP_FPS) or 24
         frame_number = int(ts_seconds * fps)
@@ -61,11 +158,22 @@ def generate_thumbnail(
 
 
 def transcribe_video_with_openai(local_video_path: str) -> str:
+    """
+    Transcribe a local file or media URL with OpenAI. Videos are sent as
+    audio only, encoded with the TRANSCRIBE_AUDIO_CODEC profile.
+    """
+    temp_audio_path: Optional[str] = None
     try:
         from openai import OpenAI
 
+        source_path = local_video_path
+        if _is_video_source(local_video_path):
+            temp_audio_path = _extract_audio_with_ffmpeg(local_video_path)
+            if temp_audio_path:
+                source_path = temp_audio_path
+
         client = OpenAI()
-        with open(local_video_path, "rb") as f:
+        with open(_require_local(source_path, local_video_path), "rb") as f:
             transcript = client.audio.transcriptions.create(model="whisper-1", file=f)
         text = getattr(transcript, "text", None)
         if isinstance(transcript, dict):
@@ -73,14 +181,23 @@ def transcribe_video_with_openai(local_video_path: str) -> str:
         return text or ""
     except Exception as e:
         raise Exception(f"OpenAI transcription failed: {str(e)}")
+    finally:
+        if temp_audio_path and os.path.exists(temp_audio_path):
+            os.remove(temp_audio_path)
 
 
 def _extract_audio_with_ffmpeg(
-    input_video_path: str, sample_rate: int = 16000
+    input_video_path: str,
+    sample_rate: int = 16000,
+    profile: Optional[AudioProfile] = None,
 ) -> Optional[str]:
-    """Extract mono WAV audio using ffmpeg. Returns temp file path or None if failed."""
+    """
+    Extract mono audio using ffmpeg, encoded with profile (default: the
+    TRANSCRIBE_AUDIO_CODEC profile). Returns temp file path or None if failed.
+    """
+    profile = profile or audio_profile()
     try:
-        fd, tmp_wav_path = tempfile.mkstemp(suffix=".wav")
+        fd, tmp_audio_path = tempfile.mkstemp(suffix=profile.suffix)
         os.close(fd)
         cmd = [
             "ffmpeg",
@@ -88,20 +205,19 @@ def _extract_audio_with_ffmpeg(
             "-i",
             input_video_path,
             "-vn",
-            "-acodec",
-            "pcm_s16le",
+            *profile.codec_args,
             "-ar",
             str(sample_rate),
             "-ac",
             "1",
-            tmp_wav_path,
+            tmp_audio_path,
         ]
         subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        return tmp_wav_path
+        return tmp_audio_path
     except Exception:
         try:
-            if "tmp_wav_path" in locals() and os.path.exists(tmp_wav_path):
-                os.remove(tmp_wav_path)
+            if "tmp_audio_path" in locals() and os.path.exists(tmp_audio_path):
+                os.remove(tmp_audio_path)
         except Exception:
             pass
         return None
@@ -134,94 +250,155 @@ def _probe_media_duration_seconds(input_path: str) -> Optional[float]:
         return None
 
 
-def _segment_media_to_wav_chunks(
-    input_path: str, chunk_seconds: int = 600, sample_rate: int = 16000
-) -> List[str]:
+def _segment_media_to_audio_chunks(
+    input_path: str,
+    chunk_seconds: int = TRANSCRIBE_CHUNK_SECONDS,
+    sample_rate: int = 16000,
+    profile: Optional[AudioProfile] = None,
+) -> List[Tuple[str, float]]:
     """
-    Segment input media into mono WAV chunks using ffmpeg. Returns list of temp file paths.
+    Split input media into mono audio chunks (encoded with profile, default
+    the TRANSCRIBE_AUDIO_CODEC profile) in a single ffmpeg pass.
 
-    Uses accurate seeking per chunk: ffmpeg -ss <start> -t <dur> -i <input> -vn -acodec pcm_s16le -ar 16000 -ac 1 <out>
-    """
-    chunk_paths: List[str] = []
-    duration = _probe_media_duration_seconds(input_path) or 0.0
-    # If duration unknown, fall back to a single extracted WAV to avoid complex logic
-    if duration <= 0.0:
-        extracted = _extract_audio_with_ffmpeg(input_path, sample_rate=sample_rate)
-        return [extracted] if extracted else []
+    The segment muxer cuts the decoded audio as it goes, so the input is read
+    and decoded once, and its segment list gives each chunk's start time.
 
+    Returns:
+        [(chunk path, start offset in seconds)] in order; empty on failure
+    """
+    profile = profile or audio_profile()
     temp_dir = tempfile.mkdtemp(prefix="vidyai_chunks_")
-    start = 0.0
-    chunk_index = 0
-    # Ensure minimum chunk_seconds > 0
-    chunk_len = max(30, int(chunk_seconds))
-    while start < duration - 0.001:
-        remaining = max(0.0, duration - start)
-        this_len = min(float(chunk_len), remaining)
-        out_path = os.path.join(temp_dir, f"chunk_{chunk_index:04d}.wav")
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-accurate_seek",
-            "-ss",
-            str(start),
-            "-t",
-            str(this_len),
-            "-i",
-            input_path,
-            "-vn",
-            "-acodec",
-            "pcm_s16le",
-            "-ar",
-            str(sample_rate),
-            "-ac",
-            "1",
-            out_path,
-        ]
+    segment_list = os.path.join(temp_dir, "chunks.csv")
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_path,
+        "-vn",
+        *profile.codec_args,
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        "1",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(max(30, int(chunk_seconds))),
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        segment_list,
+        "-segment_list_type",
+        "csv",
+        os.path.join(temp_dir, f"chunk_%04d{profile.suffix}"),
+    ]
+    chunks: List[Tuple[str, float]] = []
+    try:
+        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        with open(segment_list, newline="") as f:
+            for row in csv.reader(f):
+                # filename,start,end
+                chunk_path = os.path.join(temp_dir, row[0])
+                if os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 0:
+                    chunks.append((chunk_path, float(row[1])))
+    except Exception as e:
+        logger.warning(f"Audio segmentation failed: {e}")
+        chunks = []
+    if not chunks:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return chunks
+
+
+def _remove_chunks(chunks: List[Tuple[str, float]]) -> None:
+    """Delete the temp directory of _segment_media_to_audio_chunks output."""
+    if chunks:
+        shutil.rmtree(os.path.dirname(chunks[0][0]), ignore_errors=True)
+
+
+def _map_chunks(fn: Callable[[Tuple[str, float]], Any], chunks: List) -> List[Any]:
+    """fn over chunks on a pool of TRANSCRIBE_CHUNK_CONCURRENCY threads, in order."""
+    workers = max(1, min(TRANSCRIBE_CHUNK_CONCURRENCY, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, chunks))
+
+
+def _deepgram_transcribe_path(path: str, mimetype: Optional[str], options: Any) -> Any:
+    """
+    Transcribe a local file with Deepgram's prerecorded API.
+
+    The request body is streamed from the open file rather than read into
+    memory first.
+    """
+    with open(path, "rb") as f:
+        payload = {"stream": f}
+        if mimetype:
+            payload["mimetype"] = mimetype
         try:
-            subprocess.run(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+            import httpx
+        except ImportError:
+            return deepgram_client.listen.rest.v("1").transcribe_file(payload, options)
+        # Extended timeout for large files (up to 5 minutes)
+        return deepgram_client.listen.rest.v("1").transcribe_file(
+            payload, options, timeout=httpx.Timeout(300.0)
+        )
+
+
+def _transcript_text(response: Any) -> str:
+    """Plain transcript text from a Deepgram prerecorded response."""
+    transcript_text = ""
+    try:
+        results = (
+            response.get("results")
+            if isinstance(response, dict)
+            else getattr(response, "results", None)
+        )
+        if results:
+            channels = (
+                results.get("channels")
+                if isinstance(results, dict)
+                else getattr(results, "channels", None)
             )
-            if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
-                chunk_paths.append(out_path)
-        except Exception:
-            # Stop on failure to avoid infinite loops
-            break
-        chunk_index += 1
-        start += this_len
-    return chunk_paths
+            if channels and len(channels) > 0:
+                alt = (
+                    channels[0].get("alternatives")
+                    if isinstance(channels[0], dict)
+                    else getattr(channels[0], "alternatives", None)
+                )
+                if alt and len(alt) > 0:
+                    transcript_text = (
+                        alt[0].get("transcript")
+                        if isinstance(alt[0], dict)
+                        else getattr(alt[0], "transcript", "")
+                    )
+    except Exception:
+        transcript_text = ""
+
+    if not transcript_text:
+        transcript_text = (
+            getattr(response, "transcript", "")
+            if not isinstance(response, dict)
+            else response.get("transcript", "")
+        )
+    return transcript_text or ""
 
 
 def transcribe_video_with_deepgram(local_video_path: str) -> str:
-    """Transcribe a local video/audio file using Deepgram's prerecorded API.
+    """Transcribe a local video/audio file or media URL using Deepgram's
+    prerecorded API.
+
+    URLs (e.g. presigned S3 URLs) are read by ffmpeg; their audio is sent
+    to Deepgram, never the URL itself.
 
-    If the input appears to be a video, attempts ffmpeg audio extraction first.
+    Media of TRANSCRIBE_CHUNK_MIN_SECONDS or longer is split into audio chunks
+    in one ffmpeg pass and the chunks are transcribed concurrently. Shorter
+    videos have their audio extracted with ffmpeg first.
     """
     if not deepgram_client:
         raise Exception("Deepgram is not configured on server")
 
     temp_audio_path: Optional[str] = None
-    transcript_result: str = ""
-    chunk_paths: List[str] = []
+    chunks: List[Tuple[str, float]] = []
     try:
-        suffix = os.path.splitext(local_video_path)[1].lower()
-        is_video = suffix in [".mp4", ".mov", ".mkv", ".webm", ".avi"]
-        source_path = local_video_path
-        mimetype = (
-            mimetypes.guess_type(local_video_path)[0] or "application/octet-stream"
-        )
-
-        if is_video:
-            # Prefer extracting audio to reduce payload size and ensure supported codec
-            extracted = _extract_audio_with_ffmpeg(local_video_path)
-            if extracted and os.path.exists(extracted):
-                temp_audio_path = extracted
-                source_path = extracted
-                mimetype = "audio/wav"
-
-        # Decide whether to chunk based on duration; default to chunking if > 12 minutes
-        duration_seconds = _probe_media_duration_seconds(local_video_path) or 0.0
-        should_chunk = duration_seconds >= 12 * 60
-
         # Lazy import to avoid hard dependency if SDK missing at import time
         try:
             from deepgram import PrerecordedOptions  # type: ignore
@@ -236,77 +413,41 @@ def transcribe_video_with_deepgram(local_video_path: str) -> str:
                 punctuate=True,
             )
 
-        def _transcribe_file_bytes(
-            data_bytes: bytes, mimetype_hint: Optional[str]
-        ) -> str:
-            payload = {"buffer": data_bytes}
-            if mimetype_hint:
-                payload["mimetype"] = mimetype_hint
-            response = deepgram_client.listen.rest.v("1").transcribe_file(
-                payload, options
-            )
-            # Extract transcript text robustly
-            transcript_text_inner = ""
-            try:
-                results = (
-                    response.get("results")
-                    if isinstance(response, dict)
-                    else getattr(response, "results", None)
-                )
-                if results:
-                    channels = (
-                        results.get("channels")
-                        if isinstance(results, dict)
-                        else getattr(results, "channels", None)
+        duration_seconds = _probe_media_duration_seconds(local_video_path) or 0.0
+        if duration_seconds >= TRANSCRIBE_CHUNK_MIN_SECONDS:
+            chunks = _segment_media_to_audio_chunks(local_video_path)
+
+        if chunks:
+            parts = _map_chunks(
+                lambda chunk: _transcript_text(
+                    _deepgram_transcribe_path(
+                        chunk[0], audio_profile().mimetype, options
                     )
-                    if channels and len(channels) > 0:
-                        alt = (
-                            channels[0].get("alternatives")
-                            if isinstance(channels[0], dict)
-                            else getattr(channels[0], "alternatives", None)
-                        )
-                        if alt and len(alt) > 0:
-                            transcript_text_inner = (
-                                alt[0].get("transcript")
-                                if isinstance(alt[0], dict)
-                                else getattr(alt[0], "transcript", "")
-                            )
-            except Exception:
-                transcript_text_inner = ""
-
-            if not transcript_text_inner:
-                transcript_text_inner = (
-                    getattr(response, "transcript", "")
-                    if not isinstance(response, dict)
-                    else response.get("transcript", "")
-                )
-            return transcript_text_inner or ""
-
-        if not should_chunk:
-            with open(source_path, "rb") as f:
-                data = f.read()
-            transcript_result = _transcribe_file_bytes(data, mimetype)
-            return transcript_result
-
-        # For long media, segment into ~10-minute WAV chunks and transcribe sequentially
-        chunk_paths = _segment_media_to_wav_chunks(local_video_path, chunk_seconds=600)
-        if not chunk_paths:
-            # Fallback to single-file flow if segmentation failed
-            with open(source_path, "rb") as f:
-                data = f.read()
-            transcript_result = _transcribe_file_bytes(data, mimetype)
-            return transcript_result
-
-        transcripts: List[str] = []
-        for chunk_path in chunk_paths:
-            with open(chunk_path, "rb") as f:
-                chunk_data = f.read()
-            part = _transcribe_file_bytes(chunk_data, "audio/wav")
-            if part:
-                transcripts.append(part.strip())
-        # Merge with double newlines to preserve separation
-        transcript_result = "\n\n".join([p for p in transcripts if p])
-        return transcript_result
+                ),
+                chunks,
+            )
+            # Merge with double newlines to preserve separation
+            return "\n\n".join(part.strip() for part in parts if part)
+
+        # Single request (short media, or segmentation failed)
+        is_video = _is_video_source(local_video_path)
+        source_path = local_video_path
+        mimetype = (
+            mimetypes.guess_type(local_video_path)[0] or "application/octet-stream"
+        )
+        if is_video:
+            # Prefer extracting audio to reduce payload size and ensure supported codec
+            extracted = _extract_audio_with_ffmpeg(local_video_path)
+            if extracted and os.path.exists(extracted):
+                temp_audio_path = extracted
+                source_path = extracted
+                mimetype = audio_profile().mimetype
+
+        return _transcript_text(
+            _deepgram_transcribe_path(
+                _require_local(source_path, local_video_path), mimetype, options
+            )
+        )
     except Exception as e:
         raise Exception(f"Deepgram transcription failed: {str(e)}")
     finally:
@@ -315,15 +456,7 @@ def transcribe_video_with_deepgram(local_video_path: str) -> str:
                 os.remove(temp_audio_path)
         except Exception:
             pass
-        try:
-            for p in chunk_paths:
-                try:
-                    if p and os.path.exists(p):
-                        os.remove(p)
-                except Exception:
-                    pass
-        except Exception:
-            pass
+        _remove_chunks(chunks)
 
 
 def transcribe_video_with_deepgram_url(media_url: str) -> str:
@@ -349,51 +482,160 @@ def transcribe_video_with_deepgram_url(media_url: str) -> str:
         # Prefer the same REST path family as file-based call
         response = deepgram_client.listen.rest.v("1").transcribe_url(payload, options)
 
-        # Extract transcript similarly to file path
-        transcript_text = ""
-        try:
-            results = (
-                response.get("results")
-                if isinstance(response, dict)
-                else getattr(response, "results", None)
+        return _transcript_text(response)
+    except Exception as e:
+        raise Exception(f"Deepgram transcription failed: {str(e)}")
+
+
+def _timed_segments(response: Any) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Timed segments from a Deepgram prerecorded response: its utterances, or
+    ~3 second groups of words when there are none.
+
+    Returns:
+        (segments as {"start", "dur", "text"}, end time of the last segment)
+    """
+    transcription_segments = []
+    total_duration = 0
+
+    try:
+        results = (
+            response.get("results")
+            if isinstance(response, dict)
+            else getattr(response, "results", None)
+        )
+
+        if results:
+            # Try to get utterances first (better for timing)
+            utterances = (
+                results.get("utterances")
+                if isinstance(results, dict)
+                else getattr(results, "utterances", None)
             )
-            if results:
+
+            if utterances:
+                for utt in utterances:
+                    start = (
+                        utt.get("start")
+                        if isinstance(utt, dict)
+                        else getattr(utt, "start", 0)
+                    )
+                    end = (
+                        utt.get("end")
+                        if isinstance(utt, dict)
+                        else getattr(utt, "end", 0)
+                    )
+                    text = (
+                        utt.get("transcript")
+                        if isinstance(utt, dict)
+                        else getattr(utt, "transcript", "")
+                    )
+
+                    if text:
+                        transcription_segments.append(
+                            {"start": start, "dur": end - start, "text": text}
+                        )
+                        total_duration = max(total_duration, end)
+
+            # Fallback to channels if no utterances
+            if not transcription_segments:
                 channels = (
                     results.get("channels")
                     if isinstance(results, dict)
                     else getattr(results, "channels", None)
                 )
+
                 if channels and len(channels) > 0:
-                    alt = (
+                    alternatives = (
                         channels[0].get("alternatives")
                         if isinstance(channels[0], dict)
                         else getattr(channels[0], "alternatives", None)
                     )
-                    if alt and len(alt) > 0:
-                        transcript_text = (
-                            alt[0].get("transcript")
-                            if isinstance(alt[0], dict)
-                            else getattr(alt[0], "transcript", "")
+
+                    if alternatives and len(alternatives) > 0:
+                        words = (
+                            alternatives[0].get("words")
+                            if isinstance(alternatives[0], dict)
+                            else getattr(alternatives[0], "words", None)
                         )
-        except Exception:
-            transcript_text = ""
 
-        if not transcript_text:
-            transcript_text = (
-                getattr(response, "transcript", "")
-                if not isinstance(response, dict)
-                else response.get("transcript", "")
-            )
-        return transcript_text or ""
-    except Exception as e:
-        raise Exception(f"Deepgram transcription failed: {str(e)}")
+                        if words:
+                            # Group words into ~3 second segments
+                            current_segment = {"start": 0, "words": []}
+
+                            for word in words:
+                                word_start = (
+                                    word.get("start")
+                                    if isinstance(word, dict)
+                                    else getattr(word, "start", 0)
+                                )
+                                word_end = (
+                                    word.get("end")
+                                    if isinstance(word, dict)
+                                    else getattr(word, "end", 0)
+                                )
+                                word_text = (
+                                    word.get("word") or word.get("punctuated_word")
+                                    if isinstance(word, dict)
+                                    else getattr(word, "word", "")
+                                    or getattr(word, "punctuated_word", "")
+                                )
+
+                                if not current_segment["words"]:
+                                    current_segment["start"] = word_start
+
+                                current_segment["words"].append(word_text)
+
+                                # Split segment every ~3 seconds
+                                if word_end - current_segment["start"] >= 3.0:
+                                    text = " ".join(current_segment["words"])
+                                    transcription_segments.append(
+                                        {
+                                            "start": current_segment["start"],
+                                            "dur": word_end - current_segment["start"],
+                                            "text": text,
+                                        }
+                                    )
+                                    current_segment = {"start": 0, "words": []}
+                                    total_duration = max(total_duration, word_end)
+
+                            # Add remaining words
+                            if current_segment["words"]:
+                                last_word = words[-1]
+                                last_end = (
+                                    last_word.get("end")
+                                    if isinstance(last_word, dict)
+                                    else getattr(last_word, "end", 0)
+                                )
+                                text = " ".join(current_segment["words"])
+                                transcription_segments.append(
+                                    {
+                                        "start": current_segment["start"],
+                                        "dur": last_end - current_segment["start"],
+                                        "text": text,
+                                    }
+                                )
+                                total_duration = max(total_duration, last_end)
+
+    except Exception as parse_error:
+        logger.error(f"Failed to parse Deepgram timing data: {parse_error}")
+        # Return empty segments if parsing fails
+        pass
+
+    return transcription_segments, total_duration
 
 
 def transcribe_video_with_deepgram_timed(
     local_video_path: str, video_title: str = "Video"
 ) -> dict:
     """
-    Transcribe a local video/audio file using Deepgram and return timed segments.
+    Transcribe a local video/audio file or media URL using Deepgram and
+    return timed segments (URLs are read by ffmpeg, as in
+    transcribe_video_with_deepgram).
+
+    Media of TRANSCRIBE_CHUNK_MIN_SECONDS or longer is split into chunks
+    that are transcribed concurrently; chunk segments are shifted by the
+    chunk's start offset.
 
     Returns format compatible with RapidAPI:
     {
@@ -409,23 +651,9 @@ def transcribe_video_with_deepgram_timed(
         raise Exception("Deepgram is not configured on server")
 
     temp_audio_path: Optional[str] = None
+    chunks: List[Tuple[str, float]] = []
 
     try:
-        suffix = os.path.splitext(local_video_path)[1].lower()
-        is_video = suffix in [".mp4", ".mov", ".mkv", ".webm", ".avi"]
-        source_path = local_video_path
-        mimetype = (
-            mimetypes.guess_type(local_video_path)[0] or "application/octet-stream"
-        )
-
-        if is_video:
-            # Extract audio to reduce payload size
-            extracted = _extract_audio_with_ffmpeg(local_video_path)
-            if extracted and os.path.exists(extracted):
-                temp_audio_path = extracted
-                source_path = extracted
-                mimetype = "audio/wav"
-
         # Import Deepgram options
         try:
             from deepgram import PrerecordedOptions
@@ -443,155 +671,45 @@ def transcribe_video_with_deepgram_timed(
                 utt_split=3.0,  # Split utterances every ~3 seconds
             )
 
-        # Transcribe
-        with open(source_path, "rb") as f:
-            data = f.read()
-
-        payload = {"buffer": data}
-        if mimetype:
-            payload["mimetype"] = mimetype
+        duration_seconds = _probe_media_duration_seconds(local_video_path) or 0.0
+        if duration_seconds >= TRANSCRIBE_CHUNK_MIN_SECONDS:
+            chunks = _segment_media_to_audio_chunks(local_video_path)
 
-        # Use extended timeout for large files (up to 5 minutes)
-        try:
-            import httpx
+        if chunks:
 
-            response = deepgram_client.listen.rest.v("1").transcribe_file(
-                payload, options, timeout=httpx.Timeout(300.0)
-            )
-        except Exception:
-            # Fallback without timeout if httpx not available
-            response = deepgram_client.listen.rest.v("1").transcribe_file(
-                payload, options
+            def transcribe_chunk(chunk: Tuple[str, float]):
+                chunk_path, offset = chunk
+                response = _deepgram_transcribe_path(
+                    chunk_path, audio_profile().mimetype, options
+                )
+                segments, end = _timed_segments(response)
+                shifted = [{**seg, "start": seg["start"] + offset} for seg in segments]
+                return shifted, (end + offset if segments else 0.0)
+
+            transcription_segments = []
+            total_duration = 0.0
+            for segments, end in _map_chunks(transcribe_chunk, chunks):
+                transcription_segments.extend(segments)
+                total_duration = max(total_duration, end)
+        else:
+            is_video = _is_video_source(local_video_path)
+            source_path = local_video_path
+            mimetype = (
+                mimetypes.guess_type(local_video_path)[0] or "application/octet-stream"
             )
 
-        # Extract utterances with timing
-        transcription_segments = []
-        total_duration = 0
+            if is_video:
+                # Extract audio to reduce payload size
+                extracted = _extract_audio_with_ffmpeg(local_video_path)
+                if extracted and os.path.exists(extracted):
+                    temp_audio_path = extracted
+                    source_path = extracted
+                    mimetype = audio_profile().mimetype
 
-        try:
-            results = (
-                response.get("results")
-                if isinstance(response, dict)
-                else getattr(response, "results", None)
+            response = _deepgram_transcribe_path(
+                _require_local(source_path, local_video_path), mimetype, options
             )
-
-            if results:
-                # Try to get utterances first (better for timing)
-                utterances = (
-                    results.get("utterances")
-                    if isinstance(results, dict)
-                    else getattr(results, "utterances", None)
-                )
-
-                if utterances:
-                    for utt in utterances:
-                        start = (
-                            utt.get("start")
-                            if isinstance(utt, dict)
-                            else getattr(utt, "start", 0)
-                        )
-                        end = (
-                            utt.get("end")
-                            if isinstance(utt, dict)
-                            else getattr(utt, "end", 0)
-                        )
-                        text = (
-                            utt.get("transcript")
-                            if isinstance(utt, dict)
-                            else getattr(utt, "transcript", "")
-                        )
-
-                        if text:
-                            transcription_segments.append(
-                                {"start": start, "dur": end - start, "text": text}
-                            )
-                            total_duration = max(total_duration, end)
-
-                # Fallback to channels if no utterances
-                if not transcription_segments:
-                    channels = (
-                        results.get("channels")
-                        if isinstance(results, dict)
-                        else getattr(results, "channels", None)
-                    )
-
-                    if channels and len(channels) > 0:
-                        alternatives = (
-                            channels[0].get("alternatives")
-                            if isinstance(channels[0], dict)
-                            else getattr(channels[0], "alternatives", None)
-                        )
-
-                        if alternatives and len(alternatives) > 0:
-                            words = (
-                                alternatives[0].get("words")
-                                if isinstance(alternatives[0], dict)
-                                else getattr(alternatives[0], "words", None)
-                            )
-
-                            if words:
-                                # Group words into ~3 second segments
-                                current_segment = {"start": 0, "words": []}
-
-                                for word in words:
-                                    word_start = (
-                                        word.get("start")
-                                        if isinstance(word, dict)
-                                        else getattr(word, "start", 0)
-                                    )
-                                    word_end = (
-                                        word.get("end")
-                                        if isinstance(word, dict)
-                                        else getattr(word, "end", 0)
-                                    )
-                                    word_text = (
-                                        word.get("word") or word.get("punctuated_word")
-                                        if isinstance(word, dict)
-                                        else getattr(word, "word", "")
-                                        or getattr(word, "punctuated_word", "")
-                                    )
-
-                                    if not current_segment["words"]:
-                                        current_segment["start"] = word_start
-
-                                    current_segment["words"].append(word_text)
-
-                                    # Split segment every ~3 seconds
-                                    if word_end - current_segment["start"] >= 3.0:
-                                        text = " ".join(current_segment["words"])
-                                        transcription_segments.append(
-                                            {
-                                                "start": current_segment["start"],
-                                                "dur": word_end
-                                                - current_segment["start"],
-                                                "text": text,
-                                            }
-                                        )
-                                        current_segment = {"start": 0, "words": []}
-                                        total_duration = max(total_duration, word_end)
-
-                                # Add remaining words
-                                if current_segment["words"]:
-                                    last_word = words[-1]
-                                    last_end = (
-                                        last_word.get("end")
-                                        if isinstance(last_word, dict)
-                                        else getattr(last_word, "end", 0)
-                                    )
-                                    text = " ".join(current_segment["words"])
-                                    transcription_segments.append(
-                                        {
-                                            "start": current_segment["start"],
-                                            "dur": last_end - current_segment["start"],
-                                            "text": text,
-                                        }
-                                    )
-                                    total_duration = max(total_duration, last_end)
-
-        except Exception as parse_error:
-            logger.error(f"Failed to parse Deepgram timing data: {parse_error}")
-            # Return empty segments if parsing fails
-            pass
+            transcription_segments, total_duration = _timed_segments(response)
 
         # Return in RapidAPI-compatible format
         return {
@@ -608,6 +726,7 @@ def transcribe_video_with_deepgram_timed(
                 os.remove(temp_audio_path)
         except Exception:
             pass
+        _remove_chunks(chunks)
 
 
 def transcribe_video_with_deepgram_url_timed(
@@ -23,7 +23,9 @@ from routes.courses import router as courses_router
 from routes.course_performance import router as course_performance_router
 from routes.users import router as users_router
 from routes.material_chat import router as material_chat_router
+from services.job_queue import JobWorker
 from utils.youtube_utils import start_cache_cleanup_thread
+from utils.yolo_registry import DIAGRAM_YOLO_WARMUP, warm_up_in_background
 
 
 @asynccontextmanager
@@ -32,10 +34,21 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting up Vidya AI Backend...")
     start_cache_cleanup_thread()
+    if DIAGRAM_YOLO_WARMUP:
+        # Load the diagram detector off the startup path
+        warm_up_in_background()
+    job_worker = None
+    if os.getenv("JOB_WORKER_IN_PROCESS", "true").lower() != "false":
+        # Single-process deployments run background jobs here; set
+        # JOB_WORKER_IN_PROCESS=false when running dedicated worker.py nodes
+        job_worker = JobWorker()
+        job_worker.start()
     logger.info("✅ Startup complete")
     yield
-    # Shutdown (if needed in the future)
+    # Shutdown
     logger.info("👋 Shutting down Vidya AI Backend...")
+    if job_worker is not None:
+        job_worker.stop(wait=False)
 
 
 app = FastAPI(
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Latency, memory and score-drift benchmark of the AI-detector backends.
+
+Loads each backend (PyTorch fp32 and int8 ONNX) in its own process, so load
+time and memory aren't skewed by the other one's imports, scores the same
+texts at several batch sizes and compares the scores with PyTorch's.
+
+Usage (from the repo root with the venv active):
+    cd src && python -m management_commands.benchmark_ai_detector [options]
+
+Options:
+    --texts PATH        JSON list of {"text": ...} (default: the parity
+                        fixtures in tests/test_files/ai_detection_fixtures.json)
+    --batch-sizes LIST  Batch sizes to time (default 1,8,16)
+    --repeats N         Timed runs per batch size (default 5)
+    --backends LIST     Backends to run (default torch,onnx)
+
+Reports per backend: load time, resident memory after loading, p50/p95
+latency per batch and texts/second; then the max/mean score difference
+from PyTorch and how many texts land on a different flag level.
+"""
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_TEXTS = (
+    Path(__file__).parent.parent / "tests" / "test_files" / "ai_detection_fixtures.json"
+)
+
+
+def _rss_mb() -> float:
+    """Resident memory of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(
+    name: str, texts: List[str], batch_sizes: List[int], repeats: int
+) -> Dict[str, Any]:
+    """Child process: load one backend, score texts, time batches."""
+    from utils.ai_detection_backends import OnnxDetectorBackend, TorchDetectorBackend
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    backend = OnnxDetectorBackend() if name == "onnx" else TorchDetectorBackend()
+    load_seconds = time.perf_counter() - start
+
+    scores = backend.score(texts)
+    timings = {}
+    for size in batch_sizes:
+        batch = (texts * (size // len(texts) + 1))[:size]
+        backend.score(batch)  # Warm-up
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            backend.score(batch)
+            runs.append(time.perf_counter() - start)
+        runs.sort()
+        timings[size] = {
+            "p50_ms": statistics.median(runs) * 1000,
+            "p95_ms": runs[min(len(runs) - 1, int(len(runs) * 0.95))] * 1000,
+            "texts_per_second": size / statistics.median(runs),
+        }
+
+    return {
+        "load_seconds": load_seconds,
+        "rss_mb": _rss_mb(),
+        "model_rss_mb": _rss_mb() - rss_before,
+        "scores": scores,
+        "timings": timings,
+    }
+
+
+def _flag(score: float) -> str:
+    from utils.ai_detection_service import AIDetectionService
+
+    if score >= AIDetectionService.HARD_FLAG_THRESHOLD:
+        return "hard"
+    if score >= AIDetectionService.SOFT_FLAG_THRESHOLD:
+        return "soft"
+    return "none"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=str, default=str(DEFAULT_TEXTS))
+    parser.add_argument("--batch-sizes", type=str, default="1,8,16")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--backends", type=str, default="torch,onnx")
+    args = parser.parse_args()
+
+    with open(args.texts) as f:
+        texts = [item["text"] for item in json.load(f)]
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    backends = [name for name in args.backends.split(",") if name]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    context = multiprocessing.get_context("spawn")
+    for name in backends:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(
+                _run_backend, (name, texts, batch_sizes, args.repeats)
+            )
+
+    print(f"{len(texts)} texts\n")
+    print(f"{'backend':<8} {'load s':>7} {'RSS MB':>8} {'model MB':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<8} {result['load_seconds']:>7.2f} {result['rss_mb']:>8.0f} "
+            f"{result['model_rss_mb']:>9.0f}"
+        )
+
+    print(f"\n{'backend':<8} {'batch':>5} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>8}")
+    for name, result in results.items():
+        for size, timing in result["timings"].items():
+            print(
+                f"{name:<8} {size:>5} {timing['p50_ms']:>8.1f} "
+                f"{timing['p95_ms']:>8.1f} {timing['texts_per_second']:>8.1f}"
+            )
+
+    if "torch" in results:
+        reference = results["torch"]["scores"]
+        for name, result in results.items():
+            if name == "torch":
+                continue
+            drift = [abs(a - b) for a, b in zip(result["scores"], reference)]
+            flips = sum(
+                _flag(a) != _flag(b) for a, b in zip(result["scores"], reference)
+            )
+            print(
+                f"\n{name} vs torch: max drift {max(drift):.4f}, "
+                f"mean drift {statistics.mean(drift):.4f}, "
+                f"flag level changed for {flips}/{len(texts)} texts"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
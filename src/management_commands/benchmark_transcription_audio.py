@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Payload size, request time and word error rate of the transcription audio
+profiles (AUDIO_PROFILES in controllers/storage.py).
+
+Encodes the first --seconds of a media file with each profile the way the
+transcription paths do (mono 16 kHz), transcribes each encoding with the
+chosen provider and compares the transcripts with a reference: a text file
+if given, otherwise the WAV transcript.
+
+Usage (from the repo root with the venv active):
+    cd src && python -m management_commands.benchmark_transcription_audio MEDIA [options]
+
+Options:
+    --profiles LIST     Profiles to compare (default wav,flac,opus)
+    --provider NAME     deepgram (default) or openai
+    --seconds N         Length of the clip to encode (default 600; OpenAI
+                        rejects files over 25 MB, ~13 minutes of WAV)
+    --reference PATH    Reference transcript (default: the wav transcript)
+
+Reports per profile: encode time, payload MB and MB per hour of audio,
+request time (upload + transcription) and WER against the reference.
+Pick TRANSCRIBE_AUDIO_CODEC from the result.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from controllers.storage import (
+    AUDIO_PROFILES,
+    AudioProfile,
+    _deepgram_transcribe_path,
+    _probe_media_duration_seconds,
+    _transcript_text,
+)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words."""
+    ref = re.findall(r"[\w']+", reference.lower())
+    hyp = re.findall(r"[\w']+", hypothesis.lower())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def encode(media: str, profile: AudioProfile, seconds: int, output: str) -> None:
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-i",
+            media,
+            "-t",
+            str(seconds),
+            "-vn",
+            *profile.codec_args,
+            "-ar",
+            "16000",
+            "-ac",
+            "1",
+            output,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+
+def transcribe(path: str, profile: AudioProfile, provider: str) -> str:
+    if provider == "openai":
+        from openai import OpenAI
+
+        with open(path, "rb") as f:
+            result = OpenAI().audio.transcriptions.create(model="whisper-1", file=f)
+        return result.text or ""
+
+    from deepgram import PrerecordedOptions
+
+    options = PrerecordedOptions(model="nova-2", smart_format=True, punctuate=True)
+    return _transcript_text(_deepgram_transcribe_path(path, profile.mimetype, options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("media", type=str)
+    parser.add_argument("--profiles", type=str, default="wav,flac,opus")
+    parser.add_argument(
+        "--provider", choices=("deepgram", "openai"), default="deepgram"
+    )
+    parser.add_argument("--seconds", type=int, default=600)
+    parser.add_argument("--reference", type=str, default=None)
+    args = parser.parse_args()
+
+    names = [name for name in args.profiles.split(",") if name]
+    unknown = set(names) - set(AUDIO_PROFILES)
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix="vidyai_audio_bench_")
+    rows: Dict[str, Dict] = {}
+    transcripts: Dict[str, str] = {}
+    try:
+        for name in names:
+            profile = AUDIO_PROFILES[name]
+            path = os.path.join(work_dir, f"clip{profile.suffix}")
+            start = time.perf_counter()
+            encode(args.media, profile, args.seconds, path)
+            encode_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            transcripts[name] = transcribe(path, profile, args.provider)
+            request_seconds = time.perf_counter() - start
+
+            size = os.path.getsize(path)
+            # The clip is shorter than --seconds when the media is
+            clip_seconds = _probe_media_duration_seconds(path) or args.seconds
+            rows[name] = {
+                "encode_s": encode_seconds,
+                "mb": size / 1e6,
+                "mb_per_hour": size / 1e6 * 3600 / clip_seconds,
+                "request_s": request_seconds,
+            }
+            os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = f.read()
+        reference_name = os.path.basename(args.reference)
+    else:
+        reference = transcripts.get("wav", "")
+        reference_name = "wav transcript"
+
+    print(f"{args.seconds}s clip of {args.media}, {args.provider}\n")
+    print(
+        f"{'profile':<8} {'encode s':>8} {'MB':>8} {'MB/hour':>8} "
+        f"{'request s':>9} {'WER':>7}"
+    )
+    for name, row in rows.items():
+        wer = word_error_rate(reference, transcripts[name]) if reference else None
+        print(
+            f"{name:<8} {row['encode_s']:>8.1f} {row['mb']:>8.2f} "
+            f"{row['mb_per_hour']:>8.1f} {row['request_s']:>9.1f} "
+            f"{(f'{wer:.2%}' if wer is not None else '-'):>7}"
+        )
+    print(f"\nWER against: {reference_name}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
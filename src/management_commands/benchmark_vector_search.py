@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Recall/latency benchmark of pgvector ANN search against exact search.
+
+For a sample of videos/materials, queries the chunk table the same way
+retrieval does (filter to one document, ORDER BY cosine distance, LIMIT k)
+under each ef_search (HNSW) or probes (IVFFlat) value, and compares the
+results with an exact top-k computed in numpy from the document's own
+embeddings. Also times the exact query with index scans disabled.
+
+Usage (from the repo root with the venv active):
+    cd src && python -m management_commands.benchmark_vector_search [options]
+
+Options:
+    --table NAME        transcript_chunks (default) or material_chunks
+    --documents N       Largest N documents to sample (default 20)
+    --queries N         Queries per document (default 10)
+    --top-k K           Results per query (default 20, as hybrid retrieval)
+    --values LIST       ef_search/probes values to try (default 20,40,100,200)
+    --seed N            Random seed
+
+Queries are stored chunk embeddings plus small noise, so they look like
+real questions about the document. Run it against the index method you
+intend to use (VECTOR_INDEX_<TABLE>); see rebuild_vector_indexes.
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import func, text
+
+from controllers.config import logger
+from models import MaterialChunk, TranscriptChunk
+from services.ann_index import ANN_INDEXES, apply_search_settings
+from utils.db import SessionLocal
+
+TABLES = {
+    "transcript_chunks": (TranscriptChunk, TranscriptChunk.video_id),
+    "material_chunks": (MaterialChunk, MaterialChunk.course_material_id),
+}
+
+
+def _sample_documents(db, table: str, limit: int) -> List[str]:
+    model, doc_column = TABLES[table]
+    rows = (
+        db.query(doc_column, func.count(model.id))
+        .filter(model.embedding.isnot(None))
+        .group_by(doc_column)
+        .order_by(func.count(model.id).desc())
+        .limit(limit)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def _search(db, table: str, doc_id: str, query: np.ndarray, top_k: int, **settings):
+    model, doc_column = TABLES[table]
+    if settings.pop("exact", False):
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+    else:
+        apply_search_settings(db, table, top_k=top_k, **settings)
+
+    start = time.perf_counter()
+    ids = [
+        row[0]
+        for row in db.query(model.id)
+        .filter(doc_column == doc_id)
+        .order_by(model.embedding.cosine_distance(query.tolist()))
+        .limit(top_k)
+        .all()
+    ]
+    elapsed = (time.perf_counter() - start) * 1000
+    db.rollback()  # Drop the SET LOCAL settings
+    return ids, elapsed
+
+
+def benchmark(
+    table: str = "transcript_chunks",
+    documents: int = 20,
+    queries: int = 10,
+    top_k: int = 20,
+    values: List[int] = (20, 40, 100, 200),
+    seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    rng = np.random.default_rng(seed)
+    model, doc_column = TABLES[table]
+    method = ANN_INDEXES[table].method
+    setting = "probes" if method == "ivfflat" else "ef_search"
+
+    configs = {"exact": {"exact": True}}
+    if method != "exact":
+        configs.update({f"{setting}={v}": {setting: v} for v in values})
+    recalls = {name: [] for name in configs}
+    latencies = {name: [] for name in configs}
+
+    db = SessionLocal()
+    try:
+        doc_ids = _sample_documents(db, table, documents)
+        logger.info(f"Benchmarking {table} ({method}) over {len(doc_ids)} documents")
+
+        for doc_id in doc_ids:
+            rows = (
+                db.query(model.id, model.embedding)
+                .filter(doc_column == doc_id, model.embedding.isnot(None))
+                .all()
+            )
+            ids = np.array([row[0] for row in rows])
+            matrix = np.stack([np.asarray(row[1], dtype=np.float32) for row in rows])
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+            k = min(top_k, len(ids))
+
+            picks = rng.choice(len(ids), size=min(queries, len(ids)), replace=False)
+            for pick in picks:
+                query = matrix[pick] + rng.normal(scale=0.02, size=matrix.shape[1])
+                query = (query / np.linalg.norm(query)).astype(np.float32)
+                truth = set(ids[np.argsort(-(matrix @ query))[:k]])
+
+                for name, settings in configs.items():
+                    found, elapsed = _search(
+                        db, table, doc_id, query, top_k, **dict(settings)
+                    )
+                    recalls[name].append(len(truth & set(found)) / k)
+                    latencies[name].append(elapsed)
+    finally:
+        db.close()
+
+    report = {}
+    for name in configs:
+        if not latencies[name]:
+            continue
+        report[name] = {
+            "recall": float(np.mean(recalls[name])),
+            "p50_ms": float(np.percentile(latencies[name], 50)),
+            "p95_ms": float(np.percentile(latencies[name], 95)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", choices=sorted(TABLES), default="transcript_chunks")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--values", type=str, default="20,40,100,200")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = benchmark(
+        table=args.table,
+        documents=args.documents,
+        queries=args.queries,
+        top_k=args.top_k,
+        values=[int(v) for v in args.values.split(",") if v],
+        seed=args.seed,
+    )
+
+    print(f"{'setting':<16} {'recall@k':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<16} {row['recall']:>9.3f} "
+            f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Export the AI-detection model to ONNX with dynamic int8 quantization.
+
+Writes to the output directory:
+    model.onnx        fp32 export (kept for reference / re-quantizing)
+    model.int8.onnx   dynamically quantized model used at runtime
+    tokenizer.json    fast tokenizer (loaded without transformers)
+    config.json       model config (label names)
+
+Usage (from the repo root with the venv active):
+    pip install onnx onnxruntime
+    cd src && python -m management_commands.export_ai_detector_onnx [options]
+
+Options:
+    --output DIR    Output directory (default: AI_DETECTION_ONNX_DIR)
+    --model NAME    HuggingFace model (default: roberta-base-openai-detector)
+    --opset N       ONNX opset (default 17)
+
+Then set AI_DETECTION_BACKEND=onnx, and check score drift first with
+management_commands.benchmark_ai_detector.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from controllers.config import logger
+from utils.ai_detection_backends import (
+    AI_DETECTION_MODEL,
+    AI_DETECTION_ONNX_DIR,
+    ONNX_MODEL_FILE,
+)
+
+
+def export(model_name: str, output: Path, opset: int) -> Path:
+    """Export model_name to output, returning the quantized model's path."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    # Plain tuple outputs, so the traced graph has a single logits output
+    model.config.return_dict = False
+
+    sample = tokenizer(
+        ["A sample answer to trace the graph.", "Another, longer sample answer."],
+        padding=True,
+        return_tensors="pt",
+    )
+    fp32_path = output / "model.onnx"
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+    logger.info(f"Exported {model_name} to {fp32_path}")
+
+    int8_path = output / ONNX_MODEL_FILE
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    logger.info(f"Quantized model written to {int8_path}")
+
+    tokenizer.backend_tokenizer.save(str(output / "tokenizer.json"))
+    model.config.save_pretrained(str(output))
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=str, default=AI_DETECTION_ONNX_DIR)
+    parser.add_argument("--model", type=str, default=AI_DETECTION_MODEL)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    int8_path = export(args.model, Path(args.output), args.opset)
+    fp32_size = (Path(args.output) / "model.onnx").stat().st_size
+    print(
+        f"{int8_path}: {int8_path.stat().st_size / 1e6:.0f} MB "
+        f"(fp32 {fp32_size / 1e6:.0f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
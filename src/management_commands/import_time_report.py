@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Report what a cold import of the API (or any module) spends its time on.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the total, the most expensive top-level packages (cumulative) and
+the most expensive single modules (self time). Also lists which of the
+heavy dependencies that should load on first use (DEFERRED_MODULES) were
+imported anyway.
+
+Usage (from the repo root with the venv active):
+    cd src && python -m management_commands.import_time_report [options]
+
+Options:
+    --module NAME   Module to import (default: main)
+    --top N         Rows per table (default 25)
+
+tests/test_import_time.py fails when the cold import of main exceeds
+IMPORT_TIME_BUDGET_SECONDS or imports a deferred module; run this report
+to find the cause.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).parent.parent
+
+# Heavy dependencies the API process must not import at startup; the code
+# using them imports them on first use
+DEFERRED_MODULES = (
+    "torch",
+    "transformers",
+    "onnxruntime",
+    "ultralytics",
+    "cv2",
+    "matplotlib",
+    "weasyprint",
+    "rdkit",
+    "plotly",
+    "openpyxl",
+    "langgraph",
+    "langchain",
+    "langchain_openai",
+    "openai",
+    "anthropic",
+    "google.genai",
+    "yt_dlp",
+    "youtube_transcript_api",
+)
+
+
+@dataclass
+class ImportCost:
+    """One line of -X importtime output (times in microseconds)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportCost]:
+    """Parse -X importtime lines from stderr; other lines are ignored."""
+    costs = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        costs.append(
+            ImportCost(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                # Nested imports are indented two spaces per level
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return costs
+
+
+def measure_import(module: str = "main") -> Tuple[int, List[ImportCost], str]:
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (return code, parsed costs, stderr)
+    """
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps(sorted(m for m in {list(DEFERRED_MODULES)!r} "
+        f"if m in sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    return result.returncode, parse_importtime(result.stderr), result.stdout
+
+
+def deferred_imported(stdout: str) -> List[str]:
+    """Deferred modules the measured import loaded (from measure_import)."""
+    lines = [line for line in stdout.splitlines() if line.startswith("[")]
+    return json.loads(lines[-1]) if lines else []
+
+
+def total_seconds(costs: List[ImportCost], module: str) -> float:
+    """Cumulative import time of module (0 if it wasn't imported)."""
+    for cost in reversed(costs):
+        if cost.depth == 0 and cost.module == module:
+            return cost.cumulative_us / 1e6
+    return 0.0
+
+
+def by_package(costs: List[ImportCost]) -> Dict[str, int]:
+    """Self time summed per top-level package, in microseconds."""
+    totals: Dict[str, int] = {}
+    for cost in costs:
+        package = cost.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + cost.self_us
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", type=str, default="main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    returncode, costs, stdout = measure_import(args.module)
+    if returncode != 0 or not costs:
+        print(f"import {args.module} failed (exit {returncode})")
+        return 1
+
+    print(f"import {args.module}: {total_seconds(costs, args.module):.2f}s\n")
+
+    print(f"{'package':<40} {'ms':>8}")
+    packages = sorted(by_package(costs).items(), key=lambda item: -item[1])
+    for package, micros in packages[: args.top]:
+        print(f"{package:<40} {micros / 1000:>8.1f}")
+
+    print(f"\n{'module (self time)':<60} {'ms':>8}")
+    for cost in sorted(costs, key=lambda c: -c.self_us)[: args.top]:
+        print(f"{cost.module:<60} {cost.self_us / 1000:>8.1f}")
+
+    loaded = deferred_imported(stdout)
+    if loaded:
+        print(f"\nDeferred modules imported at startup: {', '.join(loaded)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
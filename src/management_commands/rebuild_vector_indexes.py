@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Rebuild and analyze the pgvector ANN indexes on the chunk tables.
+
+Usage (from the repo root with the venv active):
+    cd src && python -m management_commands.rebuild_vector_indexes [options]
+
+Options:
+    --table NAME          transcript_chunks or material_chunks (default: both)
+    --method METHOD       hnsw, ivfflat or exact (default: per-table setting
+                          from VECTOR_INDEX_<TABLE>, hnsw if unset)
+    --m N                 HNSW graph degree
+    --ef-construction N   HNSW build candidate list size
+    --lists N             IVFFlat list count (~rows / 1000 up to 1M rows)
+    --analyze-only        Only ANALYZE the tables, don't rebuild
+    --status              Print the current vector indexes and exit
+    --blocking            Build without CONCURRENTLY (faster, blocks writes)
+
+Indexes are built CONCURRENTLY by default, so chunk writes keep working.
+Use management_commands.benchmark_vector_search to pick settings first.
+"""
+
+import argparse
+import sys
+
+from controllers.config import logger
+from services.ann_index import (
+    ANN_INDEXES,
+    AnnIndexSpec,
+    analyze_table,
+    index_status,
+    rebuild_index,
+)
+from utils.db import engine
+
+
+def print_status() -> None:
+    rows = index_status(engine)
+    if not rows:
+        print("No vector indexes on the chunk tables")
+    for row in rows:
+        print(
+            f"{row['table_name']:<20} {row['index_name']:<40} {row['method']:<8} "
+            f"{row['size_bytes'] / 1024 / 1024:>9.1f} MB  "
+            f"rows~{row['approx_rows']:<10} "
+            f"{'valid' if row['is_valid'] else 'INVALID'}"
+        )
+
+
+def rebuild(
+    tables,
+    method: str = None,
+    m: int = None,
+    ef_construction: int = None,
+    lists: int = None,
+    analyze_only: bool = False,
+    concurrently: bool = True,
+) -> None:
+    for table in tables:
+        if analyze_only:
+            logger.info(f"Analyzing {table}")
+            analyze_table(engine, table)
+            continue
+
+        current = ANN_INDEXES[table]
+        spec = AnnIndexSpec(
+            table,
+            method=method or current.method,
+            m=m or current.m,
+            ef_construction=ef_construction or current.ef_construction,
+            lists=lists or current.lists,
+        )
+        try:
+            rebuild_index(engine, spec, concurrently=concurrently)
+        except Exception as e:
+            logger.error(f"Rebuilding vector index on {table} failed: {e}")
+    print_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", choices=sorted(ANN_INDEXES), default=None)
+    parser.add_argument("--method", choices=["hnsw", "ivfflat", "exact"])
+    parser.add_argument("--m", type=int, default=None)
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--analyze-only", action="store_true")
+    parser.add_argument("--status", action="store_true")
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        return
+
+    rebuild(
+        [args.table] if args.table else list(ANN_INDEXES),
+        method=args.method,
+        m=args.m,
+        ef_construction=args.ef_construction,
+        lists=args.lists,
+        analyze_only=args.analyze_only,
+        concurrently=not args.blocking,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,7 @@ from sqlalchemy import (
     Integer,
     JSON,
     Boolean,
+    LargeBinary,
     UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import JSONB
@@ -61,8 +62,10 @@ class Video(Base):
     # Uploaded specific / storage
     s3_key = Column(String, nullable=True)
     thumb_key = Column(String, nullable=True)
+    keyframe_index_key = Column(String, nullable=True)  # utils/keyframe_index.py
     transcript_s3_key = Column(String, nullable=True)
     local_path = Column(String, nullable=True)
+    content_sha256 = Column(String(64), nullable=True)  # Of the uploaded file
 
     # Transcripts and formatting
     transcript_text = Column(Text, nullable=True)
@@ -711,6 +714,103 @@ class MaterialChunk(Base):
     material = relationship("CourseMaterial", back_populates="chunks")
 
 
+class ChunkSparseIndex(Base):
+    """
+    Corpus-wide BM25 postings for one video's TranscriptChunks or one
+    CourseMaterial's MaterialChunks (exactly one of video_id /
+    course_material_id is set). Built at chunking time and loaded lazily
+    by services.sparse_index for hybrid retrieval.
+    """
+
+    __tablename__ = "chunk_sparse_indexes"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    video_id = Column(
+        String,
+        ForeignKey("videos.id", ondelete="CASCADE"),
+        unique=True,
+        index=True,
+        nullable=True,
+    )
+    course_material_id = Column(
+        String,
+        ForeignKey("course_materials.id", ondelete="CASCADE"),
+        unique=True,
+        index=True,
+        nullable=True,
+    )
+
+    num_docs = Column(Integer, nullable=False, default=0)
+    avg_doc_len = Column(Float, nullable=False, default=0.0)
+    # Compressed npz: vocab, CSR postings (doc ids + term frequencies), doc lengths
+    index_data = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.now(timezone.utc),
+        onupdate=datetime.now(timezone.utc),
+    )
+
+
+class ContentEmbedding(Base):
+    """
+    Embedding of one chunk text, keyed by sha256(model + text).
+
+    Shared by every video and material: re-chunking, re-timing and
+    duplicate uploads look vectors up here (services.embedding_store)
+    instead of calling the embeddings API again for unchanged text.
+    """
+
+    __tablename__ = "content_embeddings"
+
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    embedding = Column(Vector(1536), nullable=False)
+
+    created_at = Column(DateTime, default=datetime.now(timezone.utc), nullable=False)
+
+
+class BackgroundJob(Base):
+    """
+    Durable background job (services.job_queue), run by src/worker.py or
+    the API's in-process worker. Workers claim queued jobs with
+    SELECT ... FOR UPDATE SKIP LOCKED, so any number can share the table.
+    """
+
+    __tablename__ = "background_jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    kind = Column(String, nullable=False)  # transcribe, format, chunk, ...
+    payload = Column(JSONB, nullable=False, default=dict)  # Handler kwargs
+    status = Column(
+        String, nullable=False, default="queued"
+    )  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # At most one queued/running job per key (partial unique index)
+    idempotency_key = Column(String, nullable=True)
+    # Workers take jobs round-robin across groups (e.g. assignment id)
+    group_key = Column(String, nullable=True)
+    # Jobs queued by one enqueue_jobs() call (e.g. one grading run)
+    batch_id = Column(String, nullable=True)
+
+    run_after = Column(DateTime, nullable=False)  # UTC; retries back off
+    locked_by = Column(String, nullable=True)  # Worker id while running
+    locked_at = Column(DateTime, nullable=True)  # Last heartbeat
+    last_error = Column(Text, nullable=True)
+    # Handler's return value if it's a dict, e.g. {"usage": {...}} for grading
+    result = Column(JSONB, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.now(timezone.utc),
+        onupdate=datetime.now(timezone.utc),
+    )
+    finished_at = Column(DateTime, nullable=True)
+
+
 class MaterialChatSession(Base):
     """
     A per-(material, user) chat session. Each user gets independent sessions
@@ -43,6 +43,8 @@ from services.email import (
     send_share_invite_registered_email_background,
     send_share_invite_unregistered_email_background,
 )
+from services.job_queue import batch_progress
+from utils.prompt_cache import cache_hit_rate
 from utils.firebase_users import (
     get_user_by_uid as _get_owner_by_uid,
     get_users_by_uids as _get_users_by_uids,
@@ -72,7 +74,6 @@ from schemas import (
     BatchGradeResponse,
 )
 from fastapi.responses import Response, StreamingResponse
-from utils.pdf_generator import AssignmentPDFGenerator
 
 router = APIRouter()
 
@@ -3199,6 +3200,13 @@ async def get_assignment_status(
                 str(due_date - now) if due_date > now else None
             )
 
+        # Progress of the current batch grading run, for the assignment owner
+        if assignment.user_id == user_id:
+            progress = batch_progress(db, "grade", assignment_id)
+            if progress is not None:
+                progress["prompt_cache_hit_rate"] = cache_hit_rate(progress["usage"])
+            status_info["grading_progress"] = progress
+
         logger.info(
             f"Status for assignment {assignment_id} by user {user_id}: {status_info['status']}"
         )
@@ -3701,7 +3709,9 @@ async def download_assignment_pdf(
                             )
                             subq["diagram"] = None
 
-        # Generate PDF
+        # Generate PDF (WeasyPrint/matplotlib load on first use)
+        from utils.pdf_generator import AssignmentPDFGenerator
+
         pdf_generator = AssignmentPDFGenerator()
         try:
             pdf_content = pdf_generator.generate_assignment_pdf(assignment_data)
@@ -3810,6 +3820,8 @@ async def download_solution_pdf(
                             )
                             subq["diagram"] = None
 
+        from utils.pdf_generator import AssignmentPDFGenerator
+
         pdf_generator = AssignmentPDFGenerator()
         try:
             pdf_content = pdf_generator.generate_solution_pdf(assignment_data)
@@ -21,7 +21,6 @@ from utils.performance_stats import (
     is_on_time,
     normalize_weightages,
 )
-from utils.performance_xlsx import build_workbook
 from models import Assignment, AssignmentSubmission, CourseEnrollment
 from routes.courses import _verify_course_owner
 
@@ -211,6 +210,8 @@ def export_class_performance(
     actual_ids = [a["id"] for a in payload["assignments"]]
     weights = normalize_weightages(body.weightages, actual_ids)
 
+    from utils.performance_xlsx import build_workbook  # openpyxl on first use
+
     buffer = build_workbook(
         course_title=course.title,
         assignments=payload["assignments"],
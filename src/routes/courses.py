@@ -5,6 +5,7 @@ and course-scoped assignment listing.
 import csv
 import io
 import re
+import time
 import uuid
 from datetime import datetime, timezone
 
@@ -12,16 +13,13 @@ from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Upload
 from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session, joinedload
 
-from controllers.config import AWS_S3_BUCKET, logger, s3_client, upload_executor
+from controllers.config import AWS_S3_BUCKET, logger, s3_client
 from controllers.storage import (
     s3_presign_url,
     transcribe_video_with_deepgram_url,
     transcribe_video_with_deepgram_url_timed,
 )
-from controllers.background_tasks import (
-    chunk_pdf_material_background,
-    chunk_video_material_transcript_background,
-)
+from services.job_queue import enqueue_job
 from utils.db import get_db, SessionLocal
 from models import (
     Assignment,
@@ -41,6 +39,7 @@ from schemas import (
     EnrollStudentsRequest,
 )
 from utils.firebase_auth import get_current_user
+from services.course_search import search_course
 from services.email import (
     send_enrollment_active_email_background,
     send_enrollment_invite_email_background,
@@ -227,8 +226,11 @@ def _transcribe_course_material_background(material_id: str, s3_key: str) -> Non
             # in the lecture. Skipped for gallery-linked videos (they use
             # TranscriptChunk via the existing Chat-with-Video pipeline).
             if transcript_text and not material.video_id:
-                upload_executor.submit(
-                    chunk_video_material_transcript_background, material_id
+                enqueue_job(
+                    db,
+                    "chunk",
+                    {"material_id": material_id},
+                    idempotency_key=f"chunk:{material_id}",
                 )
     except Exception as e:
         logger.error(f"Background transcription error for material {material_id}: {e}")
@@ -750,13 +752,21 @@ async def upload_course_material(
 
     # Kick off background transcription for video uploads
     if material_type == "video":
-        upload_executor.submit(
-            _transcribe_course_material_background, material.id, s3_key
+        enqueue_job(
+            db,
+            "transcribe",
+            {"material_id": material.id, "s3_key": s3_key},
+            idempotency_key=f"transcribe:{material.id}",
         )
 
     # Kick off background PDF/DOCX chunking + embedding for chat
     if is_chunkable_doc:
-        upload_executor.submit(chunk_pdf_material_background, material.id, s3_key)
+        enqueue_job(
+            db,
+            "chunk",
+            {"material_id": material.id, "s3_key": s3_key},
+            idempotency_key=f"chunk:{material.id}",
+        )
 
     send_course_material_added_email_background(
         course, material, _active_enrollee_recipients(db, course_id)
@@ -886,6 +896,25 @@ def list_materials(
     return result
 
 
+@router.get("/api/courses/{course_id}/search")
+def search_course_materials(
+    course_id: str,
+    q: str = Query(..., min_length=1, max_length=1000),
+    top_k: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Hybrid search across every lecture and document in the course."""
+    _verify_course_access(course_id, current_user["uid"], db)
+    start = time.perf_counter()
+    results = search_course(db, course_id, q, top_k=top_k)
+    return {
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
 @router.get("/api/courses/{course_id}/materials/{material_id}/download")
 def download_material(
     course_id: str,
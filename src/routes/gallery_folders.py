@@ -13,6 +13,7 @@ from schemas import (
 )
 from utils.firebase_auth import get_current_user
 from controllers.config import s3_client, AWS_S3_BUCKET
+from utils.keyframe_index import delete_keyframe_index
 
 
 router = APIRouter(tags=["Gallery & Folders"], prefix="/api")
@@ -103,6 +104,9 @@ def delete_video_s3_objects(video: Video) -> None:
         except Exception:
             pass
 
+    # Delete keyframe sprite sheets and index
+    delete_keyframe_index(video.keyframe_index_key)
+
     # Delete transcript
     if video.transcript_s3_key:
         try:
@@ -21,15 +21,6 @@ parent_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 if parent_path not in sys.path:
     sys.path.insert(0, parent_path)
 
-# Import lecture summarization modules with package namespace
-try:
-    from summarize_lecture.graph.workflow import run_summarization
-    from summarize_lecture.utils.pdf_generator import LectureSummaryPDFGenerator
-except ImportError as e:
-    logger.error(f"Failed to import summarize_lecture modules: {e}")
-    logger.error(f"sys.path: {sys.path}")
-    raise
-
 router = APIRouter()
 
 
@@ -99,7 +90,11 @@ async def generate_lecture_summary(
         logger.info(f"Generating new summary for video {video_id}")
         start_time = time.time()
 
-        # Run summarization workflow
+        # Run summarization workflow (imported here: langgraph and the LLM
+        # SDKs it pulls in are slow to import)
+        from summarize_lecture.graph.workflow import run_summarization
+        from summarize_lecture.utils.pdf_generator import LectureSummaryPDFGenerator
+
         final_state = run_summarization(video_id, video.transcript_text)
 
         # Check for errors
@@ -42,9 +42,13 @@ from schemas import (
     MaterialSummaryResponse,
 )
 from services.chunking_embedding_service import EmbeddingService
+from services.sparse_index import load_sparse_index
+from services.vector_index import cached_vector_index, get_vector_index
+from utils.cache import namespace_version
 from utils.db import get_db
 from utils.firebase_auth import get_current_user
 from utils.ml_models import OpenAIQuizClient, OpenAIVisionClient
+from utils.semantic_cache import rag_semantic_cache
 from utils.text_utils import normalize_ai_response
 
 
@@ -227,72 +231,8 @@ def _owned_session_or_403(
 # ── Retrieval ──────────────────────────────────────────────────────────
 
 
-def _retrieve_context(
-    db: Session, material: CourseMaterial, query: str
-) -> Tuple[str, List[Dict[str, Any]]]:
-    """
-    Pull top-k chunks for the material and format them for the LLM.
-
-    For video materials with a linked Video row, retrieve from TranscriptChunk
-    (existing embeddings populated by the Chat-with-Video pipeline).
-    For PDF/DOCX materials, retrieve from MaterialChunk (populated by
-    chunk_pdf_material_background).
-
-    Returns (context_text, citations).
-    """
-    embedder = EmbeddingService()
-    q_emb = embedder.embed_text(query)
-
-    candidates: List[Dict[str, Any]] = []
-    cache_key: str
-
-    if material.material_type == "video" and material.video_id:
-        rows = (
-            db.query(TranscriptChunk)
-            .filter(TranscriptChunk.video_id == material.video_id)
-            .all()
-        )
-        candidates = [
-            {
-                "text": r.text,
-                "embedding": r.embedding,
-                "chunk_index": r.chunk_index,
-                "start_seconds": r.start_seconds,
-                "end_seconds": r.end_seconds,
-            }
-            for r in rows
-        ]
-        cache_key = f"video:{material.video_id}"
-    else:
-        rows = (
-            db.query(MaterialChunk)
-            .filter(MaterialChunk.course_material_id == material.id)
-            .all()
-        )
-        candidates = [
-            {
-                "text": r.text,
-                "embedding": r.embedding,
-                "chunk_index": r.chunk_index,
-                "page_number": r.page_number,
-                "start_seconds": r.start_seconds,
-                "end_seconds": r.end_seconds,
-            }
-            for r in rows
-        ]
-        cache_key = f"material:{material.id}"
-
-    if not candidates:
-        return "", []
-
-    top = embedder.hybrid_search(
-        query=query,
-        query_embedding=q_emb,
-        candidates=candidates,
-        top_k=5,
-        cache_key=cache_key,
-    )
-
+def _format_context(top: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Format retrieved chunks as (context_text, citations)."""
     # Keep the LLM context in retrieval-ranking order (best chunks first
     # are more likely to fit inside the model's attention budget).
     # Prefix each chunk with a citation marker the model is told to quote
@@ -344,6 +284,80 @@ def _retrieve_context(
     return context_text, citations
 
 
+def _retrieve_context(
+    db: Session, material: CourseMaterial, query: str
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Pull top-k chunks for the material and format them for the LLM.
+
+    For video materials with a linked Video row, retrieve from TranscriptChunk
+    (existing embeddings populated by the Chat-with-Video pipeline).
+    For PDF/DOCX materials, retrieve from MaterialChunk (populated by
+    chunk_pdf_material_background).
+
+    Returns (context_text, citations).
+    """
+    embedder = EmbeddingService()
+    q_emb = embedder.embed_text(query)
+
+    if material.material_type == "video" and material.video_id:
+        namespace = ("video", material.video_id)
+    else:
+        namespace = ("material", material.id)
+
+    # A near-duplicate of a recent question skips loading every chunk
+    top = rag_semantic_cache.lookup(*namespace, q_emb, variant="material_chat:k5")
+    if top is not None:
+        return _format_context(top)
+
+    # Chunk rewrites bump the namespace, so its version says whether the
+    # cached dense index is current before any chunk row is read; on a hit
+    # only text and metadata are loaded (for keyword search and citations)
+    version = namespace_version(*namespace)
+    cache_key = ":".join(namespace)
+    vector_index = cached_vector_index(cache_key, version)
+
+    if material.material_type == "video" and material.video_id:
+        model = TranscriptChunk
+        owner = TranscriptChunk.video_id == material.video_id
+        columns = [TranscriptChunk.text, TranscriptChunk.chunk_index]
+        sparse_index = load_sparse_index(db, video_id=material.video_id)
+    else:
+        model = MaterialChunk
+        owner = MaterialChunk.course_material_id == material.id
+        columns = [
+            MaterialChunk.text,
+            MaterialChunk.chunk_index,
+            MaterialChunk.page_number,
+        ]
+        sparse_index = load_sparse_index(db, material_id=material.id)
+    columns += [model.start_seconds, model.end_seconds]
+    if vector_index is None:
+        columns.append(model.embedding)
+
+    rows = db.query(*columns).filter(owner).order_by(model.chunk_index).all()
+    candidates = [dict(row._mapping) for row in rows]
+    if candidates and vector_index is None:
+        vector_index = get_vector_index(candidates, cache_key, version)
+
+    if not candidates:
+        return "", []
+
+    top = embedder.hybrid_search(
+        query=query,
+        query_embedding=q_emb,
+        candidates=candidates,
+        top_k=5,
+        # Only used by the in-memory BM25 fallback (no persisted sparse index)
+        cache_key=f"{cache_key}:v{version}",
+        sparse_index=sparse_index,
+        vector_index=vector_index,
+    )
+
+    rag_semantic_cache.store(*namespace, query, q_emb, top, variant="material_chat:k5")
+    return _format_context(top)
+
+
 def _processing_message(material: CourseMaterial) -> Optional[str]:
     """If retrieval has no content because the material is still being processed,
     return a user-friendly message; otherwise None."""
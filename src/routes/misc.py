@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from controllers.storage import s3_presign_url
 from controllers.config import s3_client, AWS_S3_BUCKET
-from utils.firebase_auth import get_current_user
+from utils.firebase_auth import get_admin_user, get_current_user
+from utils.cache import local_cache_stats
+from utils.semantic_cache import semantic_cache_stats
 from utils.db import get_db
 from sqlalchemy.orm import Session
 from models import SharedLink
@@ -41,3 +43,9 @@ def presign_storage_key_public(
 
     url = s3_presign_url(key, expires_in)
     return {"url": url}
+
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user=Depends(get_admin_user)):
+    """Hit/miss/eviction counters for this worker's caches (admins only)."""
+    return {"caches": local_cache_stats(), "semantic": semantic_cache_stats()}
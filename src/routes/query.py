@@ -1,21 +1,21 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 import os
 import json
 from sqlalchemy.orm import Session
 from utils.db import get_db
 from controllers.db_helpers import (
-    get_formatting_status,
-    get_transcript_cache,
+    load_video_chat_context,
     update_transcript_cache,
     get_download_status,
+    get_keyframe_index_key,
     get_video_path,
 )
-from controllers.background_tasks import (
-    download_video_background,
-    generate_summary_background,
-)
-from controllers.config import frames_path, download_executor, logger
+from controllers.background_tasks import download_video_background
+from controllers.config import frames_path, logger
 from controllers.subscription_service import (
     check_usage_limits,
     increment_usage,
@@ -23,10 +23,12 @@ from controllers.subscription_service import (
 )
 from controllers.conversation_manager import (
     store_conversation_turn,
-    get_merged_conversation_history,
+    history_from_chat_sessions,
 )
-from utils.youtube_utils import download_transcript_api, grab_youtube_frame
+from utils.frame_service import extract_frame
+from utils.youtube_utils import download_transcript_api
 from utils.cache import (
+    async_prefetch_query_cache,
     get_cached_query_embedding,
     cache_query_embedding,
     get_cached_rag_results,
@@ -38,280 +40,390 @@ from utils.ml_models import OpenAIVisionClient
 from utils.context_extraction import extract_relevant_context, truncate_to_token_limit
 from schemas import VideoQuery
 from utils.firebase_auth import get_current_user
-from models import User, Video, VideoSummary, TranscriptChunk
-from services.summary_service import SummaryService, QueryRouter
+from models import User
+from services.job_queue import enqueue_job
+from services.summary_service import QueryRouter
 from utils.text_utils import normalize_ai_response
 
 
 router = APIRouter(prefix="/api/query", tags=["Query"])
 
 
-@router.post("/video")
-async def process_query(
-    query_request: VideoQuery,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    try:
-        video_id = query_request.video_id
-        query = query_request.query
-        timestamp = query_request.timestamp
-        is_image_query = query_request.is_image_query
-
-        # Get user from database to get internal user_id
-        user = db.query(User).filter(User.firebase_uid == current_user["uid"]).first()
-        if not user:
-            # Create user if doesn't exist
-            user = User(
-                firebase_uid=current_user["uid"],
-                email=current_user.get("email"),
-                name=current_user.get("name"),
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+# The handlers are async, but the database, OpenAI and ffmpeg calls they
+# make are all blocking. The sync phases below run in the threadpool and the
+# handlers only await them (plus the async Redis prefetch in between), so
+# one slow question never stalls the event loop for everyone else.
 
-        # Check daily question limit for this specific video
-        usage_check = check_usage_limits(
-            db, user.id, "question_per_video", video_id=video_id
-        )
-        if not usage_check["allowed"]:
-            # Get subscription info for upgrade message
-            subscription = get_user_subscription(db, user.id)
-            plan_name = (
-                subscription.plan.name if subscription and subscription.plan else "Free"
-            )
 
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "limit_reached",
-                    "message": usage_check["reason"],
-                    "limit": usage_check.get("limit"),
-                    "current": usage_check.get("current"),
-                    "current_plan": plan_name,
-                    "upgrade_url": "/pricing",
-                },
-            )
+@dataclass
+class _QueryContext:
+    user: User
+    chat_context: Any
+    conversation_context: List[Dict[str, Any]]
+    transcript: Optional[str]
+    summary: Optional[Dict[str, Any]]
+    query_router: QueryRouter
+    query_type: str
 
-        vision_client = OpenAIVisionClient()
 
-        # Get merged conversation history from database (source of truth)
-        conversation_context = get_merged_conversation_history(
-            db=db,
-            video_id=video_id,
+def _question_limit_error(db: Session, user: User, video_id: str) -> Optional[dict]:
+    """The limit_reached error detail, or None if the user may ask."""
+    usage_check = check_usage_limits(
+        db, user.id, "question_per_video", video_id=video_id
+    )
+    if usage_check["allowed"]:
+        return None
+    # Get subscription info for upgrade message
+    subscription = get_user_subscription(db, user.id)
+    plan_name = subscription.plan.name if subscription and subscription.plan else "Free"
+    return {
+        "error": "limit_reached",
+        "message": usage_check["reason"],
+        "limit": usage_check.get("limit"),
+        "current": usage_check.get("current"),
+        "current_plan": plan_name,
+        "upgrade_url": "/pricing",
+    }
+
+
+def _load_query_context(
+    db: Session, current_user: dict, query_request: VideoQuery
+) -> Union[_QueryContext, dict]:
+    """
+    User, chat history, transcript, summary and query type for a question.
+    Returns the limit_reached error detail instead if the user is over the
+    daily question limit for this video.
+    """
+    video_id = query_request.video_id
+
+    # Get user from database to get internal user_id
+    user = db.query(User).filter(User.firebase_uid == current_user["uid"]).first()
+    if not user:
+        # Create user if doesn't exist
+        user = User(
             firebase_uid=current_user["uid"],
-            session_id=query_request.session_id,
-            client_history=query_request.conversation_history or [],
+            email=current_user.get("email"),
+            name=current_user.get("name"),
         )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+    # Check daily question limit for this specific video
+    limit_error = _question_limit_error(db, user, video_id)
+    if limit_error:
+        return limit_error
+
+    # Video columns, summary and chunk availability in one query
+    chat_context = load_video_chat_context(db, video_id)
+
+    # Get conversation history from database (source of truth)
+    conversation_context = history_from_chat_sessions(
+        chat_context.chat_sessions,
+        video_id,
+        current_user["uid"],
+        query_request.session_id,
+    )
 
-        # Get full transcript (needed for summary generation and specific queries)
-        transcript_to_use = None
-        formatting_status_info = get_formatting_status(db, video_id)
-        if formatting_status_info["status"] == "completed":
-            transcript_to_use = formatting_status_info["formatted_transcript"]
-        if not transcript_to_use:
-            transcript_info = get_transcript_cache(db, video_id)
-            if transcript_info and transcript_info.get("transcript_data"):
-                transcript_to_use = transcript_info["transcript_data"]
-            else:
-                transcript_data, json_data = download_transcript_api(video_id)
-                transcript_to_use = transcript_data
-                update_transcript_cache(db, video_id, transcript_data, json_data)
-
-        # Initialize services for Phase 2: Hierarchical Summaries
-        summary_service = SummaryService()
-        query_router = QueryRouter()
+    # Get full transcript (needed for summary generation and specific queries)
+    transcript_to_use = chat_context.transcript
+    if not transcript_to_use:
+        transcript_data, json_data = download_transcript_api(video_id)
+        transcript_to_use = transcript_data
+        update_transcript_cache(db, video_id, transcript_data, json_data)
+        if not chat_context.found:
+            # update_transcript_cache just created it as a YouTube video
+            chat_context.source_type = "youtube"
+
+    # Initialize services for Phase 2: Hierarchical Summaries
+    query_router = QueryRouter()
+
+    # If no summary exists, trigger background generation
+    video_summary = chat_context.summary
+    if not video_summary and transcript_to_use:
+        logger.info(
+            f"No summary found for video {video_id}, triggering background generation"
+        )
+        enqueue_job(
+            db,
+            "summarize",
+            {"video_id": video_id, "transcript": transcript_to_use},
+            idempotency_key=f"summarize:{video_id}",
+        )
 
-        # Check if summary exists
-        video_summary = summary_service.get_summary(db, video_id)
+    # Classify query type for intelligent routing
+    query_type = query_router.classify_query(query_request.query)
+    logger.info(f"Query classified as: {query_type}")
+
+    return _QueryContext(
+        user=user,
+        chat_context=chat_context,
+        conversation_context=conversation_context,
+        transcript=transcript_to_use,
+        summary=video_summary,
+        query_router=query_router,
+        query_type=query_type,
+    )
 
-        # If no summary exists, trigger background generation
-        if not video_summary and transcript_to_use:
-            logger.info(
-                f"No summary found for video {video_id}, triggering background generation"
-            )
-            download_executor.submit(
-                generate_summary_background, video_id, transcript_to_use
-            )
 
-        # Classify query type for intelligent routing
-        query_type = query_router.classify_query(query)
-        logger.info(f"Query classified as: {query_type}")
+async def _prefetch_retrieval_cache(ctx: _QueryContext, query: str, video_id: str):
+    """
+    Pull this query's cached embedding / RAG results into L1 over the async
+    Redis client, so retrieval in the threadpool doesn't block on Redis.
+    """
+    if ctx.summary and ctx.query_type != "broad":
+        top_k = 3 if ctx.query_type == "hybrid" else 5
+        await async_prefetch_query_cache(
+            query, video_id, [QueryRouter.rag_cache_query(query, top_k)]
+        )
 
-        # Build context based on query type and summary availability
-        # Phase 1+2 Combined: Uses both semantic chunks and hierarchical summaries
 
-        # Check if chunks are available for RAG
-        chunks_available = (
-            db.query(TranscriptChunk)
-            .filter(TranscriptChunk.video_id == video_id)
-            .count()
-            > 0
+def _build_llm_context(
+    db: Session, ctx: _QueryContext, video_id: str, query: str
+) -> Tuple[Optional[str], str]:
+    """
+    (context for the LLM, retrieval strategy) based on query type and
+    summary availability. Phase 1+2 combined: uses both semantic chunks and
+    hierarchical summaries.
+    """
+    transcript_to_use = ctx.transcript
+    video_summary = ctx.summary
+    query_router = ctx.query_router
+
+    # Default fallback: Use smart extraction instead of full transcript
+    if not ctx.chat_context.has_chunks and not video_summary and transcript_to_use:
+        context_for_llm = extract_relevant_context(
+            transcript_to_use, query, max_tokens=3000
         )
+        retrieval_strategy = "fallback_extraction"
+        logger.info(f"Using fallback extraction (no chunks/summary available yet)")
+    else:
+        context_for_llm = transcript_to_use  # Original fallback
+        retrieval_strategy = "full_transcript"
+
+    if video_summary:
+        if ctx.query_type == "broad":
+            # Use summary only for broad questions (80-90% token reduction)
+            context_for_llm = query_router.build_context_from_summary(video_summary)
+            retrieval_strategy = "summary_only"
+            logger.info(
+                f"Using summary-only context ({len(context_for_llm)} chars vs {len(transcript_to_use or '')} chars)"
+            )
 
-        # Default fallback: Use smart extraction instead of full transcript
-        if not chunks_available and not video_summary and transcript_to_use:
-            context_for_llm = extract_relevant_context(
-                transcript_to_use, query, max_tokens=3000
+        elif ctx.query_type == "hybrid":
+            # Phase 1+2: Use summary + semantic chunks for hybrid queries
+            context_for_llm = query_router.build_hybrid_context(
+                db, video_id, query, video_summary, transcript_to_use
             )
-            retrieval_strategy = "fallback_extraction"
-            logger.info(f"Using fallback extraction (no chunks/summary available yet)")
-        else:
-            context_for_llm = transcript_to_use  # Original fallback
-            retrieval_strategy = "full_transcript"
-
-        if video_summary:
-            if query_type == "broad":
-                # Use summary only for broad questions (80-90% token reduction)
-                context_for_llm = query_router.build_context_from_summary(video_summary)
-                retrieval_strategy = "summary_only"
-                logger.info(
-                    f"Using summary-only context ({len(context_for_llm)} chars vs {len(transcript_to_use)} chars)"
-                )
+            retrieval_strategy = "hybrid_semantic"
+            logger.info(f"Using hybrid context (summary + top-3 semantic chunks)")
 
-            elif query_type == "hybrid":
-                # Phase 1+2: Use summary + semantic chunks for hybrid queries
-                context_for_llm = query_router.build_hybrid_context(
-                    db, video_id, query, video_summary, transcript_to_use
+        elif ctx.query_type == "specific":
+            # Phase 1: Use semantic chunk retrieval for specific queries
+            semantic_context = query_router.build_semantic_context(
+                db, video_id, query, top_k=5
+            )
+            if semantic_context:
+                context_for_llm = semantic_context
+                retrieval_strategy = "semantic_chunks"
+                logger.info(f"Using semantic chunks context (top-5 relevant chunks)")
+            else:
+                # Fallback: Use smart keyword extraction when chunks not available
+                logger.warning(
+                    f"No chunks available for video {video_id}, using smart extraction fallback"
                 )
-                retrieval_strategy = "hybrid_semantic"
-                logger.info(f"Using hybrid context (summary + top-3 semantic chunks)")
-
-            elif query_type == "specific":
-                # Phase 1: Use semantic chunk retrieval for specific queries
-                semantic_context = query_router.build_semantic_context(
-                    db, video_id, query, top_k=5
+                context_for_llm = extract_relevant_context(
+                    transcript_to_use, query, max_tokens=3000
                 )
-                if semantic_context:
-                    context_for_llm = semantic_context
-                    retrieval_strategy = "semantic_chunks"
-                    logger.info(
-                        f"Using semantic chunks context (top-5 relevant chunks)"
-                    )
-                else:
-                    # Fallback: Use smart keyword extraction when chunks not available
-                    logger.warning(
-                        f"No chunks available for video {video_id}, using smart extraction fallback"
-                    )
-                    context_for_llm = extract_relevant_context(
-                        transcript_to_use, query, max_tokens=3000
-                    )
-                    retrieval_strategy = "fallback_extraction"
-
-        # Check if question is relevant to video content
-        video_record = db.query(Video).filter(Video.id == video_id).first()
-        video_title = video_record.title if video_record else ""
-
-        relevance_check = vision_client.check_question_relevance(
-            question=query,
-            transcript_excerpt=transcript_to_use[:1000] if transcript_to_use else "",
-            video_title=video_title,
-            conversation_history=conversation_context,  # Pass conversation history for context
-        )
+                retrieval_strategy = "fallback_extraction"
 
-        # If question is clearly off-topic, provide gentle redirect
-        if (
-            not relevance_check.get("is_relevant", True)
-            and relevance_check.get("confidence", 0) > 0.7
-        ):
-            # Don't increment usage for off-topic questions
-            return {
-                "response": relevance_check.get(
-                    "suggested_redirect",
-                    "I'm here to help you understand this specific video. Could you ask about something from the video content?",
-                ),
-                "video_id": video_id,
-                "timestamp": timestamp,
-                "query_type": "redirect",
-                "is_off_topic": True,
-            }
-
-        if is_image_query:
-            # YouTube image queries disabled - video download not working
-            if video_record and video_record.source_type == "youtube":
-                raise HTTPException(
-                    status_code=400,
-                    detail="Image queries are not supported for YouTube videos. Please ask questions based on the transcript instead.",
-                )
+    return context_for_llm, retrieval_strategy
 
-            if timestamp is None:
-                raise HTTPException(
-                    status_code=400, detail="Timestamp is required for image queries"
-                )
 
-            # Only for non-YouTube videos (uploaded videos)
-            video_path_local = get_video_path(db, video_id)
-            if not video_path_local:
-                raise HTTPException(
-                    status_code=400, detail="Video not available for frame extraction"
-                )
+def _off_topic_redirect(
+    vision_client: OpenAIVisionClient, ctx: _QueryContext, query: str
+) -> Optional[str]:
+    """Redirect message if the question is clearly off-topic, else None."""
+    relevance_check = vision_client.check_question_relevance(
+        question=query,
+        transcript_excerpt=ctx.transcript[:1000] if ctx.transcript else "",
+        video_title=ctx.chat_context.title,
+        conversation_history=ctx.conversation_context,  # Pass conversation history for context
+    )
+    if (
+        not relevance_check.get("is_relevant", True)
+        and relevance_check.get("confidence", 0) > 0.7
+    ):
+        return relevance_check.get(
+            "suggested_redirect",
+            "I'm here to help you understand this specific video. Could you ask about something from the video content?",
+        )
+    return None
+
+
+def _answer_query(
+    db: Session,
+    ctx: _QueryContext,
+    query_request: VideoQuery,
+    current_user: dict,
+) -> dict:
+    """Retrieval, relevance check, the LLM answer and bookkeeping."""
+    video_id = query_request.video_id
+    query = query_request.query
+    timestamp = query_request.timestamp
+    is_image_query = query_request.is_image_query
+
+    vision_client = OpenAIVisionClient()
+    context_for_llm, retrieval_strategy = _build_llm_context(db, ctx, video_id, query)
+
+    # Check if question is relevant to video content
+    redirect = _off_topic_redirect(vision_client, ctx, query)
+    if redirect is not None:
+        # Don't increment usage for off-topic questions
+        return {
+            "response": redirect,
+            "video_id": video_id,
+            "timestamp": timestamp,
+            "query_type": "redirect",
+            "is_off_topic": True,
+        }
 
-            # Extract frame from local video
-            frame_filename = f"frame_{video_id}_{int(timestamp)}.jpg"
-            frame_path = os.path.join(frames_path, frame_filename)
-            output_file, frame = grab_youtube_frame(
-                video_path_local, timestamp, frame_path
+    if is_image_query:
+        # YouTube image queries disabled - video download not working
+        if ctx.chat_context.source_type == "youtube":
+            raise HTTPException(
+                status_code=400,
+                detail="Image queries are not supported for YouTube videos. Please ask questions based on the transcript instead.",
             )
-            if not output_file:
-                raise HTTPException(status_code=500, detail="Frame extraction failed")
 
-            response = vision_client.ask_with_image(
-                query, frame_path, transcript_to_use, conversation_context
+        if timestamp is None:
+            raise HTTPException(
+                status_code=400, detail="Timestamp is required for image queries"
             )
-            web_sources = []
-            used_web_search = False
-        else:
-            # Use web-augmented answering for text queries with intelligent context
-            web_result = vision_client.ask_with_web_augmentation(
-                prompt=query,
-                context=context_for_llm,  # Use intelligent context instead of full transcript
-                conversation_history=conversation_context,
-                video_title=video_title,
-                enable_search=True,  # Can be controlled via user settings
+
+        # Only for non-YouTube videos (uploaded videos)
+        video_path_local = get_video_path(db, video_id)
+        if not video_path_local:
+            raise HTTPException(
+                status_code=400, detail="Video not available for frame extraction"
             )
-            response = web_result["response"]
-            web_sources = web_result.get("sources", [])
-            used_web_search = web_result.get("used_web_search", False)
-
-        # Normalize AI response for consistent frontend rendering
-        logger.info(f"📝 BEFORE normalization (first 300 chars): {response[:300]}")
-        logger.info(f"📝 BEFORE normalization (repr): {repr(response[:150])}")
-        response = normalize_ai_response(response)
-        logger.info(f"📝 AFTER normalization (first 300 chars): {response[:300]}")
-        logger.info(f"📝 AFTER normalization (repr): {repr(response[:150])}")
-
-        # Store conversation turn in database
-        session_id_used = store_conversation_turn(
-            db=db,
+
+        # Extract the frame; for S3 URLs ffmpeg fetches only the byte ranges
+        # it needs
+        frame_filename = f"frame_{video_id}_{int(timestamp)}.jpg"
+        frame_path = os.path.join(frames_path, frame_filename)
+        output_file = extract_frame(
+            video_path_local,
+            timestamp,
+            frame_path,
             video_id=video_id,
-            user_id=user.id,
+            keyframe_index_key=get_keyframe_index_key(db, video_id),
+        )
+        if not output_file:
+            raise HTTPException(status_code=500, detail="Frame extraction failed")
+
+        response = vision_client.ask_with_image(
+            query, frame_path, ctx.transcript, ctx.conversation_context
+        )
+        web_sources = []
+        used_web_search = False
+    else:
+        # Use web-augmented answering for text queries with intelligent context
+        web_result = vision_client.ask_with_web_augmentation(
+            prompt=query,
+            context=context_for_llm,  # Use intelligent context instead of full transcript
+            conversation_history=ctx.conversation_context,
+            video_title=ctx.chat_context.title,
+            enable_search=True,  # Can be controlled via user settings
+        )
+        response = web_result["response"]
+        web_sources = web_result.get("sources", [])
+        used_web_search = web_result.get("used_web_search", False)
+
+    # Normalize AI response for consistent frontend rendering
+    logger.info(f"📝 BEFORE normalization (first 300 chars): {response[:300]}")
+    logger.info(f"📝 BEFORE normalization (repr): {repr(response[:150])}")
+    response = normalize_ai_response(response)
+    logger.info(f"📝 AFTER normalization (first 300 chars): {response[:300]}")
+    logger.info(f"📝 AFTER normalization (repr): {repr(response[:150])}")
+
+    _record_turn(db, ctx, query_request, current_user, response)
+
+    return {
+        "response": response,
+        "video_id": video_id,
+        "timestamp": timestamp,
+        "query_type": "image" if is_image_query else "text",
+        "web_sources": web_sources,
+        "used_web_search": used_web_search,
+        "retrieval_strategy": retrieval_strategy,  # For analytics
+        "classified_query_type": ctx.query_type,  # For analytics
+    }
+
+
+def _record_turn(
+    db: Session,
+    ctx: _QueryContext,
+    query_request: VideoQuery,
+    current_user: dict,
+    response: Optional[str],
+):
+    """Store the conversation turn (if answered) and count the question."""
+    if response:
+        store_conversation_turn(
+            db=db,
+            video_id=query_request.video_id,
+            user_id=ctx.user.id,
             firebase_uid=current_user["uid"],
-            user_message=query,
+            user_message=query_request.query,
             ai_response=response,
-            timestamp=timestamp,
+            timestamp=query_request.timestamp,
             session_id=query_request.session_id,
         )
 
-        # Increment question count for this video
-        increment_usage(db, user.id, "question_per_video", 1, video_id=video_id)
+    # Increment question count for this video
+    increment_usage(
+        db, ctx.user.id, "question_per_video", 1, video_id=query_request.video_id
+    )
 
-        return {
-            "response": response,
-            "video_id": video_id,
-            "timestamp": timestamp,
-            "query_type": "image" if is_image_query else "text",
-            "web_sources": web_sources,
-            "used_web_search": used_web_search,
-            "retrieval_strategy": retrieval_strategy,  # For analytics
-            "classified_query_type": query_type,  # For analytics
-        }
+
+@router.post("/video")
+async def process_query(
+    query_request: VideoQuery,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    try:
+        ctx = await run_in_threadpool(
+            _load_query_context, db, current_user, query_request
+        )
+        if isinstance(ctx, dict):
+            raise HTTPException(status_code=429, detail=ctx)
+
+        await _prefetch_retrieval_cache(
+            ctx, query_request.query, query_request.video_id
+        )
+        return await run_in_threadpool(
+            _answer_query, db, ctx, query_request, current_user
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to process query: {str(e)}"
         )
 
 
+def _stream_preamble(
+    db: Session, ctx: _QueryContext, query_request: VideoQuery
+) -> Tuple[OpenAIVisionClient, Optional[str], Optional[str]]:
+    """(client, redirect message or None, LLM context) for a streamed answer."""
+    vision_client = OpenAIVisionClient()
+    context_for_llm, _ = _build_llm_context(
+        db, ctx, query_request.video_id, query_request.query
+    )
+    redirect = _off_topic_redirect(vision_client, ctx, query_request.query)
+    return vision_client, redirect, context_for_llm
+
+
 @router.post("/video/stream")
 async def process_query_stream(
     query_request: VideoQuery,
@@ -329,159 +441,33 @@ async def process_query_stream(
 
     async def generate_stream():
         try:
-            video_id = query_request.video_id
-            query = query_request.query
-            timestamp = query_request.timestamp
-            is_image_query = query_request.is_image_query
-
-            # Get user from database
-            user = (
-                db.query(User).filter(User.firebase_uid == current_user["uid"]).first()
+            ctx = await run_in_threadpool(
+                _load_query_context, db, current_user, query_request
             )
-            if not user:
-                user = User(
-                    firebase_uid=current_user["uid"],
-                    email=current_user.get("email"),
-                    name=current_user.get("name"),
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-
-            # Check daily question limit
-            usage_check = check_usage_limits(
-                db, user.id, "question_per_video", video_id=video_id
-            )
-            if not usage_check["allowed"]:
-                subscription = get_user_subscription(db, user.id)
-                plan_name = (
-                    subscription.plan.name
-                    if subscription and subscription.plan
-                    else "Free"
-                )
-
+            if isinstance(ctx, dict):
                 error_msg = {
                     "type": "error",
                     "data": {
-                        "error": "limit_reached",
-                        "message": usage_check["reason"],
-                        "current_plan": plan_name,
+                        key: ctx[key] for key in ("error", "message", "current_plan")
                     },
                 }
                 yield f"data: {json.dumps(error_msg)}\n\n"
                 return
 
-            vision_client = OpenAIVisionClient()
-
-            # Get conversation history (with caching optimization)
-            conversation_context = get_merged_conversation_history(
-                db=db,
-                video_id=video_id,
-                firebase_uid=current_user["uid"],
-                session_id=query_request.session_id,
-                client_history=query_request.conversation_history or [],
+            await _prefetch_retrieval_cache(
+                ctx, query_request.query, query_request.video_id
             )
-
-            # Get transcript (with caching)
-            transcript_to_use = None
-            formatting_status_info = get_formatting_status(db, video_id)
-            if formatting_status_info["status"] == "completed":
-                transcript_to_use = formatting_status_info["formatted_transcript"]
-            if not transcript_to_use:
-                transcript_info = get_transcript_cache(db, video_id)
-                if transcript_info and transcript_info.get("transcript_data"):
-                    transcript_to_use = transcript_info["transcript_data"]
-                else:
-                    transcript_data, json_data = download_transcript_api(video_id)
-                    transcript_to_use = transcript_data
-                    update_transcript_cache(db, video_id, transcript_data, json_data)
-
-            # Initialize services
-            summary_service = SummaryService()
-            query_router = QueryRouter()
-
-            # Check if summary exists (trigger generation if missing)
-            video_summary = summary_service.get_summary(db, video_id)
-            if not video_summary and transcript_to_use:
-                logger.info(f"[STREAM] No summary, triggering background generation")
-                download_executor.submit(
-                    generate_summary_background, video_id, transcript_to_use
-                )
-
-            # Classify query type
-            query_type = query_router.classify_query(query)
-            logger.info(f"[STREAM] Query classified as: {query_type}")
-
-            # Build context based on query type (uses caching)
-            chunks_available = (
-                db.query(TranscriptChunk)
-                .filter(TranscriptChunk.video_id == video_id)
-                .count()
-                > 0
-            )
-
-            if not chunks_available and not video_summary and transcript_to_use:
-                context_for_llm = extract_relevant_context(
-                    transcript_to_use, query, max_tokens=3000
-                )
-                retrieval_strategy = "fallback_extraction"
-            else:
-                context_for_llm = transcript_to_use
-
-            if video_summary:
-                if query_type == "broad":
-                    context_for_llm = query_router.build_context_from_summary(
-                        video_summary
-                    )
-                    retrieval_strategy = "summary_only"
-                elif query_type == "hybrid":
-                    context_for_llm = query_router.build_hybrid_context(
-                        db, video_id, query, video_summary, transcript_to_use
-                    )
-                    retrieval_strategy = "hybrid_semantic"
-                elif query_type == "specific":
-                    semantic_context = query_router.build_semantic_context(
-                        db, video_id, query, top_k=5
-                    )
-                    if semantic_context:
-                        context_for_llm = semantic_context
-                        retrieval_strategy = "semantic_chunks"
-                    else:
-                        context_for_llm = extract_relevant_context(
-                            transcript_to_use, query, max_tokens=3000
-                        )
-                        retrieval_strategy = "fallback_extraction"
-
-            # Check question relevance
-            video_record = db.query(Video).filter(Video.id == video_id).first()
-            video_title = video_record.title if video_record else ""
-
-            relevance_check = vision_client.check_question_relevance(
-                question=query,
-                transcript_excerpt=transcript_to_use[:1000]
-                if transcript_to_use
-                else "",
-                video_title=video_title,
-                conversation_history=conversation_context,
+            vision_client, redirect, context_for_llm = await run_in_threadpool(
+                _stream_preamble, db, ctx, query_request
             )
-
-            if (
-                not relevance_check.get("is_relevant", True)
-                and relevance_check.get("confidence", 0) > 0.7
-            ):
-                redirect_msg = {
-                    "type": "content",
-                    "data": relevance_check.get(
-                        "suggested_redirect",
-                        "I'm here to help you understand this specific video. Could you ask about something from the video content?",
-                    ),
-                }
+            if redirect is not None:
+                redirect_msg = {"type": "content", "data": redirect}
                 yield f"data: {json.dumps(redirect_msg)}\n\n"
                 yield f"data: {json.dumps({'type': 'done'})}\n\n"
                 return
 
             # Image queries not supported for streaming (rare case)
-            if is_image_query:
+            if query_request.is_image_query:
                 error_msg = {
                     "type": "error",
                     "data": "Streaming not supported for image queries",
@@ -489,14 +475,17 @@ async def process_query_stream(
                 yield f"data: {json.dumps(error_msg)}\n\n"
                 return
 
-            # Stream the response!
+            # Stream the response! The OpenAI stream is a blocking iterator,
+            # so each chunk is pulled in the threadpool
             full_response = ""
-            for chunk_json in vision_client.ask_with_web_augmentation_stream(
-                prompt=query,
-                context=context_for_llm,
-                conversation_history=conversation_context,
-                video_title=video_title,
-                enable_search=True,
+            async for chunk_json in iterate_in_threadpool(
+                vision_client.ask_with_web_augmentation_stream(
+                    prompt=query_request.query,
+                    context=context_for_llm,
+                    conversation_history=ctx.conversation_context,
+                    video_title=ctx.chat_context.title,
+                    enable_search=True,
+                )
             ):
                 yield f"data: {chunk_json}\n\n"
 
@@ -508,25 +497,12 @@ async def process_query_stream(
                 except:
                     pass
 
-            # Store conversation turn in database
+            # Store conversation turn in database and increment usage
             if full_response:
-                from utils.text_utils import normalize_ai_response
-
                 full_response = normalize_ai_response(full_response)
-
-                store_conversation_turn(
-                    db=db,
-                    video_id=video_id,
-                    user_id=user.id,
-                    firebase_uid=current_user["uid"],
-                    user_message=query,
-                    ai_response=full_response,
-                    timestamp=timestamp,
-                    session_id=query_request.session_id,
-                )
-
-            # Increment usage
-            increment_usage(db, user.id, "question_per_video", 1, video_id=video_id)
+            await run_in_threadpool(
+                _record_turn, db, ctx, query_request, current_user, full_response
+            )
 
         except Exception as e:
             logger.error(f"[STREAM] Error: {e}")
@@ -42,10 +42,12 @@ from controllers.db_helpers import (
     get_download_status,
     get_formatting_status,
     get_transcript_cache,
+    get_keyframe_index_key,
     get_video_path,
     update_transcript_cache,
 )
-from utils.youtube_utils import download_transcript_api, grab_youtube_frame
+from utils.frame_service import extract_frame
+from utils.youtube_utils import download_transcript_api
 from controllers.storage import s3_presign_url
 
 router = APIRouter(tags=["Sharing"], prefix="/api/sharing")
@@ -1205,8 +1207,12 @@ async def shared_video_chat(
                         }
                 frame_filename = f"frame_{video_id}_{int(timestamp)}.jpg"
                 frame_path = os.path.join(frames_path, frame_filename)
-                output_file, frame = grab_youtube_frame(
-                    video_path_local, timestamp, frame_path
+                output_file = extract_frame(
+                    video_path_local,
+                    timestamp,
+                    frame_path,
+                    video_id=video_id,
+                    keyframe_index_key=get_keyframe_index_key(db, video_id),
                 )
                 if not output_file:
                     raise HTTPException(
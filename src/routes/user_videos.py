@@ -1,23 +1,21 @@
-import os
 import re
-import tempfile
-import shutil
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import Body
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from utils.db import SessionLocal, get_db
 from models import Video
 from controllers.config import (
     upload_executor,
-    video_path,
     s3_client,
     AWS_S3_BUCKET,
+    logger,
 )
 from controllers.storage import (
-    s3_upload_file,
+    s3_upload_bytes,
     s3_presign_url,
-    generate_thumbnail,
     transcribe_video_with_deepgram,
     transcribe_video_with_deepgram_url,
     transcribe_video_with_deepgram_timed,
@@ -26,6 +24,18 @@ from controllers.storage import (
 from controllers.db_helpers import update_upload_status, get_upload_status
 from controllers.background_tasks import format_uploaded_transcript_background
 from utils.firebase_auth import get_current_user
+from utils.frame_service import read_frame
+from utils.keyframe_index import (
+    KEYFRAME_INDEX_ENABLED,
+    create_keyframe_index,
+    load_keyframe_index,
+)
+from utils.s3_multipart import (
+    abort_presigned_upload,
+    complete_presigned_upload,
+    start_presigned_upload,
+    stream_form_file_to_s3,
+)
 from models import SharedLink, SharedLinkAccess
 from routes.sharing import validate_shared_video_access
 from routes.gallery_folders import check_content_is_shared
@@ -39,53 +49,173 @@ async def get_upload_status_endpoint(video_id: str, db: Session = Depends(get_db
     return get_upload_status(db, video_id)
 
 
+def _upload_s3_key(user_id: str, video_id: str, filename: Optional[str]) -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "-", filename or "video.mp4").strip("-")
+    return f"user_videos/{user_id}/{video_id}_{safe_name}"
+
+
 @router.post("/upload")
 async def upload_user_video(
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    """
+    Accepts a multipart/form-data body with the video in the "file" field.
+    The body is streamed into an S3 multipart upload as it arrives
+    (utils/s3_multipart.py) rather than buffered on local disk.
+    """
+    if not s3_client or not AWS_S3_BUCKET:
+        raise HTTPException(status_code=500, detail="S3 is not configured on server")
+    vid = str(uuid.uuid4())
+    user_id = current_user["uid"]
+    try:
+        upload = await stream_form_file_to_s3(
+            request,
+            "file",
+            lambda filename: _upload_s3_key(user_id, vid, filename),
+            content_type="video/mp4",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+    original_filename = upload.filename or "Uploaded Video"
+    upload_executor.submit(
+        process_upload_background,
+        vid,
+        user_id,
+        upload.key,
+        original_filename,
+        upload.sha256,
+    )
+    return {
+        "success": True,
+        "video_id": vid,
+        "title": original_filename,
+        "message": f"Upload started. Use /api/user-videos/upload-status/{vid} to track progress.",
+    }
+
+
+def _own_upload_key(payload: dict, user_id: str) -> Tuple[str, str]:
+    """(video_id, key) of a browser multipart upload, checked to be the user's."""
+    video_id = str(payload.get("video_id") or "")
+    key = str(payload.get("key") or "")
+    if not video_id or not key.startswith(f"user_videos/{user_id}/{video_id}_"):
+        raise HTTPException(status_code=400, detail="Unknown upload")
+    return video_id, key
+
+
+@router.post("/upload/multipart/start")
+async def start_multipart_upload(
+    payload: dict = Body(...),
+    current_user=Depends(get_current_user),
+):
+    """
+    Start a direct browser-to-S3 upload of payload {"filename", "size"}.
+
+    The browser PUTs part n (bytes [(n - 1) * part_size, n * part_size)) to
+    parts[n - 1].url and posts the ETag response headers to
+    /upload/multipart/complete.
+    """
     if not s3_client or not AWS_S3_BUCKET:
         raise HTTPException(status_code=500, detail="S3 is not configured on server")
+    try:
+        size = int(payload.get("size") or 0)
+    except (TypeError, ValueError):
+        size = 0
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be a positive integer")
     vid = str(uuid.uuid4())
+    key = _upload_s3_key(current_user["uid"], vid, payload.get("filename"))
+    try:
+        upload = await run_in_threadpool(start_presigned_upload, key, size, "video/mp4")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start upload: {str(e)}")
+    return {"success": True, "video_id": vid, **upload}
+
+
+@router.post("/upload/multipart/complete")
+async def complete_multipart_upload(
+    payload: dict = Body(...),
+    current_user=Depends(get_current_user),
+):
+    """
+    Finish a browser upload and start processing it.
+
+    payload: {"video_id", "key", "upload_id", "filename",
+    "parts": [{"part_number", "etag"}]}
+    """
+    user_id = current_user["uid"]
+    vid, key = _own_upload_key(payload, user_id)
+    parts = payload.get("parts")
+    if not isinstance(parts, list) or not parts:
+        raise HTTPException(status_code=400, detail="parts must be a non-empty list")
     try:
-        suffix = os.path.splitext(file.filename or "video.mp4")[1] or ".mp4"
-        if suffix.lower() not in [".mp4", ".mov", ".mkv", ".webm", ".avi"]:
-            suffix = ".mp4"
-        temp_fd, temp_path = tempfile.mkstemp(suffix=suffix)
-        os.close(temp_fd)
-        chunk_size = 1024 * 1024
-        with open(temp_path, "wb") as out:
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                out.write(chunk)
-        original_filename = file.filename or "Uploaded Video"
+        await run_in_threadpool(
+            complete_presigned_upload, key, str(payload.get("upload_id")), parts
+        )
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to buffer uploaded file: {str(e)}"
+            status_code=400, detail=f"Failed to complete upload: {str(e)}"
         )
-    user_id = current_user["uid"]
+    original_filename = payload.get("filename") or "Uploaded Video"
+    # The parts never pass through the server, so there's no content hash
     upload_executor.submit(
-        process_upload_background, vid, user_id, temp_path, original_filename
+        process_upload_background, vid, user_id, key, original_filename
     )
     return {
         "success": True,
         "video_id": vid,
-        "title": file.filename or "Uploaded Video",
+        "title": original_filename,
         "message": f"Upload started. Use /api/user-videos/upload-status/{vid} to track progress.",
     }
 
 
+@router.post("/upload/multipart/abort")
+async def abort_multipart_upload(
+    payload: dict = Body(...),
+    current_user=Depends(get_current_user),
+):
+    _, key = _own_upload_key(payload, current_user["uid"])
+    try:
+        await run_in_threadpool(
+            abort_presigned_upload, key, str(payload.get("upload_id"))
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to abort upload: {str(e)}")
+    return {"success": True}
+
+
+def _thumbnail_jpeg(source: str) -> Optional[bytes]:
+    """Frame at 1s (or the first frame of shorter videos) as JPEG bytes."""
+    for timestamp in (1.0, 0.0):
+        try:
+            return read_frame(source, timestamp)
+        except Exception as e:
+            logger.warning(f"No thumbnail frame at {timestamp}s: {e}")
+    return None
+
+
 def process_upload_background(
-    video_id: str, user_id: str, temp_path: str, original_filename: str
+    video_id: str,
+    user_id: str,
+    s3_key: str,
+    original_filename: str,
+    content_sha256: Optional[str] = None,
 ):
+    """
+    Thumbnail, keyframe index and transcript for a video already stored at
+    s3_key. ffmpeg and Deepgram read the object through a presigned URL, so
+    the video is never copied to local disk.
+    """
     vid = video_id
 
     db = SessionLocal()
-    uploaded_s3_objects = []
-    local_files_to_cleanup = []
+    # The video itself is only deleted if processing fails
+    uploaded_s3_objects = [s3_key]
+    transcript_text = ""
+    transcript_json = None
     update_upload_status(
         db,
         vid,
@@ -100,12 +230,9 @@ def process_upload_background(
 
     def rollback_upload():
         try:
-            for s3_key in uploaded_s3_objects:
+            for key in uploaded_s3_objects:
                 if s3_client and AWS_S3_BUCKET:
-                    s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=s3_key)
-            for file_path in local_files_to_cleanup:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                    s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=key)
             video_row = db.query(Video).filter(Video.id == vid).first()
             if video_row:
                 db.delete(video_row)
@@ -114,68 +241,35 @@ def process_upload_background(
             db.rollback()
 
     try:
-        update_upload_status(
-            db,
-            vid,
-            {
-                "status": "processing",
-                "message": "Saving uploaded file...",
-                "progress": 10,
-                "current_step": "saving_file",
-                "total_steps": 6,
-            },
-        )
-        try:
-            os.path.getsize(temp_path)
-        except Exception:
-            pass
-        update_upload_status(
-            db,
-            vid,
-            {
-                "status": "processing",
-                "message": "Preparing for cloud upload...",
-                "progress": 20,
-                "current_step": "preparing_upload",
-                "total_steps": 6,
-            },
-        )
-        safe_name = re.sub(
-            r"[^A-Za-z0-9._-]+", "-", original_filename or "video.mp4"
-        ).strip("-")
-        s3_key = f"user_videos/{user_id}/{vid}_{safe_name}"
         thumb_key = f"thumbnails/{user_id}/{vid}.jpg"
         transcript_key = f"transcripts/{user_id}/{vid}.txt"
+        keyframe_index_key = None
+        presigned = s3_presign_url(s3_key, expires_in=60 * 60 * 12)
         update_upload_status(
             db,
             vid,
             {
                 "status": "processing",
-                "message": "Uploading video to cloud storage...",
-                "progress": 35,
-                "current_step": "uploading_video",
-                "total_steps": 6,
-            },
-        )
-        s3_upload_file(temp_path, s3_key, content_type="video/mp4")
-        uploaded_s3_objects.append(s3_key)
-        update_upload_status(
-            db,
-            vid,
-            {
-                "status": "processing",
-                "message": "Generating thumbnail...",
+                "message": "Generating thumbnail and preview frames...",
                 "progress": 50,
                 "current_step": "generating_thumbnail",
                 "total_steps": 6,
             },
         )
-        thumb_fd, thumb_path = tempfile.mkstemp(suffix=".jpg")
-        os.close(thumb_fd)
-        local_files_to_cleanup.append(thumb_path)
-        if generate_thumbnail(temp_path, thumb_path, ts_seconds=1.0):
-            s3_upload_file(thumb_path, thumb_key, content_type="image/jpeg")
+        thumbnail = _thumbnail_jpeg(presigned)
+        if thumbnail:
+            s3_upload_bytes(thumbnail, thumb_key, content_type="image/jpeg")
             uploaded_s3_objects.append(thumb_key)
+        if KEYFRAME_INDEX_ENABLED:
+            # Sprite sheets + index for image questions and scrubbing previews;
+            # a failure here only costs those, not the upload
+            try:
+                keyframe_index_key, keyframe_keys = create_keyframe_index(
+                    presigned, f"keyframes/{user_id}/{vid}"
+                )
+                uploaded_s3_objects.extend(keyframe_keys)
+            except Exception as e:
+                logger.warning(f"Keyframe index failed for {vid}: {e}")
         update_upload_status(
             db,
             vid,
@@ -187,13 +281,10 @@ def process_upload_background(
                 "total_steps": 6,
             },
         )
-        transcript_text = ""
-        transcript_json = None
         # Prefer server-to-server URL pull by Deepgram WITH utterance-level
         # timing so the formatted transcript carries REAL timestamps. Without
         # this the formatter falls back to fabricated 15s-per-chunk timing.
         try:
-            presigned = s3_presign_url(s3_key, expires_in=60 * 60 * 12)
             timed = transcribe_video_with_deepgram_url_timed(
                 presigned, video_title=(original_filename or "Uploaded Video")
             )
@@ -208,11 +299,12 @@ def process_upload_background(
         except Exception:
             transcript_text = ""
             transcript_json = None
-        # Fallback to local timed transcription if the URL approach fails entirely
+        # Fall back to extracting the audio ourselves (ffmpeg reads the
+        # presigned URL) if the URL approach fails entirely
         if not transcript_text:
             try:
                 timed_local = transcribe_video_with_deepgram_timed(
-                    temp_path, video_title=(original_filename or "Uploaded Video")
+                    presigned, video_title=(original_filename or "Uploaded Video")
                 )
                 segments = (timed_local or {}).get("transcription") or []
                 transcript_text = " ".join(s.get("text", "") for s in segments).strip()
@@ -220,19 +312,24 @@ def process_upload_background(
             except Exception:
                 transcript_text = ""
                 transcript_json = None
-            # Last resort: plain local transcription (no timing available).
+            # Last resort: plain transcription (no timing available). A video
+            # without a transcript is still kept rather than rolled back
             if not transcript_text:
-                transcript_text = transcribe_video_with_deepgram(temp_path)
+                try:
+                    transcript_text = transcribe_video_with_deepgram(presigned)
+                except Exception as e:
+                    logger.error(f"Transcription failed for video {vid}: {e}")
+                    transcript_text = ""
                 transcript_json = None
         if transcript_text:
-            with tempfile.NamedTemporaryFile(
-                "w", encoding="utf-8", delete=False, suffix=".txt"
-            ) as tf:
-                tf.write(transcript_text)
-                transcript_tmp = tf.name
-                local_files_to_cleanup.append(transcript_tmp)
-            s3_upload_file(transcript_tmp, transcript_key, content_type="text/plain")
+            s3_upload_bytes(
+                transcript_text.encode("utf-8"),
+                transcript_key,
+                content_type="text/plain",
+            )
             uploaded_s3_objects.append(transcript_key)
+        else:
+            transcript_key = None
         update_upload_status(
             db,
             vid,
@@ -244,21 +341,15 @@ def process_upload_background(
                 "total_steps": 6,
             },
         )
-        local_copy = os.path.join(video_path, f"{vid}.mp4")
-        try:
-            os.makedirs(video_path, exist_ok=True)
-            shutil.move(temp_path, local_copy)
-            local_files_to_cleanup.append(local_copy)
-        except Exception:
-            local_copy = temp_path
         video_row = db.query(Video).filter(Video.id == vid).first()
         if video_row:
             video_row.user_id = user_id
             video_row.title = original_filename or "Uploaded Video"
             video_row.s3_key = s3_key
             video_row.thumb_key = thumb_key
+            video_row.keyframe_index_key = keyframe_index_key
             video_row.transcript_s3_key = transcript_key
-            video_row.local_path = local_copy
+            video_row.content_sha256 = content_sha256
             video_row.transcript_text = transcript_text or None
             video_row.transcript_json = transcript_json
             db.add(video_row)
@@ -271,8 +362,9 @@ def process_upload_background(
                 title=original_filename or "Uploaded Video",
                 s3_key=s3_key,
                 thumb_key=thumb_key,
+                keyframe_index_key=keyframe_index_key,
                 transcript_s3_key=transcript_key,
-                local_path=local_copy,
+                content_sha256=content_sha256,
                 transcript_text=transcript_text or None,
                 transcript_json=transcript_json,
             )
@@ -289,8 +381,6 @@ def process_upload_background(
                 "total_steps": 6,
             },
         )
-        s3_presign_url(s3_key, expires_in=3600)
-        s3_presign_url(thumb_key, expires_in=3600)
         return
     except Exception as e:
         update_upload_status(
@@ -319,11 +409,6 @@ def process_upload_background(
             db.close()
         except Exception:
             pass
-        try:
-            if "temp_path" in locals() and os.path.exists(temp_path):
-                os.remove(temp_path)
-        except Exception:
-            pass
 
 
 @router.get("/list")
@@ -429,6 +514,40 @@ async def get_user_video_info(
     }
 
 
+@router.get("/keyframes")
+async def get_user_video_keyframes(
+    video_id: str, share_token: str = None, db: Session = Depends(get_db)
+):
+    """Keyframe index with presigned sprite sheet URLs, for scrubbing previews."""
+    if share_token:
+        video = validate_shared_video_access(db, share_token, video_id)
+        if not video:
+            raise HTTPException(
+                status_code=404, detail="Video not found in shared content"
+            )
+    else:
+        video = (
+            db.query(Video)
+            .filter(Video.id == video_id, Video.source_type == "uploaded")
+            .first()
+        )
+        if not video:
+            raise HTTPException(status_code=404, detail="Unknown video_id")
+
+    if not (video.keyframe_index_key and s3_client and AWS_S3_BUCKET):
+        raise HTTPException(status_code=404, detail="No keyframe index for video")
+    try:
+        index = load_keyframe_index(video.keyframe_index_key)
+        sheet_urls = [
+            s3_presign_url(key, expires_in=3600) for key in index.get("sheets", [])
+        ]
+    except Exception as e:
+        logger.error(f"Failed to load keyframe index for {video_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load keyframe index")
+
+    return {**index, "video_id": video.id, "sheet_urls": sheet_urls}
+
+
 @router.get("/chat-sessions")
 async def get_chat_sessions(
     video_id: str,
@@ -24,6 +24,7 @@ from models import (
     UserUsage,
 )
 from schemas import UserProfileResponse, UserProfileUpdate
+from utils.keyframe_index import delete_keyframe_index
 from services.brevo import add_contact_to_brevo
 from services.email import (
     send_welcome_email_background,
@@ -203,6 +204,7 @@ async def delete_account(
         for v in videos:
             _delete_s3_key(v.s3_key)
             _delete_s3_key(v.thumb_key)
+            delete_keyframe_index(v.keyframe_index_key)
             _delete_s3_key(v.transcript_s3_key)
         db.query(Video).filter(Video.user_id == firebase_uid).delete(
             synchronize_session=False
@@ -7,7 +7,6 @@ from utils.youtube_utils import (
 )
 from controllers.config import (
     download_executor,
-    formatting_executor,
     s3_client,
     AWS_S3_BUCKET,
     logger,
@@ -18,10 +17,7 @@ from controllers.db_helpers import (
     get_transcript_cache,
     get_formatting_status,
 )
-from controllers.background_tasks import (
-    download_video_background,
-    format_transcript_background,
-)
+from controllers.background_tasks import download_video_background
 from controllers.storage import s3_presign_url
 from controllers.video_service import get_video_title
 from controllers.subscription_service import (
@@ -30,6 +26,7 @@ from controllers.subscription_service import (
     get_user_subscription,
 )
 from schemas import YouTubeRequest
+from services.job_queue import enqueue_job
 from utils.firebase_auth import get_current_user
 from models import Video, User
 
@@ -259,8 +256,11 @@ async def get_youtube_info(
         status = get_formatting_status(db, video_id)
         if status["status"] == "not_found":
             if json_data:
-                formatting_executor.submit(
-                    format_transcript_background, video_id, json_data
+                enqueue_job(
+                    db,
+                    "format",
+                    {"video_id": video_id, "json_data": json_data},
+                    idempotency_key=f"format:{video_id}",
                 )
                 # format_transcript_background handles both formatting AND chunk/summary generation
                 formatting_message = (
@@ -271,8 +271,11 @@ async def get_youtube_info(
         elif status["status"] == "failed":
             # Retry formatting if previous attempt failed and json data is available
             if json_data:
-                formatting_executor.submit(
-                    format_transcript_background, video_id, json_data
+                enqueue_job(
+                    db,
+                    "format",
+                    {"video_id": video_id, "json_data": json_data},
+                    idempotency_key=f"format:{video_id}",
                 )
                 # format_transcript_background handles both formatting AND chunk/summary generation
                 formatting_message = (
@@ -0,0 +1,231 @@
+"""
+pgvector ANN index management for transcript and material chunks.
+
+Each chunk table gets one approximate-nearest-neighbour index on its
+embedding column, built with HNSW (default) or IVFFlat, or none at all
+("exact": rely on the per-document btree filter and an exact sort).
+
+Every retrieval query filters to one video/material first. A global ANN
+index returns its ef_search/probes nearest rows *before* that filter, so
+a filtered top-k can come back short. apply_search_settings() therefore
+sets, per transaction:
+- hnsw.ef_search / ivfflat.probes, sized to at least the requested top_k
+- iterative scans (pgvector >= 0.8 only), which keep walking the index
+  until enough rows pass the filter
+
+Partial indexes per document aren't practical (one index per video), and
+pgvector can't build composite btree+vector indexes, so filtering is
+handled with iterative scans rather than per-document indexes.
+
+Settings come from the environment, e.g.:
+    VECTOR_INDEX_TRANSCRIPT_CHUNKS=hnsw|ivfflat|exact
+    VECTOR_INDEX_HNSW_EF_SEARCH=100
+    VECTOR_INDEX_IVFFLAT_PROBES=10
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+
+METHODS = ("hnsw", "ivfflat", "exact")
+
+HNSW_M = int(os.getenv("VECTOR_INDEX_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_INDEX_HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_INDEX_HNSW_EF_SEARCH", "100"))
+IVFFLAT_LISTS = int(os.getenv("VECTOR_INDEX_IVFFLAT_LISTS", "100"))
+IVFFLAT_PROBES = int(os.getenv("VECTOR_INDEX_IVFFLAT_PROBES", "10"))
+# off | relaxed_order | strict_order (pgvector >= 0.8)
+ITERATIVE_SCAN = os.getenv("VECTOR_INDEX_ITERATIVE_SCAN", "relaxed_order")
+
+
+class AnnIndexSpec:
+    """
+    How one table's embedding column is indexed and searched.
+
+    Args:
+        table: Table name
+        method: "hnsw", "ivfflat" or "exact" (no ANN index)
+        column: Vector column name
+        m, ef_construction: HNSW build parameters
+        lists: IVFFlat build parameter
+    """
+
+    def __init__(
+        self,
+        table: str,
+        method: str = "hnsw",
+        column: str = "embedding",
+        m: int = HNSW_M,
+        ef_construction: int = HNSW_EF_CONSTRUCTION,
+        lists: int = IVFFLAT_LISTS,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown vector index method {method!r}")
+        self.table = table
+        self.method = method
+        self.column = column
+        self.m = m
+        self.ef_construction = ef_construction
+        self.lists = lists
+
+    @property
+    def index_name(self) -> str:
+        return f"idx_{self.table}_{self.column}_ann"
+
+    def create_sql(self, concurrently: bool = False) -> Optional[str]:
+        """CREATE INDEX statement, or None for the exact strategy."""
+        if self.method == "exact":
+            return None
+        if self.method == "hnsw":
+            options = f"m = {self.m}, ef_construction = {self.ef_construction}"
+        else:
+            options = f"lists = {self.lists}"
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}"
+            f"IF NOT EXISTS {self.index_name} ON {self.table} "
+            f"USING {self.method} ({self.column} vector_cosine_ops) "
+            f"WITH ({options})"
+        )
+
+    def drop_sql(self, concurrently: bool = False) -> str:
+        return (
+            f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}"
+            f"IF EXISTS {self.index_name}"
+        )
+
+
+ANN_INDEXES: Dict[str, AnnIndexSpec] = {
+    table: AnnIndexSpec(
+        table, method=os.getenv(f"VECTOR_INDEX_{table.upper()}", "hnsw").lower()
+    )
+    for table in ("transcript_chunks", "material_chunks")
+}
+
+
+_pgvector_version: Optional[tuple] = None
+
+
+def pgvector_version(db: Session) -> tuple:
+    """Installed pgvector version as a tuple, e.g. (0, 8, 0); cached."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = db.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        _pgvector_version = tuple(
+            int(part) for part in (version or "0").split(".") if part.isdigit()
+        )
+    return _pgvector_version
+
+
+def search_settings(
+    table: str,
+    top_k: int = 20,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    iterative_scan: bool = True,
+) -> Dict[str, str]:
+    """GUC values for an ANN query on table returning top_k rows."""
+    spec = ANN_INDEXES[table]
+    iterative = iterative_scan and ITERATIVE_SCAN != "off"
+    if spec.method == "hnsw":
+        settings = {"hnsw.ef_search": str(max(ef_search or HNSW_EF_SEARCH, top_k))}
+        if iterative:
+            settings["hnsw.iterative_scan"] = ITERATIVE_SCAN
+        return settings
+    if spec.method == "ivfflat":
+        settings = {"ivfflat.probes": str(min(probes or IVFFLAT_PROBES, spec.lists))}
+        if iterative:
+            # ivfflat only supports relaxed ordering
+            settings["ivfflat.iterative_scan"] = "relaxed_order"
+        return settings
+    return {}
+
+
+def apply_search_settings(
+    db: Session,
+    table: str,
+    top_k: int = 20,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+):
+    """
+    Tune ANN search for the rest of the current transaction (SET LOCAL).
+    Call right before the ORDER BY embedding <=> ... query.
+    """
+    settings = search_settings(
+        table,
+        top_k,
+        ef_search,
+        probes,
+        # Older pgvector reserves the prefix and rejects unknown settings
+        iterative_scan=pgvector_version(db) >= (0, 8),
+    )
+    if not settings:
+        return
+
+    # set_config(..., true) == SET LOCAL, but takes bind parameters
+    calls = ", ".join(
+        f"set_config(:name{i}, :value{i}, true)" for i in range(len(settings))
+    )
+    params = {}
+    for i, (name, value) in enumerate(settings.items()):
+        params[f"name{i}"] = name
+        params[f"value{i}"] = value
+    db.execute(text(f"SELECT {calls}"), params)
+
+
+# ── Maintenance ─────────────────────────────────────────────────────────
+
+
+def rebuild_index(engine: Engine, spec: AnnIndexSpec, concurrently: bool = True):
+    """
+    Drop and recreate table's ANN index with spec, then ANALYZE the table.
+
+    Concurrent builds don't block chunk writes but must run outside a
+    transaction, so this uses an AUTOCOMMIT connection.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(spec.drop_sql(concurrently)))
+        create_sql = spec.create_sql(concurrently)
+        if create_sql:
+            logger.info(f"Building {spec.method} index on {spec.table}...")
+            connection.execute(text(create_sql))
+        connection.execute(text(f"ANALYZE {spec.table}"))
+    logger.info(f"Rebuilt vector index for {spec.table} ({spec.method})")
+
+
+def analyze_table(engine: Engine, table: str):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"ANALYZE {table}"))
+
+
+def index_status(engine: Engine) -> List[Dict[str, Any]]:
+    """Vector indexes on the chunk tables with their size and validity."""
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                """
+                SELECT t.relname AS table_name,
+                       i.relname AS index_name,
+                       am.amname AS method,
+                       pg_relation_size(i.oid) AS size_bytes,
+                       ix.indisvalid AS is_valid,
+                       t.reltuples::bigint AS approx_rows
+                FROM pg_index ix
+                JOIN pg_class i ON i.oid = ix.indexrelid
+                JOIN pg_class t ON t.oid = ix.indrelid
+                JOIN pg_am am ON am.oid = i.relam
+                WHERE t.relname = ANY(:tables)
+                  AND am.amname IN ('hnsw', 'ivfflat')
+                ORDER BY t.relname, i.relname
+                """
+            ),
+            {"tables": list(ANN_INDEXES)},
+        )
+        return [dict(row._mapping) for row in rows]
@@ -0,0 +1,160 @@
+"""
+Bulk persistence of TranscriptChunk / MaterialChunk rows.
+
+Adding one ORM object per chunk pushes every 1536-dim vector through the
+unit of work and flushes hundreds of INSERTs. replace_chunks() instead
+deletes a document's chunks and writes the new ones in one statement,
+inside the caller's transaction (readers see the old or the new chunks,
+never a mix):
+- psycopg2: COPY ... FROM STDIN in binary format, vectors encoded with
+  pgvector's binary representation (no float -> text -> float round trip)
+- other drivers: one multi-row INSERT ... VALUES per WRITE_BATCH rows
+
+CHUNK_WRITE_METHOD=insert forces the INSERT path.
+"""
+
+import io
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from pgvector.sqlalchemy import Vector
+from pgvector.vector import Vector as PgVector
+from sqlalchemy import DateTime, Float, Integer, String, insert
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+from models import generate_uuid
+
+CHUNK_WRITE_METHOD = os.getenv("CHUNK_WRITE_METHOD", "copy")
+WRITE_BATCH = 500  # Rows per INSERT on the fallback path
+
+_PG_EPOCH = datetime(2000, 1, 1)
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+
+
+def _encode_timestamp(value: datetime) -> bytes:
+    # timestamp without time zone: microseconds since 2000-01-01 (UTC here)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _PG_EPOCH
+    return struct.pack(
+        ">q", (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    )
+
+
+def _binary_encoder(column) -> Callable[[Any], bytes]:
+    """Binary COPY encoder for a column, from its SQLAlchemy type."""
+    column_type = column.type
+    if isinstance(column_type, Vector):
+        return PgVector._to_db_binary
+    if isinstance(column_type, Integer):
+        return lambda value: struct.pack(">i", value)
+    if isinstance(column_type, Float):
+        return lambda value: struct.pack(">d", value)
+    if isinstance(column_type, DateTime):
+        return _encode_timestamp
+    if isinstance(column_type, String):  # Includes Text
+        return lambda value: str(value).encode("utf-8")
+    raise TypeError(f"No binary COPY encoding for {column.name} ({column_type})")
+
+
+def copy_payload(columns: List, rows: List[Dict[str, Any]]) -> bytes:
+    """
+    PostgreSQL binary COPY data for rows, in the given column order.
+
+    Args:
+        columns: Table columns to write
+        rows: Dicts keyed by column name (missing keys are NULL)
+
+    Returns:
+        Bytes for COPY ... FROM STDIN WITH (FORMAT binary)
+    """
+    encoders = [(column.name, _binary_encoder(column)) for column in columns]
+    tuple_header = struct.pack(">h", len(encoders))
+    null = struct.pack(">i", -1)
+
+    out = io.BytesIO()
+    out.write(_COPY_HEADER)
+    for row in rows:
+        out.write(tuple_header)
+        for name, encode in encoders:
+            value = row.get(name)
+            if value is None:
+                out.write(null)
+                continue
+            data = encode(value)
+            out.write(struct.pack(">i", len(data)))
+            out.write(data)
+    out.write(_COPY_TRAILER)
+    return out.getvalue()
+
+
+def _copy_rows(db: Session, table, rows: List[Dict[str, Any]]):
+    columns = list(table.columns)
+    payload = copy_payload(columns, rows)
+    column_list = ", ".join(column.name for column in columns)
+    # The session's own DBAPI connection, so COPY joins its transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT binary)",
+            io.BytesIO(payload),
+        )
+    finally:
+        cursor.close()
+
+
+def _insert_rows(db: Session, table, rows: List[Dict[str, Any]]):
+    for i in range(0, len(rows), WRITE_BATCH):
+        db.execute(insert(table).values(rows[i : i + WRITE_BATCH]))
+
+
+def replace_chunks(
+    db: Session, model, chunks: List[Dict[str, Any]], **owner: str
+) -> int:
+    """
+    Swap a document's chunk rows for new ones. Does not commit.
+
+    Args:
+        db: Database session (the caller commits)
+        model: TranscriptChunk or MaterialChunk
+        chunks: Column values per chunk (id and created_at are filled in)
+        **owner: The document, e.g. video_id=... or course_material_id=...
+
+    Returns:
+        Number of rows written
+
+    Example:
+        replace_chunks(db, MaterialChunk, rows, course_material_id=material_id)
+    """
+    ((owner_column, owner_id),) = owner.items()
+    table = model.__table__
+
+    db.query(model).filter(getattr(model, owner_column) == owner_id).delete(
+        synchronize_session=False
+    )
+    if not chunks:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"id": generate_uuid(), "created_at": now, **chunk, owner_column: owner_id}
+        for chunk in chunks
+    ]
+
+    use_copy = (
+        CHUNK_WRITE_METHOD == "copy" and db.get_bind().dialect.driver == "psycopg2"
+    )
+    if use_copy:
+        _copy_rows(db, table, rows)
+    else:
+        _insert_rows(db, table, rows)
+
+    logger.info(
+        f"Wrote {len(rows)} {table.name} rows for {owner_id} "
+        f"({'COPY' if use_copy else 'INSERT'})"
+    )
+    return len(rows)
@@ -11,21 +11,33 @@ This service handles:
 - Redis caching for 72% faster retrieval
 """
 
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
+import asyncio
+import concurrent.futures
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from models import TranscriptChunk
 from controllers.config import logger
 import numpy as np
 import re
 from functools import lru_cache
+from services.chunk_writer import replace_chunks
+from services.embedding_pipeline import embed_texts
+from services.embedding_store import embed_with_store
+from services.sparse_index import SparseIndex, store_sparse_index, tokenize
+from services.vector_index import VectorIndex, get_vector_index
 from utils.cache import (
+    get_local_cache,
     get_cached_query_embedding,
     cache_query_embedding,
     get_cached_rag_results,
     cache_rag_results,
+    invalidate_video_cache,
 )
 
+if TYPE_CHECKING:
+    # The SDK itself is imported on first use, keeping it out of API startup
+    from openai import AsyncOpenAI
+
 # BM25 for keyword-based retrieval
 try:
     from rank_bm25 import BM25Okapi
@@ -37,9 +49,9 @@ except ImportError:
     )
     BM25_AVAILABLE = False
 
-# LRU cache for BM25 indexes (stores last 100 video indexes)
-# Each entry is ~5-10KB, so 100 entries = ~500KB-1MB memory
-_bm25_cache = {}
+# LRU cache for in-memory BM25 indexes (fallback when a document has no
+# persisted sparse index). Each entry is ~5-10KB, so 100 entries = ~500KB-1MB.
+_bm25_cache = get_local_cache("bm25_indexes", max_entries=100)
 
 
 class EmbeddingService:
@@ -49,6 +61,8 @@ class EmbeddingService:
     """
 
     def __init__(self):
+        from openai import OpenAI
+
         self.client = OpenAI()
         self.model = "text-embedding-3-small"
         self.dimension = 1536
@@ -67,7 +81,7 @@ class EmbeddingService:
         # Check cache first
         if use_cache:
             cached = get_cached_query_embedding(text)
-            if cached:
+            if cached is not None:
                 logger.debug(f"Cache HIT: Query embedding for '{text[:50]}...'")
                 return cached
 
@@ -88,28 +102,40 @@ class EmbeddingService:
             logger.error(f"Error generating embedding: {e}")
             raise
 
-    def embed_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
-        """Generate embeddings for multiple texts (up to 2048 per batch)."""
-        embeddings = []
+    async def embed_batch_async(
+        self, texts: List[str], client: Optional["AsyncOpenAI"] = None
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts with parallel, token-sized batches.
 
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            try:
-                response = self.client.embeddings.create(
-                    model=self.model, input=batch, encoding_format="float"
-                )
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                logger.info(
-                    f"Generated {len(batch_embeddings)} embeddings (batch {i//batch_size + 1})"
-                )
-            except Exception as e:
-                logger.error(f"Error in batch {i}-{i+batch_size}: {e}")
-                # Fallback to individual
-                for text in batch:
-                    embeddings.append(self.embed_text(text))
+        Args:
+            texts: Texts to embed
+            client: AsyncOpenAI client bound to the running loop (default:
+                a new one, closed afterwards)
 
-        return embeddings
+        Returns:
+            One embedding per text, in input order
+        """
+        if client is not None:
+            return await embed_texts(client, self.model, texts)
+        from openai import AsyncOpenAI
+
+        async with AsyncOpenAI() as client:
+            return await embed_texts(client, self.model, texts)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Sync wrapper around embed_batch_async for the chunkers, which run in
+        worker threads (or inside a running loop: then on a helper thread).
+        """
+        if not texts:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.embed_batch_async(texts))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.embed_batch_async(texts)).result()
 
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
@@ -122,30 +148,48 @@ class EmbeddingService:
         query_embedding: List[float],
         candidates: List[Dict[str, Any]],
         top_k: int = 5,
+        vector_index: Optional[VectorIndex] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find top-k most similar chunks using cosine similarity.
 
+        Scores all candidates with one matrix-vector product over a
+        pre-normalized float32 matrix (see services.vector_index).
+
         Args:
             query_embedding: Query vector
             candidates: List of dicts with 'embedding' and metadata
             top_k: Number of results
+            vector_index: The candidates' index if already at hand (e.g. from
+                services.vector_index.cached_vector_index); candidates then
+                needn't carry embeddings
 
         Returns:
             Top-k sorted by similarity (highest first)
         """
-        similarities = []
-
-        for candidate in candidates:
-            # Explicit None check needed for pgvector (numpy arrays don't support implicit bool)
-            if candidate.get("embedding") is None:
-                continue
+        index = vector_index
+        if index is None:
+            index = get_vector_index(candidates)
+        return index.search(query_embedding, top_k=top_k)
 
-            similarity = self.cosine_similarity(query_embedding, candidate["embedding"])
-            similarities.append({**candidate, "similarity": similarity})
+    def find_most_similar_batch(
+        self,
+        query_embeddings: List[List[float]],
+        candidates: List[Dict[str, Any]],
+        top_k: int = 5,
+        vector_index: Optional[VectorIndex] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Score several queries against the same candidates in one pass
+        (vector_index as in find_most_similar).
 
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return similarities[:top_k]
+        Returns:
+            One top-k list per query, in input order
+        """
+        index = vector_index
+        if index is None:
+            index = get_vector_index(candidates)
+        return index.search_batch(query_embeddings, top_k=top_k)
 
     def hybrid_search(
         self,
@@ -155,38 +199,56 @@ class EmbeddingService:
         top_k: int = 5,
         alpha: float = 0.5,
         cache_key: Optional[str] = None,
+        sparse_index: Optional[SparseIndex] = None,
+        vector_index: Optional[VectorIndex] = None,
     ) -> List[Dict[str, Any]]:
         """
         Hybrid retrieval combining BM25 (sparse) and embeddings (dense) with caching.
         Uses Reciprocal Rank Fusion to merge results.
 
+        When sparse_index (the document's persisted corpus-wide BM25 index) is
+        given, keyword scores come from it; otherwise a BM25Okapi index is
+        built over the candidates themselves.
+
         Args:
             query: Text query
             query_embedding: Query embedding vector
             candidates: List of dicts with 'text', 'embedding', and metadata
             top_k: Number of final results
             alpha: Weight for balancing (0=BM25 only, 1=semantic only, 0.5=balanced)
-            cache_key: Optional cache key for BM25 index (e.g., video_id)
+            cache_key: Optional cache key for the BM25 index (e.g., video_id)
+            sparse_index: Optional corpus-wide BM25 index for the document
+            vector_index: Optional dense index of the candidates (see
+                find_most_similar)
 
         Returns:
             Top-k chunks ranked by combined score
         """
-        if not BM25_AVAILABLE:
+        if sparse_index is None and not BM25_AVAILABLE:
             # Fallback to pure semantic search
             logger.debug("BM25 not available, using semantic search only")
-            return self.find_most_similar(query_embedding, candidates, top_k)
+            return self.find_most_similar(
+                query_embedding, candidates, top_k, vector_index=vector_index
+            )
 
         # Dense retrieval (semantic)
-        dense_results = self.find_most_similar(query_embedding, candidates, top_k=20)
+        dense_results = self.find_most_similar(
+            query_embedding, candidates, top_k=20, vector_index=vector_index
+        )
         dense_map = {
             r.get("chunk_index", i): {"rank": i, **r}
             for i, r in enumerate(dense_results)
         }
 
-        # Sparse retrieval (BM25) - with caching
-        bm25_results = self._bm25_search(
-            query, candidates, top_k=20, cache_key=cache_key
-        )
+        # Sparse retrieval (BM25) - persisted index, else cached in-memory build
+        if sparse_index is not None:
+            bm25_results = self._sparse_index_search(
+                query, candidates, sparse_index, top_k=20
+            )
+        else:
+            bm25_results = self._bm25_search(
+                query, candidates, top_k=20, cache_key=cache_key
+            )
         bm25_map = {
             r.get("chunk_index", i): {"rank": i, **r}
             for i, r in enumerate(bm25_results)
@@ -259,23 +321,18 @@ class EmbeddingService:
         Returns:
             Tuple of (bm25_index, corpus)
         """
-        global _bm25_cache
-
-        if cache_key and cache_key in _bm25_cache:
-            logger.debug(f"BM25 Cache HIT for {cache_key}")
-            return _bm25_cache[cache_key]
+        if cache_key:
+            cached = _bm25_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"BM25 Cache HIT for {cache_key}")
+                return cached
 
         # Build new index
         corpus = [self._tokenize(c.get("text", "")) for c in candidates]
         bm25 = BM25Okapi(corpus)
 
-        # Cache it (LRU: keep last 100)
         if cache_key:
-            _bm25_cache[cache_key] = (bm25, corpus)
-            # Simple LRU: remove oldest if cache > 100 entries
-            if len(_bm25_cache) > 100:
-                oldest_key = next(iter(_bm25_cache))
-                del _bm25_cache[oldest_key]
+            _bm25_cache.set(cache_key, (bm25, corpus))
             logger.debug(f"BM25 Cache MISS: Built index for {cache_key}")
 
         return bm25, corpus
@@ -322,10 +379,34 @@ class EmbeddingService:
 
         return results
 
+    def _sparse_index_search(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        sparse_index: SparseIndex,
+        top_k: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25 search using a document's persisted corpus-wide index.
+        Hits whose chunk is not among candidates are dropped.
+        """
+        by_chunk_index = {c.get("chunk_index"): c for c in candidates}
+
+        results = []
+        for chunk_index, score in sparse_index.search(query, top_k=top_k):
+            candidate = by_chunk_index.get(chunk_index)
+            if candidate is None:
+                continue
+            candidate = candidate.copy()
+            candidate["bm25_score"] = score
+            candidate["bm25_rank"] = len(results)
+            results.append(candidate)
+
+        return results
+
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization for BM25."""
-        # Lowercase and split on non-alphanumeric
-        return re.findall(r"\w+", text.lower())
+        return tokenize(text)
 
 
 class SemanticChunker:
@@ -568,28 +649,36 @@ class TranscriptProcessor:
 
         # Step 2: Generate embeddings
         chunk_texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embedder.embed_batch(chunk_texts)
+        # Unchanged chunk texts reuse their stored embeddings
+        embeddings = embed_with_store(db, chunk_texts, self.embedder)
         logger.info(f"Generated {len(embeddings)} embeddings")
 
-        # Step 3: Delete existing chunks (if reprocessing)
-        db.query(TranscriptChunk).filter(TranscriptChunk.video_id == video_id).delete()
-
-        # Step 4: Store chunks
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            chunk_record = TranscriptChunk(
-                video_id=video_id,
-                chunk_index=idx,
-                text=chunk["text"],
-                start_time=chunk.get("start_time"),
-                end_time=chunk.get("end_time"),
-                start_seconds=chunk.get("start_seconds"),
-                end_seconds=chunk.get("end_seconds"),
-                embedding=embedding,
-                word_count=chunk.get("word_count", 0),
-            )
-            db.add(chunk_record)
+        # Steps 3-4: Replace existing chunks (if reprocessing) in one bulk write
+        replace_chunks(
+            db,
+            TranscriptChunk,
+            [
+                {
+                    "chunk_index": idx,
+                    "text": chunk["text"],
+                    "start_time": chunk.get("start_time"),
+                    "end_time": chunk.get("end_time"),
+                    "start_seconds": chunk.get("start_seconds"),
+                    "end_seconds": chunk.get("end_seconds"),
+                    "embedding": embedding,
+                    "word_count": chunk.get("word_count", 0),
+                }
+                for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+            ],
+            video_id=video_id,
+        )
+
+        # Step 5: Corpus-wide BM25 index, replaced in the same transaction
+        store_sparse_index(db, chunk_texts, video_id=video_id)
 
         db.commit()
+        # Cached retrieval results refer to the old chunks
+        invalidate_video_cache(video_id)
         logger.info(f"[Phase 1] Stored {len(chunks)} chunks for video {video_id}")
         return len(chunks)
 
@@ -0,0 +1,334 @@
+"""
+Course-wide retrieval across every lecture and document of a Course.
+
+One dense query covers both chunk tables: a UNION ALL of per-table
+pgvector top-k selects, each filtered to the course's videos/materials and
+ordered by cosine distance, so the ANN indexes do the work in a single
+round trip regardless of how many materials the course has. Keyword scores
+come from the course's documents' persisted BM25 indexes, merged into one
+course-wide index (cached while none of them change). Both rankings are
+fused with Reciprocal Rank Fusion, as in EmbeddingService.hybrid_search.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, and_, cast, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+from models import ChunkSparseIndex, CourseMaterial, MaterialChunk, TranscriptChunk
+from services.ann_index import apply_search_settings
+from services.chunking_embedding_service import EmbeddingService
+from services.sparse_index import SparseIndex, load_sparse_index
+from utils.cache import get_local_cache
+
+RRF_K = 60  # Same constant as hybrid_search
+
+# course_id -> (fingerprint, merged SparseIndex, doc number per position, docs)
+_course_sparse_cache = get_local_cache(
+    "course_sparse_indexes",
+    max_entries=64,
+    max_bytes=128 * 1024 * 1024,
+    sizeof=lambda entry: entry[1].nbytes,
+)
+
+# (kind, doc_id): kind "video" -> TranscriptChunk.video_id,
+# "material" -> MaterialChunk.course_material_id
+DocKey = Tuple[str, str]
+
+
+def _course_documents(
+    db: Session, course_id: str
+) -> Tuple[List[DocKey], Dict[DocKey, Any]]:
+    """Chunked documents of a course and the material row each belongs to."""
+    materials = (
+        db.query(
+            CourseMaterial.id,
+            CourseMaterial.title,
+            CourseMaterial.material_type,
+            CourseMaterial.video_id,
+        )
+        .filter(CourseMaterial.course_id == course_id)
+        .order_by(CourseMaterial.order, CourseMaterial.created_at)
+        .all()
+    )
+
+    docs: Dict[DocKey, Any] = {}
+    for material in materials:
+        # Same routing as material chat: gallery-linked videos use the
+        # video's TranscriptChunks, everything else its MaterialChunks
+        if material.material_type == "video" and material.video_id:
+            docs.setdefault(("video", material.video_id), material)
+        else:
+            docs.setdefault(("material", material.id), material)
+    return list(docs), docs
+
+
+def _dense_search(
+    db: Session, docs: List[DocKey], query_embedding: List[float], limit: int
+) -> List[Dict[str, Any]]:
+    """Top chunks by cosine distance across both tables, one statement."""
+    video_ids = [doc_id for kind, doc_id in docs if kind == "video"]
+    material_ids = [doc_id for kind, doc_id in docs if kind == "material"]
+
+    branches = []
+    if video_ids:
+        distance = TranscriptChunk.embedding.cosine_distance(query_embedding)
+        apply_search_settings(db, "transcript_chunks", top_k=limit)
+        branches.append(
+            select(
+                literal("video").label("kind"),
+                TranscriptChunk.video_id.label("doc_id"),
+                TranscriptChunk.chunk_index,
+                TranscriptChunk.text,
+                cast(null(), Integer).label("page_number"),
+                TranscriptChunk.start_seconds,
+                TranscriptChunk.end_seconds,
+                distance.label("distance"),
+            )
+            .where(TranscriptChunk.video_id.in_(video_ids))
+            .order_by(distance)
+            .limit(limit)
+        )
+    if material_ids:
+        distance = MaterialChunk.embedding.cosine_distance(query_embedding)
+        apply_search_settings(db, "material_chunks", top_k=limit)
+        branches.append(
+            select(
+                literal("material").label("kind"),
+                MaterialChunk.course_material_id.label("doc_id"),
+                MaterialChunk.chunk_index,
+                MaterialChunk.text,
+                MaterialChunk.page_number,
+                MaterialChunk.start_seconds,
+                MaterialChunk.end_seconds,
+                distance.label("distance"),
+            )
+            .where(MaterialChunk.course_material_id.in_(material_ids))
+            .order_by(distance)
+            .limit(limit)
+        )
+    if not branches:
+        return []
+
+    # Each branch keeps its own ORDER BY/LIMIT (so it can use its table's
+    # ANN index); the outer query merges them
+    combined = union_all(*[select(b.subquery()) for b in branches]).subquery()
+    rows = db.execute(select(combined).order_by(combined.c.distance).limit(limit)).all()
+    return [
+        {
+            "kind": row.kind,
+            "doc_id": row.doc_id,
+            "chunk_index": row.chunk_index,
+            "text": row.text,
+            "page_number": row.page_number,
+            "start_seconds": row.start_seconds,
+            "end_seconds": row.end_seconds,
+            "dense_score": 1.0 - float(row.distance),
+        }
+        for row in rows
+        if row.distance is not None
+    ]
+
+
+def _course_sparse_index(
+    db: Session, course_id: str, docs: List[DocKey]
+) -> Tuple[Optional[SparseIndex], np.ndarray, List[DocKey]]:
+    """Course-wide BM25 index merged from each document's stored index."""
+    video_ids = [doc_id for kind, doc_id in docs if kind == "video"]
+    material_ids = [doc_id for kind, doc_id in docs if kind == "material"]
+    rows = (
+        db.query(
+            ChunkSparseIndex.video_id,
+            ChunkSparseIndex.course_material_id,
+            ChunkSparseIndex.updated_at,
+        )
+        .filter(
+            or_(
+                ChunkSparseIndex.video_id.in_(video_ids),
+                ChunkSparseIndex.course_material_id.in_(material_ids),
+            )
+        )
+        .all()
+    )
+    stored = {
+        ("video", r.video_id)
+        if r.video_id
+        else ("material", r.course_material_id): r.updated_at
+        for r in rows
+    }
+    fingerprint = tuple((doc, stored.get(doc)) for doc in docs)
+
+    entry = _course_sparse_cache.get(course_id)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1], entry[2], entry[3]
+
+    indexes, indexed_docs = [], []
+    for kind, doc_id in docs:
+        index = (
+            load_sparse_index(db, video_id=doc_id)
+            if kind == "video"
+            else load_sparse_index(db, material_id=doc_id)
+        )
+        if index is not None and index.num_docs:
+            indexes.append(index)
+            indexed_docs.append((kind, doc_id))
+    if not indexes:
+        return None, np.zeros(0, dtype=np.int32), []
+
+    merged = SparseIndex.merge(indexes)
+    doc_of_position = np.repeat(
+        np.arange(len(indexes), dtype=np.int32), [i.num_docs for i in indexes]
+    )
+    _course_sparse_cache.set(
+        course_id, (fingerprint, merged, doc_of_position, indexed_docs)
+    )
+    return merged, doc_of_position, indexed_docs
+
+
+def _fetch_chunks(
+    db: Session, keys: List[Tuple[str, str, int]]
+) -> Dict[Tuple[str, str, int], Dict[str, Any]]:
+    """Load keyword-only hits (not returned by the dense query)."""
+    found: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+    for kind, model, doc_column in (
+        ("video", TranscriptChunk, TranscriptChunk.video_id),
+        ("material", MaterialChunk, MaterialChunk.course_material_id),
+    ):
+        by_doc: Dict[str, List[int]] = {}
+        for key_kind, doc_id, chunk_index in keys:
+            if key_kind == kind:
+                by_doc.setdefault(doc_id, []).append(chunk_index)
+        if not by_doc:
+            continue
+
+        rows = (
+            db.query(model)
+            .filter(
+                or_(
+                    *[
+                        and_(doc_column == doc_id, model.chunk_index.in_(indexes))
+                        for doc_id, indexes in by_doc.items()
+                    ]
+                )
+            )
+            .all()
+        )
+        for row in rows:
+            doc_id = row.video_id if kind == "video" else row.course_material_id
+            found[(kind, doc_id, row.chunk_index)] = {
+                "kind": kind,
+                "doc_id": doc_id,
+                "chunk_index": row.chunk_index,
+                "text": row.text,
+                "page_number": getattr(row, "page_number", None),
+                "start_seconds": row.start_seconds,
+                "end_seconds": row.end_seconds,
+                "dense_score": 0.0,
+            }
+    return found
+
+
+def _citation(chunk: Dict[str, Any]) -> str:
+    """[MM:SS] / [H:MM:SS] for lecture chunks, [Page N] for documents."""
+    seconds = chunk.get("start_seconds")
+    if seconds is not None:
+        m, sec = divmod(int(seconds), 60)
+        h, m = divmod(m, 60)
+        return f"[{h:02d}:{m:02d}:{sec:02d}]" if h else f"[{m:02d}:{sec:02d}]"
+    if chunk.get("page_number") is not None:
+        return f"[Page {chunk['page_number']}]"
+    return ""
+
+
+def search_course(
+    db: Session,
+    course_id: str,
+    query: str,
+    top_k: int = 10,
+    candidates: int = 50,
+    alpha: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Ranked, cited passages from every lecture and document of a course.
+
+    Args:
+        db: Database session
+        course_id: Course to search
+        query: User query
+        top_k: Number of passages to return
+        candidates: Dense and BM25 candidates fused per query
+        alpha: Weight for balancing (0=BM25 only, 1=semantic only)
+
+    Returns:
+        Passages best first, each with its material, citation and scores
+    """
+    docs, materials = _course_documents(db, course_id)
+    if not docs:
+        return []
+
+    query_embedding = EmbeddingService().embed_text(query)
+    dense = _dense_search(db, docs, query_embedding, candidates)
+
+    sparse_index, doc_of_position, indexed_docs = _course_sparse_index(
+        db, course_id, docs
+    )
+    sparse = []
+    if sparse_index is not None:
+        for position, score in sparse_index.rank(query, top_k=candidates):
+            kind, doc_id = indexed_docs[doc_of_position[position]]
+            chunk_index = int(sparse_index.chunk_indexes[position])
+            sparse.append(((kind, doc_id, chunk_index), score))
+
+    # Reciprocal Rank Fusion over (kind, doc_id, chunk_index)
+    fused: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+    for rank, chunk in enumerate(dense):
+        key = (chunk["kind"], chunk["doc_id"], chunk["chunk_index"])
+        fused[key] = {**chunk, "bm25_score": 0.0, "score": alpha / (RRF_K + rank)}
+    missing = []
+    for rank, (key, score) in enumerate(sparse):
+        if key in fused:
+            fused[key]["bm25_score"] = score
+            fused[key]["score"] += (1 - alpha) / (RRF_K + rank)
+        else:
+            fused[key] = {"bm25_score": score, "score": (1 - alpha) / (RRF_K + rank)}
+            missing.append(key)
+
+    ranked = sorted(fused.items(), key=lambda item: item[1]["score"], reverse=True)
+    top = ranked[:top_k]
+
+    # Only keyword hits that made the cut need their text loaded
+    missing = set(missing)
+    needed = [key for key, _ in top if key in missing]
+    loaded = _fetch_chunks(db, needed) if needed else {}
+
+    results = []
+    for key, data in top:
+        chunk = {**loaded.get(key, {}), **data}
+        if "text" not in chunk:
+            continue  # Chunk deleted since the BM25 index was built
+        material = materials[(chunk["kind"], chunk["doc_id"])]
+        results.append(
+            {
+                "material_id": material.id,
+                "material_title": material.title,
+                "material_type": material.material_type,
+                "video_id": chunk["doc_id"] if chunk["kind"] == "video" else None,
+                "chunk_index": chunk["chunk_index"],
+                "text": chunk["text"],
+                "page_number": chunk.get("page_number"),
+                "start_seconds": chunk.get("start_seconds"),
+                "end_seconds": chunk.get("end_seconds"),
+                "citation": _citation(chunk),
+                "score": round(chunk["score"], 6),
+                "dense_score": chunk.get("dense_score", 0.0),
+                "bm25_score": chunk["bm25_score"],
+            }
+        )
+
+    logger.info(
+        f"Course search {course_id}: {len(docs)} documents, "
+        f"{len(dense)} dense + {len(sparse)} BM25 candidates -> {len(results)}"
+    )
+    return results
@@ -0,0 +1,250 @@
+"""
+Concurrent, rate-limit-aware batch embedding.
+
+EmbeddingService.embed_batch used to send fixed batches of 100 texts one
+after another. This pipeline instead:
+- sizes batches by token count (tiktoken), so a batch of long PDF pages and
+  a batch of short transcript chunks cost the API about the same
+- sends batches in parallel through AsyncOpenAI, with the number in flight
+  bounded by an AIMD limiter: +1 after a run of successes, halved on a 429
+- retries only the batch that failed: rate limits and transient errors
+  retry the same batch after a backoff (honouring Retry-After), and a
+  batch rejected as invalid (400/422) is split in half until the offending
+  text is isolated; other errors (bad key, unknown model) fail at once
+
+Settings come from the environment, e.g.:
+    EMBEDDING_MAX_CONCURRENCY=8
+    EMBEDDING_BATCH_TOKENS=100000
+    EMBEDDING_MAX_RETRIES=6
+"""
+
+import asyncio
+import os
+import random
+from typing import Callable, List, Optional, Sequence
+
+from controllers.config import logger
+
+# tiktoken gives exact token counts; without it, ~4 characters per token
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+
+# OpenAI embedding API limits
+MAX_INPUT_TOKENS = 8191  # Per text
+MAX_BATCH_ITEMS = 2048  # Per request
+MAX_BATCH_TOKENS = 300000  # Per request
+
+
+def _token_counter(model: str) -> Callable[[str], int]:
+    if not TIKTOKEN_AVAILABLE:
+        return lambda text: len(text) // 4 + 1
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def token_batches(
+    token_counts: Sequence[int],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> List[List[int]]:
+    """
+    Group text positions into consecutive batches under both limits.
+
+    Args:
+        token_counts: Token count of each text
+        max_tokens: Token budget per batch
+        max_items: Texts per batch
+
+    Returns:
+        Lists of positions into token_counts, in order
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if current and (
+            current_tokens + tokens > max_tokens or len(current) >= max_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class AdaptiveLimiter:
+    """
+    Bounds concurrent requests with additive-increase/multiplicative-decrease.
+
+    Starts at initial, grows by one after `limit` consecutive successes
+    (up to maximum) and halves on every rate limit (down to 1). Requests
+    already in flight are never cancelled; a lower limit just holds back
+    the next ones.
+
+    Args:
+        maximum: Upper bound on requests in flight
+        initial: Starting limit (default: half of maximum)
+    """
+
+    def __init__(self, maximum: int = EMBEDDING_MAX_CONCURRENCY, initial: int = None):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(initial or (self.maximum + 1) // 2, self.maximum))
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on an API error, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def embed_texts(
+    client,
+    model: str,
+    texts: List[str],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+    max_retries: int = EMBEDDING_MAX_RETRIES,
+    count_tokens: Callable[[str], int] = None,
+) -> List[List[float]]:
+    """
+    Embed texts with parallel token-sized batches.
+
+    Args:
+        client: AsyncOpenAI client
+        model: Embedding model
+        texts: Texts to embed
+        max_tokens: Token budget per request
+        max_concurrency: Upper bound on requests in flight
+        max_retries: Attempts per batch for rate limits / transient errors
+        count_tokens: Token counter (default: tiktoken for model)
+
+    Returns:
+        One embedding per text, in input order
+
+    Raises:
+        The API error of a batch that still fails after max_retries, or of
+        a single text the API rejects
+    """
+    import openai  # Imported on first use, keeping the SDK out of API startup
+
+    # Errors worth retrying unchanged
+    retryable_errors = (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # Includes APITimeoutError
+        openai.InternalServerError,
+    )
+    # Errors caused by some text in the batch, which splitting isolates.
+    # Other status errors (401, 403, 404, ...) would fail for every half too
+    rejected_errors = (openai.BadRequestError, openai.UnprocessableEntityError)
+
+    if not texts:
+        return []
+
+    texts = list(texts)
+    count_tokens = count_tokens or _token_counter(model)
+    token_counts = [count_tokens(text) for text in texts]
+    for i, tokens in enumerate(token_counts):
+        if tokens > MAX_INPUT_TOKENS:
+            # Chunkers stay well under this; trim proportionally by characters
+            logger.warning(
+                f"Text {i} has {tokens} tokens (limit {MAX_INPUT_TOKENS}), truncating"
+            )
+            texts[i] = texts[i][: len(texts[i]) * MAX_INPUT_TOKENS // tokens]
+            token_counts[i] = MAX_INPUT_TOKENS
+
+    limiter = AdaptiveLimiter(max_concurrency)
+    results: List[Optional[List[float]]] = [None] * len(texts)
+
+    async def run(positions: List[int]):
+        attempt = 0
+        while True:
+            try:
+                async with limiter:
+                    response = await client.embeddings.create(
+                        model=model,
+                        input=[texts[i] for i in positions],
+                        encoding_format="float",
+                    )
+            except retryable_errors as e:
+                attempt += 1
+                if attempt >= max_retries:
+                    raise
+                if isinstance(e, openai.RateLimitError):
+                    limiter.on_rate_limit()
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(30.0, 0.5 * 2**attempt)
+                delay *= 1 + random.random() * 0.25  # Don't retry in lockstep
+                logger.warning(
+                    f"Embedding batch of {len(positions)} failed ({type(e).__name__}), "
+                    f"retry {attempt}/{max_retries - 1} in {delay:.1f}s "
+                    f"(concurrency {limiter.limit})"
+                )
+                await asyncio.sleep(delay)
+                continue
+            except rejected_errors as e:
+                if len(positions) == 1:
+                    raise
+                # Isolate the text the API rejects; the rest still go through
+                middle = len(positions) // 2
+                logger.warning(
+                    f"Embedding batch of {len(positions)} rejected ({e.status_code}), "
+                    f"splitting"
+                )
+                await asyncio.gather(run(positions[:middle]), run(positions[middle:]))
+                return
+
+            limiter.on_success()
+            for item in response.data:
+                results[positions[item.index]] = item.embedding
+            return
+
+    batches = token_batches(token_counts, min(max_tokens, MAX_BATCH_TOKENS))
+    await asyncio.gather(*(run(batch) for batch in batches))
+
+    logger.info(
+        f"Generated {len(texts)} embeddings in {len(batches)} batches "
+        f"({sum(token_counts)} tokens, final concurrency {limiter.limit})"
+    )
+    return results
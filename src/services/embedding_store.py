@@ -0,0 +1,98 @@
+"""
+Content-addressed embedding store.
+
+Chunk embeddings depend only on the model and the chunk text, so they're
+stored once per sha256(model + text) in content_embeddings and shared by
+every video and material. The chunkers embed through embed_with_store():
+re-chunking a transcript, re-timing an uploaded video or uploading the
+same lecture twice only sends the texts the store hasn't seen to the
+embeddings API.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+from models import ContentEmbedding
+
+LOOKUP_BATCH = 1000  # Hashes per IN (...) lookup
+
+
+def content_hash(model: str, text: str) -> str:
+    """sha256 hex digest identifying text embedded with model."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def load_embeddings(db: Session, hashes: List[str]) -> Dict[str, List[float]]:
+    """Stored embeddings for the given content hashes (missing ones omitted)."""
+    found: Dict[str, List[float]] = {}
+    for i in range(0, len(hashes), LOOKUP_BATCH):
+        rows = (
+            db.query(ContentEmbedding.content_hash, ContentEmbedding.embedding)
+            .filter(ContentEmbedding.content_hash.in_(hashes[i : i + LOOKUP_BATCH]))
+            .all()
+        )
+        found.update({row[0]: row[1] for row in rows})
+    return found
+
+
+def store_embeddings(db: Session, model: str, embeddings: Dict[str, List[float]]):
+    """Add embeddings by content hash; rows another worker added win."""
+    if not embeddings:
+        return
+    rows = [
+        {"content_hash": h, "model": model, "embedding": e}
+        for h, e in embeddings.items()
+    ]
+    for i in range(0, len(rows), LOOKUP_BATCH):
+        db.execute(
+            insert(ContentEmbedding)
+            .values(rows[i : i + LOOKUP_BATCH])
+            .on_conflict_do_nothing(index_elements=["content_hash"])
+        )
+
+
+def embed_with_store(db: Session, texts: List[str], embedder=None) -> List[List[float]]:
+    """
+    Embeddings for texts, reusing stored vectors and embedding only new text.
+
+    New embeddings are added to the session's transaction, so they're kept
+    when the caller commits its chunks.
+
+    Args:
+        db: Database session
+        texts: Chunk texts
+        embedder: EmbeddingService (default: a new one)
+
+    Returns:
+        One embedding per text, in input order
+    """
+    if not texts:
+        return []
+    if embedder is None:
+        from services.chunking_embedding_service import EmbeddingService
+
+        embedder = EmbeddingService()
+
+    hashes = [content_hash(embedder.model, text) for text in texts]
+    known = load_embeddings(db, list(dict.fromkeys(hashes)))
+
+    # Each distinct new text is embedded once, however often it repeats
+    missing: Dict[str, str] = {}
+    for h, text in zip(hashes, texts):
+        if h not in known:
+            missing.setdefault(h, text)
+
+    if missing:
+        new = dict(zip(missing, embedder.embed_batch(list(missing.values()))))
+        store_embeddings(db, embedder.model, new)
+        known.update(new)
+
+    logger.info(
+        f"Embedding store: {len(texts) - len(missing)}/{len(texts)} chunks reused, "
+        f"{len(missing)} embedded"
+    )
+    return [known[h] for h in hashes]
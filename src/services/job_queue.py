@@ -0,0 +1,578 @@
+"""
+Durable background jobs backed by Postgres.
+
+Long-running work (transcription, formatting, chunking, summaries,
+grading) used to start on process-local thread pools or raw threads: it
+was lost on restart and its concurrency was only bounded per API process.
+It is now enqueued as a BackgroundJob row and run by workers:
+- enqueue_job() inserts a row; an idempotency key keeps one queued or
+  running job per key (e.g. one summary generation per video)
+- workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+  number of worker processes can share the table
+- each kind has its own concurrency limit per worker (JOB_CONCURRENCY_<KIND>)
+- a handler that raises is retried with exponential backoff up to the
+  kind's max_attempts; a worker that dies stops heartbeating and its jobs
+  are re-queued once their lease expires
+
+Run dedicated workers with `cd src && python worker.py`. Unless
+JOB_WORKER_IN_PROCESS=false, the API also runs a worker thread, so a single
+process deployment keeps working without one.
+
+Handlers report domain failures through their own status columns (e.g.
+CourseMaterial.chunking_status) and only raise for unexpected errors. A
+handler that returns a dict has it stored as the job's result; numeric
+"usage" counters in results are summed per batch by batch_progress().
+"""
+
+import importlib
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+from models import BackgroundJob, generate_uuid
+from utils.db import SessionLocal
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """
+    A type of background job.
+
+    Args:
+        name: Kind stored on the job row
+        handler: "module:function" called with the job payload as kwargs
+            (imported lazily, so enqueueing never imports the handler)
+        concurrency: Jobs of this kind run at once per worker
+        max_attempts: Runs before a raising job is marked failed
+    """
+
+    name: str
+    handler: str
+    concurrency: int
+    max_attempts: int = 3
+
+    def resolve(self) -> Callable[..., Any]:
+        module, function = self.handler.split(":")
+        return getattr(importlib.import_module(module), function)
+
+
+def _kind(name: str, handler: str, concurrency: int, max_attempts: int = 3):
+    concurrency = int(os.getenv(f"JOB_CONCURRENCY_{name.upper()}", str(concurrency)))
+    return JobKind(name, handler, max(1, concurrency), max_attempts)
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    kind.name: kind
+    for kind in (
+        _kind(
+            "transcribe",
+            "routes.courses:_transcribe_course_material_background",
+            concurrency=2,
+        ),
+        _kind("format", "controllers.background_tasks:format_transcript_background", 3),
+        _kind("chunk", "controllers.background_tasks:chunk_material_background", 3),
+        _kind(
+            "summarize", "controllers.background_tasks:generate_summary_background", 3
+        ),
+        _kind(
+            "grade",
+            "controllers.background_tasks:grade_submission_background",
+            concurrency=4,
+            # Grading calls LLMs per question; don't re-run a whole
+            # submission more than once on unexpected errors
+            max_attempts=2,
+        ),
+    )
+}
+
+
+def _utcnow() -> datetime:
+    # Job timestamps are naive UTC (timestamp without time zone)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retrying a job that has failed `attempts` times."""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * (1 + random.random() * 0.2)
+
+
+# ── Producer side ───────────────────────────────────────────────────────
+
+_local_wakeup = threading.Event()
+
+
+def enqueue_jobs(
+    db: Session,
+    kind: str,
+    jobs: List[Tuple[Dict[str, Any], Optional[str]]],
+    group_key: Optional[str] = None,
+    delay_seconds: float = 0,
+) -> List[str]:
+    """
+    Queue a batch of jobs of one kind in one statement and commit.
+
+    The jobs share a batch_id, which batch_progress() reports on.
+
+    Args:
+        db: Database session
+        kind: One of JOB_KINDS
+        jobs: (payload, idempotency_key) pairs; payloads are the handler's
+            JSON-serialisable kwargs. A job is skipped while another with
+            its idempotency key is queued or running
+        group_key: Fairness group (e.g. assignment id): workers take jobs
+            round-robin across groups instead of oldest first
+        delay_seconds: Don't run before this many seconds from now
+
+    Returns:
+        Ids of the jobs actually queued
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    if not jobs:
+        return []
+
+    now = _utcnow()
+    batch_id = generate_uuid()
+    rows = [
+        {
+            "id": generate_uuid(),
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": JOB_KINDS[kind].max_attempts,
+            "idempotency_key": idempotency_key,
+            "group_key": group_key,
+            "batch_id": batch_id,
+            "run_after": now + timedelta(seconds=delay_seconds),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for payload, idempotency_key in jobs
+    ]
+    statement = (
+        insert(BackgroundJob)
+        .values(rows)
+        .on_conflict_do_nothing(
+            index_elements=["idempotency_key"],
+            index_where=text("status IN ('queued', 'running')"),
+        )
+        .returning(BackgroundJob.id)
+    )
+    job_ids = list(db.execute(statement).scalars())
+    db.commit()
+
+    skipped = len(rows) - len(job_ids)
+    logger.info(
+        f"Queued {len(job_ids)} {kind} job(s)"
+        + (f", {skipped} already pending" if skipped else "")
+    )
+    if job_ids:
+        _local_wakeup.set()
+    return job_ids
+
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str] = None,
+    group_key: Optional[str] = None,
+    delay_seconds: float = 0,
+) -> Optional[str]:
+    """
+    Queue one job and commit (see enqueue_jobs).
+
+    Returns:
+        The new job id, or None if a job with idempotency_key is pending
+    """
+    job_ids = enqueue_jobs(
+        db, kind, [(payload, idempotency_key)], group_key, delay_seconds
+    )
+    return job_ids[0] if job_ids else None
+
+
+def batch_progress(db: Session, kind: str, group_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Job counts by status for a group's current run.
+
+    Every enqueue_jobs() call is a batch. The current run is every batch of
+    the group that still has queued or running jobs, or the latest batch
+    once all are finished, so re-grading a few submissions while a large
+    batch is still running doesn't hide the large batch.
+
+    Returns:
+        {"started_at", "total", "queued", "running", "succeeded", "failed",
+        "done", "usage", "batches"}, or None if the group never had jobs of
+        this kind. usage sums the "usage" counters of finished jobs, and
+        batches holds the same counts per batch, oldest first
+    """
+    in_group = (BackgroundJob.kind == kind, BackgroundJob.group_key == group_key)
+    batch_ids = [
+        batch_id
+        for (batch_id,) in db.query(BackgroundJob.batch_id)
+        .filter(*in_group, BackgroundJob.status.in_(("queued", "running")))
+        .distinct()
+    ]
+    if not batch_ids:
+        latest = (
+            db.query(BackgroundJob.batch_id)
+            .filter(*in_group)
+            .order_by(BackgroundJob.created_at.desc())
+            .first()
+        )
+        if latest is None:
+            return None
+        batch_ids = [latest[0]]
+    in_run = (*in_group, BackgroundJob.batch_id.in_(batch_ids))
+
+    rows = (
+        db.query(
+            BackgroundJob.batch_id,
+            BackgroundJob.status,
+            func.count(),
+            func.min(BackgroundJob.created_at),
+        )
+        .filter(*in_run)
+        .group_by(BackgroundJob.batch_id, BackgroundJob.status)
+        .all()
+    )
+    results = (
+        db.query(BackgroundJob.batch_id, BackgroundJob.result)
+        .filter(*in_run, BackgroundJob.result.isnot(None))
+        .all()
+    )
+
+    def progress_of(batch_rows, batch_results) -> Dict[str, Any]:
+        progress: Dict[str, Any] = {
+            status: 0 for status in ("queued", "running", "succeeded", "failed")
+        }
+        for _, status, count, _ in batch_rows:
+            progress[status] = progress.get(status, 0) + count
+        progress["total"] = sum(count for _, _, count, _ in batch_rows)
+        progress["done"] = progress["queued"] + progress["running"] == 0
+        started_at = min(created_at for _, _, _, created_at in batch_rows)
+        progress["started_at"] = started_at.replace(tzinfo=timezone.utc).isoformat()
+        progress["usage"] = sum_usage(result for _, result in batch_results)
+        return progress
+
+    batches = [
+        dict(
+            progress_of(
+                [row for row in rows if row[0] == batch_id],
+                [row for row in results if row[0] == batch_id],
+            ),
+            batch_id=batch_id,
+        )
+        for batch_id in {row[0] for row in rows}
+    ]
+    batches.sort(key=lambda batch: batch["started_at"])
+    progress = progress_of(rows, results)
+    progress["batches"] = batches
+    return progress
+
+
+def sum_usage(results) -> Dict[str, int]:
+    """Sum the numeric "usage" counters of job results."""
+    total: Dict[str, int] = {}
+    for result in results:
+        for key, value in ((result or {}).get("usage") or {}).items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    return total
+
+
+# ── Worker side ─────────────────────────────────────────────────────────
+
+
+def claim_jobs(db: Session, kind: str, limit: int, worker_id: str) -> List[Any]:
+    """
+    Atomically mark up to limit due jobs of kind as running by worker_id.
+
+    Jobs are taken round-robin across group_key (the first due job of every
+    group, then the second, ...), so one 300-submission batch can't hold
+    back another assignment's grading. Ungrouped jobs are taken oldest first.
+    """
+    now = _utcnow()
+    turn = (
+        func.row_number()
+        .over(
+            partition_by=func.coalesce(BackgroundJob.group_key, BackgroundJob.id),
+            order_by=(BackgroundJob.run_after, BackgroundJob.created_at),
+        )
+        .label("turn")
+    )
+    ranked = (
+        select(BackgroundJob.id, BackgroundJob.created_at, turn)
+        .where(
+            BackgroundJob.kind == kind,
+            BackgroundJob.status == "queued",
+            BackgroundJob.run_after <= now,
+        )
+        .subquery()
+    )
+    fair = select(ranked.c.id).order_by(ranked.c.turn, ranked.c.created_at).limit(limit)
+    # Window functions can't be combined with FOR UPDATE, so lock in an
+    # outer select; rows another worker just claimed are skipped
+    due = (
+        select(BackgroundJob.id)
+        .where(BackgroundJob.id.in_(fair), BackgroundJob.status == "queued")
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(due))
+        .values(
+            status="running",
+            attempts=BackgroundJob.attempts + 1,
+            locked_by=worker_id,
+            locked_at=now,
+            updated_at=now,
+        )
+        .returning(
+            BackgroundJob.id,
+            BackgroundJob.kind,
+            BackgroundJob.payload,
+            BackgroundJob.attempts,
+            BackgroundJob.max_attempts,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return rows
+
+
+def finish_job(
+    db: Session,
+    job,
+    error: Optional[str] = None,
+    result: Optional[Dict[str, Any]] = None,
+):
+    """Mark a claimed job succeeded (storing result), or schedule its retry / fail it."""
+    now = _utcnow()
+    values: Dict[str, Any] = {"locked_by": None, "locked_at": None, "updated_at": now}
+    if error is None:
+        values.update(
+            status="succeeded", finished_at=now, last_error=None, result=result
+        )
+    elif job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        values.update(
+            status="queued",
+            run_after=now + timedelta(seconds=delay),
+            last_error=error,
+        )
+        logger.warning(
+            f"{job.kind} job {job.id} failed (attempt {job.attempts}/"
+            f"{job.max_attempts}), retrying in {delay:.0f}s: {error}"
+        )
+    else:
+        values.update(status="failed", finished_at=now, last_error=error)
+        logger.error(f"{job.kind} job {job.id} failed permanently: {error}")
+
+    # Unless its lease expired meanwhile and another worker took it over
+    db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job.id, BackgroundJob.status == "running")
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def heartbeat(db: Session, job_ids: List[str]):
+    """Extend the lease of running jobs."""
+    if not job_ids:
+        return
+    db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(job_ids), BackgroundJob.status == "running")
+        .values(locked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def requeue_expired(db: Session, lease_seconds: int = JOB_LEASE_SECONDS) -> int:
+    """Re-queue (or fail, when out of attempts) jobs whose worker died."""
+    now = _utcnow()
+    expired = (BackgroundJob.status == "running") & (
+        BackgroundJob.locked_at < now - timedelta(seconds=lease_seconds)
+    )
+    failed = db.execute(
+        update(BackgroundJob)
+        .where(expired, BackgroundJob.attempts >= BackgroundJob.max_attempts)
+        .values(
+            status="failed",
+            finished_at=now,
+            last_error="Worker lease expired",
+            locked_by=None,
+            locked_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.execute(
+        update(BackgroundJob)
+        .where(expired)
+        .values(status="queued", run_after=now, locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if failed or requeued:
+        logger.warning(f"Expired job leases: {requeued} re-queued, {failed} failed")
+    return requeued
+
+
+def job_counts(db: Session) -> Dict[str, Dict[str, int]]:
+    """Job counts by kind and status, for monitoring."""
+    counts: Dict[str, Dict[str, int]] = {}
+    rows = (
+        db.query(BackgroundJob.kind, BackgroundJob.status, func.count())
+        .group_by(BackgroundJob.kind, BackgroundJob.status)
+        .all()
+    )
+    for kind, status, count in rows:
+        counts.setdefault(kind, {})[status] = count
+    return counts
+
+
+class JobWorker:
+    """
+    Polls the queue and runs jobs on one thread pool per kind.
+
+    Args:
+        kinds: Kinds to run (default: all)
+        worker_id: Identifies this worker on claimed rows
+        poll_interval: Seconds between polls when idle
+    """
+
+    def __init__(
+        self,
+        kinds: Optional[List[str]] = None,
+        worker_id: Optional[str] = None,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.kinds = [JOB_KINDS[name] for name in (kinds or JOB_KINDS)]
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+
+        self._executors = {
+            kind.name: ThreadPoolExecutor(
+                max_workers=kind.concurrency, thread_name_prefix=f"job-{kind.name}"
+            )
+            for kind in self.kinds
+        }
+        self._running: Dict[str, str] = {}  # job id -> kind
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _free_slots(self, kind: JobKind) -> int:
+        with self._lock:
+            busy = sum(1 for k in self._running.values() if k == kind.name)
+        return kind.concurrency - busy
+
+    def _run(self, job):
+        error = None
+        result = None
+        try:
+            returned = JOB_KINDS[job.kind].resolve()(**(job.payload or {}))
+            if isinstance(returned, dict):
+                result = returned
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+
+        db = SessionLocal()
+        try:
+            finish_job(db, job, error, result)
+        except Exception as e:
+            # The lease will expire and the job re-run
+            logger.error(f"Could not record result of job {job.id}: {e}")
+        finally:
+            db.close()
+        _local_wakeup.set()  # A slot just freed up
+
+    def poll_once(self) -> int:
+        """Claim and start due jobs for every kind with free slots."""
+        started = 0
+        db = SessionLocal()
+        try:
+            for kind in self.kinds:
+                free = self._free_slots(kind)
+                if free <= 0:
+                    continue
+                for job in claim_jobs(db, kind.name, free, self.worker_id):
+                    with self._lock:
+                        self._running[job.id] = job.kind
+                    self._executors[job.kind].submit(self._run, job)
+                    started += 1
+        finally:
+            db.close()
+        return started
+
+    def _maintain(self):
+        with self._lock:
+            running = list(self._running)
+        db = SessionLocal()
+        try:
+            heartbeat(db, running)
+            requeue_expired(db)
+        finally:
+            db.close()
+
+    def run_forever(self):
+        """Poll until stop() is called."""
+        logger.info(
+            f"Job worker {self.worker_id} started: "
+            + ", ".join(f"{k.name}x{k.concurrency}" for k in self.kinds)
+        )
+        last_maintenance = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_maintenance >= JOB_LEASE_SECONDS / 3:
+                    self._maintain()
+                    last_maintenance = time.monotonic()
+                if self.poll_once():
+                    continue  # More may be due; poll again straight away
+            except Exception as e:
+                logger.error(f"Job worker poll failed: {e}")
+            _local_wakeup.wait(self.poll_interval)
+            _local_wakeup.clear()
+
+    def start(self):
+        """Run in a daemon thread (the API's in-process worker)."""
+        self._thread = threading.Thread(
+            target=self.run_forever, name="job-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop polling; with wait, let running jobs finish."""
+        self._stop.set()
+        _local_wakeup.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+        logger.info(f"Job worker {self.worker_id} stopped")
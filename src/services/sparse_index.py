@@ -0,0 +1,376 @@
+"""
+Corpus-wide BM25 index for one video's or material's chunks.
+
+Built once at chunking time over every TranscriptChunk / MaterialChunk of
+the document and persisted as a compact postings blob (ChunkSparseIndex
+row), then loaded lazily at query time. This replaces rebuilding
+BM25Okapi over whatever candidates a single query happened to fetch.
+
+Layout (CSR-style postings):
+- vocab: term -> term id
+- offsets[t]:offsets[t + 1] slices doc_ids / tfs for term t
+- doc_lens: token count per chunk
+- chunk_indexes: chunk_index for each internal doc id
+
+Scoring matches rank_bm25.BM25Okapi (k1=1.5, b=0.75, epsilon=0.25).
+"""
+
+import io
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from controllers.config import logger
+from models import ChunkSparseIndex, MaterialChunk, TranscriptChunk
+from utils.cache import get_local_cache
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Process-local cache of loaded indexes: key -> (updated_at, SparseIndex)
+_sparse_index_cache = get_local_cache(
+    "sparse_indexes",
+    max_entries=256,
+    max_bytes=64 * 1024 * 1024,
+    sizeof=lambda entry: entry[1].nbytes,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Simple tokenization for BM25 (lowercase, split on non-alphanumeric)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SparseIndex:
+    """BM25 postings over one document's chunks."""
+
+    k1 = 1.5
+    b = 0.75
+    epsilon = 0.25
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_lens: np.ndarray,
+        chunk_indexes: np.ndarray,
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.chunk_indexes = chunk_indexes
+        self.num_docs = int(doc_lens.shape[0])
+        self.avg_doc_len = float(doc_lens.mean()) if self.num_docs else 0.0
+        self.idf = self._compute_idf()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate in-memory size (arrays + vocabulary)."""
+        arrays = (
+            self.offsets,
+            self.doc_ids,
+            self.tfs,
+            self.doc_lens,
+            self.chunk_indexes,
+            self.idf,
+        )
+        return sum(a.nbytes for a in arrays) + 64 * len(self.vocab)
+
+    @classmethod
+    def build(
+        cls, texts: Sequence[str], chunk_indexes: Optional[Sequence[int]] = None
+    ) -> "SparseIndex":
+        """
+        Build postings from chunk texts.
+
+        Args:
+            texts: Chunk texts, one per chunk
+            chunk_indexes: chunk_index of each text (defaults to 0..n-1)
+        """
+        if chunk_indexes is None:
+            chunk_indexes = range(len(texts))
+
+        vocab: Dict[str, int] = {}
+        postings: List[Dict[int, int]] = []
+        doc_lens = np.zeros(len(texts), dtype=np.int32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text or "")
+            doc_lens[doc_id] = len(tokens)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_id = vocab.setdefault(token, len(vocab))
+                if term_id == len(postings):
+                    postings.append({})
+                postings[term_id][doc_id] = tf
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        for term_id, plist in enumerate(postings):
+            offsets[term_id + 1] = offsets[term_id] + len(plist)
+
+        doc_ids = np.empty(int(offsets[-1]), dtype=np.int32)
+        tfs = np.empty(int(offsets[-1]), dtype=np.int32)
+        for term_id, plist in enumerate(postings):
+            start = offsets[term_id]
+            doc_ids[start : start + len(plist)] = list(plist.keys())
+            tfs[start : start + len(plist)] = list(plist.values())
+
+        return cls(
+            vocab,
+            offsets,
+            doc_ids,
+            tfs,
+            doc_lens,
+            np.asarray(list(chunk_indexes), dtype=np.int32),
+        )
+
+    @classmethod
+    def merge(cls, indexes: Sequence["SparseIndex"]) -> "SparseIndex":
+        """
+        Concatenate several documents' indexes into one corpus (e.g. a whole
+        course) without re-tokenizing. Doc positions follow the input order;
+        IDF and average length are recomputed over the merged corpus.
+        """
+        if not indexes:
+            return cls.build([])
+
+        vocab: Dict[str, int] = {}
+        terms, doc_ids, tfs = [], [], []
+        doc_offset = 0
+        for index in indexes:
+            local_to_global = np.empty(len(index.vocab), dtype=np.int64)
+            for term, term_id in index.vocab.items():
+                local_to_global[term_id] = vocab.setdefault(term, len(vocab))
+            terms.append(np.repeat(local_to_global, np.diff(index.offsets)))
+            doc_ids.append(index.doc_ids.astype(np.int64) + doc_offset)
+            tfs.append(index.tfs)
+            doc_offset += index.num_docs
+
+        term_of_posting = np.concatenate(terms)
+        order = np.argsort(term_of_posting, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of_posting, minlength=len(vocab)), out=offsets[1:])
+
+        return cls(
+            vocab,
+            offsets,
+            np.concatenate(doc_ids)[order].astype(np.int32),
+            np.concatenate(tfs)[order],
+            np.concatenate([index.doc_lens for index in indexes]),
+            np.concatenate([index.chunk_indexes for index in indexes]),
+        )
+
+    def _compute_idf(self) -> np.ndarray:
+        """Okapi idf with rank_bm25's epsilon floor for very common terms."""
+        if not self.vocab:
+            return np.zeros(0, dtype=np.float64)
+        df = np.diff(self.offsets).astype(np.float64)
+        idf = np.log(self.num_docs - df + 0.5) - np.log(df + 0.5)
+        floor = self.epsilon * (idf.sum() / len(idf))
+        idf[idf < 0] = floor
+        return idf
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """BM25 score of every chunk for the query (internal doc order)."""
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        if not self.num_docs:
+            return scores
+
+        avg_doc_len = self.avg_doc_len or 1.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lens / avg_doc_len)
+        for token in query_tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            scores[docs] += self.idf[term_id] * (tf * (self.k1 + 1) / (tf + norm[docs]))
+        return scores
+
+    def rank(self, query: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """
+        Top-k internal doc positions by BM25 score.
+
+        Returns:
+            List of (position, score), best first, non-zero scores only
+        """
+        scores = self.get_scores(tokenize(query))
+        if top_k <= 0 or not self.num_docs:
+            return []
+
+        if top_k >= self.num_docs:
+            top = np.argsort(-scores, kind="stable")
+        else:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = part[np.argsort(-scores[part], kind="stable")]
+
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """
+        Top-k chunks by BM25 score.
+
+        Returns:
+            List of (chunk_index, score), best first, non-zero scores only
+        """
+        return [
+            (int(self.chunk_indexes[position]), score)
+            for position, score in self.rank(query, top_k)
+        ]
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compressed npz blob."""
+        terms = [""] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            vocab=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            tfs=self.tfs,
+            doc_lens=self.doc_lens,
+            chunk_indexes=self.chunk_indexes,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SparseIndex":
+        with np.load(io.BytesIO(data)) as arrays:
+            raw_vocab = arrays["vocab"].tobytes().decode("utf-8")
+            terms = raw_vocab.split("\n") if raw_vocab else []
+            return cls(
+                {term: term_id for term_id, term in enumerate(terms)},
+                arrays["offsets"],
+                arrays["doc_ids"],
+                arrays["tfs"],
+                arrays["doc_lens"],
+                arrays["chunk_indexes"],
+            )
+
+
+# ── Persistence ─────────────────────────────────────────────────────────
+
+
+def _cache_key(video_id: Optional[str], material_id: Optional[str]) -> str:
+    if bool(video_id) == bool(material_id):
+        raise ValueError("Exactly one of video_id / material_id is required")
+    return f"video:{video_id}" if video_id else f"material:{material_id}"
+
+
+def _row_filter(video_id: Optional[str], material_id: Optional[str]):
+    if video_id:
+        return ChunkSparseIndex.video_id == video_id
+    return ChunkSparseIndex.course_material_id == material_id
+
+
+def store_sparse_index(
+    db: Session,
+    texts: Sequence[str],
+    chunk_indexes: Optional[Sequence[int]] = None,
+    video_id: Optional[str] = None,
+    material_id: Optional[str] = None,
+) -> SparseIndex:
+    """
+    Build and upsert the BM25 index for a video or material.
+
+    Does not commit — call it inside the same transaction that writes the
+    chunks so the index and the chunks are replaced together.
+    """
+    key = _cache_key(video_id, material_id)
+    index = SparseIndex.build(texts, chunk_indexes)
+    now = datetime.now(timezone.utc)
+
+    row = db.query(ChunkSparseIndex).filter(_row_filter(video_id, material_id)).first()
+    if row is None:
+        row = ChunkSparseIndex(video_id=video_id, course_material_id=material_id)
+        db.add(row)
+    row.num_docs = index.num_docs
+    row.avg_doc_len = index.avg_doc_len
+    row.index_data = index.to_bytes()
+    row.updated_at = now
+
+    _sparse_index_cache.pop(key, None)
+    logger.info(
+        f"Built BM25 index for {key}: {index.num_docs} chunks, "
+        f"{len(index.vocab)} terms, {len(row.index_data)} bytes"
+    )
+    return index
+
+
+def _build_from_chunks(
+    db: Session, video_id: Optional[str], material_id: Optional[str]
+) -> Optional[SparseIndex]:
+    """Lazy backfill for documents chunked before indexes were persisted."""
+    if video_id:
+        rows = (
+            db.query(TranscriptChunk.chunk_index, TranscriptChunk.text)
+            .filter(TranscriptChunk.video_id == video_id)
+            .all()
+        )
+    else:
+        rows = (
+            db.query(MaterialChunk.chunk_index, MaterialChunk.text)
+            .filter(MaterialChunk.course_material_id == material_id)
+            .all()
+        )
+    if not rows:
+        return None
+
+    try:
+        index = store_sparse_index(
+            db,
+            [r.text for r in rows],
+            [r.chunk_index for r in rows],
+            video_id=video_id,
+            material_id=material_id,
+        )
+        db.commit()
+        return index
+    except Exception as e:
+        # Likely a concurrent backfill of the same document; use our copy
+        logger.warning(f"Could not persist BM25 index: {e}")
+        db.rollback()
+        return SparseIndex.build([r.text for r in rows], [r.chunk_index for r in rows])
+
+
+def load_sparse_index(
+    db: Session, video_id: Optional[str] = None, material_id: Optional[str] = None
+) -> Optional[SparseIndex]:
+    """
+    Get the BM25 index for a video or material.
+
+    Served from the process cache while the stored row is unchanged;
+    otherwise deserialized from the DB, or built from the chunk rows if the
+    document predates persisted indexes. Returns None if it has no chunks.
+    """
+    key = _cache_key(video_id, material_id)
+    filt = _row_filter(video_id, material_id)
+
+    updated_at = db.query(ChunkSparseIndex.updated_at).filter(filt).scalar()
+    if updated_at is None:
+        _sparse_index_cache.pop(key, None)
+        return _build_from_chunks(db, video_id, material_id)
+
+    entry = _sparse_index_cache.get(key)
+    if entry is not None and entry[0] == updated_at:
+        logger.debug(f"BM25 index cache HIT for {key}")
+        return entry[1]
+
+    data = db.query(ChunkSparseIndex.index_data).filter(filt).scalar()
+    if data is None:
+        return None
+    index = SparseIndex.from_bytes(bytes(data))
+    _sparse_index_cache.set(key, (updated_at, index))
+    logger.debug(f"BM25 index cache MISS: Loaded {key} from DB")
+    return index
@@ -10,12 +10,14 @@ This enables intelligent query routing:
 - Specific queries → Use full transcript sections
 """
 
-from openai import OpenAI
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from models import Video, VideoSummary, TranscriptChunk
 from controllers.config import logger
 from services.chunking_embedding_service import EmbeddingService
+from services.ann_index import apply_search_settings
+from services.sparse_index import load_sparse_index
+from utils.semantic_cache import rag_semantic_cache
 import json
 import re
 
@@ -26,6 +28,8 @@ class SummaryService:
     """
 
     def __init__(self):
+        from openai import OpenAI
+
         self.client = OpenAI()
         self.model = "gpt-4o-mini"  # Cost-effective for summaries
 
@@ -553,6 +557,24 @@ class QueryRouter:
 
         return context
 
+    @staticmethod
+    def _chunk_to_candidate(chunk: TranscriptChunk) -> Dict[str, Any]:
+        """Retrieval candidate dict for a TranscriptChunk row."""
+        return {
+            "text": chunk.text,
+            "start_time": chunk.start_time,
+            "end_time": chunk.end_time,
+            "start_seconds": chunk.start_seconds,
+            "end_seconds": chunk.end_seconds,
+            "chunk_index": chunk.chunk_index,
+            "embedding": chunk.embedding,
+        }
+
+    @staticmethod
+    def rag_cache_query(query: str, top_k: int, use_hybrid: bool = True) -> str:
+        """Query string the RAG results cache is keyed on."""
+        return f"{query}:k{top_k}:h{use_hybrid}"
+
     def retrieve_relevant_chunks(
         self,
         db: Session,
@@ -579,9 +601,8 @@ class QueryRouter:
         # Check cache first (30 min TTL)
         from utils.cache import get_cached_rag_results, cache_rag_results
 
-        cached_results = get_cached_rag_results(
-            video_id, f"{query}:k{top_k}:h{use_hybrid}"
-        )
+        rag_query = self.rag_cache_query(query, top_k, use_hybrid)
+        cached_results = get_cached_rag_results(video_id, rag_query)
         if cached_results:
             logger.info(
                 f"Cache HIT: RAG results for video {video_id}, query '{query[:50]}...'"
@@ -597,20 +618,20 @@ class QueryRouter:
                 f"[DEBUG] Query embedding shape: {len(query_embedding) if query_embedding else None}"
             )
 
-            # Check total chunks for this video
-            total_chunks = (
-                db.query(TranscriptChunk)
-                .filter(TranscriptChunk.video_id == video_id)
-                .count()
-            )
-            logger.info(
-                f"[DEBUG] Total chunks in DB for video {video_id}: {total_chunks}"
+            # Near-duplicate of a recent question on this video?
+            variant = f"k{top_k}:h{use_hybrid}"
+            similar = rag_semantic_cache.lookup(
+                "video", video_id, query_embedding, variant=variant
             )
+            if similar is not None:
+                return similar
 
             if use_hybrid:
-                # HYBRID: Get top 20 from dense search, then rerank with BM25
+                # HYBRID: Top 20 from dense search + top 20 from the video's
+                # corpus-wide BM25 index, fused with RRF
                 # Step 1: Database-level dense retrieval using pgvector
                 logger.info(f"[DEBUG] Executing pgvector cosine_distance query...")
+                apply_search_settings(db, "transcript_chunks", top_k=20)
                 dense_chunks = (
                     db.query(TranscriptChunk)
                     .filter(TranscriptChunk.video_id == video_id)
@@ -629,36 +650,48 @@ class QueryRouter:
                     )
                     return []
 
-                # Step 2: BM25 rerank (only on top 20, not all chunks)
-                candidates = []
-                for chunk in dense_chunks:
-                    candidates.append(
-                        {
-                            "text": chunk.text,
-                            "start_time": chunk.start_time,
-                            "end_time": chunk.end_time,
-                            "start_seconds": chunk.start_seconds,
-                            "end_seconds": chunk.end_seconds,
-                            "chunk_index": chunk.chunk_index,
-                            "embedding": chunk.embedding,
-                        }
-                    )
-
-                # BM25 rerank (with BM25 index caching per video)
+                candidates = [self._chunk_to_candidate(c) for c in dense_chunks]
+
+                # Step 2: Sparse retrieval over ALL chunks of the video
+                # (persisted index, loaded lazily). Fetch keyword hits that
+                # the dense search missed so RRF can rank them too.
+                sparse_index = load_sparse_index(db, video_id=video_id)
+                if sparse_index is not None:
+                    seen = {c["chunk_index"] for c in candidates}
+                    missing = [
+                        chunk_index
+                        for chunk_index, _ in sparse_index.search(query, top_k=20)
+                        if chunk_index not in seen
+                    ]
+                    if missing:
+                        keyword_chunks = (
+                            db.query(TranscriptChunk)
+                            .filter(
+                                TranscriptChunk.video_id == video_id,
+                                TranscriptChunk.chunk_index.in_(missing),
+                            )
+                            .all()
+                        )
+                        candidates.extend(
+                            self._chunk_to_candidate(c) for c in keyword_chunks
+                        )
+
+                # Step 3: Fuse dense + BM25 rankings
                 relevant = self.embedder.hybrid_search(
                     query,
                     query_embedding,
                     candidates,
                     top_k=top_k,
                     alpha=0.5,
-                    cache_key=f"bm25:{video_id}",
+                    sparse_index=sparse_index,
                 )
                 logger.info(
-                    f"Retrieved {len(relevant)} chunks (hybrid: pgvector + BM25 rerank)"
+                    f"Retrieved {len(relevant)} chunks (hybrid: pgvector + BM25)"
                 )
 
             else:
                 # SEMANTIC ONLY: Pure pgvector similarity search
+                apply_search_settings(db, "transcript_chunks", top_k=top_k)
                 semantic_chunks = (
                     db.query(TranscriptChunk)
                     .filter(TranscriptChunk.video_id == video_id)
@@ -676,26 +709,15 @@ class QueryRouter:
                     )
                     return []
 
-                relevant = []
-                for chunk in semantic_chunks:
-                    relevant.append(
-                        {
-                            "text": chunk.text,
-                            "start_time": chunk.start_time,
-                            "end_time": chunk.end_time,
-                            "start_seconds": chunk.start_seconds,
-                            "end_seconds": chunk.end_seconds,
-                            "chunk_index": chunk.chunk_index,
-                            "embedding": chunk.embedding,
-                        }
-                    )
+                relevant = [self._chunk_to_candidate(c) for c in semantic_chunks]
                 logger.info(
                     f"Retrieved {len(relevant)} chunks (pure semantic: pgvector)"
                 )
 
             # Cache results before returning (30 min TTL)
-            cache_rag_results(
-                video_id, f"{query}:k{top_k}:h{use_hybrid}", relevant, ttl=1800
+            cache_rag_results(video_id, rag_query, relevant, ttl=1800)
+            rag_semantic_cache.store(
+                "video", video_id, query, query_embedding, relevant, variant=variant
             )
 
             return relevant
@@ -0,0 +1,188 @@
+"""
+In-process dense retrieval over chunk embeddings.
+
+Keeps every chunk embedding of one video or material as a single
+pre-normalized float32 matrix, so scoring a query is one matrix-vector
+product and picking the top-k is one argpartition — no per-candidate
+Python loop or norm computation.
+
+Several queries can be scored together (matrix-matrix product), which is
+what query rewriting / multi-question turns need.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from controllers.config import logger
+from utils.cache import get_local_cache
+
+# Process-local indexes keyed by the retrieval cache key
+# (e.g. "video:<id>", "material:<id>") -> (version, VectorIndex). The
+# version is a token that changes whenever the document's chunks are
+# rewritten (its cache namespace version), so checking it costs nothing and
+# a hit needs no embeddings from the database. Each entry is roughly
+# n_chunks * 1536 * 4 bytes (~600KB for a 100-chunk lecture), so the byte
+# budget is what normally bounds this cache.
+_vector_index_cache = get_local_cache(
+    "vector_indexes",
+    max_entries=256,
+    max_bytes=256 * 1024 * 1024,
+    sizeof=lambda entry: entry[1].matrix.nbytes,
+)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place; zero vectors stay zero instead of NaN."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class VectorIndex:
+    """
+    Dense index over one document's chunks.
+
+    Args:
+        embeddings: (n, dim) array-like of chunk embeddings
+        payloads: One metadata dict per row (returned with each hit)
+    """
+
+    def __init__(self, embeddings: Any, payloads: List[Dict[str, Any]]):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(payloads), -1)
+        if len(payloads) != matrix.shape[0]:
+            raise ValueError(
+                f"VectorIndex got {matrix.shape[0]} vectors for {len(payloads)} payloads"
+            )
+        # Own the buffer so normalizing never mutates caller data
+        self.matrix = _normalize_rows(np.array(matrix, dtype=np.float32, copy=True))
+        self.payloads = payloads
+
+    def with_payloads(self, payloads: List[Dict[str, Any]]) -> "VectorIndex":
+        """Same (shared, read-only) matrix with fresh row metadata."""
+        if len(payloads) != len(self):
+            raise ValueError(
+                f"VectorIndex has {len(self)} rows, got {len(payloads)} payloads"
+            )
+        index = object.__new__(VectorIndex)
+        index.matrix = self.matrix
+        index.payloads = payloads
+        return index
+
+    @classmethod
+    def from_candidates(cls, candidates: List[Dict[str, Any]]) -> "VectorIndex":
+        """
+        Build from retrieval candidates (dicts with 'embedding' + metadata).
+        Candidates without an embedding are skipped.
+        """
+        kept = _embedded(candidates)
+        if not kept:
+            return cls(np.zeros((0, 0), dtype=np.float32), [])
+        return cls(np.stack([np.asarray(c["embedding"]) for c in kept]), kept)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @staticmethod
+    def _prepare_queries(query_embeddings: Any) -> np.ndarray:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        return _normalize_rows(queries.copy())
+
+    def scores(self, query_embeddings: Any) -> np.ndarray:
+        """
+        Cosine similarity of each query against every chunk.
+
+        Returns:
+            (n_queries, n_chunks) float32 array
+        """
+        queries = self._prepare_queries(query_embeddings)
+        if len(self) == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+        return queries @ self.matrix.T
+
+    @staticmethod
+    def _top_indices(row: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the top_k highest scores, best first."""
+        n = row.shape[0]
+        if top_k >= n:
+            return np.argsort(-row, kind="stable")
+        part = np.argpartition(-row, top_k - 1)[:top_k]
+        return part[np.argsort(-row[part], kind="stable")]
+
+    def search_batch(
+        self, query_embeddings: Sequence[Any], top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Score several queries in one matrix product.
+
+        Returns:
+            One top-k list per query, each hit being its payload plus 'similarity'
+        """
+        all_scores = self.scores(query_embeddings)
+        if top_k <= 0 or len(self) == 0:
+            return [[] for _ in range(all_scores.shape[0])]
+
+        results: List[List[Dict[str, Any]]] = []
+        for row in all_scores:
+            hits = []
+            for idx in self._top_indices(row, top_k):
+                hits.append({**self.payloads[idx], "similarity": float(row[idx])})
+            results.append(hits)
+        return results
+
+    def search(self, query_embedding: Any, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k chunks for a single query (highest similarity first)."""
+        return self.search_batch([query_embedding], top_k=top_k)[0]
+
+
+def _embedded(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Explicit None check needed for pgvector (numpy arrays don't support implicit bool)
+    return [c for c in candidates if c.get("embedding") is not None]
+
+
+def cached_vector_index(cache_key: str, version: Any) -> Optional[VectorIndex]:
+    """
+    The index cached for cache_key if it was built under version, else None.
+
+    Callers check this before loading chunk rows, and on a hit skip loading
+    the embeddings.
+    """
+    entry = _vector_index_cache.get(cache_key)
+    if entry is not None and entry[0] == version:
+        logger.debug(f"Vector index cache HIT for {cache_key}")
+        return entry[1]
+    return None
+
+
+def get_vector_index(
+    candidates: List[Dict[str, Any]],
+    cache_key: Optional[str] = None,
+    version: Any = None,
+) -> VectorIndex:
+    """
+    Return a VectorIndex for candidates, reusing the one cached for
+    cache_key when it was built under the same version.
+
+    Without a version nothing is cached: a key alone can't tell whether the
+    document was re-chunked or re-embedded since.
+    """
+    if not cache_key or version is None:
+        return VectorIndex.from_candidates(candidates)
+
+    index = cached_vector_index(cache_key, version)
+    if index is not None:
+        return index
+
+    index = VectorIndex.from_candidates(candidates)
+    # The matrix holds the vectors; don't keep a second copy in the payloads
+    index = index.with_payloads(
+        [{k: v for k, v in p.items() if k != "embedding"} for p in index.payloads]
+    )
+    _vector_index_cache.set(cache_key, (version, index))
+    logger.debug(
+        f"Vector index cache MISS: Built {len(index)}-row index for {cache_key}"
+    )
+    return index
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Parity of the int8 ONNX AI-detector backend with the PyTorch model
+(utils/ai_detection_backends.py) on a fixture set.
+
+Needs torch, transformers, onnxruntime and an exported model
+(management_commands.export_ai_detector_onnx); skipped otherwise.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.ai_detection_backends import (
+    AI_DETECTION_ONNX_DIR,
+    ONNX_MODEL_FILE,
+    ai_label_index,
+    softmax,
+)
+
+FIXTURES = Path(__file__).parent / "test_files" / "ai_detection_fixtures.json"
+# Dynamic int8 quantization moves RoBERTa's probabilities by ~0.01; larger
+# drift means a broken export
+MAX_SCORE_DRIFT = 0.05
+
+
+def test_label_index_and_softmax():
+    assert ai_label_index({0: "Fake", 1: "Real"}) == 0
+    assert ai_label_index({"0": "Real", "1": "Fake"}) == 1
+    assert ai_label_index({0: "LABEL_0", 1: "LABEL_1"}) is None
+    probabilities = softmax(np.array([[2.0, 0.0], [1000.0, 1000.0]]))
+    assert np.allclose(probabilities.sum(axis=1), 1.0)
+    assert probabilities[1].tolist() == [0.5, 0.5]
+
+
+def test_onnx_scores_match_pytorch():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("onnxruntime")
+    if not (Path(AI_DETECTION_ONNX_DIR) / ONNX_MODEL_FILE).exists():
+        pytest.skip("No exported ONNX model")
+
+    from utils.ai_detection_backends import OnnxDetectorBackend, TorchDetectorBackend
+
+    fixtures = json.loads(FIXTURES.read_text())
+    texts = [item["text"] for item in fixtures]
+    # Longer than the model's 512 tokens: both must truncate the same way
+    texts.append(" ".join(texts * 3))
+
+    reference = TorchDetectorBackend().score(texts)
+    onnx = OnnxDetectorBackend()
+    quantized = onnx.score(texts)
+
+    drift = np.abs(np.array(quantized) - np.array(reference))
+    assert drift.max() <= MAX_SCORE_DRIFT, dict(
+        zip([item["id"] for item in fixtures] + ["long"], drift.round(4))
+    )
+    # Batching (and padding) doesn't change a text's score
+    assert onnx.score(texts[:1])[0] == pytest.approx(quantized[0], abs=1e-4)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for pgvector ANN index settings (services/ann_index.py).
+
+Checks the generated DDL and that per-query search settings never ask the
+index for fewer candidates than the requested top_k. No DB needed.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import ann_index
+from services.ann_index import AnnIndexSpec, search_settings
+
+
+def test_create_sql_per_method():
+    hnsw = AnnIndexSpec("material_chunks", method="hnsw", m=24, ef_construction=80)
+    assert hnsw.create_sql(concurrently=True) == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_material_chunks_embedding_ann "
+        "ON material_chunks USING hnsw (embedding vector_cosine_ops) "
+        "WITH (m = 24, ef_construction = 80)"
+    )
+    ivf = AnnIndexSpec("transcript_chunks", method="ivfflat", lists=50)
+    assert "USING ivfflat" in ivf.create_sql() and "lists = 50" in ivf.create_sql()
+    assert AnnIndexSpec("transcript_chunks", method="exact").create_sql() is None
+
+    with pytest.raises(ValueError):
+        AnnIndexSpec("transcript_chunks", method="flat")
+
+
+def test_search_settings_cover_top_k(monkeypatch):
+    monkeypatch.setitem(
+        ann_index.ANN_INDEXES, "transcript_chunks", AnnIndexSpec("transcript_chunks")
+    )
+    settings = search_settings("transcript_chunks", top_k=500, ef_search=40)
+    assert settings["hnsw.ef_search"] == "500"
+    assert "hnsw.iterative_scan" in settings
+    assert "hnsw.iterative_scan" not in search_settings(
+        "transcript_chunks", iterative_scan=False
+    )
+
+    monkeypatch.setitem(
+        ann_index.ANN_INDEXES,
+        "transcript_chunks",
+        AnnIndexSpec("transcript_chunks", method="ivfflat", lists=8),
+    )
+    assert search_settings("transcript_chunks", probes=20)["ivfflat.probes"] == "8"
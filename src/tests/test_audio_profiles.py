@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the transcription audio profiles (controllers/storage.py) and the
+WER used by management_commands/benchmark_transcription_audio.py.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from controllers import storage
+from management_commands.benchmark_transcription_audio import word_error_rate
+
+
+@pytest.mark.parametrize(
+    "name, suffix, encoder",
+    [
+        ("wav", ".wav", "pcm_s16le"),
+        ("flac", ".flac", "flac"),
+        ("opus", ".ogg", "libopus"),
+    ],
+)
+def test_audio_is_extracted_with_the_selected_profile(
+    monkeypatch, name, suffix, encoder
+):
+    commands = []
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kwargs: commands.append(cmd))
+    monkeypatch.setattr(storage, "TRANSCRIBE_AUDIO_CODEC", name)
+
+    path = storage._extract_audio_with_ffmpeg("/videos/lecture.mp4")
+    try:
+        assert path.endswith(suffix)
+        cmd = commands[0]
+        assert cmd[cmd.index("-acodec") + 1] == encoder
+        assert cmd[cmd.index("-ac") + 1] == "1"
+        assert cmd[-1] == path
+    finally:
+        os.remove(path)
+
+
+def test_unknown_profile_falls_back_to_wav():
+    assert storage.audio_profile("mp3").name == "wav"
+    assert storage.audio_profile("opus").mimetype == "audio/ogg"
+
+
+def test_word_error_rate():
+    reference = "The derivative of x squared is two x."
+    assert word_error_rate(reference, "the derivative of X squared is 2x") == 2 / 8
+    assert word_error_rate(reference, reference) == 0.0
+    assert word_error_rate(reference, "") == 1.0
+    assert word_error_rate("", "") == 0.0
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process cache tier (utils/cache.py).
+
+Covers LRUCache (LRU ordering, entry/byte budgets, TTL, the on_evict hook
+used to delete cached video files, metrics, concurrent access), the binary
+Redis value encoding, and L1 invalidation. No Redis/network needed.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import cache as cache_module
+from utils.cache import (
+    LRUCache,
+    decode_value,
+    encode_value,
+    get_local_cache,
+    local_cache_stats,
+)
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache("t-lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_and_on_evict():
+    evicted = []
+    cache = LRUCache(
+        "t-bytes",
+        max_entries=100,
+        max_bytes=10,
+        sizeof=len,
+        on_evict=lambda k, v: evicted.append(k),
+    )
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"123")
+
+    assert evicted == ["a"]
+    assert cache.stats()["bytes"] == 8
+
+    # Replacing a key hands the old value to on_evict too
+    cache.set("b", b"1")
+    assert evicted == ["a", "b"]
+
+
+def test_ttl_expiry_and_sliding_refresh():
+    fixed = LRUCache("t-ttl", ttl=0.05)
+    fixed.set("k", "v")
+    time.sleep(0.07)
+    assert fixed.get("k") is None
+    assert fixed.stats()["expirations"] == 1
+
+    sliding = LRUCache("t-sliding", ttl=0.08, sliding=True)
+    sliding.set("k", "v")
+    for _ in range(3):
+        time.sleep(0.04)
+        assert sliding.get("k") == "v"
+    time.sleep(0.1)
+    assert sliding.purge_expired() == 1
+
+
+def test_hit_rate_metrics_and_registry():
+    cache = get_local_cache("t-registry", max_entries=4)
+    assert get_local_cache("t-registry") is cache
+
+    cache.set("x", 1)
+    cache.get("x")
+    cache.get("missing")
+
+    stats = local_cache_stats()["t-registry"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_concurrent_access_stays_bounded():
+    cache = LRUCache("t-threads", max_entries=50)
+
+    def worker(offset):
+        for i in range(500):
+            cache.set((offset, i), i)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.stats()
+    assert len(cache) == 50
+    assert stats["hits"] + stats["misses"] == 8 * 500
+
+
+def test_binary_encoding_round_trip_packs_vectors():
+    # pgvector and cache_query_embedding both hand over float32
+    embedding = np.random.default_rng(0).normal(size=1536).astype(np.float32)
+    results = [
+        {"text": "chunk", "chunk_index": 3, "embedding": embedding},
+        {"text": "other", "similarity": np.float32(0.25), "embedding": None},
+    ]
+
+    payload = encode_value(results)
+    assert len(payload) < 1536 * 4 + 200  # vs ~30KB as JSON text
+
+    decoded = decode_value(payload)
+    np.testing.assert_allclose(decoded[0]["embedding"], embedding, rtol=1e-6)
+    assert decoded[0]["chunk_index"] == 3
+    assert decoded[1] == {"text": "other", "similarity": 0.25, "embedding": None}
+
+    # Entries written before the binary format are still readable
+    assert decode_value(b'{"embedding": [0.5]}') == {"embedding": [0.5]}
+
+
+def test_binary_encoding_keeps_shape_and_dtype():
+    matrix = np.arange(12, dtype=np.float64).reshape(3, 4) / 7
+    ids = np.array([3, 1, 2], dtype=np.int64)
+    labels = np.array(["a", "b"])
+
+    decoded = decode_value(encode_value({"m": matrix, "ids": ids, "l": labels}))
+    assert decoded["m"].shape == (3, 4) and decoded["m"].dtype == np.float64
+    np.testing.assert_array_equal(decoded["m"], matrix)
+    assert decoded["ids"].dtype == np.int64
+    assert decoded["ids"].tolist() == [3, 1, 2]
+    assert decoded["l"] == ["a", "b"]
+
+    # Payloads from before dtype/shape were recorded: flat float32 vectors
+    legacy_header = b'{"v":{"__f32__":0},"n":[2]}'
+    legacy = (
+        cache_module._BINARY_MAGIC
+        + len(legacy_header).to_bytes(4, "little")
+        + legacy_header
+        + np.array([0.5, 1.5], dtype=np.float32).tobytes()
+    )
+    assert decode_value(legacy).tolist() == [0.5, 1.5]
+
+
+def test_l1_invalidation_by_key():
+    l1 = cache_module._l1_cache
+    l1.set("rag:v1:a", 1)
+    l1.set("rag:v1:b", 2)
+
+    cache_module._l1_invalidate("key", "rag:v1:a")
+    assert "rag:v1:a" not in l1
+    assert l1.get("rag:v1:b") == 2
+
+
+def test_redis_backend_backs_off_then_retries():
+    # Nothing listens on port 1, so every connect attempt fails fast
+    backend = cache_module.RedisBackend(
+        "redis://127.0.0.1:1/0", connect_timeout=0.2, max_backoff=4
+    )
+    if not cache_module.REDIS_AVAILABLE:
+        assert backend.client() is None
+        return
+
+    assert backend.client() is None
+    assert backend.backing_off() and backend._failures == 1
+    # Inside the backoff window no reconnect is attempted
+    assert backend.client() is None and backend._failures == 1
+
+    # Once it elapses the next call reconnects (and fails again, longer wait)
+    backend._retry_at = 0.0
+    assert backend.client() is None
+    assert backend._failures == 2
+    assert backend._retry_at - time.monotonic() > 1.5
+
+    for _ in range(5):
+        backend._retry_at = 0.0
+        backend.client()
+    assert backend._retry_at - time.monotonic() <= 4
+
+
+def test_bumping_namespace_orphans_old_rag_keys():
+    before = cache_module.rag_results_key("vid-ns", "what is an eigenvalue")
+    assert before.startswith("rag:video:vid-ns:v")
+    cache_module.cache_rag_results("vid-ns", "what is an eigenvalue", [{"t": 1}])
+    assert cache_module.get_cached_rag_results("vid-ns", "what is an eigenvalue")
+
+    cache_module.invalidate_video_cache("vid-ns")
+
+    after = cache_module.rag_results_key("vid-ns", "what is an eigenvalue")
+    assert after != before
+    assert (
+        cache_module.get_cached_rag_results("vid-ns", "what is an eigenvalue") is None
+    )
+    # Other namespaces are untouched
+    assert cache_module.rag_results_key("vid-other", "q").startswith(
+        "rag:video:vid-other:v0:"
+    )
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    def get(self, key):
+        value = self.data.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incrby(self, key, amount):
+        self.data[key] = self.data.get(key, 0) + amount
+        return self.data[key]
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def publish(self, channel, message):
+        self.published.append(message)
+
+
+def test_bumps_during_redis_outage_are_replayed(monkeypatch):
+    redis = FakeRedis()
+    redis.data["cachever:video:vid-outage"] = 3
+    client = {"current": redis}
+    monkeypatch.setattr(cache_module, "get_redis_client", lambda: client["current"])
+    monkeypatch.setattr(cache_module, "_pending_bumps", {})
+    monkeypatch.setattr(cache_module, "_local_versions", {})
+    cache_module._l1_cache.clear()
+
+    assert cache_module.namespace_version("video", "vid-outage") == 3
+
+    # Redis goes away: the bump is local and pending
+    client["current"] = None
+    assert cache_module.bump_namespace("video", "vid-outage") == 4
+    assert cache_module._pending_bumps == {"cachever:video:vid-outage": 1}
+
+    # Redis is back and L1 was cleared on reconnect: the old Redis value
+    # must not be served, and other workers get the bump
+    client["current"] = redis
+    cache_module._l1_cache.clear()
+    assert cache_module.namespace_version("video", "vid-outage") == 4
+    assert redis.data["cachever:video:vid-outage"] == 4
+    assert not cache_module._pending_bumps
+    assert any(m.endswith("|key|cachever:video:vid-outage") for m in redis.published)
+
+    assert cache_module.bump_namespace("video", "vid-outage") == 5
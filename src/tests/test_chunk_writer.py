@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk chunk writer's binary COPY encoding
+(services/chunk_writer.py). Decodes the payload by hand; no DB needed.
+"""
+
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import MaterialChunk
+from services.chunk_writer import copy_payload
+
+
+def _decode(payload: bytes, num_columns: int):
+    assert payload.startswith(b"PGCOPY\n\xff\r\n\x00")
+    offset = 11 + 8  # Signature, flags, header extension length
+    rows = []
+    while True:
+        (fields,) = struct.unpack_from(">h", payload, offset)
+        offset += 2
+        if fields == -1:
+            break
+        assert fields == num_columns
+        row = []
+        for _ in range(fields):
+            (length,) = struct.unpack_from(">i", payload, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(payload[offset : offset + length])
+            offset += length
+        rows.append(row)
+    assert offset == len(payload)
+    return rows
+
+
+def test_copy_payload_encodes_each_column_type():
+    columns = list(MaterialChunk.__table__.columns)
+    names = [c.name for c in columns]
+    embedding = np.arange(1536, dtype=np.float32) / 1536
+    row = {
+        "id": "chunk-1",
+        "course_material_id": "material-1",
+        "chunk_index": 7,
+        "text": "Eigenvalues — λ",
+        "page_number": None,
+        "start_seconds": 12.5,
+        "word_count": 3,
+        "embedding": embedding,
+        "created_at": datetime(2000, 1, 2, tzinfo=timezone.utc),
+    }
+
+    (decoded,) = _decode(copy_payload(columns, [row]), len(columns))
+    fields = dict(zip(names, decoded))
+
+    assert fields["id"] == b"chunk-1"
+    assert fields["text"].decode("utf-8") == "Eigenvalues — λ"
+    assert struct.unpack(">i", fields["chunk_index"]) == (7,)
+    assert struct.unpack(">d", fields["start_seconds"]) == (12.5,)
+    assert fields["page_number"] is None and fields["end_seconds"] is None
+    assert struct.unpack(">q", fields["created_at"]) == (86400 * 1_000_000,)
+
+    dim, unused = struct.unpack_from(">HH", fields["embedding"])
+    assert (dim, unused) == (1536, 0)
+    vector = np.frombuffer(fields["embedding"], dtype=">f4", offset=4)
+    np.testing.assert_array_equal(vector, embedding)
+
+
+def test_copy_payload_with_no_rows_is_header_and_trailer():
+    columns = list(MaterialChunk.__table__.columns)
+    assert _decode(copy_payload(columns, []), len(columns)) == []
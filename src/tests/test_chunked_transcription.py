@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for Deepgram transcription of local media and media URLs, chunked when
+long (controllers/storage.py), with fakes for ffmpeg and the Deepgram client.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from controllers import storage
+
+
+class FakeDeepgram:
+    """Answers each chunk with one utterance naming the chunk file."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.listen = SimpleNamespace(rest=SimpleNamespace(v=lambda version: self))
+
+    def transcribe_file(self, payload, options, timeout=None):
+        # Bodies are streamed from the open file, not passed as bytes
+        assert "buffer" not in payload
+        name = os.path.basename(payload["stream"].name)
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        text = f"{name} {payload['stream'].read().decode()}"
+        return {
+            "results": {
+                "utterances": [{"start": 1.0, "end": 3.0, "transcript": text}],
+                "channels": [{"alternatives": [{"transcript": text}]}],
+            }
+        }
+
+
+@pytest.fixture
+def long_media(monkeypatch, tmp_path):
+    chunk_dir = tmp_path / "chunks"
+    chunk_dir.mkdir()
+    chunks = []
+    for i in range(5):
+        path = chunk_dir / f"chunk_{i:04d}.wav"
+        path.write_bytes(f"audio{i}".encode())
+        chunks.append((str(path), i * 600.0))
+
+    client = FakeDeepgram()
+    monkeypatch.setattr(storage, "deepgram_client", client)
+    monkeypatch.setattr(storage, "TRANSCRIBE_CHUNK_CONCURRENCY", 3)
+    monkeypatch.setattr(storage, "_probe_media_duration_seconds", lambda path: 3000.0)
+    monkeypatch.setattr(storage, "_segment_media_to_audio_chunks", lambda path: chunks)
+    return client, chunk_dir
+
+
+def test_chunks_are_transcribed_concurrently_in_order(long_media):
+    client, chunk_dir = long_media
+    text = storage.transcribe_video_with_deepgram("/videos/lecture.mp4")
+
+    assert text.split("\n\n") == [f"chunk_{i:04d}.wav audio{i}" for i in range(5)]
+    assert client.max_active == 3
+    assert not chunk_dir.exists()  # Chunks are cleaned up
+
+
+def test_timed_segments_are_shifted_by_chunk_offset(long_media):
+    result = storage.transcribe_video_with_deepgram_timed("/videos/lecture.mp4")
+
+    segments = result["transcription"]
+    assert [segment["start"] for segment in segments] == [
+        1.0,
+        601.0,
+        1201.0,
+        1801.0,
+        2401.0,
+    ]
+    assert all(segment["dur"] == 2.0 for segment in segments)
+    assert result["lengthInSeconds"] == 2403
+
+
+def test_segmenting_is_a_single_ffmpeg_pass(monkeypatch):
+    commands = []
+
+    def run(cmd, stdout, stderr, check):
+        commands.append(cmd)
+        out_dir = os.path.dirname(cmd[-1])
+        rows = []
+        for i, (start, end) in enumerate([(0.0, 600.032), (600.032, 905.5)]):
+            name = f"chunk_{i:04d}.wav"
+            Path(out_dir, name).write_bytes(b"RIFF")
+            rows.append(f"{name},{start},{end}")
+        Path(cmd[cmd.index("-segment_list") + 1]).write_text("\n".join(rows) + "\n")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    chunks = storage._segment_media_to_audio_chunks("/videos/lecture.mp4")
+
+    assert len(commands) == 1
+    assert commands[0][commands[0].index("-f") + 1] == "segment"
+    assert [offset for _, offset in chunks] == [0.0, 600.032]
+    storage._remove_chunks(chunks)
+    assert not os.path.exists(os.path.dirname(chunks[0][0]))
+
+
+def test_urls_are_transcribed_from_extracted_audio_only(monkeypatch, tmp_path):
+    url = "https://bucket.s3.amazonaws.com/user_videos/u/v_talk.m4v?X-Amz-Signature=a"
+    extracted = []
+
+    def extract(source):
+        extracted.append(source)
+        audio = tmp_path / "audio.ogg"
+        audio.write_bytes(b"audio")
+        return str(audio)
+
+    monkeypatch.setattr(storage, "deepgram_client", FakeDeepgram(delay=0))
+    monkeypatch.setattr(storage, "_probe_media_duration_seconds", lambda path: 60.0)
+    monkeypatch.setattr(storage, "_extract_audio_with_ffmpeg", extract)
+
+    # Not a known video extension, but uploads are always video
+    assert storage.transcribe_video_with_deepgram(url) == "audio.ogg audio"
+    assert extracted == [url]
+
+    # Without extracted audio there's nothing local to send
+    monkeypatch.setattr(storage, "_extract_audio_with_ffmpeg", lambda source: None)
+    for transcribe in (
+        storage.transcribe_video_with_deepgram,
+        storage.transcribe_video_with_deepgram_timed,
+    ):
+        with pytest.raises(Exception, match="Could not extract audio"):
+            transcribe(url)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Tests for course-wide retrieval (services/course_search.py).
+
+Locks in that:
+  1. Dense and BM25 rankings are fused with RRF, weighted by alpha.
+  2. Positions in the merged course BM25 index map back to the right
+     document and chunk_index, skipping documents without an index.
+  3. Citations read [MM:SS] / [H:MM:SS] for lectures, [Page N] for documents.
+  4. Keyword hits whose chunk was deleted since indexing are dropped.
+
+The database, embeddings and dense query are stubbed, so these run offline.
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import course_search
+from services.course_search import RRF_K, _citation, search_course
+from services.sparse_index import SparseIndex
+
+LECTURE = ("video", "v1")
+SLIDES = ("material", "m2")
+MATERIALS = {
+    LECTURE: SimpleNamespace(id="m1", title="Lecture 1", material_type="video"),
+    SLIDES: SimpleNamespace(id="m2", title="Slides", material_type="pdf"),
+}
+
+
+def chunk(doc, chunk_index, dense_score=0.9, **fields):
+    kind, doc_id = doc
+    return {
+        "kind": kind,
+        "doc_id": doc_id,
+        "chunk_index": chunk_index,
+        "text": f"{doc_id} chunk {chunk_index}",
+        "page_number": None,
+        "start_seconds": None,
+        "end_seconds": None,
+        "dense_score": dense_score,
+        **fields,
+    }
+
+
+class FakeSparseIndex:
+    """rank() returns scripted positions; chunk_indexes maps them to chunks."""
+
+    def __init__(self, ranked, chunk_indexes):
+        self.ranked = ranked
+        self.chunk_indexes = np.asarray(chunk_indexes, dtype=np.int32)
+
+    def rank(self, query, top_k=20):
+        return self.ranked[:top_k]
+
+
+@pytest.fixture
+def course(monkeypatch):
+    """Stubs search_course's collaborators; returns what they were asked."""
+    state = SimpleNamespace(dense=[], sparse=None, stored={}, fetched=[])
+
+    def fetch_chunks(db, keys):
+        state.fetched.append(list(keys))
+        return {key: state.stored[key] for key in keys if key in state.stored}
+
+    monkeypatch.setattr(
+        course_search,
+        "_course_documents",
+        lambda db, course_id: (list(MATERIALS), MATERIALS),
+    )
+    monkeypatch.setattr(
+        course_search,
+        "EmbeddingService",
+        lambda: SimpleNamespace(embed_text=lambda query: [1.0, 0.0]),
+    )
+    monkeypatch.setattr(
+        course_search, "_dense_search", lambda db, docs, embedding, limit: state.dense
+    )
+    monkeypatch.setattr(
+        course_search,
+        "_course_sparse_index",
+        lambda db, course_id, docs: state.sparse
+        or (None, np.zeros(0, dtype=np.int32), []),
+    )
+    monkeypatch.setattr(course_search, "_fetch_chunks", fetch_chunks)
+    return state
+
+
+def test_rankings_are_fused_with_rrf(course):
+    course.dense = [chunk(LECTURE, 0), chunk(LECTURE, 1), chunk(SLIDES, 3)]
+    # BM25: slides chunk 3 first, then lecture chunk 1
+    course.sparse = (
+        FakeSparseIndex([(1, 4.0), (0, 2.0)], chunk_indexes=[1, 3]),
+        np.array([0, 1], dtype=np.int32),
+        [LECTURE, SLIDES],
+    )
+
+    results = search_course(None, "c1", "stiffness", top_k=3, alpha=0.5)
+
+    assert [(r["video_id"], r["chunk_index"]) for r in results] == [
+        (None, 3),  # Dense rank 2 + BM25 rank 0
+        ("v1", 1),  # Dense rank 1 + BM25 rank 1
+        ("v1", 0),  # Dense rank 0 only
+    ]
+    assert results[0]["score"] == round(0.5 / (RRF_K + 2) + 0.5 / RRF_K, 6)
+    assert results[0]["bm25_score"] == 4.0
+    assert results[2]["bm25_score"] == 0.0
+    assert results[0]["material_title"] == "Slides"
+    assert course.fetched == []  # Every keyword hit came with the dense rows
+
+
+def test_alpha_weights_dense_against_bm25(course):
+    course.dense = [chunk(LECTURE, 0), chunk(LECTURE, 1)]
+    course.sparse = (
+        FakeSparseIndex([(1, 4.0), (0, 2.0)], chunk_indexes=[0, 1]),
+        np.array([0, 0], dtype=np.int32),
+        [LECTURE],
+    )
+
+    semantic = search_course(None, "c1", "q", alpha=1.0)
+    keyword = search_course(None, "c1", "q", alpha=0.0)
+    assert [r["chunk_index"] for r in semantic] == [0, 1]
+    assert [r["chunk_index"] for r in keyword] == [1, 0]
+
+
+def test_deleted_keyword_hits_are_skipped(course):
+    course.dense = [chunk(LECTURE, 0)]
+    course.sparse = (
+        FakeSparseIndex([(0, 3.0), (1, 2.0)], chunk_indexes=[4, 5]),
+        np.array([1, 1], dtype=np.int32),
+        [LECTURE, SLIDES],
+    )
+    # Slides chunk 4 still exists; chunk 5 was deleted after indexing
+    course.stored = {("material", "m2", 4): chunk(SLIDES, 4, dense_score=0.0)}
+
+    results = search_course(None, "c1", "q", top_k=5)
+
+    assert sorted(course.fetched[0]) == [("material", "m2", 4), ("material", "m2", 5)]
+    assert [(r["material_id"], r["chunk_index"]) for r in results] == [
+        ("m1", 0),
+        ("m2", 4),
+    ]
+    assert results[1]["text"] == "m2 chunk 4"
+
+
+def test_no_documents_means_no_results(course, monkeypatch):
+    monkeypatch.setattr(
+        course_search, "_course_documents", lambda db, course_id: ([], {})
+    )
+    assert search_course(None, "c1", "q") == []
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *conditions):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def test_positions_map_to_documents_across_merged_indexes(monkeypatch):
+    course_search._course_sparse_cache.clear()
+    stored = {
+        ("video", "v1"): SparseIndex.build(
+            ["eigenvalues of a matrix", "nodal forces", "boundary conditions"]
+        ),
+        ("material", "m-empty"): None,
+        ("material", "m2"): SparseIndex.build(
+            ["intro slide", "the stiffness matrix relates forces"],
+            chunk_indexes=[5, 7],
+        ),
+    }
+    loads = []
+
+    def load_sparse_index(db, video_id=None, material_id=None):
+        key = ("video", video_id) if video_id else ("material", material_id)
+        loads.append(key)
+        return stored[key]
+
+    updated = datetime(2026, 10, 1)
+    db = SimpleNamespace(
+        query=lambda *columns: FakeQuery(
+            [
+                SimpleNamespace(
+                    video_id="v1", course_material_id=None, updated_at=updated
+                ),
+                SimpleNamespace(
+                    video_id=None, course_material_id="m2", updated_at=updated
+                ),
+            ]
+        )
+    )
+    monkeypatch.setattr(course_search, "load_sparse_index", load_sparse_index)
+    docs = list(stored)
+
+    merged, doc_of_position, indexed_docs = course_search._course_sparse_index(
+        db, "c1", docs
+    )
+    assert indexed_docs == [("video", "v1"), ("material", "m2")]
+    assert doc_of_position.tolist() == [0, 0, 0, 1, 1]
+
+    (position, _), *_ = merged.rank("stiffness", top_k=1)
+    assert indexed_docs[doc_of_position[position]] == ("material", "m2")
+    assert int(merged.chunk_indexes[position]) == 7
+
+    # Unchanged stored indexes: the merged one is reused
+    course_search._course_sparse_index(db, "c1", docs)
+    assert len(loads) == 3
+
+
+@pytest.mark.parametrize(
+    "fields, citation",
+    [
+        ({"start_seconds": 75.9}, "[01:15]"),
+        ({"start_seconds": 3725.0}, "[01:02:05]"),
+        ({"start_seconds": 0.0, "page_number": 3}, "[00:00]"),
+        ({"page_number": 12}, "[Page 12]"),
+        ({}, ""),
+    ],
+)
+def test_citations(fields, citation):
+    assert _citation({"start_seconds": None, "page_number": None, **fields}) == citation
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch embedding pipeline (services/embedding_pipeline.py).
+
+Uses an in-process stand-in for AsyncOpenAI's embeddings endpoint, so no
+API key or network is needed.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding_pipeline import AdaptiveLimiter, embed_texts, token_batches
+
+
+def _error(cls, status):
+    response = SimpleNamespace(
+        status_code=status, headers={"retry-after": "0"}, request=None
+    )
+    return cls("error", response=response, body=None)
+
+
+class FakeEmbeddings:
+    """Embeds "text-N" as [N]; fails the scripted calls first."""
+
+    def __init__(self, failures=(), reject=()):
+        self.failures = list(failures)
+        self.reject = set(reject)
+        self.calls = []
+
+    async def create(self, model, input, encoding_format):
+        self.calls.append(list(input))
+        await asyncio.sleep(0)
+        if self.failures:
+            raise self.failures.pop(0)
+        if self.reject & set(input):
+            raise _error(openai.BadRequestError, 400)
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=i, embedding=[float(text.split("-")[1])])
+                for i, text in enumerate(input)
+            ]
+        )
+
+
+def _embed(fake, texts, **kwargs):
+    client = SimpleNamespace(embeddings=fake)
+    kwargs.setdefault("count_tokens", lambda text: 10)
+    return asyncio.run(embed_texts(client, "test-model", texts, **kwargs))
+
+
+def test_token_batches_respect_token_and_item_limits():
+    assert token_batches([40, 40, 40, 10], max_tokens=100) == [[0, 1], [2, 3]]
+    assert token_batches([1] * 5, max_tokens=100, max_items=2) == [[0, 1], [2, 3], [4]]
+    # An oversized text still gets a batch of its own
+    assert token_batches([500, 1], max_tokens=100) == [[0], [1]]
+
+
+def test_results_keep_input_order_across_parallel_batches():
+    texts = [f"text-{i}" for i in range(25)]
+    fake = FakeEmbeddings()
+    assert _embed(fake, texts, max_tokens=30) == [[float(i)] for i in range(25)]
+    assert len(fake.calls) == 9
+
+
+def test_rate_limit_retries_only_the_failed_batch():
+    texts = [f"text-{i}" for i in range(6)]
+    fake = FakeEmbeddings(failures=[_error(openai.RateLimitError, 429)])
+    assert _embed(fake, texts, max_tokens=20) == [[float(i)] for i in range(6)]
+    # 3 batches + 1 retry of the batch that hit the 429
+    assert len(fake.calls) == 4
+    assert fake.calls.count(fake.calls[0]) == 2
+
+
+def test_rejected_batch_is_split_until_the_bad_text_is_isolated():
+    texts = [f"text-{i}" for i in range(4)]
+    fake = FakeEmbeddings(reject={"text-2"})
+    with pytest.raises(openai.BadRequestError):
+        _embed(fake, texts, max_tokens=100)
+    assert ["text-2"] in fake.calls
+    assert ["text-0", "text-1"] in fake.calls
+
+
+def test_authentication_error_fails_without_splitting():
+    texts = [f"text-{i}" for i in range(64)]
+    fake = FakeEmbeddings(failures=[_error(openai.AuthenticationError, 401)])
+    with pytest.raises(openai.AuthenticationError):
+        _embed(fake, texts, max_tokens=10_000)
+    assert len(fake.calls) == 1
+
+
+def test_retries_give_up_after_max_retries():
+    fake = FakeEmbeddings(failures=[_error(openai.InternalServerError, 500)] * 3)
+    with pytest.raises(openai.InternalServerError):
+        _embed(fake, ["text-0"], max_retries=3)
+    assert len(fake.calls) == 3
+
+
+def test_limiter_halves_on_rate_limit_and_grows_back():
+    limiter = AdaptiveLimiter(maximum=8)
+    assert limiter.limit == 4
+    limiter.on_rate_limit()
+    limiter.on_rate_limit()
+    assert limiter.limit == 1
+    for _ in range(1 + 2):
+        limiter.on_success()
+    assert limiter.limit == 3
+    limiter.on_rate_limit()
+    assert limiter.limit == 1
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed embedding store (services/embedding_store.py).
+
+The DB lookups are replaced by a dict, so only the reuse logic is under
+test. No DB or API key needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import embedding_store
+from services.embedding_store import content_hash, embed_with_store
+
+
+class FakeEmbedder:
+    model = "test-model"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def _use_dict_store(monkeypatch, store):
+    monkeypatch.setattr(
+        embedding_store,
+        "load_embeddings",
+        lambda db, hashes: {h: store[h] for h in hashes if h in store},
+    )
+    monkeypatch.setattr(
+        embedding_store,
+        "store_embeddings",
+        lambda db, model, embeddings: store.update(embeddings),
+    )
+
+
+def test_content_hash_depends_on_model_and_text():
+    assert content_hash("m", "text") == content_hash("m", "text")
+    assert content_hash("m", "text") != content_hash("m", "text ")
+    assert content_hash("m1", "text") != content_hash("m2", "text")
+    assert len(content_hash("m", "text")) == 64
+
+
+def test_only_unseen_texts_are_embedded(monkeypatch):
+    store = {}
+    _use_dict_store(monkeypatch, store)
+    embedder = FakeEmbedder()
+
+    first = embed_with_store(None, ["a", "bb", "a"], embedder)
+    assert first == [[1.0], [2.0], [1.0]]
+    # Repeated text is embedded once
+    assert embedder.calls == [["a", "bb"]]
+
+    second = embed_with_store(None, ["bb", "ccc", "a"], embedder)
+    assert second == [[2.0], [3.0], [1.0]]
+    assert embedder.calls[-1] == ["ccc"]
+
+
+def test_fully_stored_texts_skip_the_api(monkeypatch):
+    store = {content_hash("test-model", "a"): [9.0]}
+    _use_dict_store(monkeypatch, store)
+    embedder = FakeEmbedder()
+
+    assert embed_with_store(None, ["a"], embedder) == [[9.0]]
+    assert embedder.calls == []
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for frame extraction (utils/frame_service.py), with subprocess.run
+standing in for ffmpeg.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import frame_service
+from utils.frame_service import extract_frame, ffmpeg_frame_command, round_timestamp
+
+URL = "https://bucket.s3.amazonaws.com/videos/lecture.mp4?X-Amz-Signature=abc"
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    calls = []
+
+    def run(cmd, stdout, stderr, timeout):
+        calls.append(cmd)
+        seek = float(cmd[cmd.index("-ss") + 1])
+        if seek > 100:
+            return SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+        return SimpleNamespace(returncode=0, stdout=f"jpeg@{seek}".encode(), stderr=b"")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    frame_service.FRAME_CACHE.clear()
+    return calls
+
+
+def test_seeks_on_input_and_streams_one_frame():
+    cmd = ffmpeg_frame_command(URL, 42.0)
+    # -ss before -i: input seeking, so only ranges near the keyframe are read
+    assert cmd.index("-ss") < cmd.index("-i")
+    assert cmd[cmd.index("-i") + 1] == URL
+    assert cmd[cmd.index("-frames:v") + 1] == "1"
+    assert cmd[-1] == "pipe:1"
+    assert "-multiple_requests" not in ffmpeg_frame_command("/tmp/video.mp4", 1.0)
+
+
+def test_timestamps_are_rounded(monkeypatch):
+    assert round_timestamp(12.4) == 12.0
+    assert round_timestamp(-3) == 0.0
+    monkeypatch.setattr(frame_service, "FRAME_TIMESTAMP_RESOLUTION", 0.5)
+    assert round_timestamp(12.3) == 12.5
+
+
+def test_frames_are_cached_by_video_and_rounded_timestamp(ffmpeg, tmp_path):
+    first, second = tmp_path / "a.jpg", tmp_path / "b.jpg"
+
+    assert extract_frame(URL, 42.2, str(first), video_id="v1") == str(first)
+    assert extract_frame(URL, 41.8, str(second), video_id="v1") == str(second)
+    assert len(ffmpeg) == 1
+    assert first.read_bytes() == second.read_bytes() == b"jpeg@42.0"
+
+    extract_frame(URL, 42.0, str(first), video_id="v2")
+    extract_frame(URL, 42.0, str(first))  # No video_id: no caching
+    assert len(ffmpeg) == 3
+
+
+def test_missing_frame_returns_none(ffmpeg, tmp_path):
+    output = tmp_path / "frame.jpg"
+    assert extract_frame(URL, 500, str(output), video_id="v1") is None
+    assert not output.exists()
+    assert frame_service.FRAME_CACHE.get("v1:500.000") is None
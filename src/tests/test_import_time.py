@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for the API process (see
+management_commands/import_time_report.py for the full report).
+
+The cold-import checks need the app's full dependency set and skip when
+`import main` fails here.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from management_commands.import_time_report import (
+    by_package,
+    deferred_imported,
+    measure_import,
+    parse_importtime,
+    total_seconds,
+)
+
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3.0"))
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       900 |       1500 |     sqlalchemy.sql
+import time:      2000 |       3500 |   sqlalchemy
+import time:       400 |       4020 | main
+"""
+
+
+def test_parse_importtime():
+    costs = parse_importtime(SAMPLE)
+    assert [c.module for c in costs] == ["_io", "sqlalchemy.sql", "sqlalchemy", "main"]
+    assert [c.depth for c in costs] == [1, 2, 1, 0]
+    assert total_seconds(costs, "main") == pytest.approx(0.00402)
+    assert by_package(costs)["sqlalchemy"] == 2900
+
+
+@pytest.fixture(scope="module")
+def cold_import():
+    returncode, costs, stdout = measure_import("main")
+    if returncode != 0:
+        pytest.skip("main doesn't import in this environment")
+    return costs, stdout
+
+
+def test_cold_import_of_main_is_within_budget(cold_import):
+    costs, _ = cold_import
+    seconds = total_seconds(costs, "main")
+    top = sorted(by_package(costs).items(), key=lambda item: -item[1])[:5]
+    assert seconds <= IMPORT_TIME_BUDGET_SECONDS, (
+        f"import main took {seconds:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS}s); "
+        f"top packages: {', '.join(f'{p} {us / 1000:.0f}ms' for p, us in top)}"
+    )
+
+
+def test_heavy_dependencies_load_on_first_use(cold_import):
+    _, stdout = cold_import
+    assert deferred_imported(stdout) == []
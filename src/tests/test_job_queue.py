@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable job queue (services/job_queue.py).
+
+Claiming, retries and lease recovery need Postgres (SKIP LOCKED, partial
+unique indexes): those tests run against TEST_DATABASE_URL, in a scratch
+schema that is dropped afterwards, and are skipped when it isn't set.
+"""
+
+import os
+import sys
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import BackgroundJob
+from services import job_queue
+from services.job_queue import (
+    JOB_KINDS,
+    claim_jobs,
+    enqueue_job,
+    enqueue_jobs,
+    finish_job,
+    requeue_expired,
+    retry_delay,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_job_kinds_and_handlers():
+    assert set(JOB_KINDS) == {"transcribe", "format", "chunk", "summarize", "grade"}
+    for kind in JOB_KINDS.values():
+        module, function = kind.handler.split(":")
+        assert module and function
+        assert kind.concurrency >= 1 and kind.max_attempts >= 1
+
+
+def test_concurrency_from_environment(monkeypatch):
+    monkeypatch.setenv("JOB_CONCURRENCY_GRADE", "12")
+    kind = job_queue._kind("grade", "m:f", concurrency=4)
+    assert kind.concurrency == 12
+    monkeypatch.setenv("JOB_CONCURRENCY_GRADE", "0")
+    assert job_queue._kind("grade", "m:f", concurrency=4).concurrency == 1
+
+
+def test_retry_delay_backs_off_exponentially_with_cap(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_SECONDS", 10.0)
+    monkeypatch.setattr(job_queue, "JOB_RETRY_MAX_SECONDS", 100.0)
+    monkeypatch.setattr(job_queue.random, "random", lambda: 0.0)
+    assert [retry_delay(n) for n in (1, 2, 3, 4, 5)] == [10, 20, 40, 80, 100]
+
+
+def test_unknown_kind_is_rejected_before_touching_the_db():
+    with pytest.raises(ValueError):
+        enqueue_job(None, "diagram", {})
+
+
+def test_batch_enqueue_of_nothing_is_a_no_op():
+    assert job_queue.enqueue_jobs(None, "grade", [], group_key="a1") == []
+
+
+# ── Against Postgres ────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def sessions():
+    """Session factory bound to a scratch schema holding background_jobs."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    schema = f"job_queue_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_DATABASE_URL, future=True)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        future=True,
+        connect_args={"options": f"-csearch_path={schema}"},
+    )
+    try:
+        BackgroundJob.__table__.create(engine)
+        with engine.begin() as conn:
+            # Created by the migration rather than the model
+            conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX uq_background_jobs_pending_key "
+                    "ON background_jobs (idempotency_key) "
+                    "WHERE status IN ('queued', 'running')"
+                )
+            )
+        yield sessionmaker(bind=engine, autoflush=False, future=True)
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def job_row(Session, job_id):
+    with Session() as db:
+        return db.get(BackgroundJob, job_id)
+
+
+def test_idempotency_key_allows_one_pending_job(sessions):
+    with sessions() as db:
+        first = enqueue_job(db, "summarize", {"video_id": "v1"}, "summary:v1")
+        assert first is not None
+        assert enqueue_job(db, "summarize", {"video_id": "v1"}, "summary:v1") is None
+
+        claimed = claim_jobs(db, "summarize", 1, "w1")
+        finish_job(db, claimed[0])
+        # A finished job no longer blocks its key
+        assert enqueue_job(db, "summarize", {"video_id": "v1"}, "summary:v1")
+
+
+def test_claims_skip_rows_locked_by_another_worker(sessions):
+    with sessions() as db:
+        job_ids = enqueue_jobs(db, "chunk", [({"n": n}, None) for n in range(3)])
+
+    with sessions() as holder, sessions() as db:
+        # Another worker is mid-claim on the first job
+        holder.execute(
+            text("SELECT id FROM background_jobs WHERE id = :id FOR UPDATE"),
+            {"id": job_ids[0]},
+        )
+        claimed = claim_jobs(db, "chunk", 3, "w1")
+        assert {job.id for job in claimed} == set(job_ids[1:])
+        assert all(job.attempts == 1 for job in claimed)
+        holder.rollback()
+
+        # Claimed jobs aren't handed out again; the released one is
+        assert [job.id for job in claim_jobs(db, "chunk", 3, "w2")] == job_ids[:1]
+        assert claim_jobs(db, "chunk", 3, "w2") == []
+
+    assert job_row(sessions, job_ids[0]).locked_by == "w2"
+    assert job_row(sessions, job_ids[1]).locked_by == "w1"
+
+
+def test_failed_jobs_back_off_then_fail_permanently(sessions, monkeypatch):
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempts: 60 * attempts)
+    with sessions() as db:
+        job_id = enqueue_job(db, "grade", {"submission_id": "s1"})
+        assert JOB_KINDS["grade"].max_attempts == 2
+
+        (job,) = claim_jobs(db, "grade", 1, "w1")
+        finish_job(db, job, error="RuntimeError: provider timeout")
+        row = job_row(sessions, job_id)
+        assert (row.status, row.attempts, row.locked_by) == ("queued", 1, None)
+        assert row.last_error == "RuntimeError: provider timeout"
+        assert timedelta(seconds=59) < row.run_after - row.updated_at
+        # Not due until the backoff has passed
+        assert claim_jobs(db, "grade", 1, "w1") == []
+
+        db.execute(
+            text("UPDATE background_jobs SET run_after = run_after - interval '1 hour'")
+        )
+        db.commit()
+        (job,) = claim_jobs(db, "grade", 1, "w1")
+        assert job.attempts == 2
+        finish_job(db, job, error="RuntimeError: provider timeout")
+        row = job_row(sessions, job_id)
+        assert row.status == "failed" and row.finished_at is not None
+
+
+def test_successful_job_stores_its_result(sessions):
+    with sessions() as db:
+        job_id = enqueue_job(db, "grade", {"submission_id": "s1"})
+        (job,) = claim_jobs(db, "grade", 1, "w1")
+        finish_job(db, job, result={"usage": {"input_tokens": 10}})
+    row = job_row(sessions, job_id)
+    assert row.status == "succeeded"
+    assert row.result == {"usage": {"input_tokens": 10}}
+
+
+def test_expired_leases_are_requeued_or_failed(sessions):
+    with sessions() as db:
+        retried = enqueue_job(db, "chunk", {"n": 1})
+        exhausted = enqueue_job(db, "grade", {"n": 2})
+        alive = enqueue_job(db, "format", {"n": 3})
+        stale = claim_jobs(db, "chunk", 1, "dead")[0]
+        claim_jobs(db, "format", 1, "alive")
+        db.execute(
+            text(
+                "UPDATE background_jobs SET attempts = max_attempts - 1 WHERE id = :id"
+            ),
+            {"id": exhausted},
+        )
+        db.commit()
+        claim_jobs(db, "grade", 1, "dead")
+
+        # The dead worker stopped heartbeating ten minutes ago
+        db.execute(
+            text(
+                "UPDATE background_jobs SET locked_at = locked_at - interval '10 minutes' "
+                "WHERE locked_by = 'dead'"
+            )
+        )
+        db.commit()
+        assert requeue_expired(db, lease_seconds=300) == 1
+
+        # Its late report doesn't override the re-queued job
+        finish_job(db, stale)
+
+    assert job_row(sessions, retried).status == "queued"
+    assert job_row(sessions, retried).locked_by is None
+    assert job_row(sessions, exhausted).status == "failed"
+    assert job_row(sessions, exhausted).last_error == "Worker lease expired"
+    assert job_row(sessions, alive).status == "running"
+
+
+def test_batch_progress_covers_every_unfinished_batch(sessions):
+    with sessions() as db:
+        assert job_queue.batch_progress(db, "grade", "a1") is None
+        enqueue_jobs(db, "grade", [({"n": n}, None) for n in range(3)], "a1")
+        (first,) = claim_jobs(db, "grade", 1, "w1")
+        finish_job(db, first, result={"usage": {"input_tokens": 5}})
+        # A re-grade queued while the first batch is still running
+        enqueue_jobs(db, "grade", [({"n": 3}, None)], "a1")
+
+        progress = job_queue.batch_progress(db, "grade", "a1")
+        assert (progress["total"], progress["succeeded"], progress["queued"]) == (
+            4,
+            1,
+            3,
+        )
+        assert not progress["done"]
+        assert progress["usage"] == {"input_tokens": 5}
+        assert [batch["total"] for batch in progress["batches"]] == [3, 1]
+
+        for job in claim_jobs(db, "grade", 10, "w1"):
+            finish_job(db, job)
+        # Once everything finished, only the latest batch is reported
+        progress = job_queue.batch_progress(db, "grade", "a1")
+        assert (progress["total"], progress["done"]) == (1, True)
+        assert len(progress["batches"]) == 1
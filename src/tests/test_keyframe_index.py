@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the upload-time keyframe sprite index (utils/keyframe_index.py),
+on synthetic frames; ffmpeg and S3 aren't needed.
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+Image = pytest.importorskip("PIL.Image")
+
+from utils import keyframe_index
+from utils.keyframe_index import (
+    dedup_frames,
+    frame_for_timestamp,
+    indexed_frame_jpeg,
+    pack_sprites,
+    parse_showinfo_times,
+    select_filter,
+)
+
+SHOWINFO = """\
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'lecture.mp4':
+[Parsed_showinfo_2 @ 0x55d] n:   0 pts:      0 pts_time:0       duration:512 fmt:yuvj420p
+[Parsed_showinfo_2 @ 0x55d] color_range:pc color_space:bt470bg
+[Parsed_showinfo_2 @ 0x55d] n:   1 pts: 163840 pts_time:10.6667 duration:512 fmt:yuvj420p
+frame=    2 fps=0.0 q=3.0 Lsize=N/A time=00:00:10.66
+"""
+
+
+def slide(kind):
+    """A 64x36 frame: "left"/"right" half bright, or a bright centre stripe."""
+    image = Image.new("RGB", (64, 36), "black")
+    box = {"left": (0, 0, 32, 36), "right": (32, 0, 64, 36), "centre": (16, 0, 48, 36)}
+    image.paste((255, 255, 255), box[kind])
+    return image
+
+
+def test_select_filter_and_showinfo_times():
+    graph = select_filter(interval=10, scene_threshold=0.3, width=320)
+    assert graph == (
+        "select='isnan(prev_selected_t)+gte(t-prev_selected_t,10)"
+        "+gt(scene,0.3)',scale=320:-2,showinfo"
+    )
+    assert "scene" not in select_filter(interval=10, scene_threshold=0, width=320)
+    assert parse_showinfo_times(SHOWINFO) == [0.0, 10.6667]
+
+
+def test_static_slides_are_deduplicated():
+    frames = [
+        (0.0, slide("left")),
+        (10.0, slide("left")),
+        (20.0, slide("left")),
+        (30.0, slide("right")),
+        (40.0, slide("centre")),
+    ]
+    kept = dedup_frames(frames, max_distance=4)
+    assert [(frame["t"], frame["until"]) for frame in kept] == [
+        (0.0, 20.0),
+        (30.0, 30.0),
+        (40.0, 40.0),
+    ]
+
+
+def test_sprite_lookup_returns_the_covering_frame(monkeypatch, tmp_path):
+    monkeypatch.setattr(keyframe_index, "SPRITE_COLUMNS", 2)
+    monkeypatch.setattr(keyframe_index, "SPRITE_TILES_PER_SHEET", 2)
+    kinds = ["left", "right", "centre"]
+    kept = [
+        {"t": 10.0 * i, "until": 10.0 * i, "image": slide(kind)}
+        for i, kind in enumerate(kinds)
+    ]
+    kept[0]["until"] = 5.0
+    index, sheet_paths = pack_sprites(kept, str(tmp_path))
+    index["interval"] = 10.0
+
+    assert len(sheet_paths) == 2
+    assert [(f["sheet"], f["x"], f["y"]) for f in index["frames"]] == [
+        (0, 0, 0),
+        (0, 64, 0),
+        (1, 0, 0),
+    ]
+    assert frame_for_timestamp(index, 4.0)["t"] == 0.0
+    assert frame_for_timestamp(index, 12.5)["t"] == 10.0
+    assert frame_for_timestamp(index, 29.0)["t"] == 20.0
+    assert frame_for_timestamp(index, 31.0) is None  # Past the last sample
+    assert frame_for_timestamp(index, -1.0) is None
+
+    files = {
+        "index": index,
+        **{Path(p).name: Path(p).read_bytes() for p in sheet_paths},
+    }
+    monkeypatch.setattr(keyframe_index, "load_keyframe_index", lambda key: files[key])
+    monkeypatch.setattr(keyframe_index, "_s3_bytes", lambda key: files[key])
+    keyframe_index._sheet_cache.clear()
+
+    tile = Image.open(io.BytesIO(indexed_frame_jpeg("index", 13.0)))
+    assert tile.size == (64, 36)
+    # The "right" slide: dark left half, bright right half
+    assert tile.convert("L").getpixel((8, 18)) < 64
+    assert tile.convert("L").getpixel((56, 18)) > 192
+    assert indexed_frame_jpeg("index", 500.0) is None
+
+
+def test_sampled_only_lookup_skips_deduplicated_stand_ins():
+    index = {
+        "interval": 10.0,
+        "frames": [{"t": 0.0, "until": 40.0}, {"t": 50.0, "until": 50.0}],
+    }
+    assert frame_for_timestamp(index, 35.0)["t"] == 0.0
+    assert frame_for_timestamp(index, 35.0, sampled_only=True) is None
+    assert frame_for_timestamp(index, 8.0, sampled_only=True)["t"] == 0.0
+    assert frame_for_timestamp(index, 55.0, sampled_only=True)["t"] == 50.0
+
+
+def test_frames_without_matching_timestamps_build_no_index(monkeypatch, tmp_path):
+    def ffmpeg(cmd, stdout, stderr, check):
+        output_dir = Path(cmd[-1]).parent
+        for number in (1, 2):
+            slide("left").save(output_dir / f"frame_{number:06d}.jpg")
+        # showinfo logged only one of the two frames
+        return keyframe_index.subprocess.CompletedProcess(
+            cmd,
+            0,
+            b"",
+            SHOWINFO.splitlines()[1].encode(),
+        )
+
+    monkeypatch.setattr(keyframe_index.subprocess, "run", ffmpeg)
+    assert keyframe_index.build_keyframe_index("lecture.mp4", str(tmp_path)) == (
+        None,
+        [],
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for micro-batched inference (utils/micro_batcher.py), with a plain
+function standing in for the model.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.micro_batcher import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    sizes = []
+    lock = threading.Lock()
+
+    def score(texts):
+        with lock:
+            sizes.append(len(texts))
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+    texts = [f"answer {'x' * i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda text: batcher.submit(text).result(), texts))
+
+    assert results == [len(text) for text in texts]
+    assert max(sizes) <= 8
+    assert len(sizes) < len(texts)
+    assert batcher.items == len(texts)
+
+
+def test_map_keeps_order_and_respects_batch_size():
+    sizes = []
+
+    def score(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=20)
+    assert batcher.map(list(range(10))) == [i * 2 for i in range(10)]
+    assert all(size <= 4 for size in sizes)
+
+
+def test_batch_failure_reaches_every_caller_and_worker_survives():
+    def score(items):
+        if "bad" in items:
+            raise ValueError("model failed")
+        return items
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(item) for item in ("bad", "a")]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    assert batcher.map(["ok"]) == ["ok"]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for grading prompt prefix caching helpers (utils/prompt_cache.py):
+prefix memoization, the Gemini cache registry and usage normalisation.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.job_queue import sum_usage
+from utils import prompt_cache
+from utils.prompt_cache import (
+    add_usage,
+    cache_hit_rate,
+    gemini_cached_content,
+    memoized_prefix,
+    prefix_key,
+    response_usage,
+)
+
+
+def test_prefix_is_built_once_per_key():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return "rubric prefix"
+
+    key = prefix_key("gemini", "answers", [{"id": "1", "rubric": "r"}])
+    assert memoized_prefix(key, build) == "rubric prefix"
+    assert memoized_prefix(key, build) == "rubric prefix"
+    assert len(builds) == 1
+    # Any change to the questions gives a new prefix
+    assert key != prefix_key("gemini", "answers", [{"id": "1", "rubric": "r2"}])
+
+
+def test_prefix_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "PREFIX_MEMO_SIZE", 2)
+    for i in range(5):
+        memoized_prefix(prefix_key("bounded", i), lambda: "p")
+    assert len(prompt_cache._prefixes) <= 2
+
+
+def test_gemini_cache_created_once_and_failures_remembered():
+    calls = []
+
+    def create(ttl):
+        calls.append(ttl)
+        return "cachedContents/abc"
+
+    assert gemini_cached_content("k-ok", 5000, create) == "cachedContents/abc"
+    assert gemini_cached_content("k-ok", 5000, create) == "cachedContents/abc"
+    assert len(calls) == 1
+
+    def fail(ttl):
+        calls.append(ttl)
+        raise RuntimeError("too small")
+
+    assert gemini_cached_content("k-fail", 5000, fail) is None
+    assert gemini_cached_content("k-fail", 5000, fail) is None
+    assert len(calls) == 2
+
+    # Small prefixes are sent inline without trying
+    assert gemini_cached_content("k-small", 10, fail) is None
+    assert len(calls) == 2
+
+
+def test_usage_is_normalised_across_providers():
+    openai = SimpleNamespace(
+        usage=SimpleNamespace(
+            prompt_tokens=2000,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1536),
+        )
+    )
+    anthropic = SimpleNamespace(
+        usage=SimpleNamespace(
+            input_tokens=300,
+            cache_read_input_tokens=1700,
+            cache_creation_input_tokens=0,
+        )
+    )
+    gemini = SimpleNamespace(
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=2000, cached_content_token_count=None
+        )
+    )
+    assert response_usage("openai", openai)["cached_input_tokens"] == 1536
+    assert response_usage("anthropic", anthropic)["input_tokens"] == 2000
+    assert response_usage("gemini", gemini)["cached_input_tokens"] == 0
+
+    total = {}
+    for provider, response in (("openai", openai), ("anthropic", anthropic)):
+        add_usage(total, response_usage(provider, response))
+    assert total["llm_calls"] == 2
+    assert cache_hit_rate(total) == round(3236 / 4000, 4)
+    assert cache_hit_rate({}) is None
+
+
+def test_batch_usage_sums_job_results():
+    results = [
+        {"usage": {"llm_calls": 1, "input_tokens": 100, "cached_input_tokens": 80}},
+        {"usage": {"llm_calls": 1, "input_tokens": 100, "cached_input_tokens": 0}},
+        {},
+        None,
+    ]
+    assert sum_usage(results) == {
+        "llm_calls": 2,
+        "input_tokens": 200,
+        "cached_input_tokens": 80,
+    }
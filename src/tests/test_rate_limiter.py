@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-provider LLM rate limiter (utils/rate_limiter.py).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import rate_limiter
+from utils.rate_limiter import TokenBucket, get_provider_rate_limiter
+
+
+def test_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_acquire()
+    assert 0.05 < wait <= 0.1
+
+
+def test_oversized_request_is_capped_at_capacity():
+    bucket = TokenBucket(rate=100, capacity=5)
+    assert bucket.try_acquire(50) == 0.0
+    assert bucket.try_acquire(1) > 0
+
+
+def test_bucket_bounds_throughput_across_threads():
+    bucket = TokenBucket(rate=100, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(21)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 1 immediate + 20 refills at 100/s
+    assert time.monotonic() - start >= 0.18
+
+
+def test_provider_limiters_are_shared_and_configured_from_env(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setenv("LLM_RPM_GEMINI", "120")
+    monkeypatch.setenv("LLM_TPM_GEMINI", "6000")
+    limiter = get_provider_rate_limiter("gemini")
+    assert limiter is get_provider_rate_limiter("gemini")
+    assert limiter.requests.rate == 2
+    assert limiter.tokens.rate == 100
+
+    monkeypatch.setenv("LLM_RPM_OPENAI", "0")
+    assert get_provider_rate_limiter("openai").requests is None
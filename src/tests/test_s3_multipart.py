@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming uploads into S3 multipart uploads
+(utils/s3_multipart.py), against an in-memory fake S3 client.
+"""
+
+import asyncio
+import hashlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import s3_multipart
+from utils.s3_multipart import S3_MIN_PART_SIZE, MultipartUpload
+
+BOUNDARY = "----vidyaboundary"
+
+
+class FakeS3:
+    def __init__(self):
+        self.uploads = {}
+        self.objects = {}
+        self.aborted = []
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {"key": Key, "parts": {}, **kwargs}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId]["parts"][PartNumber] = Body
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)["parts"]
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[Key] = b"".join(parts[number] for number in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+        self.aborted.append(Key)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3/{Params['Key']}?uploadId={Params['UploadId']}&partNumber={Params['PartNumber']}"
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.objects[Key])}
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3()
+    monkeypatch.setattr(s3_multipart, "s3_client", client)
+    monkeypatch.setattr(s3_multipart, "AWS_S3_BUCKET", "bucket")
+    return client
+
+
+def form_request(fields, chunk_size=7001):
+    """A request streaming a multipart/form-data body in small chunks."""
+    body = b""
+    for name, filename, content in fields:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+            + content
+            + b"\r\n"
+        )
+    body += f"--{BOUNDARY}--\r\n".encode()
+
+    async def stream():
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+    return SimpleNamespace(
+        headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+        stream=stream,
+    )
+
+
+def test_writes_are_uploaded_in_full_parts(s3):
+    data = bytes(range(256)) * (S3_MIN_PART_SIZE * 2 // 256 + 1000)
+    upload = MultipartUpload(
+        "user_videos/u/v_a.mp4", content_type="video/mp4", part_size=S3_MIN_PART_SIZE
+    )
+    for start in range(0, len(data), 1_000_003):
+        upload.write(data[start : start + 1_000_003])
+        # Never more than one part buffered
+        assert len(upload._buffer) < S3_MIN_PART_SIZE
+    upload.complete()
+
+    assert s3.objects["user_videos/u/v_a.mp4"] == data
+    assert [part["PartNumber"] for part in upload.parts] == [1, 2, 3]
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_form_file_is_streamed_to_s3(s3):
+    video = b"\x00\x00\x00\x18ftypmp42" * 50_000
+    request = form_request(
+        [("title", None, b"Lecture 1"), ("file", "lecture 1.mp4", video)]
+    )
+
+    upload = asyncio.run(
+        s3_multipart.stream_form_file_to_s3(
+            request, "file", lambda filename: f"user_videos/u/v_{filename}"
+        )
+    )
+
+    assert upload.filename == "lecture 1.mp4"
+    assert upload.key == "user_videos/u/v_lecture 1.mp4"
+    assert s3.objects[upload.key] == video
+    assert upload.size == len(video)
+    assert upload.sha256 == hashlib.sha256(video).hexdigest()
+
+
+def test_failed_stream_aborts_the_upload(s3):
+    request = form_request([("file", "a.mp4", b"x" * 100_000)])
+    body_chunks = request.stream
+
+    async def stream():
+        async for chunk in body_chunks():
+            yield chunk
+            raise ConnectionResetError("client went away")
+
+    request.stream = stream
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(
+            s3_multipart.stream_form_file_to_s3(request, "file", lambda name: name)
+        )
+    assert s3.aborted == ["a.mp4"]
+    assert not s3.uploads and not s3.objects
+
+
+def test_missing_or_empty_file_is_rejected(s3):
+    def stream(fields):
+        return asyncio.run(
+            s3_multipart.stream_form_file_to_s3(
+                form_request(fields), "file", lambda filename: filename
+            )
+        )
+
+    with pytest.raises(HTTPException) as missing:
+        stream([("title", None, b"Lecture 1")])
+    assert missing.value.status_code == 400
+
+    with pytest.raises(HTTPException) as empty:
+        stream([("file", "empty.mp4", b"")])
+    assert empty.value.status_code == 400
+    assert not s3.uploads and not s3.objects
+
+
+def test_presigned_upload_round_trip(s3):
+    part_size = s3_multipart.S3_MULTIPART_PART_SIZE
+    started = s3_multipart.start_presigned_upload(
+        "user_videos/u/v_a.mp4", 2 * part_size + 1
+    )
+    assert started["part_size"] == part_size
+    assert [part["part_number"] for part in started["parts"]] == [1, 2, 3]
+
+    # The browser PUTs the parts (in any order) and reports their ETags
+    upload_id = started["upload_id"]
+    for number, body in ((3, b"c"), (1, b"a"), (2, b"b")):
+        s3.upload_part("bucket", started["key"], upload_id, number, body)
+    size = s3_multipart.complete_presigned_upload(
+        started["key"],
+        upload_id,
+        [{"part_number": n, "etag": f'"etag-{n}"'} for n in (3, 1, 2)],
+    )
+    assert size == 3
+    assert s3.objects[started["key"]] == b"abc"
+
+    # Huge files get bigger parts to stay within S3's part limit
+    assert s3_multipart.presigned_part_size(200 * 10**9) * 10000 >= 200 * 10**9
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic query cache (utils/semantic_cache.py).
+
+Locks in that near-duplicate queries (cosine >= threshold) are answered
+from cache, dissimilar ones and other variants/namespaces are not, the
+per-namespace budget evicts oldest first, and re-chunking invalidates.
+
+Runs against the in-process L1 tier, so no Redis/network is needed.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import cache as cache_module
+from utils.cache import invalidate_video_cache
+from utils.semantic_cache import SemanticCache
+
+RNG = np.random.default_rng(0)
+
+
+def _near(vector, noise=0.01):
+    return vector + RNG.normal(scale=noise, size=vector.shape)
+
+
+def test_near_duplicate_query_hits_and_strips_embeddings():
+    cache = SemanticCache("t-hit", threshold=0.95)
+    base = RNG.normal(size=64)
+    results = [{"text": "eigenvalues", "chunk_index": 2, "embedding": base}]
+    cache.store("video", "sem-v1", "what is eigenvalue", base, results)
+
+    hit = cache.lookup("video", "sem-v1", _near(base))
+    assert hit == [{"text": "eigenvalues", "chunk_index": 2}]
+
+    assert cache.lookup("video", "sem-v1", RNG.normal(size=64)) is None
+    assert cache.lookup("video", "sem-v1", base, variant="k3") is None
+    assert cache.lookup("video", "sem-other", base) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_budget_evicts_oldest_and_duplicates_share_a_slot():
+    cache = SemanticCache("t-budget", threshold=0.95, max_entries=2)
+    queries = [RNG.normal(size=64) for _ in range(3)]
+    for i, q in enumerate(queries):
+        cache.store("material", "sem-m1", f"q{i}", q, [i])
+    # Re-storing a near-duplicate replaces its entry rather than adding one
+    cache.store("material", "sem-m1", "q2 again", _near(queries[2]), [22])
+
+    assert cache.lookup("material", "sem-m1", queries[0]) is None
+    assert cache.lookup("material", "sem-m1", queries[1]) == [1]
+    assert cache.lookup("material", "sem-m1", queries[2]) == [22]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_rechunking_invalidates_semantic_entries():
+    cache = SemanticCache("t-invalidate")
+    base = RNG.normal(size=64)
+    cache.store("video", "sem-v2", "q", base, ["old"])
+    assert cache.lookup("video", "sem-v2", base) == ["old"]
+
+    invalidate_video_cache("sem-v2")
+    assert cache.lookup("video", "sem-v2", base) is None
+
+
+class FakeRedis:
+    """Just the string and sorted-set commands the cache uses."""
+
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+        self.writes = []
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def mget(self, keys):
+        return [self.strings.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.writes.append((key, len(value)))
+        self.strings[key] = value
+
+    def delete(self, key):
+        self.strings.pop(key, None)
+
+    def publish(self, channel, message):
+        pass
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def _ordered(self, key):
+        zset = self.zsets.get(key, {})
+        return sorted(zset, key=zset.get)
+
+    def zrange(self, key, start, end):
+        members = self._ordered(key)
+        end = len(members) + end if end < 0 else end
+        return [m.encode() for m in members[start : end + 1]]
+
+    def zremrangebyrank(self, key, start, end):
+        for member in self.zrange(key, start, end):
+            del self.zsets[key][member.decode()]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def pipeline(self, transaction=True):
+        redis, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis, name)(*args) for name, args in calls]
+
+        return Pipeline()
+
+
+def test_stores_from_other_workers_are_kept_one_entry_per_key(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(cache_module, "get_redis_client", lambda: redis)
+    cache = SemanticCache("t-redis", threshold=0.95, max_entries=2)
+    queries = [RNG.normal(size=64) for _ in range(3)]
+
+    for i, q in enumerate(queries[:2]):
+        # Each store as if from a worker that has never seen the others
+        cache_module._l1_cache.clear()
+        cache.store("video", "sem-redis", f"q{i}", q, [i])
+
+    # Both survive, and each write carried one entry rather than the list
+    cache_module._l1_cache.clear()
+    assert cache.lookup("video", "sem-redis", queries[0]) == [0]
+    assert cache.lookup("video", "sem-redis", queries[1]) == [1]
+    assert len({size for _, size in redis.writes}) == 1
+
+    # A third store trims the index to the cap and deletes the oldest entry
+    cache.store("video", "sem-redis", "q2", queries[2], [2])
+    (index,) = redis.zsets.values()
+    assert len(index) == 2
+    assert len([k for k in redis.strings if k.startswith("semcache:")]) == 2
+    cache_module._l1_cache.clear()
+    assert cache.lookup("video", "sem-redis", queries[0]) is None
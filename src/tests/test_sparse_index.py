@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the persisted corpus-wide BM25 index (services/sparse_index.py).
+
+Locks in that:
+  1. SparseIndex scores match rank_bm25.BM25Okapi over the same corpus, so
+     switching hybrid retrieval to the persisted index doesn't shift rankings.
+  2. The serialized blob round-trips exactly.
+  3. search() reports real chunk_index values, not internal doc positions.
+
+No network/DB, so these run offline.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.sparse_index import SparseIndex, tokenize
+
+CORPUS = [
+    "The eigenvalue of a matrix tells how the eigenvector is scaled.",
+    "Stiffness matrix K relates nodal forces to nodal displacements.",
+    "Today we review the finite element method and the stiffness matrix.",
+    "An eigenvector keeps its direction under the linear transformation.",
+    "Boundary conditions are applied before solving the system.",
+    "Thank you for your attention.",
+]
+
+
+def test_scores_match_rank_bm25():
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    reference = rank_bm25.BM25Okapi([tokenize(t) for t in CORPUS])
+    index = SparseIndex.build(CORPUS)
+
+    for query in ["stiffness matrix", "eigenvector direction", "thank you", "zzz"]:
+        expected = reference.get_scores(tokenize(query))
+        actual = index.get_scores(tokenize(query))
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_serialization_round_trip():
+    index = SparseIndex.build(CORPUS, chunk_indexes=[10, 11, 12, 13, 14, 15])
+    restored = SparseIndex.from_bytes(index.to_bytes())
+
+    assert restored.vocab == index.vocab
+    assert restored.num_docs == index.num_docs
+    np.testing.assert_array_equal(restored.chunk_indexes, index.chunk_indexes)
+    for query in ["stiffness matrix", "eigenvalue"]:
+        assert restored.search(query) == index.search(query)
+
+
+def test_search_returns_chunk_indexes_and_skips_zero_scores():
+    index = SparseIndex.build(CORPUS, chunk_indexes=[10, 11, 12, 13, 14, 15])
+
+    hits = index.search("stiffness matrix", top_k=3)
+    assert [chunk_index for chunk_index, _ in hits][:2] == [11, 12]
+    assert all(score > 0 for _, score in hits)
+
+    assert index.search("quaternion", top_k=5) == []
+    assert SparseIndex.build([]).search("anything") == []
+
+
+def test_merge_matches_index_built_over_concatenated_corpus():
+    first, second = CORPUS[:3], CORPUS[3:]
+    merged = SparseIndex.merge(
+        [
+            SparseIndex.build(first, chunk_indexes=[0, 1, 2]),
+            SparseIndex.build(second, chunk_indexes=[0, 1, 2]),
+        ]
+    )
+    reference = SparseIndex.build(CORPUS)
+
+    assert merged.num_docs == len(CORPUS)
+    for query in ["stiffness matrix", "eigenvector direction", "thank you"]:
+        np.testing.assert_allclose(
+            merged.get_scores(tokenize(query)), reference.get_scores(tokenize(query))
+        )
+    # Positions stay global; chunk_indexes stay per document
+    assert merged.rank("eigenvector", top_k=1)[0][0] == 3
+    assert merged.search("eigenvector", top_k=1)[0][0] == 0
+    assert SparseIndex.merge([]).search("anything") == []
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized dense retrieval index (services/vector_index.py).
+
+Locks in that the matrix-based search returns the same ranking and scores
+as a naive per-candidate cosine loop, skips chunks without embeddings, and
+only reuses a cached index under the version it was built for.
+
+Pure numpy, no network/DB, so these run offline.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import vector_index
+from services.vector_index import VectorIndex, cached_vector_index, get_vector_index
+
+
+def _candidates(n: int = 50, dim: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"text": f"chunk {i}", "chunk_index": i, "embedding": rng.normal(size=dim)}
+        for i in range(n)
+    ]
+
+
+def _naive_top_k(query, candidates, top_k):
+    scored = []
+    for c in candidates:
+        v = np.asarray(c["embedding"])
+        sim = float(np.dot(query, v) / (np.linalg.norm(query) * np.linalg.norm(v)))
+        scored.append((sim, c["chunk_index"]))
+    scored.sort(reverse=True)
+    return scored[:top_k]
+
+
+def test_search_matches_naive_cosine():
+    candidates = _candidates()
+    query = np.random.default_rng(1).normal(size=32)
+
+    hits = VectorIndex.from_candidates(candidates).search(query, top_k=5)
+    expected = _naive_top_k(query, candidates, 5)
+
+    assert [h["chunk_index"] for h in hits] == [idx for _, idx in expected]
+    for hit, (sim, _) in zip(hits, expected):
+        assert abs(hit["similarity"] - sim) < 1e-5
+
+
+def test_search_batch_matches_single_queries():
+    candidates = _candidates()
+    queries = np.random.default_rng(2).normal(size=(3, 32))
+    index = VectorIndex.from_candidates(candidates)
+
+    batched = index.search_batch(queries, top_k=4)
+    assert len(batched) == 3
+    for q, hits in zip(queries, batched):
+        single = index.search(q, top_k=4)
+        assert [h["chunk_index"] for h in hits] == [h["chunk_index"] for h in single]
+
+
+def test_missing_embeddings_and_small_corpus():
+    candidates = _candidates(n=3)
+    candidates.append({"text": "no vector", "chunk_index": 99, "embedding": None})
+
+    hits = VectorIndex.from_candidates(candidates).search(np.ones(32), top_k=10)
+    assert len(hits) == 3
+    assert 99 not in [h["chunk_index"] for h in hits]
+
+    assert VectorIndex.from_candidates([]).search(np.ones(32), top_k=5) == []
+
+
+def test_cached_index_is_reused_only_under_its_version():
+    vector_index._vector_index_cache.clear()
+    first = _candidates(n=10)
+    second = _candidates(n=10)[::-1]
+
+    a = get_vector_index(first, cache_key="video:test", version=1)
+    assert cached_vector_index("video:test", 1) is a
+    # A hit needs no embeddings (or candidates) at all
+    assert get_vector_index([], cache_key="video:test", version=1) is a
+    assert "embedding" not in a.payloads[0]
+
+    # Re-chunking bumps the version
+    assert cached_vector_index("video:test", 2) is None
+    b = get_vector_index(second, cache_key="video:test", version=2)
+    assert b.matrix is not a.matrix
+    assert [p["chunk_index"] for p in b.payloads] == list(range(9, -1, -1))
+
+
+def test_unversioned_indexes_are_not_cached():
+    vector_index._vector_index_cache.clear()
+    first = _candidates(n=5)
+    a = get_vector_index(first, cache_key="video:test")
+    assert get_vector_index(first, cache_key="video:test") is not a
+    assert cached_vector_index("video:test", None) is None
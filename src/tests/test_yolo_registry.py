@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared YOLO diagram detector (utils/yolo_registry.py), with a
+fake model standing in for ultralytics.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path (matches sibling tests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+Image = pytest.importorskip("PIL.Image")
+
+from utils import yolo_registry
+
+
+class FakeTensor:
+    def __init__(self, values):
+        self.values = np.array(values, dtype=float)
+
+    def __getitem__(self, index):
+        value = self.values[index]
+        return FakeTensor(value) if np.ndim(value) else value
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+def fake_box(x1, y1, x2, y2, conf):
+    return SimpleNamespace(
+        xyxy=FakeTensor([[x1, y1, x2, y2]]),
+        conf=FakeTensor([conf]),
+        cls=FakeTensor([0]),
+    )
+
+
+class FakeYOLO:
+    """Returns one box per page, placed at the page's red value."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, images, conf, verbose):
+        self.calls.append(images)
+        results = []
+        for image in images:
+            red = int(image[0, 0, 2])  # BGR
+            boxes = [fake_box(0, red, 10, red + 10, 0.5), fake_box(0, 1, 5, 5, 0.9)]
+            results.append(SimpleNamespace(boxes=boxes))
+        return results
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeYOLO()
+    monkeypatch.setitem(yolo_registry._models, "fake.pt", model)
+    monkeypatch.setitem(yolo_registry._predict_locks, "fake.pt", threading.Lock())
+    return model
+
+
+def test_pages_are_detected_in_batched_in_memory_calls(fake_model, monkeypatch):
+    monkeypatch.setattr(yolo_registry, "DIAGRAM_YOLO_BATCH_SIZE", 2)
+    pages = [Image.new("RGB", (20, 20), (red, 0, 0)) for red in (30, 40, 50)]
+
+    detections = yolo_registry.detect_diagrams(pages, model_path="fake.pt")
+
+    assert [len(batch) for batch in fake_model.calls] == [2, 1]
+    assert all(isinstance(image, np.ndarray) for image in fake_model.calls[0])
+    assert len(detections) == 3
+    # Highest confidence first; the fake model's second box follows the page
+    assert [page[0]["confidence"] for page in detections] == [0.9, 0.9, 0.9]
+    assert [page[1]["bbox"] for page in detections] == [
+        (0, 30, 10, 40),
+        (0, 40, 10, 50),
+        (0, 50, 10, 60),
+    ]
+
+
+def test_model_is_loaded_once(fake_model):
+    assert yolo_registry.get_yolo_model("fake.pt") is fake_model
+    assert yolo_registry.get_yolo_model("fake.pt") is fake_model
+    assert yolo_registry.detect_diagrams([], model_path="fake.pt") == []
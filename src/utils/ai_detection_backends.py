@@ -0,0 +1,166 @@
+"""
+Inference backends for the AI-detection model (roberta-base-openai-detector).
+
+AI_DETECTION_BACKEND selects one:
+- "torch" (default): the HuggingFace model in full precision via PyTorch
+- "onnx": the model exported to ONNX with dynamic int8 quantization, run
+  by onnxruntime on CPU. Needs no torch/transformers import, so it loads
+  faster and takes a fraction of the memory in every API/worker process.
+  Create the model with:
+      cd src && python -m management_commands.export_ai_detector_onnx
+
+Both take a list of texts, truncate each to the model's 512 tokens and
+return the probability that each text is AI-generated.
+benchmark_ai_detector compares their latency, memory and score drift.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from controllers.config import logger
+
+try:
+    import onnxruntime
+
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    onnxruntime = None
+    ONNXRUNTIME_AVAILABLE = False
+
+AI_DETECTION_MODEL = "roberta-base-openai-detector"
+AI_DETECTION_MAX_TOKENS = 512  # RoBERTa's input limit
+AI_DETECTION_BACKEND = os.getenv("AI_DETECTION_BACKEND", "torch")
+AI_DETECTION_ONNX_DIR = os.getenv("AI_DETECTION_ONNX_DIR", "models/ai_detector_onnx")
+ONNX_MODEL_FILE = "model.int8.onnx"
+# Intra-op threads for CPU inference (default: all cores). Batches already
+# run one at a time, so inter-op parallelism is off.
+AI_DETECTION_THREADS = int(os.getenv("AI_DETECTION_THREADS", str(os.cpu_count() or 1)))
+
+AI_LABELS = ("fake", "ai", "generated")  # 'Fake' = AI, 'Real' = Human
+
+
+def ai_label_index(id2label: Dict) -> Optional[int]:
+    """Index of the AI-generated class in the model's labels, or None."""
+    return next(
+        (int(index) for index, label in id2label.items() if label.lower() in AI_LABELS),
+        None,
+    )
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax of a (batch, classes) array."""
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class TorchDetectorBackend:
+    """Full-precision model via PyTorch (GPU when available)."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str = AI_DETECTION_MODEL):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.device.type == "cpu":
+            torch.set_num_threads(max(1, AI_DETECTION_THREADS))
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # Only settable before the first parallel op; keep the default
+                pass
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.to(self.device).eval()
+        self.label_index = ai_label_index(self.model.config.id2label)
+
+    def score(self, texts: List[str]) -> List[float]:
+        if self.label_index is None:
+            return [0.0] * len(texts)
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=AI_DETECTION_MAX_TOKENS,
+            padding=True,
+            return_tensors="pt",
+        ).to(self.device)
+        with self._torch.inference_mode():
+            logits = self.model(**encoded).logits
+        probabilities = self._torch.softmax(logits, dim=-1)
+        return probabilities[:, self.label_index].tolist()
+
+
+class OnnxDetectorBackend:
+    """
+    Int8-quantized ONNX export via onnxruntime (CPU).
+
+    Args:
+        model_dir: Export directory with model.int8.onnx, tokenizer.json and
+            config.json (see export_ai_detector_onnx)
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str = AI_DETECTION_ONNX_DIR):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=AI_DETECTION_MAX_TOKENS)
+        pad_id = self.tokenizer.token_to_id("<pad>")
+        self.tokenizer.enable_padding(
+            pad_id=1 if pad_id is None else pad_id, pad_token="<pad>"
+        )
+        with open(model_dir / "config.json") as f:
+            self.label_index = ai_label_index(json.load(f).get("id2label", {}))
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = max(1, AI_DETECTION_THREADS)
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def score(self, texts: List[str]) -> List[float]:
+        if self.label_index is None:
+            return [0.0] * len(texts)
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+        }
+        inputs = {k: v for k, v in inputs.items() if k in self._input_names}
+        (logits,) = self.session.run(["logits"], inputs)
+        return softmax(logits)[:, self.label_index].tolist()
+
+
+def load_detector_backend(name: str = AI_DETECTION_BACKEND):
+    """
+    Load the configured backend, falling back to PyTorch when the ONNX
+    model or onnxruntime is missing.
+    """
+    if name == "onnx":
+        try:
+            return OnnxDetectorBackend()
+        except Exception as e:
+            logger.warning(f"ONNX AI detector unavailable, using PyTorch: {e}")
+    elif name != "torch":
+        logger.warning(f"Unknown AI_DETECTION_BACKEND {name!r}, using PyTorch")
+    return TorchDetectorBackend()
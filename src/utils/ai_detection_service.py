@@ -9,22 +9,45 @@ Flags are categorized as:
 - "none": No AI detected (confidence < 0.5)
 - "soft": Possible AI (0.5 <= confidence < 0.8) - No penalty, yellow highlight
 - "hard": Likely AI (confidence >= 0.8) - 50% penalty, red highlight
+
+Model inference is micro-batched: concurrent grading threads submit texts to
+one MicroBatcher, which runs RoBERTa on up to AI_DETECTION_MAX_BATCH texts
+at a time (waiting at most AI_DETECTION_MAX_WAIT_MS for a batch to fill).
+Texts are truncated to the model's 512 tokens by the tokenizer. The model
+runs on the backend chosen by AI_DETECTION_BACKEND (PyTorch, or int8 ONNX;
+see utils/ai_detection_backends.py).
 """
 
+import hashlib
 import logging
+import os
+import threading
 from typing import Dict, List, Optional, Any
-import torch
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from utils.ai_detection_backends import load_detector_backend
+from utils.cache import get_local_cache
+from utils.micro_batcher import MicroBatcher
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Model scores keyed by hash of the (truncated) text, so regrading and
+# duplicate answers don't rerun RoBERTa.
+_model_score_cache = get_local_cache(
+    "ai_detection_scores", max_entries=4096, ttl=24 * 3600
+)
+
+AI_DETECTION_MAX_BATCH = int(os.getenv("AI_DETECTION_MAX_BATCH", "16"))
+AI_DETECTION_MAX_WAIT_MS = float(os.getenv("AI_DETECTION_MAX_WAIT_MS", "10"))
+MIN_MODEL_TEXT_LENGTH = 30  # Characters; shorter answers skip the model
+
 
 class AIDetectionService:
     """Singleton service for detecting AI-generated content in student answers."""
 
     _instance = None
-    _classifier = None
+    _instance_lock = threading.Lock()
+    _backend = None
+    _batcher: Optional[MicroBatcher] = None
     _model_loaded = False
 
     # Detection thresholds
@@ -36,43 +59,80 @@ class AIDetectionService:
     LARGE_PASTE_LENGTH = 30  # Lowered to catch smaller paste events
 
     def __new__(cls):
+        # Grading threads may race here; load the model exactly once
         if cls._instance is None:
-            cls._instance = super(AIDetectionService, cls).__new__(cls)
-            cls._instance._initialize_model()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(AIDetectionService, cls).__new__(cls)
+                    instance._initialize_model()
+                    cls._instance = instance
         return cls._instance
 
     def _initialize_model(self):
         """
-        Loads the HuggingFace model into memory.
-        Using 'roberta-base-openai-detector' as a robust baseline.
+        Loads the detection model ('roberta-base-openai-detector', a robust
+        baseline) on the AI_DETECTION_BACKEND backend.
         """
         if self._model_loaded:
             return
 
         try:
-            logger.info("Loading AI Detection Model (roberta-base-openai-detector)...")
-            model_name = "roberta-base-openai-detector"
-
-            # Check if GPU is available for faster inference
-            device = 0 if torch.cuda.is_available() else -1
-
-            self._classifier = pipeline(
-                "text-classification",
-                model=model_name,
-                tokenizer=model_name,
-                device=device,
-                top_k=None,  # Return scores for all labels (Real vs Fake)
+            self._backend = load_detector_backend()
+            self._batcher = MicroBatcher(
+                self._backend.score,
+                max_batch_size=AI_DETECTION_MAX_BATCH,
+                max_wait_ms=AI_DETECTION_MAX_WAIT_MS,
+                name="ai-detection",
             )
             self._model_loaded = True
             logger.info(
-                f"AI Detection Model loaded successfully (device: {'GPU' if device == 0 else 'CPU'})"
+                f"AI Detection Model loaded successfully (backend: {self._backend.name}, "
+                f"batch: {AI_DETECTION_MAX_BATCH})"
             )
         except Exception as e:
             logger.error(f"Failed to load AI detection model: {str(e)}")
             logger.warning("AI detection will run in fallback mode (telemetry-only)")
-            self._classifier = None
+            self._backend = None
+            self._batcher = None
             self._model_loaded = False
 
+    def model_scores(self, texts: List[str]) -> List[Optional[float]]:
+        """
+        Model scores for texts, batched with other threads' requests.
+
+        Cached scores are reused; texts too short to analyze (or every
+        text, when the model isn't loaded) get None.
+        """
+        if not self._model_loaded or self._batcher is None:
+            return [None] * len(texts)
+
+        scores: List[Optional[float]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or len(text) < MIN_MODEL_TEXT_LENGTH:
+                continue
+            cache_key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            cached = _model_score_cache.get(cache_key)
+            if cached is not None:
+                scores[i] = cached
+            else:
+                pending.append((i, cache_key, self._batcher.submit(text)))
+
+        for i, cache_key, future in pending:
+            scores[i] = future.result()
+            _model_score_cache.set(cache_key, scores[i])
+        return scores
+
+    def prefetch_model_scores(self, texts: List[str]) -> None:
+        """
+        Score all of a submission's answers as one batch up front, so the
+        per-question detect_ai_content calls that follow hit the cache.
+        """
+        try:
+            self.model_scores(texts)
+        except Exception as e:
+            logger.error(f"Error during batched model inference: {str(e)}")
+
     def detect_ai_content(
         self,
         text: str,
@@ -211,28 +271,17 @@ class AIDetectionService:
         Analyze text using the HuggingFace transformer model.
         Returns a score between 0.0 and 1.0 (probability of being AI-generated).
         """
-        if not self._classifier or not self._model_loaded:
+        if not self._model_loaded:
             logger.debug("Model not available, skipping stylometric analysis")
             return 0.0
 
         # Only run model on substantial text (at least 30 characters)
-        if len(text) < 30:
+        if len(text) < MIN_MODEL_TEXT_LENGTH:
             return 0.0
 
         try:
-            # Truncate to model max length (512 tokens for RoBERTa)
-            text_truncated = text[:512]
-
-            # The model returns a list of dicts: [[{'label': 'Fake', 'score': 0.9}, ...]]
-            results = self._classifier(text_truncated)
-
-            # Extract score for 'Fake' (AI-generated) label
-            # For roberta-base-openai-detector: 'Fake' = AI, 'Real' = Human
-            model_score = 0.0
-            for res in results[0]:
-                if res["label"].lower() in ["fake", "ai", "generated"]:
-                    model_score = res["score"]
-                    break
+            # Truncated to the model's max length (512 tokens) when tokenized
+            model_score = self.model_scores([text])[0] or 0.0
 
             if model_score > self.HARD_FLAG_THRESHOLD:
                 reasons.append(
@@ -282,6 +331,9 @@ class AIDetectionService:
         """
         results = {}
 
+        # One batched model pass for all answers
+        self.prefetch_model_scores([answer.get("text", "") for answer in answers])
+
         for answer in answers:
             question_id = answer.get("question_id")
             text = answer.get("text", "")
@@ -302,12 +354,6 @@ class AIDetectionService:
 
 
 # Singleton instance getter
-_service_instance = None
-
-
 def get_ai_detection_service() -> AIDetectionService:
-    """Get or create the singleton AI detection service instance."""
-    global _service_instance
-    if _service_instance is None:
-        _service_instance = AIDetectionService()
-    return _service_instance
+    """Get or create the singleton AI detection service instance (thread-safe)."""
+    return AIDetectionService()
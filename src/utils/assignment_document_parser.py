@@ -23,6 +23,7 @@ from .prompts import (
 from .assignment_schemas import get_assignment_parsing_schema
 from .assignment_pydantic_models import AssignmentParsingResponse
 from .document_processor import DocumentProcessor
+from .yolo_registry import detect_diagrams
 
 
 class AssignmentDocumentParser:
@@ -664,17 +665,6 @@ class AssignmentDocumentParser:
         """
         Assign diagrams to questions using YOLO for only relevant pages.
         """
-        from ultralytics import YOLO
-        import tempfile
-        import shutil
-
-        # Model path should be configurable
-        model_path = os.getenv(
-            "DIAGRAM_YOLO_MODEL_PATH", "runs/detect/diagram_detector5/weights/best.pt"
-        )
-        confidence = float(os.getenv("DIAGRAM_YOLO_CONFIDENCE", "0.25"))
-        yolo_model = YOLO(model_path)
-
         # Map: page_number -> [questions needing diagram]
         page_to_questions = {}
 
@@ -693,35 +683,13 @@ class AssignmentDocumentParser:
 
         collect_questions_with_diagrams(questions)
 
-        # For each relevant page, run YOLO and assign diagrams
-        for page_number, qs in page_to_questions.items():
-            if not (1 <= page_number <= len(images)):
-                continue
-            page_img = images[page_number - 1]
-            # Save image to temp file for YOLO
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_img:
-                page_img.save(tmp_img, "JPEG", quality=95)
-                img_path = tmp_img.name
-
-            results = yolo_model(img_path, conf=confidence, verbose=False)
-            detections = []
-            if len(results) > 0 and results[0].boxes is not None:
-                boxes = results[0].boxes
-                for i, box in enumerate(boxes):
-                    coords = box.xyxy[0].cpu().numpy()
-                    x1, y1, x2, y2 = map(int, coords)
-                    conf_score = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    detection = {
-                        "bbox": (x1, y1, x2, y2),
-                        "confidence": conf_score,
-                        "class_id": cls,
-                        "ymin": y1,
-                    }
-                    detections.append(detection)
+        # One batched YOLO call over the relevant pages, then assign per page
+        page_numbers = [p for p in page_to_questions if 1 <= p <= len(images)]
+        page_detections = detect_diagrams([images[p - 1] for p in page_numbers])
 
-            # Sort detections by confidence (desc), then ymin (asc)
-            detections.sort(key=lambda d: (-d["confidence"], d["ymin"]))
+        for page_number, detections in zip(page_numbers, page_detections):
+            qs = page_to_questions[page_number]
+            page_img = images[page_number - 1]
 
             n_questions = len(qs)
             n_diagrams = len(detections)
@@ -743,12 +711,6 @@ class AssignmentDocumentParser:
                     self._update_question_with_diagram(q, page_img, det, page_number)
                 # Leave unmatched questions empty
 
-            # Clean up temp image
-            try:
-                os.unlink(img_path)
-            except Exception:
-                pass
-
         return questions
 
     def _update_question_with_diagram(self, q, page_img, det, page_number):
@@ -1,17 +1,47 @@
 """
-Redis Cache Utility for Query Results
+Two-tier cache utility for query results
 Caches:
 - Query embeddings (120ms → 5ms)
 - RAG retrieval results (720ms → 50ms)
 - Conversation history (180ms → 10ms)
 
-Note: Redis is optional. If not available, caching is disabled (graceful degradation).
+Tiers:
+- L1: per-process LRUCache (no network hop, no decode) with a short TTL
+- L2: Redis, shared by every worker
+
+Per-video/material results are keyed under a generation counter that
+re-chunking bumps, so invalidation is O(1) (see bump_namespace).
+
+Values are stored in Redis as compact JSON metadata followed by packed
+float32 bytes for any numpy vectors (embeddings), instead of JSON-encoding
+thousands of floats. Writes and deletes are broadcast on a Redis pub/sub
+channel so other workers drop their stale L1 copies.
+
+Note: Redis is optional. If not available, only the per-process L1 is used
+(graceful degradation).
+
+Also provides LRUCache, a bounded thread-safe in-process cache for objects
+that can't go through Redis (BM25/vector indexes, temp video files, model
+scores). Named instances are shared via get_local_cache() and report
+hit/miss/eviction counters through local_cache_stats().
 """
 
+import asyncio
 import json
 import hashlib
-from typing import Optional, Any, List, Dict
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Optional, Any, Callable, List, Dict, Tuple
 from functools import wraps
+
+import numpy as np
+
 from controllers.config import logger
 
 # Try to import redis, but don't fail if not available
@@ -26,38 +56,562 @@ except ImportError:
     REDIS_AVAILABLE = False
     redis = None
 
-# Initialize Redis client (lazy loading)
-_redis_client = None
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis-py < 4.2
+    redis_asyncio = None
 
 
-def get_redis_client():
-    """Get or create Redis client (returns None if Redis not available)"""
-    global _redis_client
+# ── In-process LRU caches ───────────────────────────────────────────────
 
-    # Check if Redis module is available
-    if not REDIS_AVAILABLE:
-        return None
 
-    if _redis_client is None:
-        try:
-            _redis_client = redis.Redis(
-                host="localhost",
-                port=6379,
-                db=0,
-                decode_responses=False,  # We'll handle encoding
-                socket_connect_timeout=2,
-                socket_timeout=2,
+def _estimate_size(value: Any) -> int:
+    """Rough byte size of a cached value (numpy-aware)."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+
+# (value, expires_at, size, ttl)
+_Entry = Tuple[Any, Optional[float], int, Optional[float]]
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with optional TTL and byte budget.
+
+    Entries are evicted least-recently-used first once either max_entries
+    or max_bytes is exceeded, and expire after ttl seconds (measured from
+    the last write, or from the last read when sliding=True).
+
+    Args:
+        name: Cache name (used for metrics/logging)
+        max_entries: Maximum number of entries
+        max_bytes: Optional total size budget, measured with sizeof
+        ttl: Optional default time to live in seconds
+        sliding: Refresh an entry's TTL on every hit
+        sizeof: Function returning an entry's size in bytes
+        on_evict: Called as on_evict(key, value) when an entry is evicted,
+            expires or is replaced (e.g. to delete a temp file)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sliding: bool = False,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Any, Any], None]] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sliding = sliding
+        self.sizeof = sizeof or _estimate_size
+        self.on_evict = on_evict
+
+        self._data: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: Any) -> _Entry:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+        return entry
+
+    def _notify(self, removed: List[Tuple[Any, Any]]):
+        """Run on_evict callbacks outside the lock."""
+        if not self.on_evict:
+            return
+        for key, value in removed:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"[{self.name}] on_evict failed for {key}: {e}")
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value (marking it recently used) or default."""
+        removed = []
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size, ttl = entry
+            now = time.monotonic()
+            if expires_at is not None and now >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                removed.append((key, value))
+            else:
+                if self.sliding and ttl is not None:
+                    self._data[key] = (value, now + ttl, size, ttl)
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+        self._notify(removed)
+        return default
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Insert or replace an entry, evicting LRU entries over budget."""
+        ttl = self.ttl if ttl is None else ttl
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        removed = []
+
+        with self._lock:
+            if key in self._data:
+                old_value = self._remove(key)[0]
+                if old_value is not value:
+                    removed.append((key, old_value))
+
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            self._data[key] = (value, expires_at, size, ttl)
+            self._bytes += size
+
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None
+                and self._bytes > self.max_bytes
+                and len(self._data) > 1
+            ):
+                old_key = next(iter(self._data))
+                removed.append((old_key, self._remove(old_key)[0]))
+                self.evictions += 1
+
+        self._notify(removed)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove an entry without calling on_evict; return its value."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)[0]
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+            for key, (value, expires_at, _, _) in list(self._data.items()):
+                if expires_at is not None and now >= expires_at:
+                    self._remove(key)
+                    self.expirations += 1
+                    removed.append((key, value))
+        self._notify(removed)
+        return len(removed)
+
+    def clear(self):
+        """Drop every entry (on_evict is called for each)."""
+        with self._lock:
+            removed = [(key, entry[0]) for key, entry in self._data.items()]
+            self._data.clear()
+            self._bytes = 0
+        self._notify(removed)
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (
+                entry[1] is None or time.monotonic() < entry[1]
             )
-            # Test connection
-            _redis_client.ping()
-            logger.info("✅ Redis cache connected successfully")
-        except (redis.ConnectionError, redis.TimeoutError) as e:
-            logger.warning(f"⚠️ Redis not available: {e}. Caching disabled.")
-            _redis_client = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def keys(self) -> List[Any]:
+        """Snapshot of current keys, least recently used first."""
+        with self._lock:
+            return list(self._data.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current occupancy for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_local_caches: Dict[str, LRUCache] = {}
+_local_caches_lock = threading.Lock()
+
+
+def get_local_cache(name: str, **kwargs) -> LRUCache:
+    """
+    Get (or create on first call) the process-wide LRUCache called name.
+    kwargs are LRUCache options and only apply when the cache is created.
+    """
+    with _local_caches_lock:
+        cache = _local_caches.get(name)
+        if cache is None:
+            cache = LRUCache(name, **kwargs)
+            _local_caches[name] = cache
+        return cache
+
+
+def local_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered in-process cache, keyed by name."""
+    with _local_caches_lock:
+        caches = list(_local_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+# ── L1: per-process tier in front of Redis ──────────────────────────────
+
+# Short TTL bounds staleness if an invalidation message is ever missed.
+# L1 hands the same object to every caller (and keeps the object passed to
+# cache_set), so cached values are read-only by contract: copy before
+# mutating. Arrays decoded from Redis are read-only numpy views.
+L1_TTL_SECONDS = int(os.getenv("CACHE_L1_TTL_SECONDS", "300"))
+_l1_cache = get_local_cache(
+    "redis_l1",
+    max_entries=int(os.getenv("CACHE_L1_MAX_ENTRIES", "4096")),
+    max_bytes=int(os.getenv("CACHE_L1_MAX_MB", "64")) * 1024 * 1024,
+    ttl=L1_TTL_SECONDS,
+    sizeof=lambda value: _value_size(value),
+)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Identifies this process's own invalidation messages so it can skip them
+_PROCESS_ID = uuid.uuid4().hex
+_listener_started = False
+_listener_lock = threading.Lock()
+
+
+def _value_size(value: Any) -> int:
+    """Approximate size of a decoded value, counting vectors by nbytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return 64 + sum(_value_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(_value_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _l1_invalidate(op: str, target: str):
+    """Drop a key another worker changed (the only op published is "key")."""
+    if op == "key":
+        _l1_cache.pop(target)
+
+
+def _publish_invalidation(client, op: str, target: str):
+    try:
+        client.publish(INVALIDATION_CHANNEL, f"{_PROCESS_ID}|{op}|{target}")
+    except Exception as e:
+        logger.debug(f"Cache invalidation publish failed for {target}: {e}")
+
+
+def _start_invalidation_listener():
+    """Subscribe once per process to other workers' invalidations."""
+    global _listener_started
+
+    with _listener_lock:
+        if _listener_started:
+            return
+        _listener_started = True
+
+    def listen():
+        while True:
+            client = get_redis_client()
+            if client is None:
+                time.sleep(5)
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Publish namespace bumps made while Redis was unreachable
+                _replay_pending_bumps(client)
+                while True:
+                    # Polling (rather than listen()) so the pool's socket
+                    # timeout doesn't fire on an idle channel
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message:
+                        continue
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8", errors="replace")
+                    origin, _, rest = str(data).partition("|")
+                    if origin == _PROCESS_ID:
+                        continue
+                    op, _, target = rest.partition("|")
+                    _l1_invalidate(op, target)
+            except Exception as e:
+                # Can't trust L1 across a gap in invalidations
+                _l1_cache.clear()
+                _redis_backend.handle_error("listener", INVALIDATION_CHANNEL, e)
+                time.sleep(5)
+
+    thread = threading.Thread(target=listen, daemon=True)
+    thread.start()
+    logger.info("Started cache invalidation listener")
+
+
+# ── L2: Redis ───────────────────────────────────────────────────────────
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "2"))
+# Reconnect backoff after an outage: 1s, 2s, 4s, ... capped at this value
+REDIS_RETRY_MAX_SECONDS = float(os.getenv("REDIS_RETRY_MAX_SECONDS", "60"))
+
+
+class RedisBackend:
+    """
+    Redis connection management for the L2 tier.
+
+    One ConnectionPool is shared by every thread in the process; async
+    routes get a redis.asyncio client per event loop (asyncio connections
+    can't cross loops). After a connection failure the backend reports
+    itself unavailable for an exponentially growing backoff window and then
+    reconnects on the next call, instead of staying disabled until restart.
+
+    Args:
+        url: Redis URL (redis://, rediss:// or unix://)
+        max_connections: Pool size per process (and per event loop)
+        socket_timeout: Read/write timeout in seconds
+        connect_timeout: Connect timeout in seconds
+        max_backoff: Longest wait between reconnect attempts, in seconds
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        socket_timeout: float = 2.0,
+        connect_timeout: float = 2.0,
+        max_backoff: float = 60.0,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _pool_options(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "socket_timeout": self.socket_timeout,
+            "socket_connect_timeout": self.connect_timeout,
+            "health_check_interval": 30,
+            "decode_responses": False,  # We'll handle encoding
+        }
+
+    def backing_off(self) -> bool:
+        """True while waiting out the backoff after a failure."""
+        return time.monotonic() < self._retry_at
+
+    def mark_down(self, error: Exception):
+        """Drop the clients and wait out a backoff before reconnecting."""
+        with self._lock:
+            if self.backing_off():
+                return  # Already handled by another caller
+            self._failures += 1
+            delay = min(self.max_backoff, 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + delay
+            client, self._client = self._client, None
+            self._async_clients = weakref.WeakKeyDictionary()
+
+        if client is not None:
+            try:
+                client.connection_pool.disconnect()
+            except Exception:
+                pass
+        logger.warning(
+            f"⚠️ Redis not available: {error}. Retrying in {delay:.0f}s "
+            "(using in-process cache only)."
+        )
+
+    def _mark_up(self, client_kind: str):
+        if self._failures:
+            # Invalidations published during the outage were missed
+            _l1_cache.clear()
+        self._failures = 0
+        self._retry_at = 0.0
+        logger.info(f"✅ Redis cache connected successfully ({client_kind})")
+
+    def client(self):
+        """Shared sync client, or None if Redis is unavailable."""
+        if not REDIS_AVAILABLE:
+            return None
+        client = self._client
+        if client is not None or self.backing_off():
+            return client
+
+        with self._lock:
+            if self._client is not None or self.backing_off():
+                return self._client
+            try:
+                pool = redis.ConnectionPool.from_url(self.url, **self._pool_options())
+                client = redis.Redis(connection_pool=pool)
+                client.ping()
+            except Exception as e:
+                error = e
+                client = None
+            else:
+                self._client = client
+                self._mark_up("sync")
+
+        if client is None:
+            self.mark_down(error)
+            return None
+        _start_invalidation_listener()
+        return client
+
+    async def async_client(self):
+        """redis.asyncio client for the running event loop, or None."""
+        if not REDIS_AVAILABLE or redis_asyncio is None or self.backing_off():
+            return None
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is not None:
+            return client
+
+        client = redis_asyncio.Redis.from_url(self.url, **self._pool_options())
+        try:
+            await client.ping()
         except Exception as e:
-            logger.warning(f"⚠️ Redis error: {e}. Caching disabled.")
-            _redis_client = None
-    return _redis_client
+            await client.connection_pool.disconnect()
+            self.mark_down(e)
+            return None
+
+        with self._lock:
+            self._async_clients[loop] = client
+            self._mark_up("asyncio")
+        return client
+
+    def handle_error(self, action: str, key: str, error: Exception):
+        """Log a failed cache operation; back off if Redis itself is down."""
+        logger.debug(f"Cache {action} error for key {key}: {error}")
+        if REDIS_AVAILABLE and isinstance(
+            error, (redis.ConnectionError, redis.TimeoutError)
+        ):
+            self.mark_down(error)
+
+
+_redis_backend = RedisBackend(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    connect_timeout=REDIS_CONNECT_TIMEOUT,
+    max_backoff=REDIS_RETRY_MAX_SECONDS,
+)
+
+
+def get_redis_client():
+    """Get the pooled Redis client (returns None if Redis not available)"""
+    return _redis_backend.client()
+
+
+async def get_async_redis_client():
+    """Get the redis.asyncio client for the current event loop (or None)"""
+    return await _redis_backend.async_client()
+
+
+# ── Value encoding ──────────────────────────────────────────────────────
+
+# Prefix marking the binary format (legacy entries are plain JSON)
+_BINARY_MAGIC = b"\x01vc"
+_VECTOR_REF = "__f32__"
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Serialize a value for Redis.
+
+    Numeric numpy arrays anywhere in the value are stored as raw bytes after
+    a compact JSON header recording their dtype and shape, so a 1536-dim
+    embedding costs 6KB instead of ~30KB of JSON text, decodes without
+    parsing floats, and comes back with the shape and dtype it went in with.
+    Arrays of other dtypes (strings, objects) are stored as JSON lists.
+    """
+    arrays: List[np.ndarray] = []
+
+    def strip(obj):
+        if isinstance(obj, np.ndarray):
+            if obj.dtype.kind not in "biuf":
+                return strip(obj.tolist())
+            arrays.append(np.ascontiguousarray(obj, dtype=obj.dtype.newbyteorder("<")))
+            return {_VECTOR_REF: len(arrays) - 1}
+        if isinstance(obj, dict):
+            return {k: strip(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [strip(v) for v in obj]
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return obj
+
+    header = json.dumps(
+        {"v": strip(value), "a": [[a.dtype.str, list(a.shape)] for a in arrays]},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return b"".join(
+        [_BINARY_MAGIC, struct.pack("<I", len(header)), header]
+        + [a.tobytes() for a in arrays]
+    )
+
+
+def decode_value(data: bytes) -> Any:
+    """Inverse of encode_value; also reads legacy JSON entries."""
+    if not data.startswith(_BINARY_MAGIC):
+        return json.loads(data)
+
+    start = len(_BINARY_MAGIC)
+    (header_len,) = struct.unpack_from("<I", data, start)
+    start += 4
+    header = json.loads(data[start : start + header_len])
+    start += header_len
+
+    # Entries written before dtype/shape were recorded hold flat float32
+    # vectors, listed by length under "n"
+    layouts = header.get("a") or [["<f4", [n]] for n in header.get("n", [])]
+    arrays = []
+    for dtype_str, shape in layouts:
+        dtype = np.dtype(dtype_str)
+        count = int(np.prod(shape, dtype=np.int64))
+        # Read-only views into the Redis payload (no copy)
+        arrays.append(
+            np.frombuffer(data, dtype=dtype, count=count, offset=start).reshape(shape)
+        )
+        start += count * dtype.itemsize
+
+    def restore(obj):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and _VECTOR_REF in obj:
+                return arrays[obj[_VECTOR_REF]]
+            return {k: restore(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [restore(v) for v in obj]
+        return obj
+
+    return restore(header["v"])
 
 
 def generate_cache_key(prefix: str, *args, **kwargs) -> str:
@@ -84,18 +638,29 @@ def generate_cache_key(prefix: str, *args, **kwargs) -> str:
 
 
 def cache_get(key: str) -> Optional[Any]:
-    """Get value from cache"""
+    """
+    Get value from cache (L1, then Redis).
+
+    Values may be shared with other callers through L1 — treat them as
+    read-only.
+    """
+    value = _l1_cache.get(key)
+    if value is not None:
+        return value
+
     client = get_redis_client()
     if not client:
         return None
 
     try:
-        value = client.get(key)
-        if value:
-            return json.loads(value)
+        data = client.get(key)
+        if data:
+            value = decode_value(data)
+            _l1_cache.set(key, value)
+            return value
         return None
     except Exception as e:
-        logger.debug(f"Cache get error for key {key}: {e}")
+        _redis_backend.handle_error("get", key, e)
         return None
 
 
@@ -105,56 +670,384 @@ def cache_set(key: str, value: Any, ttl: int = 3600):
 
     Args:
         key: Cache key
-        value: Value to cache (must be JSON serializable)
+        value: Value to cache (JSON serializable, numpy arrays allowed);
+            kept by reference in L1, so don't mutate it afterwards
         ttl: Time to live in seconds (default 1 hour)
     """
+    _l1_cache.set(key, value, ttl=min(ttl, L1_TTL_SECONDS))
+
     client = get_redis_client()
     if not client:
         return False
 
     try:
-        serialized = json.dumps(value)
-        client.setex(key, ttl, serialized)
+        client.setex(key, ttl, encode_value(value))
+        _publish_invalidation(client, "key", key)
         return True
     except Exception as e:
-        logger.debug(f"Cache set error for key {key}: {e}")
+        _redis_backend.handle_error("set", key, e)
         return False
 
 
 def cache_delete(key: str):
     """Delete key from cache"""
+    _l1_cache.pop(key)
+
     client = get_redis_client()
     if not client:
         return False
 
     try:
         client.delete(key)
+        _publish_invalidation(client, "key", key)
         return True
     except Exception as e:
-        logger.debug(f"Cache delete error for key {key}: {e}")
+        _redis_backend.handle_error("delete", key, e)
         return False
 
 
-def cache_invalidate_pattern(pattern: str):
+def cache_get_many(keys: List[str]) -> List[Optional[Any]]:
+    """cache_get for several keys: L1 first, then one MGET for the rest."""
+    values: List[Optional[Any]] = [_l1_cache.get(key) for key in keys]
+    missing = [i for i, value in enumerate(values) if value is None]
+    client = get_redis_client() if missing else None
+    if not client:
+        return values
+
+    try:
+        found = client.mget([keys[i] for i in missing])
+    except Exception as e:
+        _redis_backend.handle_error("mget", ",".join(keys[i] for i in missing), e)
+        return values
+
+    for i, data in zip(missing, found):
+        if data:
+            values[i] = decode_value(data)
+            _l1_cache.set(keys[i], values[i])
+    return values
+
+
+# ── Capped key indexes ──────────────────────────────────────────────────
+#
+# An insertion-ordered, capped set of member ids under one key: a Redis
+# sorted set scored by insert time (an L1 list while Redis is down). Lets a
+# collection keep each entry under its own key, so adding one is a small
+# write that can't overwrite a concurrent add, instead of rewriting the
+# whole collection as one value.
+
+_index_lock = threading.Lock()
+
+
+def _decode_members(members) -> List[str]:
+    return [m.decode("utf-8") if isinstance(m, bytes) else m for m in members]
+
+
+def index_add(index_key: str, member: str, ttl: int, max_members: int) -> List[str]:
+    """
+    Add member as the newest in index_key and trim the index to its
+    max_members newest. Returns the trimmed members (their entries are the
+    caller's to delete).
+    """
+    client = get_redis_client()
+    if client:
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.zadd(index_key, {member: time.time()})
+            pipe.zrange(index_key, 0, -(max_members + 1))
+            pipe.zremrangebyrank(index_key, 0, -(max_members + 1))
+            pipe.expire(index_key, ttl)
+            _, trimmed, _, _ = pipe.execute()
+            return _decode_members(trimmed)
+        except Exception as e:
+            _redis_backend.handle_error("index_add", index_key, e)
+
+    with _index_lock:
+        members = [m for m in _l1_cache.get(index_key) or [] if m != member]
+        members.append(member)
+        trimmed = members[: max(0, len(members) - max_members)]
+        _l1_cache.set(index_key, members[len(trimmed) :], ttl=min(ttl, L1_TTL_SECONDS))
+    return trimmed
+
+
+def index_members(index_key: str) -> List[str]:
+    """Members of index_key, oldest first."""
+    client = get_redis_client()
+    if client:
+        try:
+            return _decode_members(client.zrange(index_key, 0, -1))
+        except Exception as e:
+            _redis_backend.handle_error("index_members", index_key, e)
+    return list(_l1_cache.get(index_key) or [])
+
+
+def index_remove(index_key: str, members: List[str]):
+    """Drop members from index_key."""
+    if not members:
+        return
+    client = get_redis_client()
+    if client:
+        try:
+            client.zrem(index_key, *members)
+        except Exception as e:
+            _redis_backend.handle_error("index_remove", index_key, e)
+
+    with _index_lock:
+        current = _l1_cache.get(index_key)
+        if current is not None:
+            _l1_cache.set(index_key, [m for m in current if m not in members])
+
+
+# ── Versioned namespaces ────────────────────────────────────────────────
+#
+# Keys derived from a video's/material's content embed that document's
+# generation counter (cachever:<kind>:<id>). Re-chunking bumps the counter,
+# so every old key becomes unreachable at once and simply ages out via its
+# TTL — O(1) invalidation with no KEYS/SCAN over Redis.
+
+# Last known version of each namespace in this process, the fallback when
+# Redis is down
+_local_versions: Dict[str, int] = {}
+# Bumps made while Redis was unreachable: key -> number of bumps. They are
+# replayed with INCRBY once Redis is back, so other workers see them and
+# this one doesn't drift back to the stale Redis value
+_pending_bumps: Dict[str, int] = {}
+_local_versions_lock = threading.Lock()
+
+
+def _version_key(kind: str, ident: str) -> str:
+    return f"cachever:{kind}:{ident}"
+
+
+def _remember_version(key: str, version: int) -> int:
+    with _local_versions_lock:
+        version = max(version, _local_versions.get(key, 0))
+        _local_versions[key] = version
+    _l1_cache.set(key, version)
+    return version
+
+
+def _replay_pending_bumps(client) -> None:
+    """Persist bumps made during a Redis outage (no-op when there are none)."""
+    if not _pending_bumps or client is None:
+        return
+    with _local_versions_lock:
+        pending = dict(_pending_bumps)
+    for key, count in pending.items():
+        try:
+            version = int(client.incrby(key, count))
+            # Never end up below a version this process already used
+            local = _local_versions.get(key, 0)
+            if version < local:
+                version = int(client.incrby(key, local - version))
+        except Exception as e:
+            _redis_backend.handle_error("bump", key, e)
+            return
+        with _local_versions_lock:
+            remaining = _pending_bumps.get(key, 0) - count
+            if remaining > 0:
+                _pending_bumps[key] = remaining
+            else:
+                _pending_bumps.pop(key, None)
+        _remember_version(key, version)
+        _publish_invalidation(client, "key", key)
+        logger.info(f"Replayed {count} cache namespace bump(s) for {key}")
+
+
+def _local_version(key: str) -> int:
+    version = _l1_cache.get(key)
+    with _local_versions_lock:
+        return max(version or 0, _local_versions.get(key, 0))
+
+
+def namespace_version(kind: str, ident: str) -> int:
     """
-    Invalidate all keys matching pattern
+    Current generation of a cache namespace (0 if never bumped).
 
     Args:
-        pattern: Redis pattern (e.g., 'rag:video123:*')
+        kind: Namespace kind ("video" or "material")
+        ident: Video or material id
     """
+    key = _version_key(kind, ident)
+    version = _l1_cache.get(key)
+    if version is not None:
+        return version
+
     client = get_redis_client()
     if not client:
-        return 0
+        return _local_version(key)
+
+    _replay_pending_bumps(client)
+    if key in _pending_bumps:
+        # Replay failed; Redis still holds the pre-bump version
+        return _local_version(key)
+    try:
+        data = client.get(key)
+    except Exception as e:
+        _redis_backend.handle_error("get", key, e)
+        return _local_version(key)
+
+    # Cached until a bump elsewhere publishes an invalidation for it
+    return _remember_version(key, int(data) if data else 0)
+
+
+def bump_namespace(kind: str, ident: str) -> int:
+    """
+    Invalidate every cached entry in a namespace by moving to its next
+    generation. Returns the new version.
+
+    Without Redis the bump is made locally and replayed to Redis when it is
+    reachable again.
+    """
+    key = _version_key(kind, ident)
+    client = get_redis_client()
+    if client:
+        _replay_pending_bumps(client)
+        if key not in _pending_bumps:
+            try:
+                version = int(client.incr(key))
+                _publish_invalidation(client, "key", key)
+                return _remember_version(key, version)
+            except Exception as e:
+                _redis_backend.handle_error("bump", key, e)
+
+    with _local_versions_lock:
+        version = max(_l1_cache.get(key) or 0, _local_versions.get(key, 0)) + 1
+        _local_versions[key] = version
+        _pending_bumps[key] = _pending_bumps.get(key, 0) + 1
+    _l1_cache.set(key, version)
+    logger.warning(f"Redis unavailable, bumped {key} locally to v{version}")
+    return version
+
+
+async def async_namespace_version(kind: str, ident: str) -> int:
+    """namespace_version for async code."""
+    key = _version_key(kind, ident)
+    version = _l1_cache.get(key)
+    if version is not None:
+        return version
+
+    client = await get_async_redis_client()
+    if not client:
+        return _local_version(key)
+
+    if _pending_bumps:
+        await asyncio.to_thread(_replay_pending_bumps, get_redis_client())
+    if key in _pending_bumps:
+        return _local_version(key)
+    try:
+        data = await client.get(key)
+    except Exception as e:
+        _redis_backend.handle_error("get", key, e)
+        return _local_version(key)
+
+    return _remember_version(key, int(data) if data else 0)
+
+
+def namespaced_key(
+    kind: str, ident: str, prefix: str, *args, version: Optional[int] = None
+) -> str:
+    """
+    generate_cache_key for data derived from one video/material, scoped to
+    its current generation: "<prefix>:<kind>:<id>:v<version>:<hash>".
+    """
+    if version is None:
+        version = namespace_version(kind, ident)
+    digest = generate_cache_key(prefix, *args).rsplit(":", 1)[1]
+    return f"{prefix}:{kind}:{ident}:v{version}:{digest}"
+
+
+# ── Async variants (for async routes) ───────────────────────────────────
+
+
+async def async_cache_get(key: str) -> Optional[Any]:
+    """
+    cache_get for async code: L1, then Redis without blocking the loop.
+    Values are shared through L1 — treat them as read-only.
+    """
+    value = _l1_cache.get(key)
+    if value is not None:
+        return value
+
+    client = await get_async_redis_client()
+    if not client:
+        return None
+
+    try:
+        data = await client.get(key)
+        if data:
+            value = decode_value(data)
+            _l1_cache.set(key, value)
+            return value
+        return None
+    except Exception as e:
+        _redis_backend.handle_error("get", key, e)
+        return None
+
+
+async def async_cache_set(key: str, value: Any, ttl: int = 3600):
+    """cache_set for async code."""
+    _l1_cache.set(key, value, ttl=min(ttl, L1_TTL_SECONDS))
+
+    client = await get_async_redis_client()
+    if not client:
+        return False
+
+    try:
+        await client.setex(key, ttl, encode_value(value))
+        await client.publish(INVALIDATION_CHANNEL, f"{_PROCESS_ID}|key|{key}")
+        return True
+    except Exception as e:
+        _redis_backend.handle_error("set", key, e)
+        return False
+
+
+async def async_cache_delete(key: str):
+    """cache_delete for async code."""
+    _l1_cache.pop(key)
+
+    client = await get_async_redis_client()
+    if not client:
+        return False
 
     try:
-        keys = client.keys(pattern)
-        if keys:
-            return client.delete(*keys)
+        await client.delete(key)
+        await client.publish(INVALIDATION_CHANNEL, f"{_PROCESS_ID}|key|{key}")
+        return True
+    except Exception as e:
+        _redis_backend.handle_error("delete", key, e)
+        return False
+
+
+async def async_cache_prefetch(keys: List[str]) -> int:
+    """
+    Load keys missing from L1 with a single MGET, so sync code that runs
+    next in this request (e.g. retrieval in a threadpool) hits L1 instead
+    of blocking on Redis.
+
+    Returns:
+        Number of keys found in Redis
+    """
+    missing = [key for key in keys if key not in _l1_cache]
+    if not missing:
+        return 0
+
+    client = await get_async_redis_client()
+    if not client:
         return 0
+
+    try:
+        values = await client.mget(missing)
     except Exception as e:
-        logger.debug(f"Cache pattern delete error for {pattern}: {e}")
+        _redis_backend.handle_error("prefetch", ",".join(missing), e)
         return 0
 
+    found = 0
+    for key, data in zip(missing, values):
+        if data:
+            _l1_cache.set(key, decode_value(data))
+            found += 1
+    return found
+
 
 # Decorator for automatic caching
 def cached(prefix: str, ttl: int = 3600, key_func=None):
@@ -203,6 +1096,14 @@ def cached(prefix: str, ttl: int = 3600, key_func=None):
 # Specialized caching functions for common use cases
 
 
+def query_embedding_key(query: str) -> str:
+    return generate_cache_key("embedding", query)
+
+
+def rag_results_key(video_id: str, query: str, version: Optional[int] = None) -> str:
+    return namespaced_key("video", video_id, "rag", query, version=version)
+
+
 def cache_query_embedding(query: str, embedding: List[float], ttl: int = 7200):
     """
     Cache query embedding (2 hour TTL - queries repeat often)
@@ -212,15 +1113,20 @@ def cache_query_embedding(query: str, embedding: List[float], ttl: int = 7200):
         embedding: Embedding vector
         ttl: Time to live (default 2 hours)
     """
-    key = generate_cache_key("embedding", query)
-    cache_set(key, {"query": query, "embedding": embedding}, ttl)
+    key = query_embedding_key(query)
+    # Stored as packed float32 (6KB) rather than a JSON list of floats
+    cache_set(key, np.asarray(embedding, dtype=np.float32), ttl)
 
 
 def get_cached_query_embedding(query: str) -> Optional[List[float]]:
     """Get cached query embedding"""
-    key = generate_cache_key("embedding", query)
+    key = query_embedding_key(query)
     result = cache_get(key)
-    return result["embedding"] if result else None
+    if result is None:
+        return None
+    if isinstance(result, dict):  # Legacy JSON entry
+        return result.get("embedding")
+    return result.tolist()
 
 
 def cache_rag_results(video_id: str, query: str, results: List[Dict], ttl: int = 1800):
@@ -233,19 +1139,44 @@ def cache_rag_results(video_id: str, query: str, results: List[Dict], ttl: int =
         results: Retrieved chunks
         ttl: Time to live (default 30 minutes)
     """
-    key = generate_cache_key("rag", video_id, query)
+    key = rag_results_key(video_id, query)
     cache_set(key, results, ttl)
 
 
 def get_cached_rag_results(video_id: str, query: str) -> Optional[List[Dict]]:
     """Get cached RAG results"""
-    key = generate_cache_key("rag", video_id, query)
+    key = rag_results_key(video_id, query)
     return cache_get(key)
 
 
-def invalidate_video_cache(video_id: str):
-    """Invalidate all cache entries for a video"""
-    pattern = f"rag:{video_id}:*"
-    deleted = cache_invalidate_pattern(pattern)
-    logger.info(f"Invalidated {deleted} cache entries for video {video_id}")
-    return deleted
+async def async_prefetch_query_cache(
+    query: str, video_id: Optional[str] = None, rag_queries: Optional[List[str]] = None
+) -> int:
+    """
+    Warm L1 with a query's cached embedding (and RAG results for video_id)
+    from an async route, before the sync retrieval code reads them.
+
+    Args:
+        query: Query text
+        video_id: Video whose RAG results to prefetch
+        rag_queries: RAG cache query strings (defaults to [query])
+    """
+    keys = [query_embedding_key(query)]
+    if video_id:
+        version = await async_namespace_version("video", video_id)
+        keys += [rag_results_key(video_id, q, version) for q in rag_queries or [query]]
+    return await async_cache_prefetch(keys)
+
+
+def invalidate_video_cache(video_id: str) -> int:
+    """Invalidate all cache entries for a video (e.g. after re-chunking)"""
+    version = bump_namespace("video", video_id)
+    logger.info(f"Invalidated cache for video {video_id} (now v{version})")
+    return version
+
+
+def invalidate_material_cache(material_id: str) -> int:
+    """Invalidate all cache entries for a course material"""
+    version = bump_namespace("material", material_id)
+    logger.info(f"Invalidated cache for material {material_id} (now v{version})")
+    return version
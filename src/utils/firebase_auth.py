@@ -1,7 +1,7 @@
 import os
 from typing import Any, Dict, Optional
 
-from fastapi import Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 
 try:
     import firebase_admin
@@ -11,6 +11,14 @@ except Exception:  # pragma: no cover
     fb_auth = None
     credentials = None
 
+# Comma-separated Firebase uids or emails allowed on operational endpoints,
+# besides users carrying the "admin" custom claim
+ADMIN_USERS = {
+    user.strip().lower()
+    for user in os.getenv("ADMIN_USERS", "").split(",")
+    if user.strip()
+}
+
 
 def ensure_firebase_initialized() -> None:
     if firebase_admin is None or credentials is None:
@@ -45,3 +53,21 @@ async def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+
+
+def is_admin(user: Dict[str, Any]) -> bool:
+    if user.get("admin") is True:
+        return True
+    return any(
+        str(user.get(field) or "").lower() in ADMIN_USERS for field in ("uid", "email")
+    )
+
+
+async def get_admin_user(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+) -> Dict[str, Any]:
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
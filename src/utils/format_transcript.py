@@ -1,18 +1,39 @@
 import json
 import os
 import re
-from openai import OpenAI, AsyncOpenAI
+from functools import lru_cache
 from typing import List, Dict
 import sys
 import asyncio
+import threading
 
 from controllers.db_helpers import update_formatting_status
 from utils.db import SessionLocal
 from controllers.config import logger
 
-# Initialize OpenAI clients (reads OPENAI_API_KEY from environment)
-client = OpenAI()
-async_client = AsyncOpenAI()
+
+@lru_cache(maxsize=1)
+def _async_client():
+    """Shared AsyncOpenAI client, created on first use (reads OPENAI_API_KEY)."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI()
+
+
+@lru_cache(maxsize=1)
+def _formatting_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop all formatting runs on, in a daemon thread started on first use.
+
+    Job worker threads used to call asyncio.run(), which built and tore down
+    a loop per transcript; the shared AsyncOpenAI client's connection pool
+    is bound to the loop it was first used on, so it has to stay on one.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(
+        target=loop.run_forever, name="transcript-formatting", daemon=True
+    ).start()
+    return loop
 
 
 def load_transcript(file_path: str) -> Dict:
@@ -88,7 +109,7 @@ async def format_chunk_async(
     """Format a single chunk using OpenAI API asynchronously"""
     async with semaphore:  # Limit concurrent requests
         try:
-            response = await async_client.chat.completions.create(
+            response = await _async_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -119,6 +140,28 @@ async def format_chunk_async(
             return (chunk_index, chunk)  # Use original if formatting fails
 
 
+def _save_formatting_progress(video_id: str, completed: int, total_chunks: int):
+    """Store formatting progress (blocking; run off the formatting loop)."""
+    db = SessionLocal()
+    try:
+        current_progress = int((completed / total_chunks) * 100) if total_chunks else 0
+        update_formatting_status(
+            db,
+            video_id,
+            {
+                "status": "formatting",
+                "message": f"AI formatting in progress... {completed}/{total_chunks} chunks ({current_progress}%)",
+                "formatted_transcript": None,
+                "error": None,
+                "progress": current_progress,
+                "total_chunks": total_chunks,
+                "current_chunk": completed,
+            },
+        )
+    finally:
+        db.close()
+
+
 async def format_with_openai_async(
     text_chunks: List[str], video_id: str = None, max_concurrent: int = 15
 ) -> List[str]:
@@ -132,23 +175,9 @@ async def format_with_openai_async(
     if video_id:
         try:
             sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-            db = SessionLocal()
-            try:
-                update_formatting_status(
-                    db,
-                    video_id,
-                    {
-                        "status": "formatting",
-                        "message": f"AI formatting in progress... 0/{total_chunks} chunks (0%)",
-                        "formatted_transcript": None,
-                        "error": None,
-                        "progress": 0,
-                        "total_chunks": total_chunks,
-                        "current_chunk": 0,
-                    },
-                )
-            finally:
-                db.close()
+            await asyncio.to_thread(
+                _save_formatting_progress, video_id, 0, total_chunks
+            )
         except ImportError:
             pass
 
@@ -172,24 +201,9 @@ async def format_with_openai_async(
         # Update progress every 5 chunks or on last chunk
         if video_id and (completed % 5 == 0 or completed == total_chunks):
             try:
-                db = SessionLocal()
-                try:
-                    current_progress = int((completed / total_chunks) * 100)
-                    update_formatting_status(
-                        db,
-                        video_id,
-                        {
-                            "status": "formatting",
-                            "message": f"AI formatting in progress... {completed}/{total_chunks} chunks ({current_progress}%)",
-                            "formatted_transcript": None,
-                            "error": None,
-                            "progress": current_progress,
-                            "total_chunks": total_chunks,
-                            "current_chunk": completed,
-                        },
-                    )
-                finally:
-                    db.close()
+                await asyncio.to_thread(
+                    _save_formatting_progress, video_id, completed, total_chunks
+                )
             except:
                 pass
 
@@ -202,8 +216,15 @@ async def format_with_openai_async(
 
 
 def format_with_openai(text_chunks: List[str], video_id: str = None) -> List[str]:
-    """Synchronous wrapper for async formatting function"""
-    return asyncio.run(format_with_openai_async(text_chunks, video_id))
+    """
+    Synchronous wrapper for async formatting function, for job worker threads.
+
+    Runs on the shared formatting loop, so concurrent format jobs share one
+    loop and one OpenAI connection pool instead of starting their own.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        format_with_openai_async(text_chunks, video_id), _formatting_loop()
+    ).result()
 
 
 def convert_plain_text_to_transcript_data(
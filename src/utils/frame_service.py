@@ -0,0 +1,152 @@
+"""
+Single-frame extraction for image queries on uploaded videos.
+
+ffmpeg seeks on the input (-ss before -i), so for a presigned S3 URL it
+reads the container index and then only the byte ranges around the nearest
+keyframe before the timestamp, via HTTP range requests, instead of
+downloading the whole recording. Local paths go through the same command.
+
+Extracted frames are JPEG bytes cached per process by (video_id, timestamp
+rounded to FRAME_TIMESTAMP_RESOLUTION seconds), so repeated questions about
+the same moment don't touch the video again. Videos uploaded with a
+keyframe index (utils/keyframe_index.py) are served from its sprite sheets,
+without running ffmpeg at all, when a tile was captured at most one index
+interval before the timestamp; a deduplicated tile standing in for a
+longer stretch could miss what changed on screen since.
+"""
+
+import os
+import subprocess
+from typing import Optional
+
+from controllers.config import logger
+from utils.cache import get_local_cache
+from utils.keyframe_index import indexed_frame_jpeg
+
+# Timestamps are rounded to this many seconds, both for the cache key and
+# for the seek, so nearby questions share one frame
+FRAME_TIMESTAMP_RESOLUTION = float(os.getenv("FRAME_TIMESTAMP_RESOLUTION", "1.0"))
+FRAME_EXTRACT_TIMEOUT_SECONDS = int(os.getenv("FRAME_EXTRACT_TIMEOUT_SECONDS", "60"))
+FRAME_JPEG_QUALITY = 2  # ffmpeg -q:v, 2 (best) .. 31
+FRAME_CACHE_TTL_SECONDS = 30 * 60
+# Answer image questions from the keyframe index's downscaled frames when
+# one was captured within an index interval of the question's timestamp
+FRAME_FROM_KEYFRAME_INDEX = (
+    os.getenv("FRAME_FROM_KEYFRAME_INDEX", "true").lower() == "true"
+)
+
+# (video_id, rounded timestamp) -> JPEG bytes; sliding TTL, byte-bounded LRU
+FRAME_CACHE = get_local_cache(
+    "video_frames",
+    max_entries=int(os.getenv("FRAME_CACHE_MAX_ENTRIES", "512")),
+    max_bytes=int(os.getenv("FRAME_CACHE_MAX_MB", "128")) * 1024 * 1024,
+    ttl=FRAME_CACHE_TTL_SECONDS,
+    sliding=True,
+    sizeof=len,
+)
+
+
+def round_timestamp(timestamp: float) -> float:
+    """Timestamp snapped to FRAME_TIMESTAMP_RESOLUTION (never negative)."""
+    steps = round(max(0.0, float(timestamp)) / FRAME_TIMESTAMP_RESOLUTION)
+    return round(steps * FRAME_TIMESTAMP_RESOLUTION, 3)
+
+
+def frame_cache_key(video_id: str, timestamp: float) -> str:
+    return f"{video_id}:{round_timestamp(timestamp):.3f}"
+
+
+def ffmpeg_frame_command(source: str, timestamp: float) -> list:
+    """ffmpeg command writing the frame at timestamp to stdout as a JPEG."""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", f"{timestamp:.3f}"]
+    if source.startswith(("http://", "https://")):
+        # Keep one connection for the index and keyframe range requests
+        cmd += ["-multiple_requests", "1"]
+    cmd += [
+        "-i",
+        source,
+        "-frames:v",
+        "1",
+        "-an",
+        "-f",
+        "image2pipe",
+        "-vcodec",
+        "mjpeg",
+        "-q:v",
+        str(FRAME_JPEG_QUALITY),
+        "pipe:1",
+    ]
+    return cmd
+
+
+def read_frame(source: str, timestamp: float) -> bytes:
+    """
+    JPEG bytes of the frame at timestamp in source (URL or local path).
+
+    Raises:
+        RuntimeError: ffmpeg failed or produced no frame (e.g. the timestamp
+            is past the end of the video)
+        subprocess.TimeoutExpired: extraction took longer than
+            FRAME_EXTRACT_TIMEOUT_SECONDS
+    """
+    result = subprocess.run(
+        ffmpeg_frame_command(source, timestamp),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=FRAME_EXTRACT_TIMEOUT_SECONDS,
+    )
+    if result.returncode != 0 or not result.stdout:
+        error = result.stderr.decode("utf-8", errors="replace").strip()[-500:]
+        raise RuntimeError(
+            f"No frame at {timestamp:.3f}s (ffmpeg exit {result.returncode}): {error}"
+        )
+    return result.stdout
+
+
+def extract_frame(
+    source: str,
+    timestamp: float,
+    output_file: str,
+    video_id: Optional[str] = None,
+    keyframe_index_key: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Save the frame at timestamp to output_file as a JPEG.
+
+    Args:
+        source: Presigned video URL or local video path
+        timestamp: Time in seconds (rounded to FRAME_TIMESTAMP_RESOLUTION)
+        output_file: Path to write the frame to
+        video_id: Enables the frame cache when given
+        keyframe_index_key: The video's keyframe index, tried before ffmpeg
+
+    Returns:
+        output_file, or None if the frame couldn't be extracted
+    """
+    timestamp = round_timestamp(timestamp)
+    key = frame_cache_key(video_id, timestamp) if video_id else None
+    jpeg = FRAME_CACHE.get(key) if key else None
+    if jpeg is not None:
+        logger.info(f"Using cached frame {key}")
+
+    if jpeg is None and keyframe_index_key and FRAME_FROM_KEYFRAME_INDEX:
+        try:
+            jpeg = indexed_frame_jpeg(keyframe_index_key, timestamp, sampled_only=True)
+        except Exception as e:
+            logger.warning(f"Keyframe index lookup failed, using ffmpeg: {e}")
+        if jpeg is not None and key:
+            FRAME_CACHE.set(key, jpeg)
+
+    if jpeg is None:
+        try:
+            jpeg = read_frame(source, timestamp)
+        except Exception as e:
+            logger.error(f"Error extracting frame at {timestamp}s: {e}")
+            return None
+        if key:
+            FRAME_CACHE.set(key, jpeg)
+
+    with open(output_file, "wb") as f:
+        f.write(jpeg)
+    logger.info(f"Frame saved to: {output_file}")
+    return output_file
@@ -12,9 +12,19 @@ from datetime import datetime, timezone
 from openai import OpenAI
 from pylatexenc.latex2text import LatexNodes2Text
 
+from controllers.config import logger
 from controllers.storage import s3_presign_url
 from utils.ai_detection_service import get_ai_detection_service
 from utils.bedrock_client import get_bedrock_client, resolve_model_id
+from utils.prompt_cache import (
+    GRADING_PROMPT_CACHE,
+    add_usage,
+    gemini_cached_content,
+    memoized_prefix,
+    prefix_key,
+    response_usage,
+)
+from utils.rate_limiter import get_provider_rate_limiter
 
 # Safely import Pydantic to enable Strict Structured Outputs for Gemini
 try:
@@ -61,6 +71,8 @@ class LLMGrader:
         self.model = model
         self.provider = self._detect_provider(model)
         self._resolved_model = model
+        # Token usage of this grader's LLM calls (see utils.prompt_cache)
+        self.usage: Dict[str, int] = {}
 
         if self.provider == "openai":
             self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
@@ -89,6 +101,9 @@ class LLMGrader:
             user_content: List of content parts in OpenAI message format
                           (``{"type": "text", "text": ...}`` or
                            ``{"type": "image_url", "image_url": {"url": ...}}``).
+                          A leading text part with a ``cache_key`` is the stable
+                          assignment prefix and is sent through the provider's
+                          prompt cache.
             temperature: Sampling temperature (ignored for reasoning models).
             max_tokens: Maximum tokens in the response.
             response_schema: Optional schema definition (Pydantic model) for Structured Outputs.
@@ -98,8 +113,29 @@ class LLMGrader:
         """
         import requests as _requests
 
+        # Shared per-provider quota, so a large grading batch queues here
+        # instead of tripping the provider's rate limits
+        estimated_tokens = (
+            len(system_content)
+            + sum(len(part.get("text", "")) for part in user_content)
+        ) // 4
+        get_provider_rate_limiter(self.provider).acquire(estimated_tokens)
+
+        cache_part = next((p for p in user_content if p.get("cache_key")), None)
+
         if self.provider == "openai":
             system_msg = {"role": "system", "content": system_content}
+            # Prefix caching is automatic; the key keeps a batch's calls on
+            # the same cache
+            cache_kwargs = (
+                {"prompt_cache_key": f"grading-{cache_part['cache_key'][:32]}"}
+                if cache_part
+                else {}
+            )
+            user_content = [
+                {k: v for k, v in part.items() if k != "cache_key"}
+                for part in user_content
+            ]
             # Reasoning models (gpt-5, o-series) use reasoning_effort instead of temperature
             if self.model.startswith("gpt-5") or self.model.startswith(
                 ("o1", "o3", "o4")
@@ -108,6 +144,7 @@ class LLMGrader:
                     model=self.model,
                     messages=[system_msg, {"role": "user", "content": user_content}],
                     reasoning_effort="high",
+                    **cache_kwargs,
                 )
             else:
                 response = self.client.chat.completions.create(
@@ -115,14 +152,20 @@ class LLMGrader:
                     messages=[system_msg, {"role": "user", "content": user_content}],
                     temperature=temperature,
                     max_tokens=16384,  # Use max tokens for OpenAI to allow for long responses
+                    **cache_kwargs,
                 )
+            self._record_usage(response)
             return (response.choices[0].message.content or "").strip()
 
         elif self.provider == "anthropic":
             anthropic_content: List[Dict[str, Any]] = []
             for part in user_content:
                 if part.get("type") == "text":
-                    anthropic_content.append({"type": "text", "text": part["text"]})
+                    block = {"type": "text", "text": part["text"]}
+                    if part.get("cache_key"):
+                        # Caches system prompt + prefix up to this block
+                        block["cache_control"] = {"type": "ephemeral"}
+                    anthropic_content.append(block)
                 elif part.get("type") == "pdf_document":
                     # Native Anthropic PDF support — send raw PDF as a document block
                     anthropic_content.append(
@@ -177,13 +220,40 @@ class LLMGrader:
                 system=system_content,
                 messages=[{"role": "user", "content": anthropic_content}],
             )
+            self._record_usage(response)
             return (response.content[0].text or "").strip()
 
         elif self.provider == "gemini":
             from google.genai import types as _genai_types
 
+            cached_content = None
+            if cache_part:
+                # The cache holds the system instruction and the prefix
+                def _create_cache(ttl_seconds: int) -> str:
+                    return self.client.caches.create(
+                        model=self.model,
+                        config=_genai_types.CreateCachedContentConfig(
+                            system_instruction=system_content,
+                            contents=[
+                                _genai_types.Content(
+                                    role="user",
+                                    parts=[_genai_types.Part(text=cache_part["text"])],
+                                )
+                            ],
+                            ttl=f"{ttl_seconds}s",
+                        ),
+                    ).name
+
+                cached_content = gemini_cached_content(
+                    prefix_key(self.model, system_content, cache_part["cache_key"]),
+                    len(cache_part["text"]) // 4,
+                    _create_cache,
+                )
+
             parts: List[Any] = []
             for part in user_content:
+                if cached_content and part is cache_part:
+                    continue
                 if part.get("type") == "text":
                     parts.append(_genai_types.Part(text=part["text"]))
                 elif part.get("type") == "image_url":
@@ -211,11 +281,14 @@ class LLMGrader:
 
             # Dynamically build config to support optional schema enforcement
             config_kwargs = {
-                "system_instruction": system_content,
                 "response_mime_type": "application/json",
                 "temperature": temperature,
                 "max_output_tokens": max_tokens,
             }
+            if cached_content:
+                config_kwargs["cached_content"] = cached_content
+            else:
+                config_kwargs["system_instruction"] = system_content
             if response_schema is not None:
                 config_kwargs["response_schema"] = response_schema
 
@@ -224,11 +297,21 @@ class LLMGrader:
                 config=_genai_types.GenerateContentConfig(**config_kwargs),
                 contents=[_genai_types.Content(role="user", parts=parts)],
             )
+            self._record_usage(response)
             return (response.text or "").strip()
 
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
+    def _record_usage(self, response: Any) -> None:
+        """Add a response's token usage to self.usage and log its cache hits."""
+        usage = response_usage(self.provider, response)
+        add_usage(self.usage, usage)
+        logger.debug(
+            f"Prompt cache ({self.provider}): {usage['cached_input_tokens']}/"
+            f"{usage['input_tokens']} input tokens cached"
+        )
+
     def grade_submission(
         self,
         assignment: Dict[str, Any],
@@ -271,6 +354,14 @@ class LLMGrader:
         flattened_answers = self._flatten_answers(submission_answers)
         print("flattened_answers", json.dumps(flattened_answers, indent=2))
 
+        # Score every answer with the detection model in one batch
+        ai_detector.prefetch_model_scores(
+            [
+                self._extract_answer_text(flattened_answers.get(str(q.get("id"))))
+                for q in flattened_questions
+            ]
+        )
+
         # Partition questions: deterministic (MCQ/TF) vs LLM-required
         deterministic_questions: List[Dict[str, Any]] = []
         llm_questions: List[Dict[str, Any]] = []
@@ -324,9 +415,13 @@ class LLMGrader:
 
         print("feedback_by_question before LLM", feedback_by_question)
 
-        # If there are LLM-required questions, build prompt only for them
+        # If there are LLM-required questions, build prompt only for them:
+        # the assignment prefix (shared by every submission) then the answers
         if llm_questions:
-            prompt_text, diagram_s3_keys = self._build_bulk_prompt(
+            cache_key, prefix_text = self._assignment_prompt_prefix(
+                llm_questions, "answers"
+            )
+            prompt_text, diagram_s3_keys = self._build_answers_prompt(
                 llm_questions, flattened_answers
             )
 
@@ -342,8 +437,10 @@ class LLMGrader:
                 ),
             }
 
-            user_content: List[Dict[str, Any]] = []
-            user_content.append({"type": "text", "text": prompt_text})
+            user_content: List[Dict[str, Any]] = [
+                self._prefix_part(cache_key, prefix_text),
+                {"type": "text", "text": prompt_text},
+            ]
 
             # Add all diagram images
             for s3_key in diagram_s3_keys:
@@ -470,75 +567,12 @@ class LLMGrader:
 
         # -------------------------------------------------------------------
         # 2. Build the rubric prompt (no student answers — visible in PDF images)
+        #    It is identical for every submission, so it's built once and sent
+        #    first where the provider's prompt cache can reuse it
         # -------------------------------------------------------------------
-        if self.provider == "gemini":
-            prompt_parts = [
-                "You are an expert academic grader.\n"
-                "The student's answer sheet is attached below as one image per page.\n"
-                "Grade EVERY question listed below by locating the student's written answer "
-                "in the images. FIRST write out your step-by-step reasoning, THEN score.\n\n"
-                "Return ONLY a JSON object with this exact structure:\n"
-                "{\n"
-                '  "grades": [\n'
-                "    {\n"
-                '      "question_id": "<id>",\n'
-                '      "reasoning": "<step-by-step logic against rubric>",\n'
-                '      "score": <float in [0, max_points]>,\n'
-                '      "strengths": "<brief strengths>",\n'
-                '      "areas_for_improvement": "<areas to improve>",\n'
-                '      "breakdown": "<detailed analysis>"\n'
-                "    }\n"
-                "  ],\n"
-                '  "overall_feedback": "<overall assessment>"\n'
-                "}\n\n"
-                "Grade strictly according to the rubric and max points for each question.\n"
-                "If a question is not answered in the PDF, assign 0 points.\n\n"
-                "--- QUESTIONS, REFERENCE ANSWERS & RUBRICS ---\n",
-            ]
-        else:
-            prompt_parts = [
-                "You are an expert academic grader.\n"
-                "The student's answer sheet is attached below as one image per page.\n"
-                "Grade EVERY question listed below by locating the student's written answer "
-                "in the images.\n\n"
-                "Return ONLY a JSON object with this exact structure:\n"
-                "{\n"
-                '  "question_<id>": {\n'
-                '    "score": <float in [0, max_points]>,\n'
-                '    "strengths": "<brief strengths>",\n'
-                '    "areas_for_improvement": "<areas to improve>",\n'
-                '    "breakdown": "<detailed analysis>"\n'
-                "  },\n"
-                '  "overall_feedback": "<overall assessment>"\n'
-                "}\n\n"
-                "Grade strictly according to the rubric and max points for each question.\n"
-                "If a question is not answered in the PDF, assign 0 points.\n\n"
-                "--- QUESTIONS, REFERENCE ANSWERS & RUBRICS ---\n",
-            ]
-
-        for q in flattened_questions:
-            q_id = str(q.get("id"))
-            q_type = q.get("type", "text")
-            equations = q.get("equations", [])
-            question_text = self._sanitize_text_for_prompt(
-                q.get("question", ""), equations
-            )
-            rubric = self._sanitize_text_for_prompt(q.get("rubric", ""), equations)
-            correct_answer = self._sanitize_text_for_prompt(
-                q.get("correctAnswer", q.get("correct_answer", "")), equations
-            )
-            max_pts = float(q.get("points", 0) or 0)
-
-            prompt_parts.append(f"QUESTION {q_id} ({q_type}):")
-            prompt_parts.append(question_text)
-            if correct_answer:
-                prompt_parts.append(f"REFERENCE ANSWER:\n{correct_answer}")
-            if rubric:
-                prompt_parts.append(f"RUBRIC:\n{rubric}")
-            prompt_parts.append(f"MAX POINTS: {max_pts}")
-            prompt_parts.append("")  # blank line between questions
-
-        prompt_text = "\n".join(prompt_parts)
+        cache_key, prompt_text = self._assignment_prompt_prefix(
+            flattened_questions, "pdf"
+        )
         print("[grade_pdf_direct] prompt_text", prompt_text)
 
         # -------------------------------------------------------------------
@@ -555,7 +589,6 @@ class LLMGrader:
             print(
                 f"[grade_pdf_direct] using Anthropic native PDF support ({len(pdf_bytes)} bytes)"
             )
-            # Anthropic recommends placing the document BEFORE the text prompt
             page_parts: List[Dict[str, Any]] = [
                 {"type": "pdf_document", "base64": b64_pdf}
             ]
@@ -598,13 +631,11 @@ class LLMGrader:
             ),
         }
 
-        # For Anthropic the document block must come before the text prompt
-        if self.provider == "anthropic":
-            user_content: List[Dict[str, Any]] = page_parts + [
-                {"type": "text", "text": prompt_text}
-            ]
-        else:
-            user_content = [{"type": "text", "text": prompt_text}] + page_parts
+        # The rubric prefix goes first for every provider (Anthropic suggests
+        # documents before text, but only a leading prefix can be cached)
+        user_content: List[Dict[str, Any]] = [
+            self._prefix_part(cache_key, prompt_text)
+        ] + page_parts
 
         print(
             f"[grade_pdf_direct] making LLM call ({self.provider}, {len(page_parts)} content part(s))"
@@ -1074,24 +1105,68 @@ class LLMGrader:
 
         return answered_map
 
-    def _build_bulk_prompt(
-        self,
-        flattened_questions: List[Dict[str, Any]],
-        flattened_answers: Dict[str, Any],
-    ) -> Tuple[str, List[str]]:
-        """Build a comprehensive prompt with all questions and answers in interleaved format.
+    def _prefix_part(self, cache_key: str, prefix_text: str) -> Dict[str, Any]:
+        """Content part for the assignment prefix, marked for prompt caching."""
+        part: Dict[str, Any] = {"type": "text", "text": prefix_text}
+        if GRADING_PROMPT_CACHE:
+            part["cache_key"] = cache_key
+        return part
+
+    def _assignment_prompt_prefix(
+        self, flattened_questions: List[Dict[str, Any]], mode: str
+    ) -> Tuple[str, str]:
+        """Grading instructions plus every question, reference answer, rubric and max points.
+
+        This part of the prompt is the same for every submission of an assignment
+        (and the same set of optional parts), so it is built once per process
+        and memoized by content.
+
+        Args:
+            flattened_questions: Questions to grade
+            mode: "answers" (student answers follow as text) or "pdf" (answer
+                sheet pages follow as images / a document)
 
         Returns:
-            Tuple of (prompt_text, list_of_diagram_s3_keys)
+            Tuple of (cache_key, prefix_text)
         """
-        prompt_parts = []
-        diagram_s3_keys = []
-        diagram_index = 0
+        key = prefix_key(self.provider, mode, flattened_questions)
+        prefix_text = memoized_prefix(
+            key, lambda: self._build_prompt_prefix(flattened_questions, mode)
+        )
+        return key, prefix_text
+
+    def _build_prompt_prefix(
+        self, flattened_questions: List[Dict[str, Any]], mode: str
+    ) -> str:
+        """Build the assignment prefix (see _assignment_prompt_prefix)."""
+        if mode == "pdf":
+            intro = (
+                "You are an expert academic grader.\n"
+                "The student's answer sheet is attached after the questions, as "
+                "one image per page.\n"
+                "Grade EVERY question listed below by locating the student's written answer "
+                "in the images."
+            )
+            closing = (
+                "Grade strictly according to the rubric and max points for each question.\n"
+                "If a question is not answered in the PDF, assign 0 points.\n\n"
+                "--- QUESTIONS, REFERENCE ANSWERS & RUBRICS ---\n"
+            )
+        else:
+            intro = (
+                "You are an expert academic grader. Grade this student's submission for "
+                "all questions."
+            )
+            closing = (
+                "GRADING CRITERIA:\n"
+                "- Grade strictly according to the provided rubric and max points.\n\n"
+                "Questions, reference answers, rubrics and max points follow. The "
+                "student's answers are given after the last question:\n"
+            )
 
         # Branching to safely accommodate Gemini's structured response expectation
         if self.provider == "gemini":
-            prompt_parts.append(
-                "You are an expert academic grader. Grade this student's submission for all questions. "
+            response_format = (
                 "For each question, FIRST write out your step-by-step reasoning against the rubric, "
                 "THEN provide a score, strengths, areas for improvement, and detailed breakdown. "
                 "Return your response as JSON with the following structure:\n"
@@ -1108,13 +1183,9 @@ class LLMGrader:
                 "  ],\n"
                 '  "overall_feedback": "<overall assessment>"\n'
                 "}\n\n"
-                "GRADING CRITERIA:\n"
-                "- Grade strictly according to the provided rubric and max points.\n\n"
-                "Questions, reference answers, rubrics, max points, and student answers follow:\n"
             )
         else:
-            prompt_parts.append(
-                "You are an expert academic grader. Grade this student's submission for all questions. "
+            response_format = (
                 "For each question, provide a score, strengths, areas for improvement, and detailed breakdown. "
                 "Return your response as JSON with the following structure:\n"
                 "{\n"
@@ -1126,11 +1197,10 @@ class LLMGrader:
                 "  },\n"
                 '  "overall_feedback": "<overall assessment>"\n'
                 "}\n\n"
-                "GRADING CRITERIA:\n"
-                "- Grade strictly according to the provided rubric and max points.\n\n"
-                "Questions, reference answers, rubrics, max points, and student answers follow:\n"
             )
 
+        prompt_parts = [f"{intro} {response_format}{closing}"]
+
         for question in flattened_questions:
             q_id = str(question.get("id"))
             q_type = question.get("type", "text")
@@ -1147,7 +1217,6 @@ class LLMGrader:
             )
             max_points = float(question.get("points", 0) or 0)
 
-            # Add question details
             prompt_parts.append(f"QUESTION {q_id} ({q_type}):")
             prompt_parts.append(f"{question_text}")
 
@@ -1158,8 +1227,28 @@ class LLMGrader:
                 prompt_parts.append(f"RUBRIC:\n{rubric}")
 
             prompt_parts.append(f"MAX POINTS: {max_points}")
+            prompt_parts.append("")  # Empty line between questions
+
+        return "\n".join(prompt_parts)
+
+    def _build_answers_prompt(
+        self,
+        flattened_questions: List[Dict[str, Any]],
+        flattened_answers: Dict[str, Any],
+    ) -> Tuple[str, List[str]]:
+        """Build the per-submission part of the prompt: the student's answer to each question.
+
+        Returns:
+            Tuple of (prompt_text, list_of_diagram_s3_keys)
+        """
+        prompt_parts = ["--- STUDENT ANSWERS ---"]
+        diagram_s3_keys = []
+        diagram_index = 0
+
+        for question in flattened_questions:
+            q_id = str(question.get("id"))
+            prompt_parts.append(f"QUESTION {q_id}:")
 
-            # Add student answer
             answer_obj = flattened_answers.get(q_id)
             if answer_obj is not None:
                 if isinstance(answer_obj, str):
@@ -0,0 +1,362 @@
+"""
+Keyframe index of uploaded videos, built once at upload time.
+
+One ffmpeg pass decodes only the video's keyframes (-skip_frame nokey),
+keeps one every KEYFRAME_INTERVAL_SECONDS plus any scene change, and writes
+them downscaled to KEYFRAME_WIDTH. Consecutive frames whose perceptual hash
+(dHash) is within KEYFRAME_DEDUP_DISTANCE bits of the last kept frame are
+dropped, so a static slide becomes one frame covering its whole time range.
+The kept frames are packed into JPEG sprite sheets and described by a JSON
+index, both stored in S3 under keyframes/<user_id>/<video_id>/:
+
+    {
+        "version": 1,
+        "interval": 10.0,
+        "tile_width": 480, "tile_height": 270, "columns": 5,
+        "sheets": ["keyframes/.../sprite_000.jpg", ...],
+        "frames": [{"t": 0.0, "until": 40.0, "sheet": 0, "x": 0, "y": 0}, ...]
+    }
+
+A frame stands for the video from "t" until its last near-duplicate sample
+("until") plus one interval. Image questions (utils/frame_service.py) are
+answered from the index when a frame was captured within one interval
+before the timestamp, and the frontend scrubs with the sheets
+(GET /api/user-videos/keyframes).
+"""
+
+import bisect
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from controllers.config import AWS_S3_BUCKET, logger, s3_client
+from controllers.storage import s3_upload_file
+from utils.cache import get_local_cache
+
+KEYFRAME_INDEX_ENABLED = os.getenv("KEYFRAME_INDEX_ENABLED", "true").lower() == "true"
+KEYFRAME_INTERVAL_SECONDS = float(os.getenv("KEYFRAME_INTERVAL_SECONDS", "10"))
+# ffmpeg scene score (0-1) that also selects a frame; 0 disables
+KEYFRAME_SCENE_THRESHOLD = float(os.getenv("KEYFRAME_SCENE_THRESHOLD", "0.3"))
+KEYFRAME_WIDTH = int(os.getenv("KEYFRAME_WIDTH", "480"))
+# Max differing dHash bits (of 64) for a frame to count as a duplicate
+KEYFRAME_DEDUP_DISTANCE = int(os.getenv("KEYFRAME_DEDUP_DISTANCE", "4"))
+SPRITE_COLUMNS = 5
+SPRITE_TILES_PER_SHEET = 25
+SPRITE_JPEG_QUALITY = 80
+KEYFRAME_INDEX_VERSION = 1
+
+_SHOWINFO_TIME = re.compile(r"\bpts_time:\s*(-?[\d.]+)")
+
+# Index JSON and sprite sheet bytes, keyed by S3 key
+_index_cache = get_local_cache("keyframe_indexes", max_entries=256)
+_sheet_cache = get_local_cache(
+    "keyframe_sheets",
+    max_entries=64,
+    max_bytes=int(os.getenv("KEYFRAME_SHEET_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    sizeof=len,
+)
+
+
+def select_filter(
+    interval: float = KEYFRAME_INTERVAL_SECONDS,
+    scene_threshold: float = KEYFRAME_SCENE_THRESHOLD,
+    width: int = KEYFRAME_WIDTH,
+) -> str:
+    """ffmpeg -vf graph: select frames, downscale, log their timestamps."""
+    select = f"isnan(prev_selected_t)+gte(t-prev_selected_t,{interval})"
+    if scene_threshold > 0:
+        select += f"+gt(scene,{scene_threshold})"
+    return f"select='{select}',scale={width}:-2,showinfo"
+
+
+def keyframe_command(input_path: str, output_dir: str) -> List[str]:
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-skip_frame",
+        "nokey",
+        "-i",
+        input_path,
+        "-an",
+        "-vf",
+        select_filter(),
+        "-vsync",
+        "vfr",
+        "-q:v",
+        "3",
+        os.path.join(output_dir, "frame_%06d.jpg"),
+    ]
+
+
+def parse_showinfo_times(stderr: str) -> List[float]:
+    """Timestamps of the frames ffmpeg's showinfo filter logged, in order."""
+    return [
+        float(match.group(1))
+        for line in stderr.splitlines()
+        if "showinfo" in line and (match := _SHOWINFO_TIME.search(line))
+    ]
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale."""
+    pixels = image.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _open_frame(frame: Union[str, Image.Image]) -> Image.Image:
+    """Frames are file paths (opened one at a time) or in-memory images."""
+    if isinstance(frame, Image.Image):
+        return frame
+    with Image.open(frame) as image:
+        return image.convert("RGB")
+
+
+def dedup_frames(
+    frames: List[Tuple[float, Union[str, Image.Image]]],
+    max_distance: int = KEYFRAME_DEDUP_DISTANCE,
+) -> List[Dict[str, Any]]:
+    """
+    Drop frames that look like the last kept one.
+
+    Returns:
+        [{"t", "until", "image"}] where until is the time of the last
+        dropped duplicate (t if none) and image is the frame as given
+    """
+    kept: List[Dict[str, Any]] = []
+    last_hash = None
+    for t, frame in frames:
+        frame_hash = dhash(_open_frame(frame))
+        if last_hash is not None and hamming(frame_hash, last_hash) <= max_distance:
+            kept[-1]["until"] = t
+            continue
+        kept.append({"t": t, "until": t, "image": frame})
+        last_hash = frame_hash
+    return kept
+
+
+def pack_sprites(
+    kept: List[Dict[str, Any]], output_dir: str
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Pack kept frames into sprite sheets.
+
+    Returns:
+        (index without "interval", sheet file paths); "sheets" holds the
+        sheet file names until the caller replaces them with S3 keys
+    """
+    tile_width, tile_height = _open_frame(kept[0]["image"]).size
+    frames, sheet_paths = [], []
+    for start in range(0, len(kept), SPRITE_TILES_PER_SHEET):
+        batch = kept[start : start + SPRITE_TILES_PER_SHEET]
+        rows = -(-len(batch) // SPRITE_COLUMNS)
+        sheet = Image.new(
+            "RGB", (SPRITE_COLUMNS * tile_width, rows * tile_height), "black"
+        )
+        sheet_number = len(sheet_paths)
+        for position, frame in enumerate(batch):
+            x = (position % SPRITE_COLUMNS) * tile_width
+            y = (position // SPRITE_COLUMNS) * tile_height
+            tile = _open_frame(frame["image"]).resize((tile_width, tile_height))
+            sheet.paste(tile, (x, y))
+            frames.append(
+                {
+                    "t": round(frame["t"], 3),
+                    "until": round(frame["until"], 3),
+                    "sheet": sheet_number,
+                    "x": x,
+                    "y": y,
+                }
+            )
+        path = os.path.join(output_dir, f"sprite_{sheet_number:03d}.jpg")
+        sheet.save(path, "JPEG", quality=SPRITE_JPEG_QUALITY)
+        sheet_paths.append(path)
+
+    index = {
+        "version": KEYFRAME_INDEX_VERSION,
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "columns": SPRITE_COLUMNS,
+        "sheets": [os.path.basename(path) for path in sheet_paths],
+        "frames": frames,
+    }
+    return index, sheet_paths
+
+
+def build_keyframe_index(
+    input_path: str, work_dir: str
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Extract, dedup and pack the keyframes of a local video into work_dir.
+
+    Returns:
+        (index, sheet file paths), or (None, []) for a video without frames
+        or when ffmpeg's frames and logged timestamps don't line up
+    """
+    frames_dir = os.path.join(work_dir, "frames")
+    os.makedirs(frames_dir, exist_ok=True)
+    result = subprocess.run(
+        keyframe_command(input_path, frames_dir),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    times = parse_showinfo_times(result.stderr.decode("utf-8", errors="replace"))
+    files = sorted(os.listdir(frames_dir))
+    if len(files) != len(times):
+        # Pairing them up would put frames at the wrong times
+        logger.warning(
+            f"Keyframe index skipped: {len(files)} frames but {len(times)} timestamps"
+        )
+        return None, []
+
+    frames = [(t, os.path.join(frames_dir, name)) for name, t in zip(files, times)]
+    if not frames:
+        return None, []
+
+    kept = dedup_frames(frames)
+    index, sheet_paths = pack_sprites(kept, work_dir)
+    index["interval"] = KEYFRAME_INTERVAL_SECONDS
+    logger.info(
+        f"Keyframe index: {len(frames)} frames sampled, {len(kept)} kept "
+        f"in {len(sheet_paths)} sheet(s)"
+    )
+    return index, sheet_paths
+
+
+def create_keyframe_index(
+    input_path: str, s3_prefix: str
+) -> Tuple[Optional[str], List[str]]:
+    """
+    Build a video's keyframe index and upload its sheets and JSON to S3.
+
+    Args:
+        input_path: Local video file or presigned URL
+        s3_prefix: Key prefix, e.g. keyframes/<user_id>/<video_id>
+
+    Returns:
+        (index S3 key or None, every uploaded S3 key)
+    """
+    work_dir = tempfile.mkdtemp(prefix="vidyai_keyframes_")
+    uploaded: List[str] = []
+    try:
+        index, sheet_paths = build_keyframe_index(input_path, work_dir)
+        if index is None:
+            return None, uploaded
+
+        sheet_keys = []
+        for path in sheet_paths:
+            key = f"{s3_prefix}/{os.path.basename(path)}"
+            s3_upload_file(path, key, content_type="image/jpeg")
+            uploaded.append(key)
+            sheet_keys.append(key)
+        index["sheets"] = sheet_keys
+
+        index_path = os.path.join(work_dir, "index.json")
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        index_key = f"{s3_prefix}/index.json"
+        s3_upload_file(index_path, index_key, content_type="application/json")
+        uploaded.append(index_key)
+        return index_key, uploaded
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _s3_bytes(key: str) -> bytes:
+    return s3_client.get_object(Bucket=AWS_S3_BUCKET, Key=key)["Body"].read()
+
+
+def load_keyframe_index(index_key: str) -> Dict[str, Any]:
+    index = _index_cache.get(index_key)
+    if index is None:
+        index = json.loads(_s3_bytes(index_key))
+        _index_cache.set(index_key, index)
+    return index
+
+
+def frame_for_timestamp(
+    index: Dict[str, Any], timestamp: float, sampled_only: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    The indexed frame showing the video at timestamp, if one covers it.
+
+    With sampled_only, the frame must have been captured at most one
+    interval before timestamp, rather than stand in for it as a near
+    duplicate of later samples.
+    """
+    frames = index.get("frames") or []
+    position = bisect.bisect_right([frame["t"] for frame in frames], timestamp) - 1
+    if position < 0:
+        return None
+    frame = frames[position]
+    interval = index.get("interval", KEYFRAME_INTERVAL_SECONDS)
+    if timestamp > (frame["t"] if sampled_only else frame["until"]) + interval:
+        return None  # Past the sampled range (e.g. beyond the end)
+    return frame
+
+
+def indexed_frame_jpeg(
+    index_key: str, timestamp: float, sampled_only: bool = False
+) -> Optional[bytes]:
+    """
+    JPEG of the indexed frame covering timestamp, cropped from its sheet.
+
+    Returns:
+        JPEG bytes, or None when the index doesn't cover timestamp (see
+        frame_for_timestamp for sampled_only)
+    """
+    index = load_keyframe_index(index_key)
+    frame = frame_for_timestamp(index, timestamp, sampled_only)
+    if frame is None:
+        return None
+
+    sheet_key = index["sheets"][frame["sheet"]]
+    sheet_bytes = _sheet_cache.get(sheet_key)
+    if sheet_bytes is None:
+        sheet_bytes = _s3_bytes(sheet_key)
+        _sheet_cache.set(sheet_key, sheet_bytes)
+
+    box = (
+        frame["x"],
+        frame["y"],
+        frame["x"] + index["tile_width"],
+        frame["y"] + index["tile_height"],
+    )
+    with Image.open(io.BytesIO(sheet_bytes)) as sheet:
+        tile = sheet.crop(box)
+    output = io.BytesIO()
+    tile.save(output, "JPEG", quality=90)
+    return output.getvalue()
+
+
+def delete_keyframe_index(index_key: Optional[str]) -> None:
+    """Delete a keyframe index and its sprite sheets from S3."""
+    if not index_key or not s3_client or not AWS_S3_BUCKET:
+        return
+    try:
+        keys = json.loads(_s3_bytes(index_key)).get("sheets", [])
+    except Exception:
+        keys = []
+    for key in keys + [index_key]:
+        try:
+            s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=key)
+        except Exception:
+            pass
+    _index_cache.pop(index_key, None)
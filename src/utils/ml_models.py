@@ -1,4 +1,3 @@
-from openai import OpenAI
 import base64
 from .system_prompt import (
     SYSTEM_PROMPT_CONVERSATIONAL_FORMATTED,
@@ -17,6 +16,8 @@ from controllers.config import logger
 class OpenAIVisionClient:
     def __init__(self):
         """Initialize the OpenAI client with API key from environment variables"""
+        from openai import OpenAI
+
         self.client = OpenAI()
         self.model = "gpt-4o"  # OpenAI's vision model
         self.search_client = WebSearchClient(provider="tavily")  # Web search client
@@ -945,6 +946,8 @@ Now process the ACTUAL conversation provided above (NOT the examples):"""
 class OpenAIQuizClient:
     def __init__(self, model_name: str = "gpt-4o"):
         """Initialize OpenAI client."""
+        from openai import OpenAI
+
         self.client = OpenAI()  # Uses OPENAI_API_KEY from environment
         self.model = model_name
 
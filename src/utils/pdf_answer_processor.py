@@ -17,6 +17,7 @@ from pdf2image import convert_from_path
 from PIL import Image
 
 from controllers.config import logger
+from utils.yolo_registry import detect_diagrams
 
 
 class PDFAnswerProcessor:
@@ -443,26 +444,6 @@ class PDFAnswerProcessor:
         For each answer that has a diagram with page_number, run YOLO on that page
         to detect diagram regions and assign bounding boxes.
         """
-        import tempfile
-
-        try:
-            from ultralytics import YOLO
-        except ImportError:
-            logger.warning("ultralytics not installed, skipping YOLO enrichment")
-            return answers
-
-        # Model path should be configurable
-        model_path = os.getenv(
-            "DIAGRAM_YOLO_MODEL_PATH", "runs/detect/diagram_detector5/weights/best.pt"
-        )
-        confidence = float(os.getenv("DIAGRAM_YOLO_CONFIDENCE", "0.25"))
-
-        try:
-            yolo_model = YOLO(model_path)
-        except Exception as e:
-            logger.warning(f"Failed to load YOLO model: {e}")
-            return answers
-
         # Map: page_number -> [(question_id, answer_dict)]
         page_to_answers: Dict[int, List[tuple]] = {}
 
@@ -479,83 +460,53 @@ class PDFAnswerProcessor:
             logger.info("No diagrams with page numbers found, skipping YOLO enrichment")
             return answers
 
-        logger.info(f"Running YOLO on {len(page_to_answers)} pages with diagrams")
-
-        # For each relevant page, run YOLO and assign bounding boxes
-        for page_number, answer_items in page_to_answers.items():
-            if not (1 <= page_number <= len(pages)):
+        page_numbers = []
+        for page_number in page_to_answers:
+            if 1 <= page_number <= len(pages):
+                page_numbers.append(page_number)
+            else:
                 logger.warning(f"Page {page_number} out of range (1-{len(pages)})")
-                continue
 
-            page_img = pages[page_number - 1]
+        logger.info(f"Running YOLO on {len(page_numbers)} pages with diagrams")
 
-            # Save image to temp file for YOLO
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_img:
-                page_img.save(tmp_img, "JPEG", quality=95)
-                img_path = tmp_img.name
+        # One batched YOLO call over the relevant pages
+        try:
+            page_detections = detect_diagrams([pages[p - 1] for p in page_numbers])
+        except ImportError:
+            logger.warning("ultralytics not installed, skipping YOLO enrichment")
+            return answers
+        except Exception as e:
+            logger.warning(f"YOLO detection failed: {e}")
+            return answers
 
-            try:
-                results = yolo_model(img_path, conf=confidence, verbose=False)
-                detections = []
-
-                if len(results) > 0 and results[0].boxes is not None:
-                    boxes = results[0].boxes
-                    for box in boxes:
-                        coords = box.xyxy[0].cpu().numpy()
-                        x1, y1, x2, y2 = map(int, coords)
-                        conf_score = float(box.conf[0])
-                        cls = int(box.cls[0])
-                        detection = {
-                            "bbox": (x1, y1, x2, y2),
-                            "confidence": conf_score,
-                            "class_id": cls,
-                            "ymin": y1,
-                        }
-                        detections.append(detection)
-
-                # Sort detections by confidence (desc), then ymin (asc)
-                detections.sort(key=lambda d: (-d["confidence"], d["ymin"]))
-
-                n_answers = len(answer_items)
-                n_diagrams = len(detections)
-
-                logger.info(
-                    f"Page {page_number}: {n_diagrams} diagrams detected for {n_answers} answers"
-                )
+        # Assign bounding boxes per page
+        for page_number, detections in zip(page_numbers, page_detections):
+            answer_items = page_to_answers[page_number]
+            n_answers = len(answer_items)
+            n_diagrams = len(detections)
 
-                # Assignment logic (matching assignment_document_parser.py)
-                if n_answers == 1 and n_diagrams > 0:
-                    # Assign highest confidence diagram
-                    det = detections[0]
-                    self._update_answer_with_bounding_box(
-                        answer_items[0][1], det, page_number
-                    )
-                elif n_diagrams >= n_answers:
-                    # Assign first n_answers diagrams sorted by ymin
-                    top_diagrams = sorted(
-                        detections[:n_answers], key=lambda d: d["ymin"]
-                    )
-                    for (q_id, answer_data), det in zip(answer_items, top_diagrams):
-                        self._update_answer_with_bounding_box(
-                            answer_data, det, page_number
-                        )
-                elif n_diagrams < n_answers and n_diagrams > 0:
-                    # Assign all detected diagrams sorted by ymin
-                    top_diagrams = sorted(detections, key=lambda d: d["ymin"])
-                    for (q_id, answer_data), det in zip(answer_items, top_diagrams):
-                        self._update_answer_with_bounding_box(
-                            answer_data, det, page_number
-                        )
-                    # Remaining answers without diagrams keep bounding_box as None
-
-            except Exception as e:
-                logger.error(f"Error running YOLO on page {page_number}: {e}")
-            finally:
-                # Clean up temp image
-                try:
-                    os.unlink(img_path)
-                except Exception:
-                    pass
+            logger.info(
+                f"Page {page_number}: {n_diagrams} diagrams detected for {n_answers} answers"
+            )
+
+            # Assignment logic (matching assignment_document_parser.py)
+            if n_answers == 1 and n_diagrams > 0:
+                # Assign highest confidence diagram
+                det = detections[0]
+                self._update_answer_with_bounding_box(
+                    answer_items[0][1], det, page_number
+                )
+            elif n_diagrams >= n_answers:
+                # Assign first n_answers diagrams sorted by ymin
+                top_diagrams = sorted(detections[:n_answers], key=lambda d: d["ymin"])
+                for (q_id, answer_data), det in zip(answer_items, top_diagrams):
+                    self._update_answer_with_bounding_box(answer_data, det, page_number)
+            elif n_diagrams < n_answers and n_diagrams > 0:
+                # Assign all detected diagrams sorted by ymin
+                top_diagrams = sorted(detections, key=lambda d: d["ymin"])
+                for (q_id, answer_data), det in zip(answer_items, top_diagrams):
+                    self._update_answer_with_bounding_box(answer_data, det, page_number)
+                # Remaining answers without diagrams keep bounding_box as None
 
         return answers
 
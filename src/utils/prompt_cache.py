@@ -0,0 +1,156 @@
+"""
+Prompt prefix caching for batch LLM grading.
+
+Every submission of an assignment is graded with the same instructions,
+questions, reference answers and rubrics; only the student's answers
+differ. The grader puts that assignment portion first, as a stable prefix,
+so providers can serve it from their prompt cache:
+- OpenAI: automatic prefix caching (prompt_cache_key routes a batch's
+  calls to the same cache)
+- Anthropic: a cache_control breakpoint on the prefix block
+- Gemini: an explicit cached content per prefix (GEMINI_CACHE_TTL_SECONDS),
+  falling back to the inline prefix when the cache can't be created
+
+This module holds the provider-independent parts: a per-process memo of
+built prefixes (built once per assignment, not once per submission), the
+Gemini cache registry and normalised token usage, which grading jobs
+return so batch_progress() can report cache hits per batch.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from controllers.config import logger
+
+GRADING_PROMPT_CACHE = os.getenv("GRADING_PROMPT_CACHE", "true").lower() != "false"
+GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600"))
+# Gemini rejects explicit caches below this many tokens
+GEMINI_CACHE_MIN_TOKENS = 1024
+PREFIX_MEMO_SIZE = 64  # Assignment prefixes kept per process
+
+USAGE_KEYS = ("llm_calls", "input_tokens", "cached_input_tokens", "cache_write_tokens")
+
+_prefixes: "OrderedDict[str, str]" = OrderedDict()
+_gemini_caches: Dict[str, Tuple[Optional[str], float]] = {}
+_lock = threading.Lock()
+_gemini_lock = threading.Lock()  # Held across cache creation calls
+
+
+def prefix_key(*parts: Any) -> str:
+    """Stable sha256 hex digest of JSON-serialisable prompt inputs."""
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def memoized_prefix(key: str, build: Callable[[], str]) -> str:
+    """
+    Prompt prefix for key, built on first use and kept in a small LRU.
+
+    Args:
+        key: prefix_key() of everything the prefix depends on
+        build: Builds the prefix text on a miss
+    """
+    with _lock:
+        prefix = _prefixes.get(key)
+        if prefix is not None:
+            _prefixes.move_to_end(key)
+            return prefix
+    prefix = build()
+    with _lock:
+        _prefixes[key] = prefix
+        while len(_prefixes) > PREFIX_MEMO_SIZE:
+            _prefixes.popitem(last=False)
+    return prefix
+
+
+def gemini_cached_content(
+    key: str, estimated_tokens: int, create: Callable[[int], str]
+) -> Optional[str]:
+    """
+    Name of the Gemini cached content for a prefix, creating it if needed.
+
+    Prefixes below GEMINI_CACHE_MIN_TOKENS aren't cached. Failures are
+    remembered for the TTL, so a batch doesn't retry creation for every
+    submission.
+
+    Args:
+        key: Prefix key (include the model: caches are per model)
+        estimated_tokens: Approximate prefix size
+        create: Creates the cache with the given TTL seconds, returns its name
+
+    Returns:
+        Cache name, or None to send the prefix inline
+    """
+    if estimated_tokens < GEMINI_CACHE_MIN_TOKENS:
+        return None
+    with _gemini_lock:
+        now = time.monotonic()
+        name, expires = _gemini_caches.get(key, (None, 0.0))
+        if expires > now:
+            return name
+        try:
+            name = create(GEMINI_CACHE_TTL_SECONDS)
+            logger.info(f"Created Gemini prompt cache {name}")
+        except Exception as e:
+            logger.warning(f"Gemini prompt cache unavailable, sending inline: {e}")
+            name = None
+        # Stop using a cache a minute before the provider expires it
+        _gemini_caches[key] = (name, now + max(0, GEMINI_CACHE_TTL_SECONDS - 60))
+        return name
+
+
+def _attr(obj: Any, *path: str) -> int:
+    for name in path:
+        obj = getattr(obj, name, None)
+        if obj is None:
+            return 0
+    return int(obj or 0)
+
+
+def response_usage(provider: str, response: Any) -> Dict[str, int]:
+    """
+    Normalised token usage of one LLM response.
+
+    input_tokens counts the whole prompt, cached part included, so
+    cached_input_tokens / input_tokens is the cache hit rate.
+    """
+    if provider == "openai":
+        total = _attr(response, "usage", "prompt_tokens")
+        cached = _attr(response, "usage", "prompt_tokens_details", "cached_tokens")
+        written = 0
+    elif provider == "anthropic":
+        cached = _attr(response, "usage", "cache_read_input_tokens")
+        written = _attr(response, "usage", "cache_creation_input_tokens")
+        # Anthropic's input_tokens excludes cache reads and writes
+        total = _attr(response, "usage", "input_tokens") + cached + written
+    elif provider == "gemini":
+        total = _attr(response, "usage_metadata", "prompt_token_count")
+        cached = _attr(response, "usage_metadata", "cached_content_token_count")
+        written = 0
+    else:
+        total = cached = written = 0
+    return {
+        "llm_calls": 1,
+        "input_tokens": total,
+        "cached_input_tokens": cached,
+        "cache_write_tokens": written,
+    }
+
+
+def add_usage(total: Dict[str, int], usage: Dict[str, int]) -> Dict[str, int]:
+    """Add usage into total (in place) and return total."""
+    for key in USAGE_KEYS:
+        total[key] = total.get(key, 0) + int(usage.get(key, 0) or 0)
+    return total
+
+
+def cache_hit_rate(usage: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Share of input tokens served from the prompt cache, or None."""
+    if not usage or not usage.get("input_tokens"):
+        return None
+    return round(usage.get("cached_input_tokens", 0) / usage["input_tokens"], 4)
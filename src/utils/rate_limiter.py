@@ -0,0 +1,117 @@
+"""
+Per-provider token-bucket rate limiting for LLM calls.
+
+Batch grading runs many LLM calls at once; without a limit a large batch
+trips the provider's requests-per-minute / tokens-per-minute quota and
+every call starts failing with 429s. Each provider gets one process-wide
+limiter with two buckets:
+- requests: LLM_RPM_<PROVIDER> calls per minute
+- tokens:   LLM_TPM_<PROVIDER> estimated input tokens per minute (0 = off)
+
+Callers block in acquire() until both buckets have room. Limits apply per
+process, so with several job workers divide the provider quota between
+them.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from controllers.config import logger
+
+DEFAULT_RPM = {"openai": 500, "anthropic": 50, "gemini": 1000}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilling at rate tokens per second.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst (default: one second's worth, at least 1)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Take amount tokens if available.
+
+        Returns:
+            0.0 on success, else seconds until amount will be available
+        """
+        # A request larger than the bucket would never fit; let it drain
+        # the bucket fully instead
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0):
+        """Block until amount tokens are taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class ProviderRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one provider.
+
+    Args:
+        provider: Provider name (for logging)
+        rpm: Requests per minute (0 = unlimited)
+        tpm: Estimated input tokens per minute (0 = unlimited)
+    """
+
+    def __init__(self, provider: str, rpm: int, tpm: int = 0):
+        self.provider = provider
+        # Capacity of a few seconds' quota: smooths bursts of parallel calls
+        # without letting a cold start fire a whole minute's worth at once
+        self.requests = (
+            TokenBucket(rpm / 60, capacity=max(1, rpm / 20)) if rpm else None
+        )
+        self.tokens = TokenBucket(tpm / 60, capacity=max(1, tpm / 20)) if tpm else None
+
+    def acquire(self, tokens: int = 0):
+        """Block until a request of ~tokens input tokens may be sent."""
+        start = time.monotonic()
+        if self.requests is not None:
+            self.requests.acquire()
+        if self.tokens is not None and tokens:
+            self.tokens.acquire(tokens)
+        waited = time.monotonic() - start
+        if waited > 1.0:
+            logger.info(f"Rate limited {self.provider} call for {waited:.1f}s")
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_provider_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Process-wide limiter for provider, configured from the environment."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            name = provider.upper()
+            rpm = int(os.getenv(f"LLM_RPM_{name}", str(DEFAULT_RPM.get(provider, 500))))
+            tpm = int(os.getenv(f"LLM_TPM_{name}", "0"))
+            limiter = ProviderRateLimiter(provider, rpm, tpm)
+            _limiters[provider] = limiter
+        return limiter
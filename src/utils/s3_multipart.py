@@ -0,0 +1,343 @@
+"""
+Streaming video uploads into S3 multipart uploads.
+
+The upload request body is parsed as it arrives (python-multipart, the
+parser Starlette uses for forms) instead of being spooled to a temporary
+file first, and the file field is written to S3 in S3_MULTIPART_PART_SIZE
+parts. Memory per upload is bounded by one part, nothing is written to the
+API host's disk, and the SHA-256 of the content is computed on the way.
+
+Browsers can skip the API host altogether: start_presigned_upload creates
+the multipart upload and returns a presigned upload_part URL per part, the
+browser PUTs the parts straight to S3, and complete_presigned_upload
+stitches them together.
+
+Uploads abandoned without an abort (a crashed API process, a closed browser
+tab) keep their parts in S3 until aborted; scripts/configure_s3_lifecycle.py
+adds the bucket lifecycle rule that aborts them after a day, and
+scripts/fix_s3_cors.py allows the browser's part PUTs.
+"""
+
+import hashlib
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from controllers.config import AWS_S3_BUCKET, logger, s3_client
+
+# S3 requires every part but the last to be at least 5 MiB, and allows at
+# most 10,000 parts per upload
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+S3_MULTIPART_PART_SIZE = max(
+    S3_MIN_PART_SIZE,
+    int(os.getenv("S3_MULTIPART_PART_SIZE_MB", "16")) * 1024 * 1024,
+)
+S3_PRESIGNED_PART_EXPIRES_SECONDS = int(
+    os.getenv("S3_PRESIGNED_PART_EXPIRES_SECONDS", str(6 * 60 * 60))
+)
+
+
+class MultipartUpload:
+    """
+    Writes a stream of bytes to one S3 object as a multipart upload.
+
+    write() buffers until a full part is available and uploads it, so at
+    most one part is held in memory. complete() uploads the remainder and
+    finishes the upload; abort() discards the parts uploaded so far.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        content_type: Optional[str] = None,
+        part_size: Optional[int] = None,
+        client: Any = None,
+        bucket: Optional[str] = None,
+    ):
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(part_size or S3_MULTIPART_PART_SIZE, S3_MIN_PART_SIZE)
+        self.client = client or s3_client
+        self.bucket = bucket or AWS_S3_BUCKET
+        self.upload_id: Optional[str] = None
+        self.parts: List[Dict[str, Any]] = []
+        self.size = 0
+        self._buffer = bytearray()
+        self._hash = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def start(self) -> None:
+        params = {"Bucket": self.bucket, "Key": self.key, "ACL": "private"}
+        if self.content_type:
+            params["ContentType"] = self.content_type
+        self.upload_id = self.client.create_multipart_upload(**params)["UploadId"]
+
+    def write(self, data: bytes) -> None:
+        if self.upload_id is None:
+            self.start()
+        self._hash.update(data)
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+    def _upload_part(self, body: bytes) -> None:
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def complete(self) -> None:
+        if self.upload_id is None:
+            self.start()
+        if self._buffer or not self.parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        if self.upload_id is None:
+            return
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload of {self.key}: {e}")
+
+
+@dataclass
+class StreamedUpload:
+    key: str
+    filename: str
+    size: int
+    sha256: str
+
+
+class _FormFileReader:
+    """python-multipart callbacks collecting the data of one file field."""
+
+    def __init__(self, field: str):
+        self.field = field.encode()
+        self.filename: Optional[str] = None
+        self.pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+        # Only the first part of the field carrying a filename is the file
+        if (
+            self.filename is None
+            and options.get(b"name") == self.field
+            and b"filename" in options
+        ):
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(bytes(data[start:end]))
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+
+async def stream_form_file_to_s3(
+    request: Request,
+    field: str,
+    key_for_filename: Callable[[str], str],
+    content_type: Optional[str] = None,
+) -> StreamedUpload:
+    """
+    Stream the file in a multipart/form-data request field to S3.
+
+    Args:
+        request: Request whose body hasn't been read yet
+        field: Form field holding the file
+        key_for_filename: Maps the client's filename to the S3 key
+        content_type: ContentType of the S3 object
+
+    Raises:
+        HTTPException: 400 if the body isn't multipart/form-data or has no
+            (or an empty) file in field; S3 errors and client disconnects
+            are re-raised after the multipart upload is aborted
+    """
+    mime, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=400, detail="Expected a multipart/form-data body"
+        )
+
+    reader = _FormFileReader(field)
+    parser = MultipartParser(boundary, reader.callbacks())
+    upload: Optional[MultipartUpload] = None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if reader.filename is not None and upload is None:
+                upload = MultipartUpload(
+                    key_for_filename(reader.filename), content_type=content_type
+                )
+            if reader.pending:
+                data = b"".join(reader.pending)
+                reader.pending.clear()
+                # Blocks on S3 once per full part, which also holds back
+                # reading the request until the part is stored
+                await run_in_threadpool(upload.write, data)
+        parser.finalize()
+
+        if upload is None:
+            raise HTTPException(
+                status_code=400, detail=f"No file in form field '{field}'"
+            )
+        if upload.size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        await run_in_threadpool(upload.complete)
+    except Exception as e:
+        if upload is not None:
+            await run_in_threadpool(upload.abort)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, FormParserError):
+            raise HTTPException(status_code=400, detail=f"Malformed form body: {e}")
+        raise
+
+    logger.info(f"Streamed {upload.size} bytes to s3://{upload.bucket}/{upload.key}")
+    return StreamedUpload(
+        key=upload.key,
+        filename=reader.filename,
+        size=upload.size,
+        sha256=upload.sha256,
+    )
+
+
+def presigned_part_size(size: int) -> int:
+    """Part size for a browser upload of size bytes within S3_MAX_PARTS."""
+    return max(S3_MULTIPART_PART_SIZE, math.ceil(size / S3_MAX_PARTS))
+
+
+def start_presigned_upload(
+    key: str, size: int, content_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Create a multipart upload for a browser to PUT parts to directly.
+
+    Returns:
+        {"key", "upload_id", "part_size", "parts": [{"part_number", "url"}]};
+        part n holds bytes [(n - 1) * part_size, n * part_size) of the file
+        and the ETag header of each PUT response goes to
+        complete_presigned_upload
+    """
+    part_size = presigned_part_size(size)
+    params = {"Bucket": AWS_S3_BUCKET, "Key": key, "ACL": "private"}
+    if content_type:
+        params["ContentType"] = content_type
+    upload_id = s3_client.create_multipart_upload(**params)["UploadId"]
+    parts = [
+        {
+            "part_number": number,
+            "url": s3_client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": AWS_S3_BUCKET,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": number,
+                },
+                ExpiresIn=S3_PRESIGNED_PART_EXPIRES_SECONDS,
+            ),
+        }
+        for number in range(1, max(1, math.ceil(size / part_size)) + 1)
+    ]
+    return {"key": key, "upload_id": upload_id, "part_size": part_size, "parts": parts}
+
+
+def complete_presigned_upload(
+    key: str, upload_id: str, parts: List[Dict[str, Any]]
+) -> int:
+    """
+    Finish a browser multipart upload.
+
+    Args:
+        parts: [{"part_number", "etag"}] as returned by the part PUTs
+
+    Returns:
+        Size of the stored object in bytes
+    """
+    s3_client.complete_multipart_upload(
+        Bucket=AWS_S3_BUCKET,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": sorted(
+                (
+                    {"PartNumber": int(part["part_number"]), "ETag": part["etag"]}
+                    for part in parts
+                ),
+                key=lambda part: part["PartNumber"],
+            )
+        },
+    )
+    return s3_client.head_object(Bucket=AWS_S3_BUCKET, Key=key)["ContentLength"]
+
+
+def abort_presigned_upload(key: str, upload_id: str) -> None:
+    s3_client.abort_multipart_upload(Bucket=AWS_S3_BUCKET, Key=key, UploadId=upload_id)
@@ -0,0 +1,221 @@
+"""
+Semantic query cache: reuse retrieval results for near-duplicate questions.
+
+The exact-string RAG cache misses "what is eigenvalue" vs "what's an
+eigenvalue?". For each video/material we keep the most recent queries'
+embeddings next to their results, and answer a new query from cache when
+its cosine similarity to a stored query clears a threshold — skipping the
+pgvector / hybrid retrieval entirely.
+
+Each stored query is its own entry in the two-tier cache (L1 + Redis),
+listed in a capped per-document index (a Redis sorted set), so a store
+writes one entry and can't overwrite another worker's. Index and entries
+sit under the document's versioned namespace, so re-chunking invalidates
+them along with everything else for that document.
+"""
+
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from controllers.config import logger
+from utils.cache import (
+    cache_delete,
+    cache_get_many,
+    cache_set,
+    index_add,
+    index_members,
+    index_remove,
+    namespaced_key,
+)
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "64"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "1800"))
+
+
+def _normalize(embedding) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if not vector.size or norm == 0.0:
+        return None
+    return vector / norm
+
+
+def _strip_embeddings(results: Any) -> Any:
+    """Drop per-chunk embeddings; callers only read text/metadata."""
+    if isinstance(results, list):
+        return [
+            {k: v for k, v in r.items() if k != "embedding"}
+            if isinstance(r, dict)
+            else r
+            for r in results
+        ]
+    return results
+
+
+class SemanticCache:
+    """
+    Per-document cache of (query embedding -> value) answered by similarity.
+
+    Each namespace holds at most max_entries recent queries; the oldest is
+    evicted first.
+
+    Args:
+        name: Cache name (key prefix and metrics label)
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Queries kept per video/material
+        ttl: Seconds an entry (and its namespace's index) lives after a store
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: int = SEMANTIC_CACHE_TTL_SECONDS,
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _key(self, kind: str, ident: str, variant: str) -> str:
+        """Index key; entry keys are "<index key>:<entry id>"."""
+        return namespaced_key(kind, ident, "semcache", self.name, variant)
+
+    def _entries(self, index_key: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(entry id, entry) pairs still cached, oldest first."""
+        ids = index_members(index_key)
+        entries = cache_get_many([f"{index_key}:{entry_id}" for entry_id in ids])
+        return [(i, entry) for i, entry in zip(ids, entries) if entry is not None]
+
+    def _best_match(self, entries: List[Tuple[str, Dict[str, Any]]], vector):
+        """(entry id, entry, similarity) of the closest stored query."""
+        if not entries or vector is None:
+            return None, None, 0.0
+        similarities = np.stack([entry["e"] for _, entry in entries]) @ vector
+        best = int(np.argmax(similarities))
+        entry_id, entry = entries[best]
+        return entry_id, entry, float(similarities[best])
+
+    def lookup(
+        self, kind: str, ident: str, query_embedding, variant: str = ""
+    ) -> Optional[Any]:
+        """
+        Cached value for the most similar stored query, or None.
+
+        Args:
+            kind: Namespace kind ("video" or "material")
+            ident: Video or material id
+            query_embedding: Embedding of the incoming query
+            variant: Extra key part for values that depend on parameters
+                (e.g. top_k), so they never answer one another
+        """
+        vector = _normalize(query_embedding)
+        entries = (
+            self._entries(self._key(kind, ident, variant)) if vector is not None else []
+        )
+
+        _, match, similarity = self._best_match(entries, vector)
+        hit = match is not None and similarity >= self.threshold
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not hit:
+            return None
+        logger.info(
+            f"Semantic cache HIT ({self.name}) for {kind} {ident}: "
+            f"similarity {similarity:.3f} to '{match['q'][:50]}'"
+        )
+        return match["r"]
+
+    def store(
+        self,
+        kind: str,
+        ident: str,
+        query: str,
+        query_embedding,
+        value: Any,
+        variant: str = "",
+    ):
+        """Remember value for this query, evicting the oldest over budget."""
+        vector = _normalize(query_embedding)
+        if vector is None:
+            return
+
+        index_key = self._key(kind, ident, variant)
+        # A near-identical query replaces its older entry instead of
+        # taking a second slot
+        match_id, _, similarity = self._best_match(self._entries(index_key), vector)
+        if match_id is not None and similarity >= self.threshold:
+            index_remove(index_key, [match_id])
+            cache_delete(f"{index_key}:{match_id}")
+
+        entry_id = uuid.uuid4().hex[:16]
+        cache_set(
+            f"{index_key}:{entry_id}",
+            {"q": query, "e": vector, "r": _strip_embeddings(value)},
+            self.ttl,
+        )
+        evicted = index_add(index_key, entry_id, self.ttl, self.max_entries)
+        for old_id in evicted:
+            cache_delete(f"{index_key}:{old_id}")
+
+        with self._lock:
+            self.stores += 1
+            self.evictions += len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring (this worker only)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "threshold": self.threshold,
+                "max_entries": self.max_entries,
+            }
+
+
+_semantic_caches: Dict[str, SemanticCache] = {}
+_semantic_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(name: str, **kwargs) -> SemanticCache:
+    """
+    Get (or create on first call) the process-wide SemanticCache called
+    name. kwargs only apply when the cache is created.
+    """
+    with _semantic_caches_lock:
+        cache = _semantic_caches.get(name)
+        if cache is None:
+            cache = SemanticCache(name, **kwargs)
+            _semantic_caches[name] = cache
+        return cache
+
+
+def semantic_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every semantic cache, keyed by name."""
+    with _semantic_caches_lock:
+        caches = list(_semantic_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+# Retrieval results shared by video chat and material chat
+rag_semantic_cache = get_semantic_cache("rag")
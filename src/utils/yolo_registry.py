@@ -0,0 +1,149 @@
+"""
+Process-wide registry of the YOLO diagram detectors.
+
+Each model file is loaded once per process and shared by every request and
+grading thread; ultralytics itself is imported on first use, keeping it out
+of API startup. detect_diagrams runs one batched predict over in-memory page
+images (no temp files) and returns each page's detections in the shape the
+diagram assignment code expects.
+
+With DIAGRAM_YOLO_WARMUP=true the API loads the default model in the
+background at startup and runs a dummy inference, so the first upload with
+diagrams doesn't pay for model loading and CUDA/graph initialisation.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from controllers.config import logger
+
+DIAGRAM_YOLO_MODEL_PATH = os.getenv(
+    "DIAGRAM_YOLO_MODEL_PATH", "runs/detect/diagram_detector5/weights/best.pt"
+)
+DIAGRAM_YOLO_CONFIDENCE = float(os.getenv("DIAGRAM_YOLO_CONFIDENCE", "0.25"))
+DIAGRAM_YOLO_WARMUP = os.getenv("DIAGRAM_YOLO_WARMUP", "false").lower() == "true"
+# Pages per predict call; bounds memory for long documents
+DIAGRAM_YOLO_BATCH_SIZE = int(os.getenv("DIAGRAM_YOLO_BATCH_SIZE", "16"))
+WARMUP_IMAGE_SIZE = 640
+
+_models: Dict[str, Any] = {}
+# ultralytics predictors keep per-call state, so inference on a shared model
+# is serialized per model file
+_predict_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_yolo_model(model_path: Optional[str] = None, warmup: bool = False) -> Any:
+    """
+    Return the YOLO model for model_path, loading it on first use.
+
+    Args:
+        model_path: Weights file (default: DIAGRAM_YOLO_MODEL_PATH)
+        warmup: Run a dummy inference right after loading
+
+    Raises:
+        ImportError: ultralytics isn't installed
+        Exception: The model file couldn't be loaded (not cached, so a
+            later call retries)
+    """
+    model_path = model_path or DIAGRAM_YOLO_MODEL_PATH
+    model = _models.get(model_path)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        model = _models.get(model_path)
+        if model is None:
+            from ultralytics import YOLO
+
+            model = YOLO(model_path)
+            logger.info(f"Loaded YOLO model {model_path}")
+            if warmup:
+                blank = np.zeros((WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), np.uint8)
+                model.predict([blank], verbose=False)
+                logger.info(f"Warmed up YOLO model {model_path}")
+            _predict_locks[model_path] = threading.Lock()
+            _models[model_path] = model
+    return model
+
+
+def warm_up_in_background(model_path: Optional[str] = None) -> threading.Thread:
+    """Load and warm up a model on a daemon thread (used at API startup)."""
+
+    def load():
+        try:
+            get_yolo_model(model_path, warmup=True)
+        except Exception as e:
+            logger.warning(f"YOLO warmup failed: {e}")
+
+    thread = threading.Thread(target=load, name="yolo-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _to_bgr_array(image: Image.Image) -> np.ndarray:
+    """PIL page image -> contiguous HWC uint8 BGR array, as ultralytics expects."""
+    rgb = np.asarray(image.convert("RGB"))
+    return np.ascontiguousarray(rgb[:, :, ::-1])
+
+
+def _detections(result: Any) -> List[Dict[str, Any]]:
+    """Boxes of one page's result, by confidence (desc) then ymin (asc)."""
+    detections = []
+    if result is not None and result.boxes is not None:
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+            detections.append(
+                {
+                    "bbox": (x1, y1, x2, y2),
+                    "confidence": float(box.conf[0]),
+                    "class_id": int(box.cls[0]),
+                    "ymin": y1,
+                }
+            )
+    detections.sort(key=lambda d: (-d["confidence"], d["ymin"]))
+    return detections
+
+
+def detect_diagrams(
+    images: Sequence[Image.Image],
+    confidence: Optional[float] = None,
+    model_path: Optional[str] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Detect diagram regions on page images in batched predict calls.
+
+    Args:
+        images: Page images
+        confidence: Minimum box confidence (default: DIAGRAM_YOLO_CONFIDENCE)
+        model_path: Weights file (default: DIAGRAM_YOLO_MODEL_PATH)
+
+    Returns:
+        Per image, a list of {"bbox": (x1, y1, x2, y2), "confidence",
+        "class_id", "ymin"} sorted by confidence (desc), then ymin (asc)
+    """
+    if not images:
+        return []
+    model_path = model_path or DIAGRAM_YOLO_MODEL_PATH
+    model = get_yolo_model(model_path, warmup=DIAGRAM_YOLO_WARMUP)
+    if confidence is None:
+        confidence = DIAGRAM_YOLO_CONFIDENCE
+
+    detections: List[List[Dict[str, Any]]] = []
+    for start in range(0, len(images), DIAGRAM_YOLO_BATCH_SIZE):
+        arrays = [
+            _to_bgr_array(image)
+            for image in images[start : start + DIAGRAM_YOLO_BATCH_SIZE]
+        ]
+        with _predict_locks[model_path]:
+            results = model.predict(arrays, conf=confidence, verbose=False)
+        results = list(results)
+        detections.extend(
+            _detections(results[i] if i < len(results) else None)
+            for i in range(len(arrays))
+        )
+    return detections
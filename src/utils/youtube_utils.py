@@ -2,50 +2,20 @@ import os
 import re
 from urllib.parse import quote
 import time
-import yt_dlp
-import cv2
-from youtube_transcript_api import YouTubeTranscriptApi
 import http.client
 import requests
 from fastapi import HTTPException
 from controllers.config import video_path, logger
+from utils.frame_service import FRAME_CACHE
 from datetime import datetime, timedelta
 import threading
 
-# Video cache: {video_id: {'path': temp_file_path, 'last_access': datetime}}
-VIDEO_CACHE = {}
-CACHE_TTL_MINUTES = 30
-CACHE_LOCK = threading.Lock()
-
 
 def cleanup_expired_cache():
-    """Remove cached video files that haven't been accessed in 30 minutes"""
-    with CACHE_LOCK:
-        now = datetime.now()
-        expired_videos = []
-
-        for video_id, cache_data in VIDEO_CACHE.items():
-            last_access = cache_data["last_access"]
-            age_minutes = (now - last_access).total_seconds() / 60
-
-            if age_minutes >= CACHE_TTL_MINUTES:
-                expired_videos.append(video_id)
-
-        # Remove expired entries and delete files
-        for video_id in expired_videos:
-            cache_data = VIDEO_CACHE.pop(video_id)
-            temp_path = cache_data["path"]
-
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                    logger.info(
-                        f"🗑️ Cache cleanup: Removed expired video cache for {video_id} (age: {age_minutes:.1f} min)"
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to remove cached file {temp_path}: {e}")
-            else:
-                logger.warning(f"Cached file already removed: {temp_path}")
+    """Drop cached video frames that haven't been accessed in 30 minutes"""
+    removed = FRAME_CACHE.purge_expired()
+    if removed:
+        logger.info(f"🗑️ Cache cleanup: Removed {removed} expired frame(s)")
 
 
 def start_cache_cleanup_thread():
@@ -569,6 +539,8 @@ def download_video1(youtube_url, output_path=".", debug=False):
     }
 
     try:
+        import yt_dlp
+
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             log(f"Downloading: {youtube_url}")
             ydl.download([youtube_url])
@@ -622,6 +594,8 @@ def _fallback_youtube_transcript_api(video_id):
     Tries English first, then any available language.
     NOTE: This does NOT work on cloud servers (AWS/GCP/Azure) due to YouTube IP blocking."""
     try:
+        from youtube_transcript_api import YouTubeTranscriptApi
+
         ytt = YouTubeTranscriptApi()
         # Try English first
         try:
@@ -906,6 +880,8 @@ def download_transcript(video_url_or_id):
             video_id = video_url_or_id
 
         # Fetch transcript
+        from youtube_transcript_api import YouTubeTranscriptApi
+
         transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=["en"])
         transcript_text = " ".join([item["text"] for item in transcript])
         # print(transcript_text)
@@ -913,181 +889,3 @@ def download_transcript(video_url_or_id):
     except Exception as e:
         logger.error(f"Error fetching transcript: {e}")
         return None
-
-
-def grab_youtube_frame(video_path_func, timestamp, output_file="extracted_frame.jpg"):
-    """
-    Extract a frame from a YouTube video at a specific timestamp.
-
-    Args:
-        video_path_func (str): The path or URL to the video file
-        timestamp (float): Time in seconds where you want to capture the frame
-        output_file (str): Path to save the extracted frame
-
-    Returns:
-        tuple: (str, numpy.ndarray) Path to the saved frame image and the frame itself
-    """
-    frame = None
-    video = None
-    temp_file_created = False
-
-    try:
-        video_path = video_path_func
-        video_id = None
-
-        # DEBUG: Log what type of path we received
-        if video_path.startswith("http://") or video_path.startswith("https://"):
-            logger.info(f"🔴 RECEIVED S3 URL: {video_path[:100]}...")
-
-            # Try to extract video_id from the S3 URL (format: .../video_id.mp4)
-            try:
-                # Extract filename from URL
-                filename = video_path.split("/")[-1].split("?")[
-                    0
-                ]  # Remove query params
-                video_id = filename.replace(".mp4", "").replace(".webm", "")
-                logger.info(f"� Extracted video_id: {video_id}")
-            except:
-                logger.warning("Could not extract video_id from S3 URL")
-
-            # Check if we have this video cached
-            with CACHE_LOCK:
-                if video_id and video_id in VIDEO_CACHE:
-                    cache_data = VIDEO_CACHE[video_id]
-                    cached_path = cache_data["path"]
-
-                    # Verify the cached file still exists
-                    if os.path.exists(cached_path):
-                        age_minutes = (
-                            datetime.now() - cache_data["last_access"]
-                        ).total_seconds() / 60
-                        logger.info(
-                            f"✨ Using CACHED video! (age: {age_minutes:.1f} min, path: {cached_path})"
-                        )
-
-                        # Update last access time
-                        VIDEO_CACHE[video_id]["last_access"] = datetime.now()
-                        video_path = cached_path
-                    else:
-                        logger.warning(
-                            f"⚠️ Cached file no longer exists, removing from cache"
-                        )
-                        VIDEO_CACHE.pop(video_id, None)
-                        video_id = None  # Force re-download
-
-            # If not in cache or cache invalid, download it
-            if not video_id or video_id not in VIDEO_CACHE:
-                logger.info(
-                    f"📥 Video not in cache, downloading temporarily for frame extraction..."
-                )
-
-                # Download the video temporarily
-                import tempfile
-
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-                temp_path = temp_file.name
-                temp_file.close()
-                temp_file_created = True
-
-                # Download from S3 URL
-                download_start = time.time()
-                response = requests.get(video_path, stream=True, timeout=60)
-                if response.status_code == 200:
-                    total_size = int(response.headers.get("content-length", 0))
-                    downloaded = 0
-
-                    with open(temp_path, "wb") as f:
-                        for chunk in response.iter_content(chunk_size=1024 * 1024):
-                            if chunk:
-                                f.write(chunk)
-                                downloaded += len(chunk)
-
-                    download_time = time.time() - download_start
-                    size_mb = total_size / (1024 * 1024)
-                    logger.info(
-                        f"✅ Video downloaded in {download_time:.1f}s ({size_mb:.1f} MB) to: {temp_path}"
-                    )
-
-                    # Add to cache
-                    if video_id:
-                        with CACHE_LOCK:
-                            VIDEO_CACHE[video_id] = {
-                                "path": temp_path,
-                                "last_access": datetime.now(),
-                            }
-                        logger.info(
-                            f"💾 Video cached for video_id: {video_id} (will auto-delete after {CACHE_TTL_MINUTES} min of inactivity)"
-                        )
-                        temp_file_created = False  # Don't delete in finally block
-
-                    video_path = temp_path
-                else:
-                    raise Exception(
-                        f"Failed to download video from S3: {response.status_code}"
-                    )
-
-        elif video_path.startswith("/"):
-            logger.info(f"🟢 RECEIVED LOCAL PATH: {video_path}")
-            logger.info(f"🟢 File exists: {os.path.exists(video_path)}")
-        else:
-            logger.info(f"⚠️ UNKNOWN PATH TYPE: {video_path}")
-
-        # Open the video with OpenCV
-        video = cv2.VideoCapture(video_path)
-
-        if not video.isOpened():
-            raise Exception(f"Failed to open video file: {video_path}")
-
-        # Get video properties
-        fps = video.get(cv2.CAP_PROP_FPS)
-        logger.info(f"Video FPS: {fps}")
-
-        if fps == 0 or fps is None:
-            raise Exception(
-                "Invalid FPS value, video file may be corrupted or inaccessible"
-            )
-
-        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps
-
-        logger.info(f"Video duration: {duration:.2f} seconds")
-        logger.info(f"FPS: {fps}")
-
-        # Calculate frame number for the given timestamp
-        frame_number = int(timestamp * fps)
-
-        # Check if timestamp is within video duration
-        if timestamp > duration:
-            raise ValueError(
-                f"Timestamp {timestamp} exceeds video duration {duration:.2f}"
-            )
-
-        # Seek to the specified frame
-        video.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-
-        # Read the frame
-        ret, frame = video.read()
-
-        if ret:
-            # Save the frame
-            cv2.imwrite(output_file, frame)
-            logger.info(f"Frame saved to: {output_file}")
-            return output_file, frame
-        else:
-            raise RuntimeError(f"Failed to extract frame at timestamp {timestamp}")
-
-    except Exception as e:
-        logger.error(f"Error extracting frame: {str(e)}")
-        return None, None
-    finally:
-        if video is not None:
-            video.release()
-        # Only clean up temporary file if it was NOT added to cache
-        if temp_file_created and "temp_path" in locals() and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-                logger.info(
-                    f"🗑️ Temporary (non-cached) video file removed: {temp_path}"
-                )
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file: {e}")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Background job worker (see services/job_queue.py).
+
+Runs queued transcription, formatting, chunking, summary and grading jobs
+from the background_jobs table. Start as many as needed, on any node that
+has the app's environment; they coordinate through Postgres.
+
+Usage (from the repo root with the venv active):
+    cd src && python worker.py [options]
+
+Options:
+    --kinds LIST    Comma-separated job kinds to run (default: all), e.g.
+                    --kinds grade to run a grading-only worker
+    --status        Print job counts by kind and status and exit
+
+Per-kind concurrency comes from JOB_CONCURRENCY_<KIND>. Set
+JOB_WORKER_IN_PROCESS=false on the API nodes once dedicated workers run.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import signal
+import sys
+
+from controllers.config import logger
+from services.job_queue import JOB_KINDS, JobWorker, job_counts
+from utils.db import SessionLocal
+
+
+def print_status() -> None:
+    db = SessionLocal()
+    try:
+        counts = job_counts(db)
+    finally:
+        db.close()
+    if not counts:
+        print("No jobs")
+    for kind, by_status in sorted(counts.items()):
+        print(
+            f"{kind:<12} "
+            + "  ".join(
+                f"{status}={count}" for status, count in sorted(by_status.items())
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kinds", type=str, default=None)
+    parser.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        return
+
+    kinds = [k for k in (args.kinds or "").split(",") if k] or None
+    unknown = set(kinds or []) - set(JOB_KINDS)
+    if unknown:
+        parser.error(f"Unknown job kinds: {', '.join(sorted(unknown))}")
+
+    worker = JobWorker(kinds)
+
+    def shutdown(signum, frame):
+        logger.info("Stopping worker, waiting for running jobs...")
+        worker.stop(wait=False)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())